@@ -31,9 +31,8 @@ export async function getAgentStatus() {
 
   const [recentActivity] = await sql`
     SELECT
-      MAX(created_at) as last_memory_created,
-      MAX(last_accessed) as last_memory_accessed
-    FROM memories
+      (SELECT MAX(created_at) FROM memories) as last_memory_created,
+      (SELECT MAX(last_accessed) FROM memory_stats) as last_memory_accessed
   `;
 
   return {
@@ -468,6 +467,8 @@ export async function getRecentEpisodicMemories(
   const memories = await sql`
     SELECT
       m.*,
+      ms.access_count,
+      ms.last_accessed,
       em.action_taken,
       em.context,
       em.result,
@@ -476,6 +477,7 @@ export async function getRecentEpisodicMemories(
       em.event_time
     FROM memories m
     JOIN episodic_memories em ON m.id = em.memory_id
+    LEFT JOIN memory_stats ms ON ms.memory_id = m.id
     WHERE m.status = 'active'
     ORDER BY m.created_at DESC
     LIMIT ${limit}
@@ -491,6 +493,8 @@ export async function getSemanticMemories(
   const memories = await sql`
     SELECT
       m.*,
+      ms.access_count,
+      ms.last_accessed,
       sm.confidence,
       sm.last_validated,
       sm.source_references,
@@ -499,6 +503,7 @@ export async function getSemanticMemories(
       sm.related_concepts
     FROM memories m
     JOIN semantic_memories sm ON m.id = sm.memory_id
+    LEFT JOIN memory_stats ms ON ms.memory_id = m.id
     WHERE m.status = 'active'
     ORDER BY m.importance DESC, m.created_at DESC
     LIMIT ${limit}
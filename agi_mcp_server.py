@@ -27,6 +27,7 @@ from uuid import UUID
 from dotenv import load_dotenv
 
 from cognitive_memory_api import (
+    RECALL_MODES,
     CognitiveMemory,
     GoalPriority,
     MemoryInput,
@@ -94,6 +95,7 @@ async def _dispatch_tool(
             include_emotional_state=bool(args.get("include_emotional_state", True)),
             include_goals=bool(args.get("include_goals", False)),
             include_drives=bool(args.get("include_drives", True)),
+            mode=args.get("mode"),
         )
 
     if name == "hydrate_batch":
@@ -129,6 +131,25 @@ async def _dispatch_tool(
             memory_types=parsed_types,
             min_importance=float(args.get("min_importance", 0.0)),
             include_partial=include_partial,
+            mode=args.get("mode"),
+        )
+
+    if name == "recall_many":
+        queries = _require(args, "queries", name)
+        if not isinstance(queries, list):
+            raise ValueError("queries must be an array of strings")
+        memory_types = args.get("memory_types")
+        parsed_types: list[MemoryType] | None = None
+        if memory_types is not None:
+            if not isinstance(memory_types, list):
+                raise ValueError("memory_types must be an array of strings")
+            parsed_types = [MemoryType(t) for t in memory_types]
+        return await client.recall_many(
+            queries,
+            limit=int(args.get("limit", 10)),
+            memory_types=parsed_types,
+            min_importance=float(args.get("min_importance", 0.0)),
+            mode=args.get("mode"),
         )
 
     if name == "recall_by_id":
@@ -321,6 +342,11 @@ def _tools() -> list[Any]:
                     "include_emotional_state": {"type": "boolean", "default": True},
                     "include_goals": {"type": "boolean", "default": False},
                     "include_drives": {"type": "boolean", "default": True},
+                    "mode": {
+                        "type": ["string", "null"],
+                        "enum": [*RECALL_MODES, None],
+                        "description": "Recall quality: fast (cheapest), balanced, or exact (sequential scan).",
+                    },
                 },
                 "required": ["query"],
                 "additionalProperties": False,
@@ -381,11 +407,56 @@ def _tools() -> list[Any]:
                         "default": 0.0,
                     },
                     "include_partial": {"type": "boolean", "default": True},
+                    "mode": {
+                        "type": ["string", "null"],
+                        "enum": [*RECALL_MODES, None],
+                        "description": "Recall quality: fast (cheapest), balanced, or exact (sequential scan).",
+                    },
                 },
                 "required": ["query"],
                 "additionalProperties": False,
             },
         ),
+        _tool(
+            "recall_many",
+            "Recall memories for several queries in one round trip (fast_recall_many).",
+            {
+                "type": "object",
+                "properties": {
+                    "queries": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "minItems": 1,
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "maximum": 50,
+                        "default": 10,
+                    },
+                    "memory_types": {
+                        "type": ["array", "null"],
+                        "items": {
+                            "type": "string",
+                            "enum": [t.value for t in MemoryType],
+                        },
+                    },
+                    "min_importance": {
+                        "type": "number",
+                        "minimum": 0.0,
+                        "maximum": 1.0,
+                        "default": 0.0,
+                    },
+                    "mode": {
+                        "type": ["string", "null"],
+                        "enum": [*RECALL_MODES, None],
+                        "description": "Recall quality: fast (cheapest), balanced, or exact (sequential scan).",
+                    },
+                },
+                "required": ["queries"],
+                "additionalProperties": False,
+            },
+        ),
         _tool(
             "recall_by_id",
             "Fetch a memory by id.",
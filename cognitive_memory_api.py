@@ -11,17 +11,27 @@ Design:
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, AsyncIterator, Iterable, Optional
-from uuid import UUID
+from itertools import zip_longest
+from typing import Any, AsyncIterator, Iterable, Optional, Sequence
+from uuid import UUID, uuid4
 
 import asyncpg
+import numpy as np
+from pgvector.asyncpg import register_vector
 
 from prompt_resources import compose_personhood_prompt
 
+logger = logging.getLogger(__name__)
+
 
 class MemoryType(str, Enum):
     EPISODIC = "episodic"
@@ -89,6 +99,7 @@ class RecallResult:
     memories: list[Memory]
     partial_activations: list[PartialActivation]
     query: str
+    trace: dict[str, Any] | None = None
 
 
 @dataclass(frozen=True)
@@ -100,6 +111,7 @@ class HydratedContext:
     emotional_state: dict[str, Any] | None
     goals: dict[str, Any] | None
     urgent_drives: list[dict[str, Any]]
+    trace: dict[str, Any] | None = None
 
 
 @dataclass(frozen=True)
@@ -131,6 +143,10 @@ async def _init_connection(conn: asyncpg.Connection) -> None:
         await conn.execute("LOAD 'age';")
     except Exception:
         pass
+    # Binary codec: vector params accept lists/np.ndarray, results decode to np.ndarray.
+    # Not optional: remember_batch_raw, bulk_import and recall_with_vectors depend on it,
+    # so a missing vector type fails pool creation instead of those calls.
+    await register_vector(conn)
     try:
         await conn.execute("SET search_path = ag_catalog, public;")
     except Exception:
@@ -147,10 +163,133 @@ def _to_jsonb_arg(val: Any) -> Any:
     return val
 
 
+RECALL_MODES = ("fast", "balanced", "exact")
+
+
+def _check_recall_mode(mode: str | None) -> None:
+    if mode is not None and mode not in RECALL_MODES:
+        raise ValueError("mode must be None, 'fast', 'balanced' or 'exact'")
+
+
 def _cypher_escape(value: str) -> str:
     return value.replace("'", "''")
 
 
+def _vector_literal(values: Iterable[float]) -> str:
+    return "[" + ",".join(str(float(v)) for v in values) + "]"
+
+
+_MISSING = object()
+
+
+def _parse_embedding_response(payload: Any, expected: int) -> list[list[float]]:
+    """Normalize the response formats accepted by get_embedding()/get_embeddings()."""
+    if isinstance(payload, dict) and "embeddings" in payload:
+        vectors = payload["embeddings"]
+    elif isinstance(payload, dict) and "data" in payload:
+        vectors = [d["embedding"] for d in payload["data"]]
+    elif isinstance(payload, dict) and "embedding" in payload:
+        vectors = [payload["embedding"]]
+    elif isinstance(payload, list) and payload and isinstance(payload[0], list):
+        vectors = payload
+    else:
+        vectors = [payload]
+    if not isinstance(vectors, list) or len(vectors) != expected:
+        got = len(vectors) if isinstance(vectors, list) else 0
+        raise ValueError(
+            f"embedding service returned {got} embeddings for {expected} inputs"
+        )
+    return [[float(x) for x in v] for v in vectors]
+
+
+class EmbeddingBatcher:
+    """
+    Client-side embedding provider that coalesces concurrent requests.
+
+    Texts submitted within `max_wait_ms` of each other (up to `max_batch_size`)
+    are sent to the embedding service as a single `{"inputs": [...]}` request.
+    The short default `timeout` bounds how long a call waits on an unreachable
+    service before the client falls back to DB-side embedding. Requires httpx.
+    """
+
+    def __init__(
+        self,
+        service_url: str,
+        *,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        timeout: float = 5.0,
+    ):
+        self.service_url = service_url
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._timeout = timeout
+        self._client: Any = None
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        futures: list[asyncio.Future] = []
+        for text in texts:
+            fut = loop.create_future()
+            self._pending.append((text, fut))
+            futures.append(fut)
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+        if self._pending and self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return list(await asyncio.gather(*futures))
+
+    async def close(self) -> None:
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            if self._client is None:
+                try:
+                    import httpx
+                except Exception as e:
+                    raise RuntimeError(
+                        "httpx is required for client-side embeddings. Install with: pip install httpx"
+                    ) from e
+                self._client = httpx.AsyncClient(timeout=self._timeout)
+            resp = await self._client.post(self.service_url, json={"inputs": unique})
+            resp.raise_for_status()
+            vectors = dict(zip(unique, _parse_embedding_response(resp.json(), len(unique))))
+        except Exception as exc:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for text, fut in batch:
+            if not fut.done():
+                fut.set_result(vectors[text])
+
+
 class CognitiveMemory:
     """
     Async client for the cognitive memory database.
@@ -160,37 +299,139 @@ class CognitiveMemory:
     - Agent operations: `recall()`, `remember()`, `connect_memories()`
     """
 
-    def __init__(self, pool: asyncpg.Pool):
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        *,
+        embedder: EmbeddingBatcher | None = None,
+        cache_turn_context: bool = False,
+        turn_context_max_age: float = 60.0,
+        recall_cache: str | None = None,
+        recall_cache_ttl: float = 300.0,
+        recall_cache_size: int = 256,
+        slow_recall_ms: float | None = None,
+    ):
+        if recall_cache not in (None, "local", "shared"):
+            raise ValueError("recall_cache must be None, 'local' or 'shared'")
         self._pool = pool
+        self._embedder = embedder
+        self._embedder_failed_logged = False
+        self._embedding_dim: int | None = None
+        self._cache_turn_context = cache_turn_context
+        self._turn_context: dict[str, Any] | None = None
+        self._turn_context_version: int | None = None
+        self._turn_context_at = 0.0
+        self._turn_context_max_age = max(0.0, float(turn_context_max_age))
+        self._recall_cache = recall_cache
+        self._recall_cache_ttl = max(0.0, float(recall_cache_ttl))
+        self._recall_cache_size = max(1, int(recall_cache_size))
+        self._recall_results: OrderedDict[str, tuple[int, float, RecallResult]] = (
+            OrderedDict()
+        )
+        self._slow_recall_ms = slow_recall_ms
 
     @classmethod
     @asynccontextmanager
     async def connect(
         cls,
         dsn: str,
+        *,
+        embedding_service_url: str | None = None,
+        embedding_batch_size: int = 32,
+        embedding_max_wait_ms: float = 5.0,
+        embedding_timeout: float = 5.0,
+        cache_turn_context: bool = False,
+        turn_context_max_age: float = 60.0,
+        recall_cache: str | None = None,
+        recall_cache_ttl: float = 300.0,
+        slow_recall_ms: float | None = None,
         **pool_kwargs: Any,
     ) -> AsyncIterator["CognitiveMemory"]:
         """
         Async context manager that owns the underlying pool.
 
+        If `embedding_service_url` is given, embeddings for remember/recall/hydrate
+        are computed client-side (micro-batched across concurrent calls) and handed
+        to the DB, instead of each call doing its own HTTP request from Postgres.
+        A call that fails or exceeds `embedding_timeout` seconds is logged and falls
+        back to DB-side embedding.
+
+        If `cache_turn_context` is set, `hydrate()` keeps the identity/worldview/
+        emotion/goals/drives sections in process and reuses them until the DB's
+        turn-context version changes or they are `turn_context_max_age` seconds old
+        (the DB snapshot's own max age).
+
+        If `recall_cache` is "local" (in process) or "shared" (UNLOGGED `recall_cache`
+        table, shared across processes), repeated `recall()` calls are served from
+        cache until the DB's memory-write watermark moves or `recall_cache_ttl`
+        seconds pass.
+
+        With `slow_recall_ms`, `explain=True` recalls/hydrations that take at least
+        that long are also logged to the `recall_trace` table.
+
         Usage:
             async with CognitiveMemory.connect(dsn) as mem:
                 ctx = await mem.hydrate("...")
         """
-        pool = await asyncpg.create_pool(dsn, init=_init_connection, **pool_kwargs)
-        client = cls(pool)
+        client = await cls.create(
+            dsn,
+            embedding_service_url=embedding_service_url,
+            embedding_batch_size=embedding_batch_size,
+            embedding_max_wait_ms=embedding_max_wait_ms,
+            embedding_timeout=embedding_timeout,
+            cache_turn_context=cache_turn_context,
+            turn_context_max_age=turn_context_max_age,
+            recall_cache=recall_cache,
+            recall_cache_ttl=recall_cache_ttl,
+            slow_recall_ms=slow_recall_ms,
+            **pool_kwargs,
+        )
         try:
             yield client
         finally:
-            await pool.close()
+            await client.close()
 
     @classmethod
-    async def create(cls, dsn: str, **pool_kwargs: Any) -> "CognitiveMemory":
+    async def create(
+        cls,
+        dsn: str,
+        *,
+        embedding_service_url: str | None = None,
+        embedding_batch_size: int = 32,
+        embedding_max_wait_ms: float = 5.0,
+        embedding_timeout: float = 5.0,
+        cache_turn_context: bool = False,
+        turn_context_max_age: float = 60.0,
+        recall_cache: str | None = None,
+        recall_cache_ttl: float = 300.0,
+        slow_recall_ms: float | None = None,
+        **pool_kwargs: Any,
+    ) -> "CognitiveMemory":
         """Create a pool and return a client; call `close()` when done."""
         pool = await asyncpg.create_pool(dsn, init=_init_connection, **pool_kwargs)
-        return cls(pool)
+        embedder = (
+            EmbeddingBatcher(
+                embedding_service_url,
+                max_batch_size=embedding_batch_size,
+                max_wait_ms=embedding_max_wait_ms,
+                timeout=embedding_timeout,
+            )
+            if embedding_service_url
+            else None
+        )
+        return cls(
+            pool,
+            embedder=embedder,
+            cache_turn_context=cache_turn_context,
+            turn_context_max_age=turn_context_max_age,
+            recall_cache=recall_cache,
+            recall_cache_ttl=recall_cache_ttl,
+            slow_recall_ms=slow_recall_ms,
+        )
 
     async def close(self) -> None:
+        if self._embedder is not None:
+            await self._embedder.close()
         await self._pool.close()
 
     # =========================================================================
@@ -208,47 +449,113 @@ class CognitiveMemory:
         include_emotional_state: bool = True,
         include_goals: bool = False,
         include_drives: bool = True,
+        hybrid: bool = False,
+        diversity: float = 0.0,
+        mode: str | None = None,
+        explain: bool = False,
     ) -> HydratedContext:
         """
         Hydrate a query with relevant context for RAG prompt augmentation.
 
-        This uses:
-        - `fast_recall(query, limit)` for relevant memories
-        - `find_partial_activations(query)` for tip-of-tongue clusters (optional)
-        - `gather_turn_context()` for identity/worldview/emotions/drives/goals (optional subsets)
+        One round trip to `hydrate_context(query, limit, flags)`, which embeds the
+        query once and returns:
+        - `fast_recall` memories
+        - `find_partial_activations` tip-of-tongue clusters (optional)
+        - identity/worldview/emotions/drives/goals (only the requested subsets)
+
+        With `cache_turn_context`, all sections are fetched once per turn-context
+        version and filtered locally; unchanged versions skip them entirely.
+        `hybrid`, `diversity` and `mode` shape the recalled memories (see `recall`);
+        `explain` attaches the recall's stage timings as `trace` (see `recall`)
+        and, like there, does not support `hybrid` or `diversity`.
         """
+        _check_recall_mode(mode)
+        if explain and (hybrid or diversity > 0.0):
+            raise ValueError("explain does not support hybrid or diversity")
+        cache = self._cache_turn_context
+        flags: dict[str, Any] = {
+            "include_partial": include_partial,
+            "include_identity": include_identity or cache,
+            "include_worldview": include_worldview or cache,
+            "include_emotional_state": include_emotional_state or cache,
+            "include_goals": include_goals or cache,
+            "include_drives": include_drives or cache,
+            "hybrid": hybrid,
+            "diversity": diversity,
+        }
+        if mode is not None:
+            flags["mode"] = mode
+        if explain:
+            flags["explain"] = True
+            if self._slow_recall_ms is not None:
+                flags["log_slow_ms"] = self._slow_recall_ms
+        if (
+            cache
+            and self._turn_context is not None
+            and time.monotonic() - self._turn_context_at < self._turn_context_max_age
+        ):
+            flags["known_context_version"] = self._turn_context_version
+        vectors = await self._embed_texts([query])
         async with self._pool.acquire() as conn:
-            memories = await self._recall_memories(conn, query, memory_limit)
-            partial = (
-                await self._find_partial_activations(conn, query)
-                if include_partial
-                else []
+            await self._prime_embedding_cache(conn, [query], vectors)
+            raw = await conn.fetchval(
+                "SELECT hydrate_context($1::text, $2::int, $3::jsonb)",
+                query,
+                memory_limit,
+                _to_jsonb_arg(flags),
             )
+        ctx = _coerce_json(raw) or {}
 
-            ctx_row = await conn.fetchval("SELECT gather_turn_context()")
-            ctx = _coerce_json(ctx_row)
+        sections: dict[str, Any] = ctx
+        if cache:
+            cached = self._turn_context
+            if ctx.get("context_unchanged") and cached is not None:
+                sections = cached
+            else:
+                version = ctx.get("context_version")
+                if self._turn_context_version is None or (
+                    version is not None and int(version) >= self._turn_context_version
+                ):
+                    self._turn_context = {
+                        k: ctx.get(k)
+                        for k in (
+                            "identity",
+                            "worldview",
+                            "emotional_state",
+                            "goals",
+                            "urgent_drives",
+                        )
+                    }
+                    self._turn_context_version = (
+                        int(version) if version is not None else None
+                    )
+                    self._turn_context_at = time.monotonic()
 
-            identity = ctx.get("identity", []) if include_identity else []
-            worldview = ctx.get("worldview", []) if include_worldview else []
-            emotional_state = (
-                ctx.get("emotional_state") if include_emotional_state else None
-            )
-            goals = ctx.get("goals") if include_goals else None
-            urgent_drives = ctx.get("urgent_drives", []) if include_drives else []
-
-            return HydratedContext(
-                memories=memories,
-                partial_activations=partial,
-                identity=list(identity) if isinstance(identity, list) else [],
-                worldview=list(worldview) if isinstance(worldview, list) else [],
-                emotional_state=dict(emotional_state)
-                if isinstance(emotional_state, dict)
-                else None,
-                goals=dict(goals) if isinstance(goals, dict) else None,
-                urgent_drives=list(urgent_drives)
-                if isinstance(urgent_drives, list)
-                else [],
-            )
+        identity = sections.get("identity", []) if include_identity else []
+        worldview = sections.get("worldview", []) if include_worldview else []
+        emotional_state = (
+            sections.get("emotional_state") if include_emotional_state else None
+        )
+        goals = sections.get("goals") if include_goals else None
+        urgent_drives = sections.get("urgent_drives", []) if include_drives else []
+
+        return HydratedContext(
+            memories=[_json_to_memory(m) for m in ctx.get("memories") or []],
+            partial_activations=[
+                _json_to_partial_activation(pa)
+                for pa in ctx.get("partial_activations") or []
+            ],
+            identity=list(identity) if isinstance(identity, list) else [],
+            worldview=list(worldview) if isinstance(worldview, list) else [],
+            emotional_state=dict(emotional_state)
+            if isinstance(emotional_state, dict)
+            else None,
+            goals=dict(goals) if isinstance(goals, dict) else None,
+            urgent_drives=list(urgent_drives)
+            if isinstance(urgent_drives, list)
+            else [],
+            trace=ctx.get("trace"),
+        )
 
     async def hydrate_batch(
         self,
@@ -282,24 +589,271 @@ class CognitiveMemory:
         limit: int = 10,
         memory_types: list[MemoryType] | None = None,
         min_importance: float = 0.0,
+        min_trust: float | None = None,
+        source_kinds: list[str] | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
         include_partial: bool = True,
+        hybrid: bool = False,
+        diversity: float = 0.0,
+        min_relevance: float | None = None,
+        mode: str | None = None,
+        explain: bool = False,
     ) -> RecallResult:
+        """
+        Recall memories relevant to `query`.
+
+        Filters are applied inside `fast_recall`, so up to `limit` matching
+        memories are returned even when most near neighbors are filtered out.
+
+        With `hybrid`, seeds come from full-text and vector search fused by
+        reciprocal rank, which helps exact names and rare tokens.
+
+        `diversity` (0..1) reranks a larger candidate set by maximal marginal
+        relevance so near-duplicates (e.g. overlapping chunks) are dropped.
+
+        `min_relevance` skips memories whose stored (decayed) relevance score is
+        below the threshold - a cheap "important and recent" prefilter.
+
+        `mode` trades latency against recall quality: "fast" (small HNSW
+        ef_search, for background recalls), "balanced" (larger ef_search) or
+        "exact" (sequential scan, no approximation). None keeps the server's
+        settings. Calls are counted per mode and application_name in
+        `recall_mode_stats` (aggregated by maintenance).
+
+        `explain` runs the instrumented `fast_recall_explain` instead and sets
+        `trace` to its per-stage timings (embedding, seed scan, association and
+        temporal expansion, scoring), candidate counts per source and whether
+        the query embedding was cached. It bypasses the recall cache and does not
+        support `hybrid` or `diversity`.
+
+        With a `recall_cache`, identical (normalized) calls are answered from
+        cache while no memory has been written since the cached result.
+        """
+        _check_recall_mode(mode)
+        if explain:
+            if hybrid or diversity > 0.0:
+                raise ValueError("explain does not support hybrid or diversity")
+            return await self._recall_explained(
+                query,
+                limit=limit,
+                memory_types=memory_types,
+                min_importance=min_importance,
+                min_trust=min_trust,
+                source_kinds=source_kinds,
+                created_after=created_after,
+                created_before=created_before,
+                include_partial=include_partial,
+                min_relevance=min_relevance,
+                mode=mode,
+            )
+
+        cache_key: str | None = None
+        cache_version = 0
+        if self._recall_cache is not None:
+            cache_params = {
+                "limit": limit,
+                "memory_types": sorted(t.value for t in memory_types)
+                if memory_types is not None
+                else None,
+                "min_importance": min_importance,
+                "min_trust": min_trust,
+                "source_kinds": sorted(source_kinds) if source_kinds is not None else None,
+                "created_after": created_after.isoformat() if created_after else None,
+                "created_before": created_before.isoformat() if created_before else None,
+                "include_partial": include_partial,
+                "hybrid": hybrid,
+                "diversity": diversity,
+                "min_relevance": min_relevance,
+                "mode": mode,
+            }
+            async with self._pool.acquire() as conn:
+                cached, cache_key, cache_version = await self._get_cached_recall(
+                    conn, query, cache_params
+                )
+            if cached is not None:
+                return RecallResult(
+                    memories=cached.memories,
+                    partial_activations=cached.partial_activations,
+                    query=query,
+                )
+
+        vectors = await self._embed_texts([query])
         async with self._pool.acquire() as conn:
+            await self._prime_embedding_cache(conn, [query], vectors)
             memories = await self._recall_memories(
                 conn,
                 query,
                 limit,
                 memory_types=memory_types,
                 min_importance=min_importance,
+                min_trust=min_trust,
+                source_kinds=source_kinds,
+                created_after=created_after,
+                created_before=created_before,
+                hybrid=hybrid,
+                diversity=diversity,
+                min_relevance=min_relevance,
+                mode=mode,
             )
             partial = (
                 await self._find_partial_activations(conn, query)
                 if include_partial
                 else []
             )
-            return RecallResult(
+            result = RecallResult(
                 memories=memories, partial_activations=partial, query=query
             )
+            if cache_key is not None:
+                await self._put_cached_recall(conn, cache_key, cache_version, result)
+            return result
+
+    async def recall_many(
+        self,
+        queries: list[str],
+        *,
+        limit: int = 10,
+        memory_types: list[MemoryType] | None = None,
+        min_importance: float = 0.0,
+        mode: str | None = None,
+    ) -> list[RecallResult]:
+        """
+        Recall memories for several queries in one round trip.
+
+        `fast_recall_many` embeds all queries in one batch and runs the recall
+        pipeline for each of them in a single statement, so planners issuing
+        many sub-queries per turn need one connection instead of a fan-out.
+        Results are in `queries` order; partial activations are not computed.
+        """
+        _check_recall_mode(mode)
+        if not queries:
+            return []
+        vectors = await self._embed_texts(queries)
+        async with self._pool.acquire() as conn:
+            await self._prime_embedding_cache(conn, queries, vectors)
+            rows = await conn.fetch(
+                """
+                SELECT
+                    fr.query_index,
+                    fr.memory_id,
+                    fr.content,
+                    fr.memory_type,
+                    fr.score,
+                    fr.source,
+                    COALESCE(ms.importance, m.importance) AS importance,
+                    m.trust_level,
+                    m.source_attribution,
+                    m.created_at,
+                    em.emotional_valence,
+                    CASE WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score END AS relevance_score
+                FROM fast_recall_many(
+                    $1::text[],
+                    $2::int,
+                    $3::memory_type[],
+                    $4::float,
+                    $5::text
+                ) fr
+                JOIN memories m ON m.id = fr.memory_id
+                LEFT JOIN episodic_memories em ON em.memory_id = fr.memory_id
+                LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+                ORDER BY fr.query_index, fr.score DESC
+                """,
+                queries,
+                limit,
+                [t.value for t in memory_types] if memory_types is not None else None,
+                min_importance,
+                mode,
+            )
+
+        grouped: list[list[Memory]] = [[] for _ in queries]
+        for row in rows:
+            grouped[row["query_index"] - 1].append(self._recall_row_to_memory(row))
+        return [
+            RecallResult(memories=memories, partial_activations=[], query=query)
+            for query, memories in zip(queries, grouped)
+        ]
+
+    async def get_embedding(self, text: str) -> np.ndarray:
+        """Embedding for `text` as a float32 array (DB get_embedding(), cached)."""
+        vectors = await self._embed_texts([text])
+        async with self._pool.acquire() as conn:
+            await self._prime_embedding_cache(conn, [text], vectors)
+            value = await conn.fetchval("SELECT get_embedding($1::text)", text)
+        return np.asarray(value, dtype=np.float32)
+
+    async def recall_with_vectors(
+        self,
+        query: str | Sequence[float] | np.ndarray,
+        *,
+        limit: int = 10,
+        memory_types: list[MemoryType] | None = None,
+        min_importance: float = 0.0,
+        mode: str | None = None,
+    ) -> tuple[list[Memory], np.ndarray]:
+        """
+        Recall memories together with their embeddings.
+
+        `query` is either text (embedded as in recall()) or a precomputed query
+        vector, which skips embedding altogether. Returns the memories and a
+        float32 matrix whose rows are their embeddings, in the same order, for
+        client-side vector math. Partial activations are not computed. Calls are
+        counted in `recall_mode_stats` like recall().
+        """
+        _check_recall_mode(mode)
+        query_text = query if isinstance(query, str) else None
+        query_vector = None if isinstance(query, str) else np.asarray(query, dtype=np.float32)
+        vectors = await self._embed_texts([query_text]) if query_text is not None else None
+        async with self._pool.acquire() as conn:
+            if query_text is not None:
+                await self._prime_embedding_cache(conn, [query_text], vectors)
+            started = time.perf_counter()
+            rows = await conn.fetch(
+                """
+                SELECT
+                    fr.memory_id,
+                    fr.content,
+                    fr.memory_type,
+                    fr.score,
+                    fr.source,
+                    COALESCE(ms.importance, m.importance) AS importance,
+                    m.trust_level,
+                    m.source_attribution,
+                    m.created_at,
+                    m.embedding,
+                    em.emotional_valence,
+                    CASE WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score END AS relevance_score
+                FROM fast_recall_with_embedding(
+                    COALESCE($1::vector, get_embedding($2::text)),
+                    $3::int,
+                    $4::memory_type[],
+                    $5::float,
+                    p_mode => $6::text
+                ) fr
+                JOIN memories m ON m.id = fr.memory_id
+                LEFT JOIN episodic_memories em ON em.memory_id = fr.memory_id
+                LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+                ORDER BY fr.score DESC
+                """,
+                query_vector,
+                query_text,
+                limit,
+                [t.value for t in memory_types] if memory_types is not None else None,
+                min_importance,
+                mode,
+            )
+            # fast_recall_with_embedding() is the shared pipeline and does not log itself;
+            # count this entry point per caller and mode like fast_recall() does.
+            await conn.execute(
+                "SELECT record_recall_mode($1::text, clock_timestamp() - make_interval(secs => $2::float))",
+                mode,
+                time.perf_counter() - started,
+            )
+
+        memories = [self._recall_row_to_memory(row) for row in rows]
+        if not rows:
+            return memories, np.empty((0, 0), dtype=np.float32)
+        matrix = np.vstack([np.asarray(row["embedding"], dtype=np.float32) for row in rows])
+        return memories, matrix
 
     async def recall_by_id(self, memory_id: UUID) -> Memory | None:
         async with self._pool.acquire() as conn:
@@ -309,13 +863,15 @@ class CognitiveMemory:
                     m.id,
                     m.type,
                     m.content,
-                    m.importance,
+                    COALESCE(ms.importance, m.importance) AS importance,
                     m.trust_level,
                     m.source_attribution,
                     m.created_at,
-                    em.emotional_valence
+                    em.emotional_valence,
+                    CASE WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score END AS relevance_score
                 FROM memories m
                 LEFT JOIN episodic_memories em ON m.id = em.memory_id
+                LEFT JOIN memory_stats ms ON ms.memory_id = m.id
                 WHERE m.id = $1
                 """,
                 memory_id,
@@ -327,6 +883,7 @@ class CognitiveMemory:
                 type=MemoryType(row["type"]),
                 content=row["content"],
                 importance=float(row["importance"]),
+                relevance_score=row["relevance_score"],
                 trust_level=float(row["trust_level"])
                 if row["trust_level"] is not None
                 else None,
@@ -351,13 +908,15 @@ class CognitiveMemory:
                         m.id,
                         m.type,
                         m.content,
-                        m.importance,
+                        COALESCE(ms.importance, m.importance) AS importance,
                         m.trust_level,
                         m.source_attribution,
                         m.created_at,
-                        em.emotional_valence
+                        em.emotional_valence,
+                        CASE WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score END AS relevance_score
                     FROM memories m
                     LEFT JOIN episodic_memories em ON m.id = em.memory_id
+                    LEFT JOIN memory_stats ms ON ms.memory_id = m.id
                     WHERE m.status = 'active'
                     ORDER BY m.created_at DESC
                     LIMIT $1
@@ -371,13 +930,15 @@ class CognitiveMemory:
                         m.id,
                         m.type,
                         m.content,
-                        m.importance,
+                        COALESCE(ms.importance, m.importance) AS importance,
                         m.trust_level,
                         m.source_attribution,
                         m.created_at,
-                        em.emotional_valence
+                        em.emotional_valence,
+                        CASE WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score END AS relevance_score
                     FROM memories m
                     LEFT JOIN episodic_memories em ON m.id = em.memory_id
+                    LEFT JOIN memory_stats ms ON ms.memory_id = m.id
                     WHERE m.status = 'active' AND m.type = $2::memory_type
                     ORDER BY m.created_at DESC
                     LIMIT $1
@@ -403,8 +964,11 @@ class CognitiveMemory:
         source_attribution: dict[str, Any] | None = None,
         source_references: Any | None = None,
         trust_level: float | None = None,
+        dedupe: bool = False,
     ) -> UUID:
+        vectors = await self._embed_texts([content])
         async with self._pool.acquire() as conn:
+            await self._prime_embedding_cache(conn, [content], vectors)
             memory_id = await self._create_memory(
                 conn,
                 content,
@@ -415,15 +979,13 @@ class CognitiveMemory:
                 source_attribution=source_attribution,
                 source_references=source_references,
                 trust_level=trust_level,
+                dedupe=dedupe,
             )
 
             if concepts:
-                for concept in concepts:
-                    await conn.fetchval(
-                        "SELECT link_memory_to_concept($1::uuid, $2::text, 1.0)",
-                        memory_id,
-                        concept,
-                    )
+                await self._link_concepts(
+                    conn, [memory_id] * len(concepts), list(concepts)
+                )
 
             return memory_id
 
@@ -446,10 +1008,15 @@ class CognitiveMemory:
                 return {}
             return dict(_coerce_json(row["profile"]))
 
-    async def remember_batch(self, memories: Iterable[MemoryInput]) -> list[UUID]:
+    async def remember_batch(
+        self, memories: Iterable[MemoryInput], *, dedupe: bool = False
+    ) -> list[UUID]:
+        mem_list = list(memories)
+        contents = [m.content for m in mem_list]
+        vectors = await self._embed_texts(contents)
         async with self._pool.acquire() as conn:
+            await self._prime_embedding_cache(conn, contents, vectors)
             items: list[dict[str, Any]] = []
-            mem_list = list(memories)
             for m in mem_list:
                 item: dict[str, Any] = {
                     "type": m.type.value,
@@ -480,36 +1047,42 @@ class CognitiveMemory:
             import json
 
             created = await conn.fetchval(
-                "SELECT batch_create_memories($1::jsonb)", json.dumps(items)
+                "SELECT batch_create_memories($1::jsonb, $2::boolean)",
+                json.dumps(items),
+                dedupe,
             )
             ids = list(created or [])
 
-            # Link concepts (still per-memory).
+            # Link concepts for the whole batch in one call.
+            link_ids: list[UUID] = []
+            link_concepts: list[str] = []
             for mid, m in zip(ids, mem_list):
-                if m.concepts:
-                    for concept in m.concepts:
-                        await conn.fetchval(
-                            "SELECT link_memory_to_concept($1::uuid, $2::text, 1.0)",
-                            mid,
-                            concept,
-                        )
+                for concept in m.concepts or []:
+                    link_ids.append(mid)
+                    link_concepts.append(concept)
+            if link_ids:
+                await self._link_concepts(conn, link_ids, link_concepts)
 
             return ids
 
     async def remember_batch_raw(
         self,
         contents: list[str],
-        embeddings: list[list[float]],
+        embeddings: Sequence[Sequence[float]] | np.ndarray,
         *,
         type: MemoryType = MemoryType.EPISODIC,
         importance: float = 0.5,
+        dedupe: bool = False,
     ) -> list[UUID]:
         """
         Insert memories with pre-computed embeddings (bypasses get_embedding()).
 
         Notes:
+        - Embeddings may be lists or np.ndarray rows (or one 2-D array); they are
+          sent as binary vector[] through the pgvector codec.
         - Graph nodes are created to keep AGE state consistent.
         - Embedding dimension must match the DB typmod.
+        - dedupe=True returns the id of an existing duplicate (reinforced) instead of inserting.
         """
         if len(contents) != len(embeddings):
             raise ValueError("contents and embeddings must have same length")
@@ -524,40 +1097,101 @@ class CognitiveMemory:
 
             created = await conn.fetchval(
                 """
-                SELECT batch_create_memories_with_embeddings(
+                SELECT batch_create_memories_with_vectors(
                     $1::memory_type,
                     $2::text[],
-                    $3::jsonb,
-                    $4::float
+                    $3::vector[],
+                    $4::float,
+                    $5::boolean
                 )
                 """,
                 type.value,
                 contents,
-                _to_jsonb_arg(embeddings),
+                [np.asarray(e, dtype=np.float32) for e in embeddings],
                 float(importance),
+                dedupe,
             )
             return list(created or [])
 
+    async def bulk_import(
+        self,
+        contents: Iterable[str],
+        embeddings: Iterable[Sequence[float]],
+        *,
+        type: MemoryType = MemoryType.EPISODIC,
+        importance: float = 0.5,
+        batch_size: int = 10_000,
+    ) -> int:
+        """
+        Stream memories with pre-computed embeddings into the DB (large imports).
+
+        Rows are sent over binary COPY into `memory_import_staging` (pgvector binary
+        codec, no JSON round trip; embeddings may be lists or np.ndarray) and moved
+        into memories, the type table and the graph by import_staged_memories().
+        Each batch of `batch_size` rows commits in its own transaction. Returns the
+        number of memories created.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+
+        total = 0
+        async with self._pool.acquire() as conn:
+            expected_dim = int(await conn.fetchval("SELECT embedding_dimension()"))
+            batch_id = uuid4()
+            records: list[tuple[Any, ...]] = []
+            rows = zip_longest(contents, embeddings, fillvalue=_MISSING)
+            for ord_, (content, embedding) in enumerate(rows):
+                if content is _MISSING or embedding is _MISSING:
+                    raise ValueError("contents and embeddings must have same length")
+                if len(embedding) != expected_dim:
+                    raise ValueError(
+                        f"embedding dimension mismatch: expected {expected_dim}, got {len(embedding)}"
+                    )
+                records.append(
+                    (batch_id, ord_, type.value, content, embedding, float(importance))
+                )
+                if len(records) >= batch_size:
+                    total += await self._import_staged(conn, batch_id, records)
+                    batch_id = uuid4()
+                    records = []
+            if records:
+                total += await self._import_staged(conn, batch_id, records)
+        return total
+
+    async def _import_staged(
+        self,
+        conn: asyncpg.Connection,
+        batch_id: UUID,
+        records: list[tuple[Any, ...]],
+    ) -> int:
+        async with conn.transaction():
+            await conn.copy_records_to_table(
+                "memory_import_staging",
+                schema_name="public",
+                columns=["batch_id", "ord", "type", "content", "embedding", "importance"],
+                records=records,
+            )
+            imported = await conn.fetchval(
+                "SELECT import_staged_memories($1::uuid)", batch_id
+            )
+        return int(imported or 0)
+
     async def touch_memories(self, memory_ids: Iterable[UUID]) -> int:
-        """Increment access_count/last_accessed for the given memory ids."""
+        """
+        Record an access for the given memory ids; returns the number of events buffered.
+
+        Accesses go to memory_access_log and are applied to memory_stats
+        (access_count/last_accessed) by the next maintenance tick (flush_memory_access_log()).
+        """
         ids = list(memory_ids)
         if not ids:
             return 0
         async with self._pool.acquire() as conn:
-            n = await conn.execute(
-                """
-                UPDATE memories
-                SET access_count = access_count + 1,
-                    last_accessed = CURRENT_TIMESTAMP
-                WHERE id = ANY($1::uuid[])
-                """,
+            n = await conn.fetchval(
+                "SELECT record_memory_access($1::uuid[])",
                 ids,
             )
-            # asyncpg returns "UPDATE <count>"
-            try:
-                return int(str(n).split()[-1])
-            except Exception:
-                return 0
+            return int(n or 0)
 
     # =========================================================================
     # GRAPH / RELATIONSHIPS
@@ -585,18 +1219,20 @@ class CognitiveMemory:
             )
 
     async def connect_batch(self, relationships: Iterable[RelationshipInput]) -> None:
+        rels = list(relationships)
+        if not rels:
+            return
         async with self._pool.acquire() as conn:
-            for r in relationships:
-                await conn.execute(
-                    """
-                    SELECT discover_relationship($1::uuid, $2::uuid, $3::graph_edge_type, $4::float, 'api', NULL, $5::text)
-                    """,
-                    r.from_id,
-                    r.to_id,
-                    r.relationship_type.value,
-                    r.confidence,
-                    r.context,
-                )
+            await conn.execute(
+                """
+                SELECT discover_relationships($1::uuid[], $2::uuid[], $3::graph_edge_type[], $4::float[], 'api', NULL, $5::text[])
+                """,
+                [r.from_id for r in rels],
+                [r.to_id for r in rels],
+                [r.relationship_type.value for r in rels],
+                [r.confidence for r in rels],
+                [r.context for r in rels],
+            )
 
     async def resolve_memory_reference(self, ref: str) -> UUID | None:
         """
@@ -660,17 +1296,32 @@ class CognitiveMemory:
                 strength,
             )
 
+    async def link_concepts_batch(
+        self, links: Iterable[tuple[UUID, str, float]]
+    ) -> list[UUID | None]:
+        """Link many (memory_id, concept, strength) triples in one call; returns concept ids in input order."""
+        link_list = list(links)
+        async with self._pool.acquire() as conn:
+            return await self._link_concepts(
+                conn,
+                [mid for mid, _, _ in link_list],
+                [concept for _, concept, _ in link_list],
+                [float(strength) for _, _, strength in link_list],
+            )
+
     async def find_by_concept(self, concept: str, *, limit: int = 10) -> list[Memory]:
         async with self._pool.acquire() as conn:
             rows = await conn.fetch(
                 """
-                SELECT m.id, m.type, m.content, m.importance, m.created_at, em.emotional_valence
+                SELECT m.id, m.type, m.content, COALESCE(ms.importance, m.importance) AS importance, m.created_at, em.emotional_valence,
+                       CASE WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score END AS relevance_score
                 FROM memories m
                 JOIN memory_concepts mc ON m.id = mc.memory_id
                 JOIN concepts c ON mc.concept_id = c.id
                 LEFT JOIN episodic_memories em ON m.id = em.memory_id
+                LEFT JOIN memory_stats ms ON ms.memory_id = m.id
                 WHERE c.name = $1 AND m.status = 'active'
-                ORDER BY mc.strength DESC, m.importance DESC
+                ORDER BY mc.strength DESC, COALESCE(ms.importance, m.importance) DESC
                 LIMIT $2
                 """,
                 concept,
@@ -683,7 +1334,9 @@ class CognitiveMemory:
     # =========================================================================
 
     async def hold(self, content: str, *, ttl_seconds: int = 3600) -> UUID:
+        vectors = await self._embed_texts([content])
         async with self._pool.acquire() as conn:
+            await self._prime_embedding_cache(conn, [content], vectors)
             return await conn.fetchval(
                 "SELECT add_to_working_memory($1::text, $2::int * interval '1 second')",
                 content,
@@ -693,7 +1346,9 @@ class CognitiveMemory:
     async def search_working(
         self, query: str, *, limit: int = 5
     ) -> list[dict[str, Any]]:
+        vectors = await self._embed_texts([query])
         async with self._pool.acquire() as conn:
+            await self._prime_embedding_cache(conn, [query], vectors)
             rows = await conn.fetch(
                 "SELECT * FROM search_working_memory($1::text, $2::int)", query, limit
             )
@@ -845,6 +1500,77 @@ class CognitiveMemory:
     # INTERNALS
     # =========================================================================
 
+    async def _embed_texts(self, texts: list[str]) -> list[list[float]] | None:
+        """
+        Embed texts client-side (if an embedder is configured).
+
+        Returns None when no embedder is configured or the service call fails, in
+        which case the DB falls back to get_embedding() as usual. The first failure
+        is logged as a warning, later ones at debug level.
+        """
+        if self._embedder is None or not texts:
+            return None
+        try:
+            return await self._embedder.embed_many(texts)
+        except Exception as e:
+            if not self._embedder_failed_logged:
+                self._embedder_failed_logged = True
+                logger.warning(
+                    f"Client-side embedding via {self._embedder.service_url} failed, "
+                    f"falling back to DB-side embedding: {e!r}"
+                )
+            else:
+                logger.debug(f"Client-side embedding failed: {e!r}")
+            return None
+
+    async def _prime_embedding_cache(
+        self,
+        conn: asyncpg.Connection,
+        texts: list[str],
+        vectors: list[list[float]] | None,
+    ) -> None:
+        """Seed embedding_cache so DB-side get_embedding()/get_embeddings() skip HTTP."""
+        if not vectors:
+            return
+        if self._embedding_dim is None:
+            self._embedding_dim = int(await conn.fetchval("SELECT embedding_dimension()"))
+        pairs = [(t, v) for t, v in zip(texts, vectors) if len(v) == self._embedding_dim]
+        if len(pairs) < len(texts):
+            logger.warning(
+                f"Client-side embedding returned vectors that do not match "
+                f"embedding_dimension() = {self._embedding_dim}; skipping them"
+            )
+        if not pairs:
+            return
+        await conn.execute(
+            """
+            INSERT INTO embedding_cache (content_hash, embedding)
+            SELECT encode(sha256(t.content::bytea), 'hex'), t.embedding::vector
+            FROM unnest($1::text[], $2::text[]) AS t(content, embedding)
+            ON CONFLICT (content_hash) DO NOTHING
+            """,
+            [t for t, _ in pairs],
+            [_vector_literal(v) for _, v in pairs],
+        )
+
+    async def _link_concepts(
+        self,
+        conn: asyncpg.Connection,
+        memory_ids: list[UUID],
+        concepts: list[str],
+        strengths: list[float] | None = None,
+    ) -> list[UUID | None]:
+        """Link (memory, concept) pairs in one round trip via link_memories_to_concepts()."""
+        if not memory_ids:
+            return []
+        concept_ids = await conn.fetchval(
+            "SELECT link_memories_to_concepts($1::uuid[], $2::text[], $3::float[])",
+            memory_ids,
+            concepts,
+            strengths,
+        )
+        return list(concept_ids or [])
+
     async def _create_memory(
         self,
         conn: asyncpg.Connection,
@@ -857,52 +1583,136 @@ class CognitiveMemory:
         source_attribution: dict[str, Any] | None = None,
         source_references: Any | None = None,
         trust_level: float | None = None,
+        dedupe: bool = False,
     ) -> UUID:
         if type == MemoryType.EPISODIC:
             return await conn.fetchval(
-                "SELECT create_episodic_memory($1::text, NULL, $2::jsonb, NULL, $3::float, CURRENT_TIMESTAMP, $4::float, $5::jsonb, $6::float)",
+                "SELECT create_episodic_memory($1::text, NULL, $2::jsonb, NULL, $3::float, CURRENT_TIMESTAMP, $4::float, $5::jsonb, $6::float, $7::boolean)",
                 content,
                 _to_jsonb_arg(context),
                 emotional_valence,
                 importance,
                 _to_jsonb_arg(source_attribution),
                 trust_level,
+                dedupe,
             )
         if type == MemoryType.SEMANTIC:
             sources = source_references if source_references is not None else context
             return await conn.fetchval(
-                "SELECT create_semantic_memory($1::text, 0.8::float, NULL, NULL, $2::jsonb, $3::float, $4::jsonb, $5::float)",
+                "SELECT create_semantic_memory($1::text, 0.8::float, NULL, NULL, $2::jsonb, $3::float, $4::jsonb, $5::float, $6::boolean)",
                 content,
                 _to_jsonb_arg(sources),
                 importance,
                 _to_jsonb_arg(source_attribution),
                 trust_level,
+                dedupe,
             )
         if type == MemoryType.PROCEDURAL:
             steps = context if context is not None else {}
             return await conn.fetchval(
-                "SELECT create_procedural_memory($1::text, $2::jsonb, NULL, $3::float, $4::jsonb, $5::float)",
+                "SELECT create_procedural_memory($1::text, $2::jsonb, NULL, $3::float, $4::jsonb, $5::float, $6::boolean)",
                 content,
                 _to_jsonb_arg(steps),
                 importance,
                 _to_jsonb_arg(source_attribution),
                 trust_level,
+                dedupe,
             )
         if type == MemoryType.STRATEGIC:
             pattern_desc = (
                 context.get("pattern_description", content) if context else content
             )
             return await conn.fetchval(
-                "SELECT create_strategic_memory($1::text, $2::text, 0.8::float, $3::jsonb, NULL, $4::float, $5::jsonb, $6::float)",
+                "SELECT create_strategic_memory($1::text, $2::text, 0.8::float, $3::jsonb, NULL, $4::float, $5::jsonb, $6::float, $7::boolean)",
                 content,
                 pattern_desc,
                 _to_jsonb_arg(context),
                 importance,
                 _to_jsonb_arg(source_attribution),
                 trust_level,
+                dedupe,
             )
         raise ValueError(f"Unknown memory type: {type}")
 
+    async def _get_cached_recall(
+        self, conn: asyncpg.Connection, query: str, params: dict[str, Any]
+    ) -> tuple[RecallResult | None, str, int]:
+        """
+        Look up a cached recall; returns (result or None, cache key, current watermark).
+
+        The watermark is read (committed state only) before the recall it tags runs,
+        so a stored result is never older than its version.
+        """
+        if self._recall_cache == "shared":
+            row = await conn.fetchrow(
+                """
+                SELECT k.key, memory_write_version() AS version, get_cached_recall(k.key, $3::float) AS results
+                FROM recall_cache_key($1::text, $2::jsonb) AS k(key)
+                """,
+                query,
+                _to_jsonb_arg(params),
+                self._recall_cache_ttl,
+            )
+            payload = _coerce_json(row["results"])
+            cached = None
+            if isinstance(payload, dict):
+                cached = RecallResult(
+                    memories=[_json_to_memory(m) for m in payload.get("memories") or []],
+                    partial_activations=[
+                        _json_to_partial_activation(pa)
+                        for pa in payload.get("partial_activations") or []
+                    ],
+                    query=query,
+                )
+            return cached, row["key"], int(row["version"])
+
+        import json
+
+        normalized = " ".join(query.split()).lower()
+        key = hashlib.sha256(
+            f"{normalized}\x1f{json.dumps(params, sort_keys=True)}".encode("utf-8")
+        ).hexdigest()
+        version = int(await conn.fetchval("SELECT memory_write_version()"))
+        entry = self._recall_results.get(key)
+        if entry is not None:
+            entry_version, stored_at, result = entry
+            if (
+                entry_version == version
+                and time.monotonic() - stored_at < self._recall_cache_ttl
+            ):
+                self._recall_results.move_to_end(key)
+                return result, key, version
+            del self._recall_results[key]
+        return None, key, version
+
+    async def _put_cached_recall(
+        self,
+        conn: asyncpg.Connection,
+        key: str,
+        version: int,
+        result: RecallResult,
+    ) -> None:
+        """Store a recall computed while the watermark was `version`."""
+        if self._recall_cache == "shared":
+            payload = {
+                "memories": [_memory_to_json(m) for m in result.memories],
+                "partial_activations": [
+                    _partial_activation_to_json(pa) for pa in result.partial_activations
+                ],
+            }
+            await conn.execute(
+                "SELECT put_cached_recall($1::text, $2::bigint, $3::jsonb)",
+                key,
+                version,
+                _to_jsonb_arg(payload),
+            )
+            return
+
+        self._recall_results[key] = (version, time.monotonic(), result)
+        self._recall_results.move_to_end(key)
+        while len(self._recall_results) > self._recall_cache_size:
+            self._recall_results.popitem(last=False)
+
     async def _recall_memories(
         self,
         conn: asyncpg.Connection,
@@ -910,6 +1720,14 @@ class CognitiveMemory:
         limit: int,
         memory_types: list[MemoryType] | None = None,
         min_importance: float = 0.0,
+        min_trust: float | None = None,
+        source_kinds: list[str] | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        hybrid: bool = False,
+        diversity: float = 0.0,
+        min_relevance: float | None = None,
+        mode: str | None = None,
     ) -> list[Memory]:
         rows = await conn.fetch(
             """
@@ -919,45 +1737,105 @@ class CognitiveMemory:
                 fr.memory_type,
                 fr.score,
                 fr.source,
-                m.importance,
+                COALESCE(ms.importance, m.importance) AS importance,
                 m.trust_level,
                 m.source_attribution,
                 m.created_at,
-                em.emotional_valence
-            FROM fast_recall($1::text, $2::int) fr
+                em.emotional_valence,
+                CASE WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score END AS relevance_score
+            FROM fast_recall(
+                $1::text,
+                $2::int,
+                $3::memory_type[],
+                $4::float,
+                $5::float,
+                $6::text[],
+                $7::timestamptz,
+                $8::timestamptz,
+                $9::boolean,
+                $10::float,
+                $11::float,
+                $12::text
+            ) fr
             JOIN memories m ON m.id = fr.memory_id
             LEFT JOIN episodic_memories em ON em.memory_id = fr.memory_id
-            WHERE m.importance >= $3::float
+            LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+            ORDER BY fr.score DESC
             """,
             query,
             limit,
+            [t.value for t in memory_types] if memory_types is not None else None,
             min_importance,
+            min_trust,
+            source_kinds,
+            created_after,
+            created_before,
+            hybrid,
+            diversity,
+            min_relevance,
+            mode,
         )
 
-        memories: list[Memory] = []
-        for row in rows:
-            mt = MemoryType(row["memory_type"])
-            if memory_types is not None and mt not in set(memory_types):
-                continue
-            memories.append(
-                Memory(
-                    id=row["memory_id"],
-                    type=mt,
-                    content=row["content"],
-                    importance=float(row["importance"]),
-                    similarity=float(row["score"]),
-                    source=row["source"],
-                    trust_level=float(row["trust_level"])
-                    if row["trust_level"] is not None
-                    else None,
-                    source_attribution=_coerce_json(row["source_attribution"])
-                    if row["source_attribution"] is not None
-                    else None,
-                    created_at=row["created_at"],
-                    emotional_valence=row["emotional_valence"],
+        return [self._recall_row_to_memory(row) for row in rows]
+
+    async def _recall_explained(
+        self,
+        query: str,
+        *,
+        limit: int,
+        memory_types: list[MemoryType] | None,
+        min_importance: float,
+        min_trust: float | None,
+        source_kinds: list[str] | None,
+        created_after: datetime | None,
+        created_before: datetime | None,
+        include_partial: bool,
+        min_relevance: float | None,
+        mode: str | None,
+    ) -> RecallResult:
+        vectors = await self._embed_texts([query])
+        async with self._pool.acquire() as conn:
+            await self._prime_embedding_cache(conn, [query], vectors)
+            raw = await conn.fetchval(
+                """
+                SELECT fast_recall_explain(
+                    $1::text,
+                    $2::int,
+                    $3::memory_type[],
+                    $4::float,
+                    $5::float,
+                    $6::text[],
+                    $7::timestamptz,
+                    $8::timestamptz,
+                    $9::float,
+                    $10::text,
+                    $11::float
                 )
+                """,
+                query,
+                limit,
+                [t.value for t in memory_types] if memory_types is not None else None,
+                min_importance,
+                min_trust,
+                source_kinds,
+                created_after,
+                created_before,
+                min_relevance,
+                mode,
+                self._slow_recall_ms,
             )
-        return memories
+            partial = (
+                await self._find_partial_activations(conn, query)
+                if include_partial
+                else []
+            )
+        doc = _coerce_json(raw) or {}
+        return RecallResult(
+            memories=[_json_to_memory(m) for m in doc.get("memories") or []],
+            partial_activations=partial,
+            query=query,
+            trace=doc.get("trace"),
+        )
 
     async def _find_partial_activations(
         self, conn: asyncpg.Connection, query: str
@@ -981,12 +1859,33 @@ class CognitiveMemory:
             )
         return out
 
+    def _recall_row_to_memory(self, row: asyncpg.Record) -> Memory:
+        """Memory from a fast_recall row joined with memories/episodic_memories."""
+        return Memory(
+            id=row["memory_id"],
+            type=MemoryType(row["memory_type"]),
+            content=row["content"],
+            importance=float(row["importance"]),
+            relevance_score=row["relevance_score"],
+            similarity=float(row["score"]),
+            source=row["source"],
+            trust_level=float(row["trust_level"])
+            if row["trust_level"] is not None
+            else None,
+            source_attribution=_coerce_json(row["source_attribution"])
+            if row["source_attribution"] is not None
+            else None,
+            created_at=row["created_at"],
+            emotional_valence=row["emotional_valence"],
+        )
+
     def _row_to_memory(self, row: asyncpg.Record) -> Memory:
         return Memory(
             id=row["id"],
             type=MemoryType(row["type"]),
             content=row["content"],
             importance=float(row["importance"]),
+            relevance_score=row["relevance_score"] if "relevance_score" in row else None,
             trust_level=float(row["trust_level"])
             if "trust_level" in row and row["trust_level"] is not None
             else None,
@@ -1027,19 +1926,44 @@ class CognitiveMemorySync:
     def recall(self, query: str, **kwargs: Any) -> RecallResult:
         return self._loop.run_until_complete(self._async.recall(query, **kwargs))
 
+    def recall_many(self, queries: list[str], **kwargs: Any) -> list[RecallResult]:
+        return self._loop.run_until_complete(self._async.recall_many(queries, **kwargs))
+
+    def get_embedding(self, text: str) -> np.ndarray:
+        return self._loop.run_until_complete(self._async.get_embedding(text))
+
+    def recall_with_vectors(
+        self, query: str | Sequence[float] | np.ndarray, **kwargs: Any
+    ) -> tuple[list[Memory], np.ndarray]:
+        return self._loop.run_until_complete(
+            self._async.recall_with_vectors(query, **kwargs)
+        )
+
     def remember(self, content: str, **kwargs: Any) -> UUID:
         return self._loop.run_until_complete(self._async.remember(content, **kwargs))
 
-    def remember_batch(self, memories: Iterable[MemoryInput]) -> list[UUID]:
-        return self._loop.run_until_complete(self._async.remember_batch(memories))
+    def remember_batch(self, memories: Iterable[MemoryInput], **kwargs: Any) -> list[UUID]:
+        return self._loop.run_until_complete(
+            self._async.remember_batch(memories, **kwargs)
+        )
 
     def remember_batch_raw(
-        self, contents: list[str], embeddings: list[list[float]], **kwargs: Any
+        self,
+        contents: list[str],
+        embeddings: Sequence[Sequence[float]] | np.ndarray,
+        **kwargs: Any,
     ) -> list[UUID]:
         return self._loop.run_until_complete(
             self._async.remember_batch_raw(contents, embeddings, **kwargs)
         )
 
+    def bulk_import(
+        self, contents: Iterable[str], embeddings: Iterable[Sequence[float]], **kwargs: Any
+    ) -> int:
+        return self._loop.run_until_complete(
+            self._async.bulk_import(contents, embeddings, **kwargs)
+        )
+
     def connect_memories(
         self, from_id: UUID, to_id: UUID, relationship: RelationshipType, **kwargs: Any
     ) -> None:
@@ -1171,3 +2095,72 @@ def _coerce_json(val: Any) -> Any:
 
         return json.loads(val)
     return val
+
+
+def _coerce_datetime(val: Any) -> datetime | None:
+    if val is None or isinstance(val, datetime):
+        return val
+    text = str(val).replace("Z", "+00:00")
+    # Postgres trims trailing zeros from fractional seconds; fromisoformat (<3.11) wants 3 or 6 digits.
+    m = re.match(r"^(.*?\.)(\d+)(.*)$", text)
+    if m:
+        text = f"{m.group(1)}{m.group(2)[:6].ljust(6, '0')}{m.group(3)}"
+    return datetime.fromisoformat(text)
+
+
+def _json_to_memory(obj: dict[str, Any]) -> Memory:
+    return Memory(
+        id=UUID(str(obj["memory_id"])),
+        type=MemoryType(obj["type"]),
+        content=obj["content"],
+        importance=float(obj["importance"]),
+        relevance_score=float(obj["relevance_score"])
+        if obj.get("relevance_score") is not None
+        else None,
+        similarity=float(obj["score"]) if obj.get("score") is not None else None,
+        source=obj.get("source"),
+        trust_level=float(obj["trust_level"])
+        if obj.get("trust_level") is not None
+        else None,
+        source_attribution=obj.get("source_attribution"),
+        created_at=_coerce_datetime(obj.get("created_at")),
+        emotional_valence=obj.get("emotional_valence"),
+    )
+
+
+def _memory_to_json(memory: Memory) -> dict[str, Any]:
+    return {
+        "memory_id": str(memory.id),
+        "type": memory.type.value,
+        "content": memory.content,
+        "importance": memory.importance,
+        "relevance_score": memory.relevance_score,
+        "score": memory.similarity,
+        "source": memory.source,
+        "trust_level": memory.trust_level,
+        "source_attribution": memory.source_attribution,
+        "created_at": memory.created_at.isoformat() if memory.created_at else None,
+        "emotional_valence": memory.emotional_valence,
+    }
+
+
+def _partial_activation_to_json(pa: PartialActivation) -> dict[str, Any]:
+    return {
+        "cluster_id": str(pa.cluster_id),
+        "cluster_name": pa.cluster_name,
+        "keywords": list(pa.keywords),
+        "emotional_signature": pa.emotional_signature,
+        "cluster_similarity": pa.cluster_similarity,
+        "best_memory_similarity": pa.best_memory_similarity,
+    }
+
+
+def _json_to_partial_activation(obj: dict[str, Any]) -> PartialActivation:
+    return PartialActivation(
+        cluster_id=UUID(str(obj["cluster_id"])),
+        cluster_name=obj["cluster_name"],
+        keywords=list(obj.get("keywords") or []),
+        emotional_signature=obj.get("emotional_signature"),
+        cluster_similarity=float(obj["cluster_similarity"]),
+        best_memory_similarity=float(obj["best_memory_similarity"]),
+    )
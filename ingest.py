@@ -60,6 +60,7 @@ class Config:
     
     # Processing Settings
     batch_size: int = 5  # Chunks to process before committing
+    dedupe: bool = False  # Reinforce near-duplicate memories instead of inserting
     verbose: bool = True
 
 
@@ -689,7 +690,7 @@ class MemoryStore:
         if not inputs:
             return []
 
-        ids = self.client.remember_batch(inputs)
+        ids = self.client.remember_batch(inputs, dedupe=self.config.dedupe)
         created = [str(i) for i in ids]
 
         # Record receipts best-effort; failures should not fail ingestion after commit.
@@ -910,6 +911,8 @@ Examples:
                         help='Target chunk size in characters (default: 2000)')
     parser.add_argument('--no-recursive', action='store_true',
                         help='Do not recursively process directories')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='Merge near-duplicate memories into existing ones instead of inserting')
     parser.add_argument('--quiet', '-q', action='store_true',
                         help='Suppress verbose output')
     
@@ -926,6 +929,7 @@ Examples:
         db_user=args.db_user,
         db_password=args.db_password,
         chunk_size=args.chunk_size,
+        dedupe=args.dedupe,
         verbose=not args.quiet,
     )
     
@@ -7,7 +7,6 @@ These are the function definitions and handlers that allow the model to actively
 recall, search, and explore its memories.
 """
 
-import json
 import re
 from datetime import datetime, timezone
 from dataclasses import dataclass, asdict
@@ -65,6 +64,11 @@ MEMORY_TOOLS = [
                         "type": "number",
                         "description": "Minimum importance score (0.0-1.0). Use to filter for significant memories.",
                         "default": 0.0
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["fast", "balanced", "exact"],
+                        "description": "Recall quality vs. latency: 'fast' for quick lookups, 'balanced' for better recall, 'exact' for an exhaustive search. Omit for the default."
                     }
                 },
                 "required": ["query"]
@@ -343,48 +347,32 @@ class MemoryToolHandler:
         limit = min(args.get('limit', 5), 20)
         memory_types = args.get('memory_types')
         min_importance = args.get('min_importance', 0.0)
+        mode = args.get('mode')
         
         with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # Use the fast_recall function
+            # Filters are applied inside fast_recall, so LIMIT stays exact.
             cur.execute("""
                 SELECT 
-                    memory_id,
-                    content,
-                    memory_type,
-                    score,
-                    source
-                FROM fast_recall(%s, %s)
-            """, (query, limit * 2))  # Get more, then filter
+                    fr.memory_id,
+                    fr.content,
+                    fr.memory_type,
+                    fr.score,
+                    fr.source,
+                    COALESCE(ms.importance, m.importance) AS importance
+                FROM fast_recall(%s, %s, %s::memory_type[], %s, p_mode => %s) fr
+                JOIN memories m ON m.id = fr.memory_id
+                LEFT JOIN memory_stats ms ON ms.memory_id = fr.memory_id
+                ORDER BY fr.score DESC
+            """, (query, limit, memory_types or None, min_importance, mode))
             
             results = cur.fetchall()
             
-            # Filter by type and importance if specified
-            if memory_types or min_importance > 0:
-                cur.execute("""
-                    SELECT id, importance FROM memories 
-                    WHERE id = ANY(%s)
-                """, ([r['memory_id'] for r in results],))
-                
-                importance_map = {str(row['id']): row['importance'] for row in cur.fetchall()}
-                
-                filtered = []
-                for r in results:
-                    mid = str(r['memory_id'])
-                    if memory_types and r['memory_type'] not in memory_types:
-                        continue
-                    if importance_map.get(mid, 0) < min_importance:
-                        continue
-                    r['importance'] = importance_map.get(mid, 0)
-                    filtered.append(r)
-                results = filtered[:limit]
-            
-            # Update access counts
+            # Record accesses (applied by the maintenance flush)
             if results:
-                cur.execute("""
-                    UPDATE memories 
-                    SET access_count = access_count + 1, last_accessed = CURRENT_TIMESTAMP
-                    WHERE id = ANY(%s)
-                """, ([r['memory_id'] for r in results],))
+                cur.execute(
+                    "SELECT record_memory_access(%s::uuid[])",
+                    ([str(r['memory_id']) for r in results],),
+                )
                 self.conn.commit()
         
         return {
@@ -406,19 +394,20 @@ class MemoryToolHandler:
             params = [limit]
             
             if memory_types:
-                type_filter = "AND type = ANY(%s)"
+                type_filter = "AND m.type = ANY(%s)"
                 params.insert(0, memory_types)
             
             cur.execute(f"""
                 SELECT 
-                    id as memory_id,
-                    content,
-                    type as memory_type,
-                    importance,
-                    created_at,
-                    last_accessed
-                FROM memories
-                WHERE status = 'active' {type_filter}
+                    m.id as memory_id,
+                    m.content,
+                    m.type as memory_type,
+                    COALESCE(ms.importance, m.importance) as importance,
+                    m.created_at,
+                    ms.last_accessed
+                FROM memories m
+                LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+                WHERE m.status = 'active' {type_filter}
                 ORDER BY {order_col} DESC NULLS LAST
                 LIMIT %s
             """, params)
@@ -453,11 +442,12 @@ class MemoryToolHandler:
                     m.id as memory_id,
                     m.content,
                     m.type as memory_type,
-                    m.importance,
+                    COALESCE(ms.importance, m.importance) AS importance,
                     m.created_at,
                     em.sequence_order
                 FROM episode_memories em
                 JOIN memories m ON em.memory_id = m.id
+                LEFT JOIN memory_stats ms ON ms.memory_id = m.id
                 WHERE em.episode_id = %s
                 ORDER BY em.sequence_order
             """, (episode_id,))
@@ -499,13 +489,14 @@ class MemoryToolHandler:
                     m.id as memory_id,
                     m.content,
                     m.type as memory_type,
-                    m.importance,
+                    COALESCE(ms.importance, m.importance) AS importance,
                     mc.strength as concept_strength
                 FROM memory_concepts mc
                 JOIN memories m ON mc.memory_id = m.id
+                LEFT JOIN memory_stats ms ON ms.memory_id = m.id
                 WHERE mc.concept_id = %s
                 AND m.status = 'active'
-                ORDER BY mc.strength DESC, m.importance DESC
+                ORDER BY mc.strength DESC, importance DESC
                 LIMIT %s
             """, (concept_id, limit))
             
@@ -742,7 +733,7 @@ class ApiMemoryToolHandler:
         if isinstance(memory_types, list) and memory_types:
             parsed_types = [ApiMemoryType(str(t)) for t in memory_types]
 
-        result = self.client.recall(query, limit=limit, memory_types=parsed_types, min_importance=min_importance, include_partial=False)
+        result = self.client.recall(query, limit=limit, memory_types=parsed_types, min_importance=min_importance, include_partial=False, mode=args.get("mode"))
         self.client.touch_memories([m.id for m in result.memories])
         memories = [
             {
@@ -900,9 +891,10 @@ class ContextEnricher:
     sending to the LLM.
     """
     
-    def __init__(self, db_config: dict, top_k: int = 5):
+    def __init__(self, db_config: dict, top_k: int = 5, recall_cache: str | None = "local"):
         self.db_config = db_config
         self.top_k = top_k
+        self.recall_cache = recall_cache
         self.client: CognitiveMemorySync | None = None
     
     def connect(self):
@@ -914,7 +906,9 @@ class ContextEnricher:
             f"@{self.db_config.get('host', 'localhost')}:{int(self.db_config.get('port', 5432))}"
             f"/{self.db_config.get('dbname', 'agi_memory')}"
         )
-        self.client = CognitiveMemorySync.connect(dsn, min_size=1, max_size=5)
+        self.client = CognitiveMemorySync.connect(
+            dsn, min_size=1, max_size=5, recall_cache=self.recall_cache
+        )
     
     def enrich(self, user_message: str) -> dict:
         """
@@ -1142,7 +1136,7 @@ def cross_join_query(
 
     - Vector: uses `search_similar_memories(query_text, limit)` in Postgres.
     - SQL: optionally filters candidates by joining against `table` with simple equality predicates.
-    - Neighborhood: optionally attaches cached neighbors from `memory_neighborhoods`.
+    - Neighborhood: optionally attaches cached neighbors from `memory_neighbor_edges`.
     """
     if not query_text:
         return []
@@ -1201,53 +1195,31 @@ def cross_join_query(
                 hit_ids = [str(h["memory_id"]) for h in filtered_hits]
                 cur.execute(
                     """
-                    SELECT memory_id, neighbors
-                    FROM memory_neighborhoods
-                    WHERE memory_id = ANY(%s::uuid[])
+                    SELECT e.memory_id, e.neighbor_id, e.weight,
+                           m.type, m.content, COALESCE(ms.importance, m.importance) AS importance
+                    FROM (
+                        SELECT memory_id, neighbor_id, weight,
+                               row_number() OVER (PARTITION BY memory_id ORDER BY weight DESC) AS rn
+                        FROM memory_neighbor_edges
+                        WHERE memory_id = ANY(%s::uuid[])
+                    ) e
+                    JOIN memories m ON m.id = e.neighbor_id
+                    LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+                    WHERE e.rn <= %s
+                    ORDER BY e.memory_id, e.rn
                     """,
-                    (hit_ids,),
+                    (hit_ids, max(0, int(neighbor_limit))),
                 )
-                neighbor_rows = list(cur.fetchall() or [])
-
-                neighbor_ids: set[str] = set()
-                for row in neighbor_rows:
-                    mem_id = str(row["memory_id"])
-                    neighbors = row.get("neighbors") or {}
-                    if isinstance(neighbors, str):
-                        try:
-                            neighbors = json.loads(neighbors)
-                        except Exception:
-                            neighbors = {}
-
-                    pairs: list[tuple[str, float]] = []
-                    if isinstance(neighbors, dict):
-                        for k, v in neighbors.items():
-                            try:
-                                pairs.append((str(k), float(v)))
-                            except Exception:
-                                continue
-                    pairs.sort(key=lambda kv: kv[1], reverse=True)
-
-                    sliced = pairs[: max(0, int(neighbor_limit))]
-                    neighbors_by_id[mem_id] = [{"memory_id": mid, "weight": w} for mid, w in sliced]
-                    neighbor_ids.update(mid for mid, _ in sliced)
-
-                neighbor_content: dict[str, dict] = {}
-                if include_neighbor_content and neighbor_ids:
-                    cur.execute(
-                        """
-                        SELECT id, type, content, importance
-                        FROM memories
-                        WHERE id = ANY(%s::uuid[])
-                        """,
-                        (list(neighbor_ids),),
-                    )
-                    for row in cur.fetchall() or []:
-                        neighbor_content[str(row["id"])] = dict(row)
-
-                    for mem_id, neigh_list in neighbors_by_id.items():
-                        for n in neigh_list:
-                            n["memory"] = neighbor_content.get(n["memory_id"])
+                for row in cur.fetchall() or []:
+                    entry: dict[str, Any] = {"memory_id": str(row["neighbor_id"]), "weight": float(row["weight"])}
+                    if include_neighbor_content:
+                        entry["memory"] = {
+                            "id": row["neighbor_id"],
+                            "type": row["type"],
+                            "content": row["content"],
+                            "importance": row["importance"],
+                        }
+                    neighbors_by_id.setdefault(str(row["memory_id"]), []).append(entry)
 
             results: list[dict] = []
             for hit in filtered_hits:
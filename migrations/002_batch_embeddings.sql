@@ -0,0 +1,311 @@
+-- Patch migration: batched embeddings (get_embeddings) for batch memory / working-memory writes.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Get embeddings for many texts at once (with caching).
+-- Probes embedding_cache for every input in one query, sends only the misses to the
+-- service as batched requests ({"inputs": [...]}, chunked by embedding_config.batch_size),
+-- and writes the new embeddings back to the cache in bulk.
+-- Returns one vector per input, in input order (NULL for NULL/empty inputs).
+CREATE OR REPLACE FUNCTION get_embeddings(text_contents TEXT[])
+RETURNS vector[] AS $$
+DECLARE
+    service_url TEXT;
+    response http_response;
+    request_body TEXT;
+    embedding_json JSONB;
+    embeddings_json JSONB;
+    expected_dim INT;
+    batch_size INT;
+    miss_hashes TEXT[];
+    miss_texts TEXT[];
+    chunk_hashes TEXT[];
+    chunk_texts TEXT[];
+    n_misses INT;
+    chunk_start INT;
+    chunk_len INT;
+    i INT;
+    embedding_array FLOAT[];
+    start_ts TIMESTAMPTZ;
+    retry_seconds INT;
+    retry_interval_seconds FLOAT;
+    last_error TEXT;
+    result vector[];
+BEGIN
+    IF text_contents IS NULL OR COALESCE(array_length(text_contents, 1), 0) = 0 THEN
+        RETURN ARRAY[]::vector[];
+    END IF;
+
+    PERFORM sync_embedding_dimension_config();
+    expected_dim := embedding_dimension();
+
+    -- Distinct uncached inputs (one representative text per hash).
+    SELECT
+        COALESCE(array_agg(h.content_hash ORDER BY h.first_ord), ARRAY[]::TEXT[]),
+        COALESCE(array_agg(h.content ORDER BY h.first_ord), ARRAY[]::TEXT[])
+    INTO miss_hashes, miss_texts
+    FROM (
+        SELECT DISTINCT ON (encode(sha256(t.content::bytea), 'hex'))
+            encode(sha256(t.content::bytea), 'hex') AS content_hash,
+            t.content,
+            t.ord AS first_ord
+        FROM unnest(text_contents) WITH ORDINALITY AS t(content, ord)
+        WHERE t.content IS NOT NULL AND t.content <> ''
+        ORDER BY encode(sha256(t.content::bytea), 'hex'), t.ord
+    ) h
+    WHERE NOT EXISTS (
+        SELECT 1 FROM embedding_cache ec WHERE ec.content_hash = h.content_hash
+    );
+
+    n_misses := COALESCE(array_length(miss_hashes, 1), 0);
+
+    IF n_misses > 0 THEN
+        SELECT value INTO service_url FROM embedding_config WHERE key = 'service_url';
+        batch_size := GREATEST(1, COALESCE(NULLIF((SELECT value FROM embedding_config WHERE key = 'batch_size'), '')::int, 32));
+        retry_seconds := COALESCE(NULLIF((SELECT value FROM embedding_config WHERE key = 'retry_seconds'), '')::int, 30);
+        retry_interval_seconds := COALESCE(NULLIF((SELECT value FROM embedding_config WHERE key = 'retry_interval_seconds'), '')::float, 1.0);
+
+        chunk_start := 1;
+        WHILE chunk_start <= n_misses LOOP
+            chunk_len := LEAST(batch_size, n_misses - chunk_start + 1);
+            chunk_hashes := miss_hashes[chunk_start:chunk_start + chunk_len - 1];
+            chunk_texts := miss_texts[chunk_start:chunk_start + chunk_len - 1];
+
+            request_body := json_build_object('inputs', to_json(chunk_texts))::TEXT;
+
+            -- Make HTTP request (same retry policy as get_embedding).
+            start_ts := clock_timestamp();
+            LOOP
+                BEGIN
+                    SELECT * INTO response FROM http_post(
+                        service_url,
+                        request_body,
+                        'application/json'
+                    );
+
+                    IF response.status = 200 THEN
+                        EXIT;
+                    END IF;
+
+                    IF response.status IN (400, 401, 403, 404, 413, 422) THEN
+                        RAISE EXCEPTION 'Embedding service error: % - %', response.status, response.content;
+                    END IF;
+
+                    last_error := format('status %s: %s', response.status, left(COALESCE(response.content, ''), 500));
+                EXCEPTION
+                    WHEN OTHERS THEN
+                        last_error := SQLERRM;
+                END;
+
+                IF retry_seconds <= 0 OR clock_timestamp() - start_ts >= (retry_seconds || ' seconds')::interval THEN
+                    RAISE EXCEPTION 'Embedding service not available after % seconds: %', retry_seconds, COALESCE(last_error, '<unknown>');
+                END IF;
+
+                PERFORM pg_sleep(GREATEST(0.0, retry_interval_seconds));
+            END LOOP;
+
+            embedding_json := response.content::JSONB;
+
+            -- Normalize to an array of embeddings (handle different response formats)
+            IF jsonb_typeof(embedding_json) = 'object' AND embedding_json ? 'embeddings' THEN
+                -- Format: {"embeddings": [[...], [...]]}
+                embeddings_json := embedding_json->'embeddings';
+            ELSIF jsonb_typeof(embedding_json) = 'object' AND embedding_json ? 'data' THEN
+                -- OpenAI format: {"data": [{"embedding": [...]}, ...]}
+                SELECT jsonb_agg(d->'embedding' ORDER BY ord) INTO embeddings_json
+                FROM jsonb_array_elements(embedding_json->'data') WITH ORDINALITY AS x(d, ord);
+            ELSIF jsonb_typeof(embedding_json) = 'object' AND embedding_json ? 'embedding' THEN
+                -- Format: {"embedding": [...]} (single input only)
+                embeddings_json := jsonb_build_array(embedding_json->'embedding');
+            ELSIF jsonb_typeof(embedding_json->0) = 'array' THEN
+                -- HuggingFace TEI format: [[...], [...]] (array of arrays)
+                embeddings_json := embedding_json;
+            ELSE
+                -- Flat array format: [...] (single input only)
+                embeddings_json := jsonb_build_array(embedding_json);
+            END IF;
+
+            IF COALESCE(jsonb_array_length(embeddings_json), 0) <> chunk_len THEN
+                RAISE EXCEPTION 'Embedding service returned % embeddings for % inputs',
+                    COALESCE(jsonb_array_length(embeddings_json), 0), chunk_len;
+            END IF;
+
+            FOR i IN 1..chunk_len LOOP
+                embedding_array := ARRAY(
+                    SELECT jsonb_array_elements_text(embeddings_json->(i - 1))::FLOAT
+                );
+                IF array_length(embedding_array, 1) IS NULL OR array_length(embedding_array, 1) != expected_dim THEN
+                    RAISE EXCEPTION 'Invalid embedding dimension: expected %, got %', expected_dim, array_length(embedding_array, 1);
+                END IF;
+            END LOOP;
+
+            -- Cache the chunk in one statement
+            INSERT INTO embedding_cache (content_hash, embedding)
+            SELECT
+                chunk_hashes[e.ord],
+                ARRAY(SELECT jsonb_array_elements_text(e.emb)::FLOAT)::vector
+            FROM jsonb_array_elements(embeddings_json) WITH ORDINALITY AS e(emb, ord)
+            ON CONFLICT DO NOTHING;
+
+            chunk_start := chunk_start + chunk_len;
+        END LOOP;
+    END IF;
+
+    SELECT array_agg(ec.embedding ORDER BY t.ord) INTO result
+    FROM unnest(text_contents) WITH ORDINALITY AS t(content, ord)
+    LEFT JOIN embedding_cache ec
+        ON t.content IS NOT NULL
+       AND t.content <> ''
+       AND ec.content_hash = encode(sha256(t.content::bytea), 'hex');
+
+    RETURN result;
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Failed to get embeddings: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batch create memories from JSONB items.
+-- Each item must include: {"type": "semantic|episodic|procedural|strategic", "content": "..."}
+-- Optional keys: importance, emotional_valence, context, action_taken, result, event_time,
+--                confidence, category, related_concepts, source_references, steps, prerequisites,
+--                pattern_description, supporting_evidence, context_applicability,
+--                source_attribution, trust_level.
+CREATE OR REPLACE FUNCTION batch_create_memories(p_items JSONB)
+RETURNS UUID[] AS $$
+DECLARE
+    ids UUID[] := ARRAY[]::UUID[];
+    item JSONB;
+    mtype memory_type;
+    content TEXT;
+    importance FLOAT;
+    new_id UUID;
+    idx INT := 0;
+BEGIN
+    IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' THEN
+        RETURN ids;
+    END IF;
+
+    -- Embed every item up front in one batched call; the per-item creators then hit the cache.
+    PERFORM get_embeddings(ARRAY(
+        SELECT NULLIF(e->>'content', '')
+        FROM jsonb_array_elements(p_items) AS e
+    ));
+
+    FOR item IN SELECT * FROM jsonb_array_elements(p_items)
+    LOOP
+        idx := idx + 1;
+        mtype := NULLIF(item->>'type', '')::memory_type;
+        content := NULLIF(item->>'content', '');
+        IF content IS NULL OR mtype IS NULL THEN
+            RAISE EXCEPTION 'batch_create_memories: item % missing required fields', idx;
+        END IF;
+        importance := COALESCE(NULLIF(item->>'importance', '')::float, 0.5);
+
+        IF mtype = 'episodic' THEN
+            new_id := create_episodic_memory(
+                content,
+                item->'action_taken',
+                item->'context',
+                item->'result',
+                COALESCE(NULLIF(item->>'emotional_valence', '')::float, 0.0),
+                COALESCE(NULLIF(item->>'event_time', '')::timestamptz, CURRENT_TIMESTAMP),
+                importance,
+                item->'source_attribution',
+                NULLIF(item->>'trust_level', '')::float
+            );
+        ELSIF mtype = 'semantic' THEN
+            new_id := create_semantic_memory(
+                content,
+                COALESCE(NULLIF(item->>'confidence', '')::float, 0.8),
+                CASE WHEN item ? 'category' THEN ARRAY(SELECT jsonb_array_elements_text(item->'category')) ELSE NULL END,
+                CASE WHEN item ? 'related_concepts' THEN ARRAY(SELECT jsonb_array_elements_text(item->'related_concepts')) ELSE NULL END,
+                item->'source_references',
+                importance,
+                item->'source_attribution',
+                NULLIF(item->>'trust_level', '')::float
+            );
+        ELSIF mtype = 'procedural' THEN
+            new_id := create_procedural_memory(
+                content,
+                COALESCE(item->'steps', jsonb_build_object('steps', '[]'::jsonb)),
+                item->'prerequisites',
+                importance,
+                item->'source_attribution',
+                NULLIF(item->>'trust_level', '')::float
+            );
+        ELSIF mtype = 'strategic' THEN
+            new_id := create_strategic_memory(
+                content,
+                COALESCE(NULLIF(item->>'pattern_description', ''), content),
+                COALESCE(NULLIF(item->>'confidence_score', '')::float, 0.8),
+                item->'supporting_evidence',
+                item->'context_applicability',
+                importance,
+                item->'source_attribution',
+                NULLIF(item->>'trust_level', '')::float
+            );
+        ELSE
+            RAISE EXCEPTION 'batch_create_memories: item % invalid type %', idx, mtype::text;
+        END IF;
+
+        IF new_id IS NULL THEN
+            RAISE EXCEPTION 'batch_create_memories: item % failed to create memory', idx;
+        END IF;
+        ids := array_append(ids, new_id);
+    END LOOP;
+
+    RETURN ids;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add many items to working memory with one batched embedding call.
+CREATE OR REPLACE FUNCTION add_to_working_memory_batch(
+    p_contents TEXT[],
+    p_expiry INTERVAL DEFAULT INTERVAL '1 hour',
+    p_importance FLOAT DEFAULT 0.3,
+    p_source_attribution JSONB DEFAULT NULL,
+    p_trust_level FLOAT DEFAULT NULL,
+    p_promote_to_long_term BOOLEAN DEFAULT FALSE
+) RETURNS UUID[] AS $$
+DECLARE
+    ids UUID[];
+    embeddings vector[];
+    normalized_source JSONB;
+    effective_trust FLOAT;
+BEGIN
+    IF p_contents IS NULL OR COALESCE(array_length(p_contents, 1), 0) = 0 THEN
+        RETURN ARRAY[]::UUID[];
+    END IF;
+
+    embeddings := get_embeddings(p_contents);
+
+    normalized_source := normalize_source_reference(p_source_attribution);
+    IF normalized_source = '{}'::jsonb THEN
+        normalized_source := jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP);
+    END IF;
+    effective_trust := LEAST(1.0, GREATEST(0.0, COALESCE(p_trust_level, 0.8)));
+
+    -- Pre-assign ids so the result follows input order.
+    SELECT COALESCE(array_agg(gen_random_uuid() ORDER BY t.ord), ARRAY[]::UUID[]) INTO ids
+    FROM unnest(p_contents) WITH ORDINALITY AS t(content, ord)
+    WHERE t.content IS NOT NULL AND t.content <> '';
+
+    INSERT INTO working_memory (id, content, embedding, importance, source_attribution, trust_level, promote_to_long_term, expiry)
+    SELECT
+        ids[t.rn],
+        t.content,
+        embeddings[t.ord],
+        LEAST(1.0, GREATEST(0.0, COALESCE(p_importance, 0.3))),
+        normalized_source,
+        effective_trust,
+        COALESCE(p_promote_to_long_term, false),
+        CURRENT_TIMESTAMP + p_expiry
+    FROM (
+        SELECT u.content, u.ord::int AS ord, (row_number() OVER (ORDER BY u.ord))::int AS rn
+        FROM unnest(p_contents) WITH ORDINALITY AS u(content, ord)
+        WHERE u.content IS NOT NULL AND u.content <> ''
+    ) t;
+
+    RETURN ids;
+END;
+$$ LANGUAGE plpgsql;
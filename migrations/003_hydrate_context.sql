@@ -0,0 +1,328 @@
+-- Patch migration: single-call RAG hydration (hydrate_context) that embeds the query once.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Hot-path recall for a precomputed query embedding (vector seeds + neighborhoods + episodes).
+CREATE OR REPLACE FUNCTION fast_recall_with_embedding(
+    p_query_embedding vector,
+    p_limit INT DEFAULT 10
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+	DECLARE
+	    query_embedding vector;
+	    zero_vec vector;
+	    current_valence FLOAT;
+	BEGIN
+	    query_embedding := p_query_embedding;
+	    IF query_embedding IS NULL THEN
+	        RETURN;
+	    END IF;
+	    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+	    BEGIN
+	        current_valence := NULLIF(get_current_affective_state()->>'valence', '')::float;
+	    EXCEPTION
+	        WHEN OTHERS THEN
+	            current_valence := NULL;
+	    END;
+	    current_valence := COALESCE(current_valence, 0.0);
+
+	    RETURN QUERY
+	    WITH
+    -- Vector seeds (semantic similarity)
+	    seeds AS (
+	        SELECT
+	            m.id,
+	            m.content,
+	            m.type,
+            m.importance,
+            m.decay_rate,
+            m.created_at,
+            m.last_accessed,
+            1 - (m.embedding <=> query_embedding) as sim
+        FROM memories m
+	        WHERE m.status = 'active'
+	          AND m.embedding IS NOT NULL
+	          AND m.embedding <> zero_vec
+	        ORDER BY m.embedding <=> query_embedding
+	        LIMIT GREATEST(p_limit, 5)
+	    ),
+    -- Expand via precomputed neighborhoods
+    associations AS (
+        SELECT
+            (key)::UUID as mem_id,
+            MAX((value::float) * s.sim) as assoc_score
+        FROM seeds s
+        JOIN memory_neighborhoods mn ON s.id = mn.memory_id,
+        jsonb_each_text(mn.neighbors)
+        WHERE NOT mn.is_stale
+        GROUP BY key
+    ),
+    -- Temporal context from episodes
+    temporal AS (
+        SELECT DISTINCT
+            em.memory_id as mem_id,
+            0.15 as temp_score
+        FROM seeds s
+        JOIN episode_memories em_seed ON s.id = em_seed.memory_id
+        JOIN episode_memories em ON em_seed.episode_id = em.episode_id
+        WHERE em.memory_id != s.id
+        LIMIT 20
+    ),
+    -- Combine all candidates
+    candidates AS (
+        SELECT id as mem_id, sim as vector_score, NULL::float as assoc_score, NULL::float as temp_score
+        FROM seeds
+        UNION
+        SELECT mem_id, NULL, assoc_score, NULL FROM associations
+        UNION
+        SELECT mem_id, NULL, NULL, temp_score FROM temporal
+    ),
+    -- Aggregate scores per memory
+    scored AS (
+        SELECT
+            c.mem_id,
+            MAX(c.vector_score) as vector_score,
+            MAX(c.assoc_score) as assoc_score,
+            MAX(c.temp_score) as temp_score
+        FROM candidates c
+        GROUP BY c.mem_id
+    )
+	    SELECT
+	        m.id,
+	        m.content,
+	        m.type,
+	        GREATEST(
+	            COALESCE(sc.vector_score, 0) * 0.5 +
+	            COALESCE(sc.assoc_score, 0) * 0.3 +
+	            COALESCE(sc.temp_score, 0) * 0.15 +
+	            calculate_relevance(m.importance, m.decay_rate, m.created_at, m.last_accessed) * 0.05 +
+	            -- Mood-congruent recall bias (small): prefer episodic memories whose valence matches current affect.
+	            (CASE
+	                WHEN em.emotional_valence IS NULL THEN 0.5
+	                ELSE 1.0 - (ABS(em.emotional_valence - current_valence) / 2.0)
+	            END) * 0.05,
+	            0.001
+	        ) as final_score,
+	        CASE
+	            WHEN sc.vector_score IS NOT NULL THEN 'vector'
+	            WHEN sc.assoc_score IS NOT NULL THEN 'association'
+	            WHEN sc.temp_score IS NOT NULL THEN 'temporal'
+	            ELSE 'fallback'
+	        END as source
+	    FROM scored sc
+	    JOIN memories m ON sc.mem_id = m.id
+	    LEFT JOIN episodic_memories em ON em.memory_id = m.id
+	    WHERE m.status = 'active'
+	    ORDER BY final_score DESC
+	    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Primary retrieval entrypoint: embeds the query text, then runs fast_recall_with_embedding().
+CREATE OR REPLACE FUNCTION fast_recall(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT * FROM fast_recall_with_embedding(get_embedding(p_query_text), p_limit);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Tip-of-tongue clusters for a precomputed query embedding: the query is close to a
+-- cluster centroid but no individual member memory is a strong match.
+CREATE OR REPLACE FUNCTION find_partial_activations_with_embedding(
+    p_query_embedding vector,
+    p_cluster_threshold FLOAT DEFAULT 0.7,
+    p_memory_threshold FLOAT DEFAULT 0.5
+)
+RETURNS TABLE (
+    cluster_id UUID,
+    cluster_name TEXT,
+    keywords TEXT[],
+    emotional_signature JSONB,
+    cluster_similarity FLOAT,
+    best_memory_similarity FLOAT
+) AS $$
+BEGIN
+    IF p_query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        mc.id,
+        mc.name,
+        mc.keywords,
+        mc.emotional_signature,
+        (1 - (mc.centroid_embedding <=> p_query_embedding))::float as cluster_sim,
+        MAX((1 - (m.embedding <=> p_query_embedding))::float) as best_mem_sim
+    FROM memory_clusters mc
+    JOIN memory_cluster_members mcm ON mc.id = mcm.cluster_id
+    JOIN memories m ON mcm.memory_id = m.id
+    WHERE m.status = 'active'
+      AND mc.centroid_embedding IS NOT NULL
+    GROUP BY mc.id, mc.name, mc.keywords, mc.emotional_signature, mc.centroid_embedding
+    HAVING
+        (1 - (mc.centroid_embedding <=> p_query_embedding)) >= p_cluster_threshold
+        AND MAX(1 - (m.embedding <=> p_query_embedding)) < p_memory_threshold;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION find_partial_activations(
+    p_query_text TEXT,
+    p_cluster_threshold FLOAT DEFAULT 0.7,
+    p_memory_threshold FLOAT DEFAULT 0.5
+)
+RETURNS TABLE (
+    cluster_id UUID,
+    cluster_name TEXT,
+    keywords TEXT[],
+    emotional_signature JSONB,
+    cluster_similarity FLOAT,
+    best_memory_similarity FLOAT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT * FROM find_partial_activations_with_embedding(
+        safe_get_embedding(p_query_text),
+        p_cluster_threshold,
+        p_memory_threshold
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drives at or near their urgency threshold (context for turns / hydration)
+CREATE OR REPLACE FUNCTION get_urgent_drives_context()
+RETURNS JSONB AS $$
+BEGIN
+    RETURN COALESCE((
+        SELECT jsonb_agg(
+            jsonb_build_object(
+                'name', name,
+                'level', current_level,
+                'urgency_ratio', current_level / NULLIF(urgency_threshold, 0)
+            )
+            ORDER BY current_level DESC
+        )
+        FROM drives
+        WHERE current_level >= urgency_threshold * 0.8
+    ), '[]'::jsonb);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Extend gather_turn_context with emotional_state
+CREATE OR REPLACE FUNCTION gather_turn_context()
+RETURNS JSONB AS $$
+DECLARE
+    state_record RECORD;
+    action_costs JSONB;
+BEGIN
+    SELECT * INTO state_record FROM heartbeat_state WHERE id = 1;
+
+    SELECT jsonb_object_agg(
+        regexp_replace(key, '^cost_', ''),
+        value
+    ) INTO action_costs
+    FROM heartbeat_config
+    WHERE key LIKE 'cost_%';
+
+    RETURN jsonb_build_object(
+        'agent', get_agent_profile_context(),
+        'environment', get_environment_snapshot(),
+        'goals', get_goals_snapshot(),
+        'recent_memories', get_recent_context(5),
+        'identity', get_identity_context(),
+        'worldview', get_worldview_context(),
+        'self_model', get_self_model_context(25),
+        'narrative', get_narrative_context(),
+        'energy', jsonb_build_object(
+            'current', state_record.current_energy,
+            'max', (SELECT value FROM heartbeat_config WHERE key = 'max_energy')
+        ),
+        'action_costs', action_costs,
+        'heartbeat_number', state_record.heartbeat_count,
+        'urgent_drives', get_urgent_drives_context(),
+        'emotional_state', get_current_affective_state()
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Single-call hydration: embeds the query once and returns recalled memories,
+-- partial activations and the requested context sections as one JSONB document.
+-- Flags (all optional): include_partial, include_identity, include_worldview,
+-- include_emotional_state, include_drives (default true); include_goals (default false).
+CREATE OR REPLACE FUNCTION hydrate_context(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_flags JSONB DEFAULT '{}'::jsonb
+)
+RETURNS JSONB AS $$
+DECLARE
+    flags JSONB := COALESCE(p_flags, '{}'::jsonb);
+    query_embedding vector;
+    result JSONB;
+BEGIN
+    query_embedding := get_embedding(p_query_text);
+
+    result := jsonb_build_object(
+        'memories', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object(
+                    'memory_id', fr.memory_id,
+                    'content', fr.content,
+                    'type', fr.memory_type,
+                    'score', fr.score,
+                    'source', fr.source,
+                    'importance', m.importance,
+                    'trust_level', m.trust_level,
+                    'source_attribution', m.source_attribution,
+                    'created_at', m.created_at,
+                    'emotional_valence', em.emotional_valence
+                )
+                ORDER BY fr.score DESC
+            )
+            FROM fast_recall_with_embedding(query_embedding, p_limit) fr
+            JOIN memories m ON m.id = fr.memory_id
+            LEFT JOIN episodic_memories em ON em.memory_id = fr.memory_id
+        ), '[]'::jsonb)
+    );
+
+    IF COALESCE((flags->>'include_partial')::boolean, TRUE) THEN
+        result := result || jsonb_build_object(
+            'partial_activations', COALESCE((
+                SELECT jsonb_agg(to_jsonb(pa))
+                FROM find_partial_activations_with_embedding(query_embedding) pa
+            ), '[]'::jsonb)
+        );
+    END IF;
+    IF COALESCE((flags->>'include_identity')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('identity', get_identity_context());
+    END IF;
+    IF COALESCE((flags->>'include_worldview')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('worldview', get_worldview_context());
+    END IF;
+    IF COALESCE((flags->>'include_emotional_state')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('emotional_state', get_current_affective_state());
+    END IF;
+    IF COALESCE((flags->>'include_goals')::boolean, FALSE) THEN
+        result := result || jsonb_build_object('goals', get_goals_snapshot());
+    END IF;
+    IF COALESCE((flags->>'include_drives')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('urgent_drives', get_urgent_drives_context());
+    END IF;
+
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql;
+
@@ -0,0 +1,193 @@
+-- Patch migration: versioned turn-context snapshot cache (gather_turn_context reuse).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Monotonic state version for the turn context. Bumped (at commit time) by writes to the
+-- tables gather_turn_context() reads; a cached snapshot is reused while the version is unchanged.
+CREATE SEQUENCE IF NOT EXISTS turn_context_version_seq;
+
+-- Transient snapshot cache (fast writes, lost on crash)
+CREATE UNLOGGED TABLE IF NOT EXISTS turn_context_cache (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),  -- Singleton pattern
+    version BIGINT NOT NULL,
+    snapshot JSONB NOT NULL,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION turn_context_version()
+RETURNS BIGINT AS $$
+    SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM turn_context_version_seq;
+$$ LANGUAGE sql VOLATILE;
+
+CREATE OR REPLACE FUNCTION bump_turn_context_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM nextval('turn_context_version_seq');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Deferred so the bump lands as close to commit as possible (a reader that sees the new
+-- version should also see the new data).
+DROP TRIGGER IF EXISTS trg_turn_context_version_goals ON goals;
+CREATE CONSTRAINT TRIGGER trg_turn_context_version_goals
+    AFTER INSERT OR UPDATE OR DELETE ON goals
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_turn_context_version();
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_drives ON drives;
+CREATE CONSTRAINT TRIGGER trg_turn_context_version_drives
+    AFTER INSERT OR UPDATE OR DELETE ON drives
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_turn_context_version();
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_identity ON identity_aspects;
+CREATE CONSTRAINT TRIGGER trg_turn_context_version_identity
+    AFTER INSERT OR UPDATE OR DELETE ON identity_aspects
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_turn_context_version();
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_worldview ON worldview_primitives;
+CREATE CONSTRAINT TRIGGER trg_turn_context_version_worldview
+    AFTER INSERT OR UPDATE OR DELETE ON worldview_primitives
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_turn_context_version();
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_heartbeat ON heartbeat_state;
+CREATE CONSTRAINT TRIGGER trg_turn_context_version_heartbeat
+    AFTER INSERT OR UPDATE OR DELETE ON heartbeat_state
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_turn_context_version();
+
+-- Access bookkeeping (access_count/importance) does not change the turn context.
+DROP TRIGGER IF EXISTS trg_turn_context_version_memories ON memories;
+CREATE CONSTRAINT TRIGGER trg_turn_context_version_memories
+    AFTER INSERT OR DELETE OR UPDATE OF content, status, trust_level, source_attribution ON memories
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_turn_context_version();
+
+-- Cached gather_turn_context(): recomputed when the state version changes or the snapshot is
+-- older than p_max_age_seconds (graph-backed sections like self_model/narrative are not versioned).
+-- The environment section is time-dependent and always computed fresh.
+CREATE OR REPLACE FUNCTION get_turn_context_snapshot(p_max_age_seconds FLOAT DEFAULT 60)
+RETURNS JSONB AS $$
+DECLARE
+    current_version BIGINT;
+    cached RECORD;
+    snap JSONB;
+BEGIN
+    current_version := turn_context_version();
+
+    SELECT * INTO cached FROM turn_context_cache WHERE id = 1;
+
+    IF FOUND
+       AND cached.version = current_version
+       AND cached.computed_at > clock_timestamp() - make_interval(secs => GREATEST(0, COALESCE(p_max_age_seconds, 0)))
+    THEN
+        snap := cached.snapshot;
+    ELSE
+        snap := gather_turn_context();
+
+        INSERT INTO turn_context_cache (id, version, snapshot, computed_at)
+        VALUES (1, current_version, snap, clock_timestamp())
+        ON CONFLICT (id) DO UPDATE
+        SET version = EXCLUDED.version,
+            snapshot = EXCLUDED.snapshot,
+            computed_at = EXCLUDED.computed_at
+        WHERE turn_context_cache.version <= EXCLUDED.version;
+    END IF;
+
+    RETURN snap || jsonb_build_object(
+        'environment', get_environment_snapshot(),
+        'context_version', current_version
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Single-call hydration: embeds the query once and returns recalled memories,
+-- partial activations and the requested context sections as one JSONB document.
+-- Flags (all optional): include_partial, include_identity, include_worldview,
+-- include_emotional_state, include_drives (default true); include_goals (default false).
+-- Context sections come from the versioned turn-context snapshot; if the caller passes
+-- known_context_version and it is still current, sections are omitted and
+-- context_unchanged is set so the caller can reuse its own copy.
+CREATE OR REPLACE FUNCTION hydrate_context(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_flags JSONB DEFAULT '{}'::jsonb
+)
+RETURNS JSONB AS $$
+DECLARE
+    flags JSONB := COALESCE(p_flags, '{}'::jsonb);
+    query_embedding vector;
+    known_version BIGINT;
+    current_version BIGINT;
+    ctx JSONB;
+    result JSONB;
+BEGIN
+    query_embedding := get_embedding(p_query_text);
+    known_version := NULLIF(flags->>'known_context_version', '')::bigint;
+
+    result := jsonb_build_object(
+        'memories', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object(
+                    'memory_id', fr.memory_id,
+                    'content', fr.content,
+                    'type', fr.memory_type,
+                    'score', fr.score,
+                    'source', fr.source,
+                    'importance', m.importance,
+                    'trust_level', m.trust_level,
+                    'source_attribution', m.source_attribution,
+                    'created_at', m.created_at,
+                    'emotional_valence', em.emotional_valence
+                )
+                ORDER BY fr.score DESC
+            )
+            FROM fast_recall_with_embedding(query_embedding, p_limit) fr
+            JOIN memories m ON m.id = fr.memory_id
+            LEFT JOIN episodic_memories em ON em.memory_id = fr.memory_id
+        ), '[]'::jsonb)
+    );
+
+    IF COALESCE((flags->>'include_partial')::boolean, TRUE) THEN
+        result := result || jsonb_build_object(
+            'partial_activations', COALESCE((
+                SELECT jsonb_agg(to_jsonb(pa))
+                FROM find_partial_activations_with_embedding(query_embedding) pa
+            ), '[]'::jsonb)
+        );
+    END IF;
+    current_version := turn_context_version();
+    result := result || jsonb_build_object('context_version', current_version);
+    IF known_version IS NOT NULL AND known_version = current_version THEN
+        RETURN result || jsonb_build_object('context_unchanged', TRUE);
+    END IF;
+
+    ctx := get_turn_context_snapshot();
+
+    IF COALESCE((flags->>'include_identity')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('identity', ctx->'identity');
+    END IF;
+    IF COALESCE((flags->>'include_worldview')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('worldview', ctx->'worldview');
+    END IF;
+    IF COALESCE((flags->>'include_emotional_state')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('emotional_state', ctx->'emotional_state');
+    END IF;
+    IF COALESCE((flags->>'include_goals')::boolean, FALSE) THEN
+        result := result || jsonb_build_object('goals', ctx->'goals');
+    END IF;
+    IF COALESCE((flags->>'include_drives')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('urgent_drives', ctx->'urgent_drives');
+    END IF;
+
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,206 @@
+-- Patch migration: filtered fast_recall (type / importance / trust / source kind / created_at).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- The filter arguments change the signatures; drop the old ones so calls do not become ambiguous.
+DROP FUNCTION IF EXISTS fast_recall(TEXT, INT);
+DROP FUNCTION IF EXISTS fast_recall_with_embedding(vector, INT);
+
+-- Hot-path recall for a precomputed query embedding (vector seeds + neighborhoods + episodes).
+-- Optional filters (type, importance, trust, source kind, created_at range) are applied inside
+-- the seed scan and to every candidate, so filtered recalls still return up to p_limit rows.
+CREATE OR REPLACE FUNCTION fast_recall_with_embedding(
+    p_query_embedding vector,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    query_embedding vector;
+    zero_vec vector;
+    current_valence FLOAT;
+    has_filters BOOLEAN;
+    prev_iterative_scan TEXT;
+BEGIN
+    query_embedding := p_query_embedding;
+    IF query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+    BEGIN
+        current_valence := NULLIF(get_current_affective_state()->>'valence', '')::float;
+    EXCEPTION
+        WHEN OTHERS THEN
+            current_valence := NULL;
+    END;
+    current_valence := COALESCE(current_valence, 0.0);
+
+    has_filters := p_memory_types IS NOT NULL
+        OR COALESCE(p_min_importance, 0.0) > 0.0
+        OR p_min_trust IS NOT NULL
+        OR p_source_kinds IS NOT NULL
+        OR p_created_after IS NOT NULL
+        OR p_created_before IS NOT NULL;
+
+    -- With filters, let the HNSW scan keep going until enough rows pass them
+    -- (pgvector >= 0.8); otherwise ef_search candidates can all be filtered away.
+    IF has_filters THEN
+        BEGIN
+            prev_iterative_scan := current_setting('hnsw.iterative_scan', true);
+            PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_iterative_scan := NULL;
+        END;
+    END IF;
+
+    RETURN QUERY
+    WITH
+    -- Vector seeds (semantic similarity)
+    seeds AS MATERIALIZED (
+        SELECT
+            m.id,
+            m.content,
+            m.type,
+            m.importance,
+            m.decay_rate,
+            m.created_at,
+            m.last_accessed,
+            1 - (m.embedding <=> query_embedding) as sim
+        FROM memories m
+        WHERE m.status = 'active'
+          AND m.embedding IS NOT NULL
+          AND m.embedding <> zero_vec
+          AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+          AND m.importance >= COALESCE(p_min_importance, 0.0)
+          AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+          AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+          AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+          AND (p_created_before IS NULL OR m.created_at < p_created_before)
+        ORDER BY m.embedding <=> query_embedding
+        LIMIT GREATEST(p_limit, 5)
+    ),
+    -- Expand via precomputed neighborhoods
+    associations AS (
+        SELECT
+            (key)::UUID as mem_id,
+            MAX((value::float) * s.sim) as assoc_score
+        FROM seeds s
+        JOIN memory_neighborhoods mn ON s.id = mn.memory_id,
+        jsonb_each_text(mn.neighbors)
+        WHERE NOT mn.is_stale
+        GROUP BY key
+    ),
+    -- Temporal context from episodes
+    temporal AS (
+        SELECT DISTINCT
+            em.memory_id as mem_id,
+            0.15 as temp_score
+        FROM seeds s
+        JOIN episode_memories em_seed ON s.id = em_seed.memory_id
+        JOIN episode_memories em ON em_seed.episode_id = em.episode_id
+        WHERE em.memory_id != s.id
+        LIMIT 20
+    ),
+    -- Combine all candidates
+    candidates AS (
+        SELECT id as mem_id, sim as vector_score, NULL::float as assoc_score, NULL::float as temp_score
+        FROM seeds
+        UNION
+        SELECT mem_id, NULL, assoc_score, NULL FROM associations
+        UNION
+        SELECT mem_id, NULL, NULL, temp_score FROM temporal
+    ),
+    -- Aggregate scores per memory
+    scored AS (
+        SELECT
+            c.mem_id,
+            MAX(c.vector_score) as vector_score,
+            MAX(c.assoc_score) as assoc_score,
+            MAX(c.temp_score) as temp_score
+        FROM candidates c
+        GROUP BY c.mem_id
+    )
+    SELECT
+        m.id,
+        m.content,
+        m.type,
+        GREATEST(
+            COALESCE(sc.vector_score, 0) * 0.5 +
+            COALESCE(sc.assoc_score, 0) * 0.3 +
+            COALESCE(sc.temp_score, 0) * 0.15 +
+            calculate_relevance(m.importance, m.decay_rate, m.created_at, m.last_accessed) * 0.05 +
+            -- Mood-congruent recall bias (small): prefer episodic memories whose valence matches current affect.
+            (CASE
+                WHEN em.emotional_valence IS NULL THEN 0.5
+                ELSE 1.0 - (ABS(em.emotional_valence - current_valence) / 2.0)
+            END) * 0.05,
+            0.001
+        ) as final_score,
+        CASE
+            WHEN sc.vector_score IS NOT NULL THEN 'vector'
+            WHEN sc.assoc_score IS NOT NULL THEN 'association'
+            WHEN sc.temp_score IS NOT NULL THEN 'temporal'
+            ELSE 'fallback'
+        END as source
+    FROM scored sc
+    JOIN memories m ON sc.mem_id = m.id
+    LEFT JOIN episodic_memories em ON em.memory_id = m.id
+    WHERE m.status = 'active'
+      AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+      AND m.importance >= COALESCE(p_min_importance, 0.0)
+      AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+      AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+      AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+      AND (p_created_before IS NULL OR m.created_at < p_created_before)
+    ORDER BY final_score DESC
+    LIMIT p_limit;
+
+    IF has_filters AND prev_iterative_scan IS NOT NULL THEN
+        PERFORM set_config('hnsw.iterative_scan', prev_iterative_scan, true);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Primary retrieval entrypoint: embeds the query text, then runs fast_recall_with_embedding().
+CREATE OR REPLACE FUNCTION fast_recall(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT * FROM fast_recall_with_embedding(
+        get_embedding(p_query_text),
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION fast_recall(TEXT, INT, memory_type[], FLOAT, FLOAT, TEXT[], TIMESTAMPTZ, TIMESTAMPTZ) IS 'Primary retrieval function combining vector similarity, precomputed associations, and temporal context. Hot path - optimized for speed.';
@@ -0,0 +1,370 @@
+-- Patch migration: hybrid lexical + vector recall (content_tsv + reciprocal rank fusion).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+ALTER TABLE memories
+    ADD COLUMN IF NOT EXISTS content_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+CREATE INDEX IF NOT EXISTS idx_memories_content_tsv ON memories USING GIN (content_tsv);
+
+-- The hybrid argument changes the signatures; drop the old ones so calls do not become ambiguous.
+DROP FUNCTION IF EXISTS fast_recall(TEXT, INT, memory_type[], FLOAT, FLOAT, TEXT[], TIMESTAMPTZ, TIMESTAMPTZ);
+DROP FUNCTION IF EXISTS fast_recall_with_embedding(vector, INT, memory_type[], FLOAT, FLOAT, TEXT[], TIMESTAMPTZ, TIMESTAMPTZ);
+
+-- Hot-path recall for a precomputed query embedding (vector seeds + neighborhoods + episodes).
+-- Optional filters (type, importance, trust, source kind, created_at range) are applied inside
+-- the seed scan and to every candidate, so filtered recalls still return up to p_limit rows.
+-- Hybrid mode (p_lexical_query set): seeds come from the HNSW and full-text (content_tsv)
+-- candidate lists fused with reciprocal rank fusion, so exact names and rare tokens that
+-- embed poorly still surface. Seed scores are then the fused score scaled to [0, 1].
+CREATE OR REPLACE FUNCTION fast_recall_with_embedding(
+    p_query_embedding vector,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_lexical_query TEXT DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    query_embedding vector;
+    zero_vec vector;
+    current_valence FLOAT;
+    has_filters BOOLEAN;
+    prev_iterative_scan TEXT;
+    lexical_query tsquery;
+    seed_limit INT;
+    arm_limit INT;
+    rrf_k CONSTANT INT := 60;
+BEGIN
+    query_embedding := p_query_embedding;
+    IF query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+    BEGIN
+        current_valence := NULLIF(get_current_affective_state()->>'valence', '')::float;
+    EXCEPTION
+        WHEN OTHERS THEN
+            current_valence := NULL;
+    END;
+    current_valence := COALESCE(current_valence, 0.0);
+
+    IF NULLIF(btrim(p_lexical_query), '') IS NOT NULL THEN
+        lexical_query := websearch_to_tsquery('english', p_lexical_query);
+        -- Stopword-only queries have no lexemes; fall back to pure vector seeds.
+        IF numnode(lexical_query) = 0 THEN
+            lexical_query := NULL;
+        END IF;
+    END IF;
+    seed_limit := GREATEST(p_limit, 5);
+    arm_limit := CASE WHEN lexical_query IS NULL THEN seed_limit ELSE seed_limit * 2 END;
+
+    has_filters := p_memory_types IS NOT NULL
+        OR COALESCE(p_min_importance, 0.0) > 0.0
+        OR p_min_trust IS NOT NULL
+        OR p_source_kinds IS NOT NULL
+        OR p_created_after IS NOT NULL
+        OR p_created_before IS NOT NULL;
+
+    -- With filters, let the HNSW scan keep going until enough rows pass them
+    -- (pgvector >= 0.8); otherwise ef_search candidates can all be filtered away.
+    IF has_filters THEN
+        BEGIN
+            prev_iterative_scan := current_setting('hnsw.iterative_scan', true);
+            PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_iterative_scan := NULL;
+        END;
+    END IF;
+
+    RETURN QUERY
+    WITH
+    -- Vector candidates (semantic similarity, HNSW)
+    vector_hits AS MATERIALIZED (
+        SELECT v.id, v.sim, row_number() OVER (ORDER BY v.dist) as rnk
+        FROM (
+            SELECT
+                m.id,
+                m.embedding <=> query_embedding as dist,
+                1 - (m.embedding <=> query_embedding) as sim
+            FROM memories m
+            WHERE m.status = 'active'
+              AND m.embedding IS NOT NULL
+              AND m.embedding <> zero_vec
+              AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+              AND m.importance >= COALESCE(p_min_importance, 0.0)
+              AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+              AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+              AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+              AND (p_created_before IS NULL OR m.created_at < p_created_before)
+            ORDER BY m.embedding <=> query_embedding
+            LIMIT arm_limit
+        ) v
+    ),
+    -- Lexical candidates (full-text, GIN on content_tsv); empty unless hybrid
+    lexical_hits AS MATERIALIZED (
+        SELECT l.id, l.sim, row_number() OVER (ORDER BY l.lex_rank DESC, l.id) as rnk
+        FROM (
+            SELECT
+                m.id,
+                ts_rank_cd(m.content_tsv, lexical_query) as lex_rank,
+                1 - (m.embedding <=> query_embedding) as sim
+            FROM memories m
+            WHERE lexical_query IS NOT NULL
+              AND m.content_tsv @@ lexical_query
+              AND m.status = 'active'
+              AND m.embedding IS NOT NULL
+              AND m.embedding <> zero_vec
+              AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+              AND m.importance >= COALESCE(p_min_importance, 0.0)
+              AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+              AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+              AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+              AND (p_created_before IS NULL OR m.created_at < p_created_before)
+            ORDER BY ts_rank_cd(m.content_tsv, lexical_query) DESC
+            LIMIT arm_limit
+        ) l
+    ),
+    -- Seeds: vector hits as-is, or both lists fused with reciprocal rank fusion
+    seeds AS MATERIALIZED (
+        SELECT
+            f.id,
+            CASE
+                WHEN lexical_query IS NULL THEN f.sim
+                ELSE f.rrf / (2.0 / (rrf_k + 1))
+            END as sim,
+            NOT f.in_vector as lexical_only
+        FROM (
+            SELECT
+                h.id,
+                MAX(h.sim) as sim,
+                SUM(1.0 / (rrf_k + h.rnk)) as rrf,
+                bool_or(h.arm = 'vector') as in_vector
+            FROM (
+                SELECT id, sim, rnk, 'vector' as arm FROM vector_hits
+                UNION ALL
+                SELECT id, sim, rnk, 'lexical' as arm FROM lexical_hits
+            ) h
+            GROUP BY h.id
+        ) f
+        ORDER BY 2 DESC
+        LIMIT seed_limit
+    ),
+    -- Expand via precomputed neighborhoods
+    associations AS (
+        SELECT
+            e.neighbor_id as mem_id,
+            MAX(e.weight * s.sim) as assoc_score
+        FROM seeds s
+        JOIN memory_neighborhoods mn ON mn.memory_id = s.id AND NOT mn.is_stale
+        JOIN memory_neighbor_edges e ON e.memory_id = s.id
+        GROUP BY e.neighbor_id
+    ),
+    -- Temporal context from episodes
+    temporal AS (
+        SELECT DISTINCT
+            em.memory_id as mem_id,
+            0.15 as temp_score
+        FROM seeds s
+        JOIN episode_memories em_seed ON s.id = em_seed.memory_id
+        JOIN episode_memories em ON em_seed.episode_id = em.episode_id
+        WHERE em.memory_id != s.id
+        LIMIT 20
+    ),
+    -- Combine all candidates
+    candidates AS (
+        SELECT id as mem_id, sim as vector_score, NULL::float as assoc_score, NULL::float as temp_score, lexical_only
+        FROM seeds
+        UNION
+        SELECT mem_id, NULL, assoc_score, NULL, NULL FROM associations
+        UNION
+        SELECT mem_id, NULL, NULL, temp_score, NULL FROM temporal
+    ),
+    -- Aggregate scores per memory
+    scored AS (
+        SELECT
+            c.mem_id,
+            MAX(c.vector_score) as vector_score,
+            MAX(c.assoc_score) as assoc_score,
+            MAX(c.temp_score) as temp_score,
+            bool_or(c.lexical_only) as lexical_only
+        FROM candidates c
+        GROUP BY c.mem_id
+    )
+    SELECT
+        m.id,
+        m.content,
+        m.type,
+        GREATEST(
+            COALESCE(sc.vector_score, 0) * 0.5 +
+            COALESCE(sc.assoc_score, 0) * 0.3 +
+            COALESCE(sc.temp_score, 0) * 0.15 +
+            calculate_relevance(m.importance, m.decay_rate, m.created_at, m.last_accessed) * 0.05 +
+            -- Mood-congruent recall bias (small): prefer episodic memories whose valence matches current affect.
+            (CASE
+                WHEN em.emotional_valence IS NULL THEN 0.5
+                ELSE 1.0 - (ABS(em.emotional_valence - current_valence) / 2.0)
+            END) * 0.05,
+            0.001
+        ) as final_score,
+        CASE
+            WHEN sc.vector_score IS NOT NULL AND sc.lexical_only THEN 'lexical'
+            WHEN sc.vector_score IS NOT NULL THEN 'vector'
+            WHEN sc.assoc_score IS NOT NULL THEN 'association'
+            WHEN sc.temp_score IS NOT NULL THEN 'temporal'
+            ELSE 'fallback'
+        END as source
+    FROM scored sc
+    JOIN memories m ON sc.mem_id = m.id
+    LEFT JOIN episodic_memories em ON em.memory_id = m.id
+    WHERE m.status = 'active'
+      AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+      AND m.importance >= COALESCE(p_min_importance, 0.0)
+      AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+      AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+      AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+      AND (p_created_before IS NULL OR m.created_at < p_created_before)
+    ORDER BY final_score DESC
+    LIMIT p_limit;
+
+    IF has_filters AND prev_iterative_scan IS NOT NULL THEN
+        PERFORM set_config('hnsw.iterative_scan', prev_iterative_scan, true);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Primary retrieval entrypoint: embeds the query text, then runs fast_recall_with_embedding().
+-- p_hybrid also searches content_tsv with the query text and fuses both candidate lists.
+CREATE OR REPLACE FUNCTION fast_recall(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_hybrid BOOLEAN DEFAULT FALSE
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT * FROM fast_recall_with_embedding(
+        get_embedding(p_query_text),
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        CASE WHEN p_hybrid THEN p_query_text END
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Single-call hydration: embeds the query once and returns recalled memories,
+-- partial activations and the requested context sections as one JSONB document.
+-- Flags (all optional): include_partial, include_identity, include_worldview,
+-- include_emotional_state, include_drives (default true); include_goals, hybrid (default false).
+-- Context sections come from the versioned turn-context snapshot; if the caller passes
+-- known_context_version and it is still current, sections are omitted and
+-- context_unchanged is set so the caller can reuse its own copy.
+CREATE OR REPLACE FUNCTION hydrate_context(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_flags JSONB DEFAULT '{}'::jsonb
+)
+RETURNS JSONB AS $$
+DECLARE
+    flags JSONB := COALESCE(p_flags, '{}'::jsonb);
+    query_embedding vector;
+    known_version BIGINT;
+    current_version BIGINT;
+    ctx JSONB;
+    result JSONB;
+BEGIN
+    query_embedding := get_embedding(p_query_text);
+    known_version := NULLIF(flags->>'known_context_version', '')::bigint;
+
+    result := jsonb_build_object(
+        'memories', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object(
+                    'memory_id', fr.memory_id,
+                    'content', fr.content,
+                    'type', fr.memory_type,
+                    'score', fr.score,
+                    'source', fr.source,
+                    'importance', m.importance,
+                    'trust_level', m.trust_level,
+                    'source_attribution', m.source_attribution,
+                    'created_at', m.created_at,
+                    'emotional_valence', em.emotional_valence
+                )
+                ORDER BY fr.score DESC
+            )
+            FROM fast_recall_with_embedding(
+                query_embedding,
+                p_limit,
+                p_lexical_query => CASE
+                    WHEN COALESCE((flags->>'hybrid')::boolean, FALSE) THEN p_query_text
+                END
+            ) fr
+            JOIN memories m ON m.id = fr.memory_id
+            LEFT JOIN episodic_memories em ON em.memory_id = fr.memory_id
+        ), '[]'::jsonb)
+    );
+
+    IF COALESCE((flags->>'include_partial')::boolean, TRUE) THEN
+        result := result || jsonb_build_object(
+            'partial_activations', COALESCE((
+                SELECT jsonb_agg(to_jsonb(pa))
+                FROM find_partial_activations_with_embedding(query_embedding) pa
+            ), '[]'::jsonb)
+        );
+    END IF;
+    current_version := turn_context_version();
+    result := result || jsonb_build_object('context_version', current_version);
+    IF known_version IS NOT NULL AND known_version = current_version THEN
+        RETURN result || jsonb_build_object('context_unchanged', TRUE);
+    END IF;
+
+    ctx := get_turn_context_snapshot();
+
+    IF COALESCE((flags->>'include_identity')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('identity', ctx->'identity');
+    END IF;
+    IF COALESCE((flags->>'include_worldview')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('worldview', ctx->'worldview');
+    END IF;
+    IF COALESCE((flags->>'include_emotional_state')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('emotional_state', ctx->'emotional_state');
+    END IF;
+    IF COALESCE((flags->>'include_goals')::boolean, FALSE) THEN
+        result := result || jsonb_build_object('goals', ctx->'goals');
+    END IF;
+    IF COALESCE((flags->>'include_drives')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('urgent_drives', ctx->'urgent_drives');
+    END IF;
+
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql;
+
+
+COMMENT ON FUNCTION fast_recall(TEXT, INT, memory_type[], FLOAT, FLOAT, TEXT[], TIMESTAMPTZ, TIMESTAMPTZ, BOOLEAN) IS 'Primary retrieval function combining vector similarity, precomputed associations, and temporal context. Hot path - optimized for speed.';
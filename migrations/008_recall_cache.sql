@@ -0,0 +1,552 @@
+-- Patch migration: recall result cache with a global memory-write watermark.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Global memory-write watermark. Bumped (at commit time) by writes that can change recall
+-- results; cached recalls are served only while the watermark is unchanged.
+CREATE SEQUENCE IF NOT EXISTS memory_write_version_seq;
+
+-- Shared recall results keyed by recall_cache_key() (fast writes, lost on crash)
+CREATE UNLOGGED TABLE IF NOT EXISTS recall_cache (
+    cache_key TEXT PRIMARY KEY,
+    write_version BIGINT NOT NULL,
+    results JSONB NOT NULL,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION memory_write_version()
+RETURNS BIGINT AS $$
+    SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM memory_write_version_seq;
+$$ LANGUAGE sql VOLATILE;
+
+CREATE OR REPLACE FUNCTION bump_memory_write_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM nextval('memory_write_version_seq');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Access bookkeeping (access_count/last_accessed) does not invalidate cached recalls.
+DROP TRIGGER IF EXISTS trg_memory_write_version_memories ON memories;
+CREATE CONSTRAINT TRIGGER trg_memory_write_version_memories
+    AFTER INSERT OR DELETE OR UPDATE OF
+        content, embedding, status, type, importance, trust_level, source_attribution, decay_rate, created_at
+    ON memories
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_memory_write_version();
+
+-- Neighborhood edges are only rewritten together with their memory_neighborhoods row.
+DROP TRIGGER IF EXISTS trg_memory_write_version_neighborhoods ON memory_neighborhoods;
+CREATE CONSTRAINT TRIGGER trg_memory_write_version_neighborhoods
+    AFTER INSERT OR UPDATE OR DELETE ON memory_neighborhoods
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_memory_write_version();
+
+-- Cache key for a recall: normalized query text (trimmed, whitespace-collapsed, lowercased)
+-- plus the recall parameters (limit, filters, mode) as canonical JSONB text.
+CREATE OR REPLACE FUNCTION recall_cache_key(p_query_text TEXT, p_params JSONB DEFAULT '{}'::jsonb)
+RETURNS TEXT AS $$
+    SELECT encode(
+        sha256(convert_to(
+            lower(regexp_replace(btrim(COALESCE(p_query_text, '')), '\s+', ' ', 'g'))
+                || E'\x1f' || COALESCE(p_params, '{}'::jsonb)::text,
+            'UTF8'
+        )),
+        'hex'
+    );
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Cached results for p_cache_key, or NULL if missing, written before the current
+-- watermark, or older than p_max_age_seconds (time-dependent relevance still drifts).
+CREATE OR REPLACE FUNCTION get_cached_recall(p_cache_key TEXT, p_max_age_seconds FLOAT DEFAULT 300)
+RETURNS JSONB AS $$
+    SELECT rc.results
+    FROM recall_cache rc
+    WHERE rc.cache_key = p_cache_key
+      AND rc.write_version = memory_write_version()
+      AND rc.computed_at > clock_timestamp() - make_interval(secs => GREATEST(0, COALESCE(p_max_age_seconds, 0)));
+$$ LANGUAGE sql VOLATILE;
+
+-- Store results computed while the watermark was p_write_version (read it BEFORE recalling,
+-- so a concurrent write can only make the entry look older than it is, never newer).
+CREATE OR REPLACE FUNCTION put_cached_recall(p_cache_key TEXT, p_write_version BIGINT, p_results JSONB)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO recall_cache (cache_key, write_version, results, computed_at)
+    VALUES (p_cache_key, p_write_version, COALESCE(p_results, '[]'::jsonb), clock_timestamp())
+    ON CONFLICT (cache_key) DO UPDATE
+    SET write_version = EXCLUDED.write_version,
+        results = EXCLUDED.results,
+        computed_at = EXCLUDED.computed_at
+    WHERE recall_cache.write_version <= EXCLUDED.write_version;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop entries that can no longer be served.
+CREATE OR REPLACE FUNCTION cleanup_recall_cache(p_max_age_seconds FLOAT DEFAULT 300)
+RETURNS INT AS $$
+DECLARE
+    deleted_count INT;
+BEGIN
+    DELETE FROM recall_cache
+    WHERE write_version < memory_write_version()
+       OR computed_at < clock_timestamp() - make_interval(secs => GREATEST(0, COALESCE(p_max_age_seconds, 0)));
+
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    RETURN deleted_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run a single subconscious maintenance tick: consolidation + pruning + indexing upkeep.
+CREATE OR REPLACE FUNCTION run_subconscious_maintenance(p_params JSONB DEFAULT '{}'::jsonb)
+RETURNS JSONB AS $$
+DECLARE
+    got_lock BOOLEAN;
+    min_imp FLOAT;
+    min_acc INT;
+    neighborhood_batch INT;
+    cache_days INT;
+    wm_stats JSONB;
+    recomputed INT;
+    cache_deleted INT;
+    recall_cache_deleted INT;
+BEGIN
+    got_lock := pg_try_advisory_lock(hashtext('agi_subconscious_maintenance'));
+    IF NOT got_lock THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'locked');
+    END IF;
+
+    min_imp := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_importance', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_importance'),
+        0.75
+    );
+    min_acc := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_accesses', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_accesses')::int,
+        3
+    );
+    neighborhood_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size')::int,
+        10
+    );
+    cache_days := COALESCE(
+        NULLIF(p_params->>'embedding_cache_older_than_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'embedding_cache_older_than_days')::int,
+        7
+    );
+
+    wm_stats := cleanup_working_memory_with_stats(min_imp, min_acc);
+    recomputed := batch_recompute_neighborhoods(neighborhood_batch);
+    cache_deleted := cleanup_embedding_cache((cache_days || ' days')::interval);
+    recall_cache_deleted := cleanup_recall_cache();
+
+    UPDATE maintenance_state
+    SET last_maintenance_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+
+    -- Log the maintenance run for dashboard
+    INSERT INTO maintenance_log (
+        ran_at,
+        neighborhoods_recomputed,
+        embedding_cache_deleted,
+        working_memory_deleted,
+        working_memory_promoted,
+        success
+    ) VALUES (
+        CURRENT_TIMESTAMP,
+        COALESCE(recomputed, 0),
+        COALESCE(cache_deleted, 0),
+        COALESCE(NULLIF(wm_stats->>'deleted_count', '')::int, 0),
+        COALESCE(NULLIF(wm_stats->>'promoted_count', '')::int, 0),
+        true
+    );
+
+    PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'working_memory', wm_stats,
+        'neighborhoods_recomputed', COALESCE(recomputed, 0),
+        'embedding_cache_deleted', COALESCE(cache_deleted, 0),
+        'recall_cache_deleted', COALESCE(recall_cache_deleted, 0),
+        'ran_at', CURRENT_TIMESTAMP
+    );
+EXCEPTION
+    WHEN OTHERS THEN
+        PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+        RAISE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Heartbeat recall action serves repeated queries from recall_cache.
+CREATE OR REPLACE FUNCTION public.execute_heartbeat_action(p_heartbeat_id uuid, p_action text, p_params jsonb DEFAULT '{}'::jsonb)
+ RETURNS jsonb
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+    action_kind heartbeat_action;
+    action_cost FLOAT;
+    current_e FLOAT;
+    result JSONB;
+    queued_call_id UUID;
+    outbox_id UUID;
+    remembered_id UUID;
+    boundary_hits JSONB;
+    boundary_content TEXT;
+BEGIN
+    BEGIN
+        action_kind := p_action::heartbeat_action;
+    EXCEPTION
+        WHEN invalid_text_representation THEN
+            RETURN jsonb_build_object('success', false, 'error', 'Unknown action: ' || COALESCE(p_action, '<null>'));
+    END;
+
+    action_cost := get_action_cost(p_action);
+    current_e := get_current_energy();
+
+    IF current_e < action_cost THEN
+        RETURN jsonb_build_object(
+            'success', false,
+            'error', 'Insufficient energy',
+            'required', action_cost,
+            'available', current_e
+        );
+    END IF;
+
+    IF p_action IN ('reach_out_public', 'synthesize') THEN
+        boundary_content := COALESCE(p_params->>'content', '');
+        SELECT COALESCE(jsonb_agg(row_to_json(r)), '[]'::jsonb)
+        INTO boundary_hits
+        FROM check_boundaries(boundary_content) r;
+
+        IF boundary_hits IS NOT NULL AND jsonb_array_length(boundary_hits) > 0 THEN
+            IF EXISTS (
+                SELECT 1
+                FROM jsonb_array_elements(boundary_hits) e
+                WHERE e->>'response_type' = 'refuse'
+            ) THEN
+                RETURN jsonb_build_object(
+                    'success', false,
+                    'error', 'Boundary triggered',
+                    'boundaries', boundary_hits
+                );
+            END IF;
+        END IF;
+    END IF;
+
+    PERFORM update_energy(-action_cost);
+
+    CASE p_action
+        WHEN 'observe' THEN
+            result := jsonb_build_object('environment', get_environment_snapshot());
+
+        WHEN 'review_goals' THEN
+            result := jsonb_build_object('goals', get_goals_snapshot());
+
+        WHEN 'remember' THEN
+            remembered_id := create_episodic_memory(
+                p_content := COALESCE(p_params->>'content', ''),
+                p_context := COALESCE(p_params, '{}'::jsonb) || jsonb_build_object('heartbeat_id', p_heartbeat_id),
+                p_emotional_valence := COALESCE((p_params->>'emotional_valence')::float, 0),
+                p_importance := COALESCE((p_params->>'importance')::float, 0.4)
+            );
+            result := jsonb_build_object('memory_id', remembered_id);
+
+        WHEN 'recall' THEN
+            DECLARE
+                v_query TEXT := p_params->>'query';
+                v_limit INT := COALESCE((p_params->>'limit')::int, 5);
+                v_cache_key TEXT;
+                v_version BIGINT;
+            BEGIN
+                v_cache_key := recall_cache_key(v_query, jsonb_build_object('limit', v_limit, 'caller', 'heartbeat'));
+                v_version := memory_write_version();
+                result := get_cached_recall(v_cache_key);
+                IF result IS NULL THEN
+                    SELECT jsonb_agg(row_to_json(r)) INTO result
+                    FROM fast_recall(v_query, v_limit) r;
+                    result := COALESCE(result, '[]'::jsonb);
+                    PERFORM put_cached_recall(v_cache_key, v_version, result);
+                END IF;
+            END;
+            result := jsonb_build_object('memories', result);
+            PERFORM satisfy_drive('curiosity', 0.2);
+
+        WHEN 'connect' THEN
+            DECLARE
+                v_from uuid;
+                v_to uuid;
+                v_from_raw text;
+                v_to_raw text;
+                v_rel_text text;
+                v_rel graph_edge_type;
+            BEGIN
+                v_from_raw := p_params->>'from_id';
+                v_to_raw := p_params->>'to_id';
+
+                -- Try to resolve references (UUID or semantic label)
+                v_from := resolve_memory_reference(v_from_raw);
+                v_to := resolve_memory_reference(v_to_raw);
+                v_rel_text := NULLIF(btrim(COALESCE(p_params->>'relationship_type','')), '');
+
+                -- Reject + salvage: could not resolve IDs or missing relationship_type
+                IF v_from IS NULL OR v_to IS NULL OR v_rel_text IS NULL THEN
+                    remembered_id := create_episodic_memory(
+                        p_content := 'Rejected connect proposal (unresolved references). Raw: ' || COALESCE(p_params::text, '{}'),
+                        p_context := jsonb_build_object(
+                            'kind','ingestion_reject',
+                            'action','connect',
+                            'reason','Unresolved memory references',
+                            'from_raw', COALESCE(v_from_raw, '<missing>'),
+                            'to_raw', COALESCE(v_to_raw, '<missing>'),
+                            'from_resolved', v_from IS NOT NULL,
+                            'to_resolved', v_to IS NOT NULL,
+                            'heartbeat_id', p_heartbeat_id
+                        ),
+                        p_emotional_valence := 0,
+                        p_importance := 0.2
+                    );
+
+                    RETURN jsonb_build_object(
+                        'success', false,
+                        'error', 'Unresolved memory references',
+                        'salvaged_memory_id', remembered_id,
+                        'details', jsonb_build_object(
+                            'from_raw', COALESCE(v_from_raw,'<missing>'),
+                            'to_raw', COALESCE(v_to_raw,'<missing>'),
+                            'from_resolved', v_from,
+                            'to_resolved', v_to,
+                            'relationship_type', COALESCE(v_rel_text,'<missing>')
+                        )
+                    );
+                END IF;
+
+                -- Reject + salvage: relationship_type must be a valid enum
+                BEGIN
+                    v_rel := v_rel_text::graph_edge_type;
+                EXCEPTION WHEN invalid_text_representation THEN
+                    remembered_id := create_episodic_memory(
+                        p_content := 'Rejected connect proposal (invalid relationship_type enum). relationship_type=' ||
+                                     COALESCE(v_rel_text,'<null>') || '. Raw: ' || COALESCE(p_params::text, '{}'),
+                        p_context := jsonb_build_object(
+                            'kind','ingestion_reject',
+                            'action','connect',
+                            'reason','Invalid relationship_type enum',
+                            'relationship_type', v_rel_text,
+                            'heartbeat_id', p_heartbeat_id
+                        ),
+                        p_emotional_valence := 0,
+                        p_importance := 0.2
+                    );
+
+                    RETURN jsonb_build_object(
+                        'success', false,
+                        'error', 'Invalid relationship_type enum',
+                        'relationship_type', v_rel_text,
+                        'salvaged_memory_id', remembered_id
+                    );
+                END;
+
+                PERFORM create_memory_relationship(
+                    v_from,
+                    v_to,
+                    v_rel,
+                    COALESCE(p_params->'properties', '{}'::jsonb)
+                );
+                result := jsonb_build_object(
+                    'connected', true,
+                    'from_id', v_from,
+                    'to_id', v_to,
+                    'resolved_from', v_from_raw,
+                    'resolved_to', v_to_raw
+                );
+                PERFORM satisfy_drive('coherence', 0.1);
+            END;
+
+        WHEN 'reprioritize' THEN
+            DECLARE
+                v_goal_id UUID;
+                v_goal_raw TEXT;
+            BEGIN
+                -- Accept both 'goal_id' and 'goal' keys (LLM sometimes uses either)
+                v_goal_raw := COALESCE(p_params->>'goal_id', p_params->>'goal');
+                v_goal_id := resolve_goal_reference(v_goal_raw);
+
+                IF v_goal_id IS NULL THEN
+                    -- Salvage the intent
+                    remembered_id := create_episodic_memory(
+                        p_content := 'Rejected reprioritize (unresolved goal). Raw: ' || COALESCE(p_params::text, '{}'),
+                        p_context := jsonb_build_object(
+                            'kind', 'ingestion_reject',
+                            'action', 'reprioritize',
+                            'reason', 'Unresolved goal reference',
+                            'goal_raw', COALESCE(v_goal_raw, '<missing>'),
+                            'heartbeat_id', p_heartbeat_id
+                        ),
+                        p_emotional_valence := 0,
+                        p_importance := 0.2
+                    );
+                    RETURN jsonb_build_object(
+                        'success', false,
+                        'error', 'Unresolved goal reference',
+                        'salvaged_memory_id', remembered_id,
+                        'goal_raw', v_goal_raw
+                    );
+                END IF;
+
+                PERFORM change_goal_priority(
+                    v_goal_id,
+                    (p_params->>'new_priority')::goal_priority,
+                    p_params->>'reason'
+                );
+                IF (p_params->>'new_priority') = 'completed' THEN
+                    PERFORM satisfy_drive('competence', 0.4);
+                END IF;
+                result := jsonb_build_object(
+                    'reprioritized', true,
+                    'goal_id', v_goal_id,
+                    'resolved_from', v_goal_raw
+                );
+            END;
+
+        WHEN 'reflect' THEN
+            INSERT INTO external_calls (call_type, input, heartbeat_id)
+            VALUES (
+                'think',
+                jsonb_build_object(
+                    'kind', 'reflect',
+                    'recent_memories', get_recent_context(20),
+                    'identity', get_identity_context(),
+                    'worldview', get_worldview_context(),
+                    'contradictions', (
+                        SELECT COALESCE(jsonb_agg(row_to_json(t)), '[]'::jsonb)
+                        FROM (SELECT * FROM find_contradictions(NULL) LIMIT 5) t
+                    ),
+                    'goals', get_goals_snapshot(),
+                    'heartbeat_id', p_heartbeat_id,
+                    'instructions', 'Analyze patterns. Note contradictions. Suggest identity updates. Discover relationships between memories.'
+                ),
+                p_heartbeat_id
+            )
+            RETURNING id INTO queued_call_id;
+            result := jsonb_build_object('queued', true, 'external_call_id', queued_call_id);
+            PERFORM satisfy_drive('coherence', 0.2);
+
+        WHEN 'maintain' THEN
+            IF p_params ? 'worldview_id' THEN
+                -- Harden: worldview_id can be semantic text; only act if it's a real UUID
+                DECLARE wid uuid;
+                BEGIN
+                    wid := public.try_uuid(p_params->>'worldview_id');
+
+                    IF wid IS NOT NULL THEN
+                        UPDATE worldview_primitives
+                        SET confidence = COALESCE((p_params->>'new_confidence')::float, confidence),
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE id = wid;
+                    END IF;
+                END;
+            END IF;
+            result := jsonb_build_object('maintained', true);
+            PERFORM satisfy_drive('coherence', 0.1);
+
+        WHEN 'brainstorm_goals' THEN
+            INSERT INTO external_calls (call_type, input, heartbeat_id)
+            VALUES (
+                'think',
+                jsonb_build_object(
+                    'kind', 'brainstorm_goals',
+                    'heartbeat_id', p_heartbeat_id,
+                    'context', gather_turn_context(),
+                    'params', COALESCE(p_params, '{}'::jsonb)
+                ),
+                p_heartbeat_id
+            )
+            RETURNING id INTO queued_call_id;
+            result := jsonb_build_object('queued', true, 'external_call_id', queued_call_id);
+
+        WHEN 'inquire_shallow', 'inquire_deep' THEN
+            INSERT INTO external_calls (call_type, input, heartbeat_id)
+            VALUES (
+                'think',
+                jsonb_build_object(
+                    'kind', 'inquire',
+                    'depth', p_action,
+                    'heartbeat_id', p_heartbeat_id,
+                    'query', COALESCE(p_params->>'query', p_params->>'question'),
+                    'context', gather_turn_context(),
+                    'params', COALESCE(p_params, '{}'::jsonb)
+                ),
+                p_heartbeat_id
+            )
+            RETURNING id INTO queued_call_id;
+            result := jsonb_build_object('queued', true, 'external_call_id', queued_call_id);
+            PERFORM satisfy_drive('curiosity', 0.2);
+
+        WHEN 'synthesize' THEN
+            DECLARE synth_id UUID;
+            DECLARE tags text[];
+            BEGIN
+                tags := ARRAY['synthesis', COALESCE(p_params->>'topic', 'general')]::text[];
+                synth_id := create_semantic_memory(
+                    p_params->>'content',
+                    COALESCE((p_params->>'confidence')::float, 0.8),
+                    tags,
+                    NULL,
+                    jsonb_build_object('heartbeat_id', p_heartbeat_id, 'sources', p_params->'sources', 'boundaries', boundary_hits),
+                    0.7
+                );
+                result := jsonb_build_object('synthesis_memory_id', synth_id, 'boundaries', boundary_hits);
+            END;
+
+        WHEN 'reach_out_user' THEN
+            INSERT INTO outbox_messages (kind, payload)
+            VALUES (
+                'user',
+                jsonb_build_object(
+                    'message', p_params->>'message',
+                    'intent', p_params->>'intent',
+                    'heartbeat_id', p_heartbeat_id
+                )
+            )
+            RETURNING id INTO outbox_id;
+            result := jsonb_build_object('queued', true, 'outbox_id', outbox_id);
+            PERFORM satisfy_drive('connection', 0.3);
+
+        WHEN 'reach_out_public' THEN
+            INSERT INTO outbox_messages (kind, payload)
+            VALUES (
+                'public',
+                jsonb_build_object(
+                    'platform', p_params->>'platform',
+                    'content', p_params->>'content',
+                    'heartbeat_id', p_heartbeat_id,
+                    'boundaries', boundary_hits
+                )
+            )
+            RETURNING id INTO outbox_id;
+            result := jsonb_build_object('queued', true, 'outbox_id', outbox_id, 'boundaries', boundary_hits);
+            PERFORM satisfy_drive('connection', 0.3);
+
+        WHEN 'rest' THEN
+            result := jsonb_build_object('rested', true, 'energy_preserved', current_e - action_cost);
+            PERFORM satisfy_drive('rest', 0.4);
+
+        ELSE
+            RETURN jsonb_build_object('success', false, 'error', 'Unknown action: ' || COALESCE(p_action, '<null>'));
+    END CASE;
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'action', p_action,
+        'cost', action_cost,
+        'energy_remaining', get_current_energy(),
+        'result', result
+    );
+END;
+$function$;
@@ -0,0 +1,504 @@
+-- Patch migration: stored memories.relevance_score refreshed by subconscious maintenance.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+ALTER TABLE memories ADD COLUMN IF NOT EXISTS relevance_score FLOAT;
+ALTER TABLE memories ADD COLUMN IF NOT EXISTS relevance_computed_at TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS idx_memories_relevance ON memories (relevance_score DESC) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_memories_relevance_computed ON memories (relevance_computed_at ASC NULLS FIRST) WHERE status = 'active';
+
+INSERT INTO maintenance_config (key, value, description) VALUES
+    ('relevance_batch_size', 500, 'How many stored memory relevance scores to refresh per tick'),
+    ('relevance_max_age_minutes', 60, 'Minutes before a stored relevance score is refreshed even if the memory is unchanged')
+ON CONFLICT (key) DO NOTHING;
+
+-- Calculate age in days (used for decay). STABLE, not IMMUTABLE: it depends on NOW().
+CREATE OR REPLACE FUNCTION age_in_days(ts TIMESTAMPTZ)
+RETURNS FLOAT
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT EXTRACT(EPOCH FROM (NOW() - ts)) / 86400.0;
+$$;
+
+-- Calculate relevance score dynamically (memories.relevance_score caches it)
+CREATE OR REPLACE FUNCTION calculate_relevance(
+    p_importance FLOAT,
+    p_decay_rate FLOAT,
+    p_created_at TIMESTAMPTZ,
+    p_last_accessed TIMESTAMPTZ
+) RETURNS FLOAT
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT p_importance * EXP(
+        -p_decay_rate * LEAST(
+            age_in_days(p_created_at),
+            age_in_days(COALESCE(p_last_accessed, p_created_at)) * 0.5
+        )
+    );
+$$;
+
+-- Relevance refreshes (which set relevance_computed_at) are bookkeeping, not modifications.
+DROP TRIGGER IF EXISTS trg_memory_timestamp ON memories;
+CREATE TRIGGER trg_memory_timestamp
+    BEFORE UPDATE ON memories
+    FOR EACH ROW
+    WHEN (NEW.relevance_computed_at IS NOT DISTINCT FROM OLD.relevance_computed_at)
+    EXECUTE FUNCTION update_memory_timestamp();
+
+-- Refresh memories.relevance_score for up to p_batch_size active memories that have no score,
+-- were modified since it was computed, or whose score is older than p_max_age_minutes.
+CREATE OR REPLACE FUNCTION refresh_relevance_scores(
+    p_batch_size INT DEFAULT 500,
+    p_max_age_minutes FLOAT DEFAULT 60
+)
+RETURNS INT AS $$
+DECLARE
+    refreshed INT;
+BEGIN
+    WITH due AS (
+        SELECT m.id
+        FROM memories m
+        WHERE m.status = 'active'
+          AND (
+              m.relevance_computed_at IS NULL
+              OR m.relevance_computed_at < m.updated_at
+              OR m.relevance_computed_at < CURRENT_TIMESTAMP - make_interval(secs => GREATEST(0, COALESCE(p_max_age_minutes, 0)) * 60)
+          )
+        ORDER BY m.relevance_computed_at ASC NULLS FIRST
+        LIMIT GREATEST(0, COALESCE(p_batch_size, 0))
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE memories m
+    SET relevance_score = calculate_relevance(m.importance, m.decay_rate, m.created_at, m.last_accessed),
+        relevance_computed_at = CURRENT_TIMESTAMP
+    FROM due
+    WHERE m.id = due.id;
+
+    GET DIAGNOSTICS refreshed = ROW_COUNT;
+    RETURN refreshed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run a single subconscious maintenance tick: consolidation + pruning + indexing upkeep.
+CREATE OR REPLACE FUNCTION run_subconscious_maintenance(p_params JSONB DEFAULT '{}'::jsonb)
+RETURNS JSONB AS $$
+DECLARE
+    got_lock BOOLEAN;
+    min_imp FLOAT;
+    min_acc INT;
+    neighborhood_batch INT;
+    cache_days INT;
+    wm_stats JSONB;
+    recomputed INT;
+    cache_deleted INT;
+    recall_cache_deleted INT;
+    relevance_batch INT;
+    relevance_max_age FLOAT;
+    relevance_refreshed INT;
+BEGIN
+    got_lock := pg_try_advisory_lock(hashtext('agi_subconscious_maintenance'));
+    IF NOT got_lock THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'locked');
+    END IF;
+
+    min_imp := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_importance', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_importance'),
+        0.75
+    );
+    min_acc := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_accesses', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_accesses')::int,
+        3
+    );
+    neighborhood_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size')::int,
+        10
+    );
+    cache_days := COALESCE(
+        NULLIF(p_params->>'embedding_cache_older_than_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'embedding_cache_older_than_days')::int,
+        7
+    );
+    relevance_batch := COALESCE(
+        NULLIF(p_params->>'relevance_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_batch_size')::int,
+        500
+    );
+    relevance_max_age := COALESCE(
+        NULLIF(p_params->>'relevance_max_age_minutes', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_max_age_minutes'),
+        60
+    );
+
+    wm_stats := cleanup_working_memory_with_stats(min_imp, min_acc);
+    recomputed := batch_recompute_neighborhoods(neighborhood_batch);
+    cache_deleted := cleanup_embedding_cache((cache_days || ' days')::interval);
+    recall_cache_deleted := cleanup_recall_cache();
+    relevance_refreshed := refresh_relevance_scores(relevance_batch, relevance_max_age);
+
+    UPDATE maintenance_state
+    SET last_maintenance_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+
+    -- Log the maintenance run for dashboard
+    INSERT INTO maintenance_log (
+        ran_at,
+        neighborhoods_recomputed,
+        embedding_cache_deleted,
+        working_memory_deleted,
+        working_memory_promoted,
+        success
+    ) VALUES (
+        CURRENT_TIMESTAMP,
+        COALESCE(recomputed, 0),
+        COALESCE(cache_deleted, 0),
+        COALESCE(NULLIF(wm_stats->>'deleted_count', '')::int, 0),
+        COALESCE(NULLIF(wm_stats->>'promoted_count', '')::int, 0),
+        true
+    );
+
+    PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'working_memory', wm_stats,
+        'neighborhoods_recomputed', COALESCE(recomputed, 0),
+        'embedding_cache_deleted', COALESCE(cache_deleted, 0),
+        'recall_cache_deleted', COALESCE(recall_cache_deleted, 0),
+        'relevance_refreshed', COALESCE(relevance_refreshed, 0),
+        'ran_at', CURRENT_TIMESTAMP
+    );
+EXCEPTION
+    WHEN OTHERS THEN
+        PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+        RAISE;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- The min_relevance argument changes the signatures; drop the old ones so calls do not become ambiguous.
+DROP FUNCTION IF EXISTS fast_recall(TEXT, INT, memory_type[], FLOAT, FLOAT, TEXT[], TIMESTAMPTZ, TIMESTAMPTZ, BOOLEAN, FLOAT);
+DROP FUNCTION IF EXISTS fast_recall_with_embedding(vector, INT, memory_type[], FLOAT, FLOAT, TEXT[], TIMESTAMPTZ, TIMESTAMPTZ, TEXT, FLOAT);
+
+-- Hot-path recall for a precomputed query embedding (vector seeds + neighborhoods + episodes).
+-- Optional filters (type, importance, trust, source kind, created_at range) are applied inside
+-- the seed scan and to every candidate, so filtered recalls still return up to p_limit rows.
+-- Hybrid mode (p_lexical_query set): seeds come from the HNSW and full-text (content_tsv)
+-- candidate lists fused with reciprocal rank fusion, so exact names and rare tokens that
+-- embed poorly still surface. Seed scores are then the fused score scaled to [0, 1].
+-- p_diversity > 0 recalls 3x p_limit candidates and keeps p_limit of them by maximal
+-- marginal relevance (lambda = 1 - p_diversity), dropping near-duplicates.
+-- Relevance uses the stored memories.relevance_score when it is current; p_min_relevance
+-- prefilters on it (unscored or modified memories fall back to importance, its upper bound).
+CREATE OR REPLACE FUNCTION fast_recall_with_embedding(
+    p_query_embedding vector,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_lexical_query TEXT DEFAULT NULL,
+    p_diversity FLOAT DEFAULT 0.0,
+    p_min_relevance FLOAT DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    query_embedding vector;
+    zero_vec vector;
+    current_valence FLOAT;
+    has_filters BOOLEAN;
+    prev_iterative_scan TEXT;
+    lexical_query tsquery;
+    seed_limit INT;
+    arm_limit INT;
+    rrf_k CONSTANT INT := 60;
+BEGIN
+    query_embedding := p_query_embedding;
+    IF query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+
+    IF COALESCE(p_diversity, 0.0) > 0.0 THEN
+        RETURN QUERY
+        WITH fr AS MATERIALIZED (
+            SELECT * FROM fast_recall_with_embedding(
+                query_embedding,
+                p_limit * 3,
+                p_memory_types,
+                p_min_importance,
+                p_min_trust,
+                p_source_kinds,
+                p_created_after,
+                p_created_before,
+                p_lexical_query,
+                0.0,
+                p_min_relevance
+            )
+        )
+        SELECT fr.memory_id, fr.content, fr.memory_type, fr.score, fr.source
+        FROM mmr_rerank(
+            (SELECT array_agg(f.memory_id ORDER BY f.score DESC) FROM fr f),
+            (SELECT array_agg(f.score ORDER BY f.score DESC) FROM fr f),
+            p_limit,
+            1.0 - LEAST(p_diversity, 1.0)
+        ) mr
+        JOIN fr ON fr.memory_id = mr.memory_id
+        ORDER BY mr.mmr_rank;
+        RETURN;
+    END IF;
+
+    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+    BEGIN
+        current_valence := NULLIF(get_current_affective_state()->>'valence', '')::float;
+    EXCEPTION
+        WHEN OTHERS THEN
+            current_valence := NULL;
+    END;
+    current_valence := COALESCE(current_valence, 0.0);
+
+    IF NULLIF(btrim(p_lexical_query), '') IS NOT NULL THEN
+        lexical_query := websearch_to_tsquery('english', p_lexical_query);
+        -- Stopword-only queries have no lexemes; fall back to pure vector seeds.
+        IF numnode(lexical_query) = 0 THEN
+            lexical_query := NULL;
+        END IF;
+    END IF;
+    seed_limit := GREATEST(p_limit, 5);
+    arm_limit := CASE WHEN lexical_query IS NULL THEN seed_limit ELSE seed_limit * 2 END;
+
+    has_filters := p_memory_types IS NOT NULL
+        OR COALESCE(p_min_importance, 0.0) > 0.0
+        OR p_min_trust IS NOT NULL
+        OR p_source_kinds IS NOT NULL
+        OR p_created_after IS NOT NULL
+        OR p_created_before IS NOT NULL
+        OR p_min_relevance IS NOT NULL;
+
+    -- With filters, let the HNSW scan keep going until enough rows pass them
+    -- (pgvector >= 0.8); otherwise ef_search candidates can all be filtered away.
+    IF has_filters THEN
+        BEGIN
+            prev_iterative_scan := current_setting('hnsw.iterative_scan', true);
+            PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_iterative_scan := NULL;
+        END;
+    END IF;
+
+    RETURN QUERY
+    WITH
+    -- Vector candidates (semantic similarity, HNSW)
+    vector_hits AS MATERIALIZED (
+        SELECT v.id, v.sim, row_number() OVER (ORDER BY v.dist) as rnk
+        FROM (
+            SELECT
+                m.id,
+                m.embedding <=> query_embedding as dist,
+                1 - (m.embedding <=> query_embedding) as sim
+            FROM memories m
+            WHERE m.status = 'active'
+              AND m.embedding IS NOT NULL
+              AND m.embedding <> zero_vec
+              AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+              AND m.importance >= COALESCE(p_min_importance, 0.0)
+              AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+              AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+              AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+              AND (p_created_before IS NULL OR m.created_at < p_created_before)
+              AND (p_min_relevance IS NULL OR (CASE WHEN m.relevance_computed_at >= m.updated_at THEN m.relevance_score ELSE m.importance END) >= p_min_relevance)
+            ORDER BY m.embedding <=> query_embedding
+            LIMIT arm_limit
+        ) v
+    ),
+    -- Lexical candidates (full-text, GIN on content_tsv); empty unless hybrid
+    lexical_hits AS MATERIALIZED (
+        SELECT l.id, l.sim, row_number() OVER (ORDER BY l.lex_rank DESC, l.id) as rnk
+        FROM (
+            SELECT
+                m.id,
+                ts_rank_cd(m.content_tsv, lexical_query) as lex_rank,
+                1 - (m.embedding <=> query_embedding) as sim
+            FROM memories m
+            WHERE lexical_query IS NOT NULL
+              AND m.content_tsv @@ lexical_query
+              AND m.status = 'active'
+              AND m.embedding IS NOT NULL
+              AND m.embedding <> zero_vec
+              AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+              AND m.importance >= COALESCE(p_min_importance, 0.0)
+              AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+              AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+              AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+              AND (p_created_before IS NULL OR m.created_at < p_created_before)
+              AND (p_min_relevance IS NULL OR (CASE WHEN m.relevance_computed_at >= m.updated_at THEN m.relevance_score ELSE m.importance END) >= p_min_relevance)
+            ORDER BY ts_rank_cd(m.content_tsv, lexical_query) DESC
+            LIMIT arm_limit
+        ) l
+    ),
+    -- Seeds: vector hits as-is, or both lists fused with reciprocal rank fusion
+    seeds AS MATERIALIZED (
+        SELECT
+            f.id,
+            CASE
+                WHEN lexical_query IS NULL THEN f.sim
+                ELSE f.rrf / (2.0 / (rrf_k + 1))
+            END as sim,
+            NOT f.in_vector as lexical_only
+        FROM (
+            SELECT
+                h.id,
+                MAX(h.sim) as sim,
+                SUM(1.0 / (rrf_k + h.rnk)) as rrf,
+                bool_or(h.arm = 'vector') as in_vector
+            FROM (
+                SELECT id, sim, rnk, 'vector' as arm FROM vector_hits
+                UNION ALL
+                SELECT id, sim, rnk, 'lexical' as arm FROM lexical_hits
+            ) h
+            GROUP BY h.id
+        ) f
+        ORDER BY 2 DESC
+        LIMIT seed_limit
+    ),
+    -- Expand via precomputed neighborhoods
+    associations AS (
+        SELECT
+            e.neighbor_id as mem_id,
+            MAX(e.weight * s.sim) as assoc_score
+        FROM seeds s
+        JOIN memory_neighborhoods mn ON mn.memory_id = s.id AND NOT mn.is_stale
+        JOIN memory_neighbor_edges e ON e.memory_id = s.id
+        GROUP BY e.neighbor_id
+    ),
+    -- Temporal context from episodes
+    temporal AS (
+        SELECT DISTINCT
+            em.memory_id as mem_id,
+            0.15 as temp_score
+        FROM seeds s
+        JOIN episode_memories em_seed ON s.id = em_seed.memory_id
+        JOIN episode_memories em ON em_seed.episode_id = em.episode_id
+        WHERE em.memory_id != s.id
+        LIMIT 20
+    ),
+    -- Combine all candidates
+    candidates AS (
+        SELECT id as mem_id, sim as vector_score, NULL::float as assoc_score, NULL::float as temp_score, lexical_only
+        FROM seeds
+        UNION
+        SELECT mem_id, NULL, assoc_score, NULL, NULL FROM associations
+        UNION
+        SELECT mem_id, NULL, NULL, temp_score, NULL FROM temporal
+    ),
+    -- Aggregate scores per memory
+    scored AS (
+        SELECT
+            c.mem_id,
+            MAX(c.vector_score) as vector_score,
+            MAX(c.assoc_score) as assoc_score,
+            MAX(c.temp_score) as temp_score,
+            bool_or(c.lexical_only) as lexical_only
+        FROM candidates c
+        GROUP BY c.mem_id
+    )
+    SELECT
+        m.id,
+        m.content,
+        m.type,
+        GREATEST(
+            COALESCE(sc.vector_score, 0) * 0.5 +
+            COALESCE(sc.assoc_score, 0) * 0.3 +
+            COALESCE(sc.temp_score, 0) * 0.15 +
+            (CASE
+                WHEN m.relevance_computed_at >= m.updated_at THEN m.relevance_score
+                ELSE calculate_relevance(m.importance, m.decay_rate, m.created_at, m.last_accessed)
+            END) * 0.05 +
+            -- Mood-congruent recall bias (small): prefer episodic memories whose valence matches current affect.
+            (CASE
+                WHEN em.emotional_valence IS NULL THEN 0.5
+                ELSE 1.0 - (ABS(em.emotional_valence - current_valence) / 2.0)
+            END) * 0.05,
+            0.001
+        ) as final_score,
+        CASE
+            WHEN sc.vector_score IS NOT NULL AND sc.lexical_only THEN 'lexical'
+            WHEN sc.vector_score IS NOT NULL THEN 'vector'
+            WHEN sc.assoc_score IS NOT NULL THEN 'association'
+            WHEN sc.temp_score IS NOT NULL THEN 'temporal'
+            ELSE 'fallback'
+        END as source
+    FROM scored sc
+    JOIN memories m ON sc.mem_id = m.id
+    LEFT JOIN episodic_memories em ON em.memory_id = m.id
+    WHERE m.status = 'active'
+      AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+      AND m.importance >= COALESCE(p_min_importance, 0.0)
+      AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+      AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+      AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+      AND (p_created_before IS NULL OR m.created_at < p_created_before)
+      AND (p_min_relevance IS NULL OR (CASE WHEN m.relevance_computed_at >= m.updated_at THEN m.relevance_score ELSE m.importance END) >= p_min_relevance)
+    ORDER BY final_score DESC
+    LIMIT p_limit;
+
+    IF has_filters AND prev_iterative_scan IS NOT NULL THEN
+        PERFORM set_config('hnsw.iterative_scan', prev_iterative_scan, true);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Primary retrieval entrypoint: embeds the query text, then runs fast_recall_with_embedding().
+-- p_hybrid also searches content_tsv with the query text and fuses both candidate lists;
+-- p_diversity reranks by maximal marginal relevance and p_min_relevance prefilters on the
+-- stored relevance score (see fast_recall_with_embedding).
+CREATE OR REPLACE FUNCTION fast_recall(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_hybrid BOOLEAN DEFAULT FALSE,
+    p_diversity FLOAT DEFAULT 0.0,
+    p_min_relevance FLOAT DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT * FROM fast_recall_with_embedding(
+        get_embedding(p_query_text),
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        CASE WHEN p_hybrid THEN p_query_text END,
+        p_diversity,
+        p_min_relevance
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+
+COMMENT ON FUNCTION fast_recall(TEXT, INT, memory_type[], FLOAT, FLOAT, TEXT[], TIMESTAMPTZ, TIMESTAMPTZ, BOOLEAN, FLOAT, FLOAT) IS 'Primary retrieval function combining vector similarity, precomputed associations, and temporal context. Hot path - optimized for speed.';
@@ -0,0 +1,894 @@
+-- Patch migration: per-call recall quality modes (fast / balanced / exact) and recall_mode_stats.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Recall quality modes. 'fast' and 'balanced' size hnsw.ef_search for the call,
+-- 'exact' scans sequentially; unnamed calls keep the session settings ('default').
+CREATE OR REPLACE FUNCTION normalize_recall_mode(p_mode TEXT)
+RETURNS TEXT AS $$
+DECLARE
+    normalized TEXT := lower(COALESCE(NULLIF(btrim(p_mode), ''), 'default'));
+BEGIN
+    IF normalized NOT IN ('default', 'fast', 'balanced', 'exact') THEN
+        RAISE EXCEPTION 'Invalid recall mode: % (expected fast, balanced or exact)', p_mode;
+    END IF;
+    RETURN normalized;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- hnsw.ef_search for a recall mode and candidate count (NULL = leave the setting alone).
+-- pgvector caps ef_search at 1000 and never returns more rows than ef_search per scan.
+CREATE OR REPLACE FUNCTION recall_mode_ef_search(p_mode TEXT, p_candidates INT)
+RETURNS INT AS $$
+    SELECT CASE p_mode
+        WHEN 'fast' THEN LEAST(1000, GREATEST(p_candidates, 20))
+        WHEN 'balanced' THEN LEAST(1000, GREATEST(p_candidates * 4, 100))
+        ELSE NULL
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Per caller (application_name) and mode: how often recall ran and how long it took.
+CREATE UNLOGGED TABLE IF NOT EXISTS recall_mode_stats (
+    caller TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    calls BIGINT NOT NULL DEFAULT 0,
+    total_ms FLOAT NOT NULL DEFAULT 0,
+    max_ms FLOAT NOT NULL DEFAULT 0,
+    last_called_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (caller, mode)
+);
+
+-- Count one recall served in p_mode that started at p_started_at. Best-effort: a
+-- read-only transaction (or any other failure) never fails the recall itself.
+CREATE OR REPLACE FUNCTION record_recall_mode(p_mode TEXT, p_started_at TIMESTAMPTZ)
+RETURNS VOID AS $$
+DECLARE
+    elapsed_ms FLOAT := EXTRACT(EPOCH FROM (clock_timestamp() - p_started_at)) * 1000.0;
+BEGIN
+    INSERT INTO recall_mode_stats (caller, mode, calls, total_ms, max_ms, last_called_at)
+    VALUES (
+        COALESCE(NULLIF(current_setting('application_name', true), ''), 'unknown'),
+        normalize_recall_mode(p_mode),
+        1,
+        elapsed_ms,
+        elapsed_ms,
+        CURRENT_TIMESTAMP
+    )
+    ON CONFLICT (caller, mode) DO UPDATE SET
+        calls = recall_mode_stats.calls + 1,
+        total_ms = recall_mode_stats.total_ms + EXCLUDED.total_ms,
+        max_ms = GREATEST(recall_mode_stats.max_ms, EXCLUDED.max_ms),
+        last_called_at = EXCLUDED.last_called_at;
+EXCEPTION
+    WHEN OTHERS THEN
+        NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The mode argument changes the signatures; drop the old ones so calls do not become ambiguous.
+DROP FUNCTION IF EXISTS fast_recall(TEXT, INT, memory_type[], FLOAT, FLOAT, TEXT[], TIMESTAMPTZ, TIMESTAMPTZ, BOOLEAN, FLOAT, FLOAT);
+DROP FUNCTION IF EXISTS fast_recall_with_embedding(vector, INT, memory_type[], FLOAT, FLOAT, TEXT[], TIMESTAMPTZ, TIMESTAMPTZ, TEXT, FLOAT, FLOAT);
+
+-- Hot-path recall for a precomputed query embedding (vector seeds + neighborhoods + episodes).
+-- Optional filters (type, importance, trust, source kind, created_at range) are applied inside
+-- the seed scan and to every candidate, so filtered recalls still return up to p_limit rows.
+-- Hybrid mode (p_lexical_query set): seeds come from the HNSW and full-text (content_tsv)
+-- candidate lists fused with reciprocal rank fusion, so exact names and rare tokens that
+-- embed poorly still surface. Seed scores are then the fused score scaled to [0, 1].
+-- p_diversity > 0 recalls 3x p_limit candidates and keeps p_limit of them by maximal
+-- marginal relevance (lambda = 1 - p_diversity), dropping near-duplicates.
+-- Relevance uses the stored memories.relevance_score when it is current; p_min_relevance
+-- prefilters on it (unscored or modified memories fall back to importance, its upper bound).
+-- p_mode picks the vector-scan quality (see recall_mode_ef_search): 'fast' and 'balanced'
+-- set hnsw.ef_search for this call only, 'exact' skips the HNSW index for an exact
+-- sequential kNN scan; NULL keeps the session settings.
+CREATE OR REPLACE FUNCTION fast_recall_with_embedding(
+    p_query_embedding vector,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_lexical_query TEXT DEFAULT NULL,
+    p_diversity FLOAT DEFAULT 0.0,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    query_embedding vector;
+    zero_vec vector;
+    current_valence FLOAT;
+    has_filters BOOLEAN;
+    prev_iterative_scan TEXT;
+    prev_ef_search TEXT;
+    ef_search INT;
+    recall_mode TEXT;
+    exact_scan BOOLEAN;
+    lexical_query tsquery;
+    seed_limit INT;
+    arm_limit INT;
+    rrf_k CONSTANT INT := 60;
+BEGIN
+    query_embedding := p_query_embedding;
+    IF query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+    recall_mode := normalize_recall_mode(p_mode);
+    exact_scan := recall_mode = 'exact';
+
+    IF COALESCE(p_diversity, 0.0) > 0.0 THEN
+        RETURN QUERY
+        WITH fr AS MATERIALIZED (
+            SELECT * FROM fast_recall_with_embedding(
+                query_embedding,
+                p_limit * 3,
+                p_memory_types,
+                p_min_importance,
+                p_min_trust,
+                p_source_kinds,
+                p_created_after,
+                p_created_before,
+                p_lexical_query,
+                0.0,
+                p_min_relevance,
+                p_mode
+            )
+        )
+        SELECT fr.memory_id, fr.content, fr.memory_type, fr.score, fr.source
+        FROM mmr_rerank(
+            (SELECT array_agg(f.memory_id ORDER BY f.score DESC) FROM fr f),
+            (SELECT array_agg(f.score ORDER BY f.score DESC) FROM fr f),
+            p_limit,
+            1.0 - LEAST(p_diversity, 1.0)
+        ) mr
+        JOIN fr ON fr.memory_id = mr.memory_id
+        ORDER BY mr.mmr_rank;
+        RETURN;
+    END IF;
+
+    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+    BEGIN
+        current_valence := NULLIF(get_current_affective_state()->>'valence', '')::float;
+    EXCEPTION
+        WHEN OTHERS THEN
+            current_valence := NULL;
+    END;
+    current_valence := COALESCE(current_valence, 0.0);
+
+    IF NULLIF(btrim(p_lexical_query), '') IS NOT NULL THEN
+        lexical_query := websearch_to_tsquery('english', p_lexical_query);
+        -- Stopword-only queries have no lexemes; fall back to pure vector seeds.
+        IF numnode(lexical_query) = 0 THEN
+            lexical_query := NULL;
+        END IF;
+    END IF;
+    seed_limit := GREATEST(p_limit, 5);
+    arm_limit := CASE WHEN lexical_query IS NULL THEN seed_limit ELSE seed_limit * 2 END;
+
+    has_filters := p_memory_types IS NOT NULL
+        OR COALESCE(p_min_importance, 0.0) > 0.0
+        OR p_min_trust IS NOT NULL
+        OR p_source_kinds IS NOT NULL
+        OR p_created_after IS NOT NULL
+        OR p_created_before IS NOT NULL
+        OR p_min_relevance IS NOT NULL;
+
+    -- With filters, let the HNSW scan keep going until enough rows pass them
+    -- (pgvector >= 0.8); otherwise ef_search candidates can all be filtered away.
+    IF has_filters AND NOT exact_scan THEN
+        BEGIN
+            prev_iterative_scan := current_setting('hnsw.iterative_scan', true);
+            PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_iterative_scan := NULL;
+        END;
+    END IF;
+    ef_search := recall_mode_ef_search(recall_mode, arm_limit);
+    IF ef_search IS NOT NULL THEN
+        BEGIN
+            prev_ef_search := current_setting('hnsw.ef_search', true);
+            PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_ef_search := NULL;
+        END;
+    END IF;
+
+    RETURN QUERY
+    WITH
+    -- Active memories passing the filters (inlined into each arm below)
+    eligible AS NOT MATERIALIZED (
+        SELECT m.id, m.embedding, m.content_tsv
+        FROM memories m
+        WHERE m.status = 'active'
+          AND m.embedding IS NOT NULL
+          AND m.embedding <> zero_vec
+          AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+          AND m.importance >= COALESCE(p_min_importance, 0.0)
+          AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+          AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+          AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+          AND (p_created_before IS NULL OR m.created_at < p_created_before)
+          AND (p_min_relevance IS NULL OR (CASE WHEN m.relevance_computed_at >= m.updated_at THEN m.relevance_score ELSE m.importance END) >= p_min_relevance)
+    ),
+    -- Vector candidates (semantic similarity): HNSW, or an exact sequential scan in
+    -- 'exact' mode (ordering by "distance + 0" keeps the planner off the index)
+    vector_hits AS MATERIALIZED (
+        SELECT v.id, v.sim, row_number() OVER (ORDER BY v.dist) as rnk
+        FROM (
+            (
+                SELECT
+                    e.id,
+                    e.embedding <=> query_embedding as dist,
+                    1 - (e.embedding <=> query_embedding) as sim
+                FROM eligible e
+                WHERE NOT exact_scan
+                ORDER BY e.embedding <=> query_embedding
+                LIMIT arm_limit
+            )
+            UNION ALL
+            (
+                SELECT
+                    e.id,
+                    (e.embedding <=> query_embedding) + 0 as dist,
+                    1 - (e.embedding <=> query_embedding) as sim
+                FROM eligible e
+                WHERE exact_scan
+                ORDER BY (e.embedding <=> query_embedding) + 0
+                LIMIT arm_limit
+            )
+        ) v
+    ),
+    -- Lexical candidates (full-text, GIN on content_tsv); empty unless hybrid
+    lexical_hits AS MATERIALIZED (
+        SELECT l.id, l.sim, row_number() OVER (ORDER BY l.lex_rank DESC, l.id) as rnk
+        FROM (
+            SELECT
+                e.id,
+                ts_rank_cd(e.content_tsv, lexical_query) as lex_rank,
+                1 - (e.embedding <=> query_embedding) as sim
+            FROM eligible e
+            WHERE lexical_query IS NOT NULL
+              AND e.content_tsv @@ lexical_query
+            ORDER BY ts_rank_cd(e.content_tsv, lexical_query) DESC
+            LIMIT arm_limit
+        ) l
+    ),
+    -- Seeds: vector hits as-is, or both lists fused with reciprocal rank fusion
+    seeds AS MATERIALIZED (
+        SELECT
+            f.id,
+            CASE
+                WHEN lexical_query IS NULL THEN f.sim
+                ELSE f.rrf / (2.0 / (rrf_k + 1))
+            END as sim,
+            NOT f.in_vector as lexical_only
+        FROM (
+            SELECT
+                h.id,
+                MAX(h.sim) as sim,
+                SUM(1.0 / (rrf_k + h.rnk)) as rrf,
+                bool_or(h.arm = 'vector') as in_vector
+            FROM (
+                SELECT id, sim, rnk, 'vector' as arm FROM vector_hits
+                UNION ALL
+                SELECT id, sim, rnk, 'lexical' as arm FROM lexical_hits
+            ) h
+            GROUP BY h.id
+        ) f
+        ORDER BY 2 DESC
+        LIMIT seed_limit
+    ),
+    -- Expand via precomputed neighborhoods
+    associations AS (
+        SELECT
+            e.neighbor_id as mem_id,
+            MAX(e.weight * s.sim) as assoc_score
+        FROM seeds s
+        JOIN memory_neighborhoods mn ON mn.memory_id = s.id AND NOT mn.is_stale
+        JOIN memory_neighbor_edges e ON e.memory_id = s.id
+        GROUP BY e.neighbor_id
+    ),
+    -- Temporal context from episodes
+    temporal AS (
+        SELECT DISTINCT
+            em.memory_id as mem_id,
+            0.15 as temp_score
+        FROM seeds s
+        JOIN episode_memories em_seed ON s.id = em_seed.memory_id
+        JOIN episode_memories em ON em_seed.episode_id = em.episode_id
+        WHERE em.memory_id != s.id
+        LIMIT 20
+    ),
+    -- Combine all candidates
+    candidates AS (
+        SELECT id as mem_id, sim as vector_score, NULL::float as assoc_score, NULL::float as temp_score, lexical_only
+        FROM seeds
+        UNION
+        SELECT mem_id, NULL, assoc_score, NULL, NULL FROM associations
+        UNION
+        SELECT mem_id, NULL, NULL, temp_score, NULL FROM temporal
+    ),
+    -- Aggregate scores per memory
+    scored AS (
+        SELECT
+            c.mem_id,
+            MAX(c.vector_score) as vector_score,
+            MAX(c.assoc_score) as assoc_score,
+            MAX(c.temp_score) as temp_score,
+            bool_or(c.lexical_only) as lexical_only
+        FROM candidates c
+        GROUP BY c.mem_id
+    )
+    SELECT
+        m.id,
+        m.content,
+        m.type,
+        GREATEST(
+            COALESCE(sc.vector_score, 0) * 0.5 +
+            COALESCE(sc.assoc_score, 0) * 0.3 +
+            COALESCE(sc.temp_score, 0) * 0.15 +
+            (CASE
+                WHEN m.relevance_computed_at >= m.updated_at THEN m.relevance_score
+                ELSE calculate_relevance(m.importance, m.decay_rate, m.created_at, m.last_accessed)
+            END) * 0.05 +
+            -- Mood-congruent recall bias (small): prefer episodic memories whose valence matches current affect.
+            (CASE
+                WHEN em.emotional_valence IS NULL THEN 0.5
+                ELSE 1.0 - (ABS(em.emotional_valence - current_valence) / 2.0)
+            END) * 0.05,
+            0.001
+        ) as final_score,
+        CASE
+            WHEN sc.vector_score IS NOT NULL AND sc.lexical_only THEN 'lexical'
+            WHEN sc.vector_score IS NOT NULL THEN 'vector'
+            WHEN sc.assoc_score IS NOT NULL THEN 'association'
+            WHEN sc.temp_score IS NOT NULL THEN 'temporal'
+            ELSE 'fallback'
+        END as source
+    FROM scored sc
+    JOIN memories m ON sc.mem_id = m.id
+    LEFT JOIN episodic_memories em ON em.memory_id = m.id
+    WHERE m.status = 'active'
+      AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+      AND m.importance >= COALESCE(p_min_importance, 0.0)
+      AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+      AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+      AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+      AND (p_created_before IS NULL OR m.created_at < p_created_before)
+      AND (p_min_relevance IS NULL OR (CASE WHEN m.relevance_computed_at >= m.updated_at THEN m.relevance_score ELSE m.importance END) >= p_min_relevance)
+    ORDER BY final_score DESC
+    LIMIT p_limit;
+
+    IF prev_iterative_scan IS NOT NULL THEN
+        PERFORM set_config('hnsw.iterative_scan', prev_iterative_scan, true);
+    END IF;
+    IF prev_ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', prev_ef_search, true);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Primary retrieval entrypoint: embeds the query text, then runs fast_recall_with_embedding().
+-- p_hybrid also searches content_tsv with the query text and fuses both candidate lists;
+-- p_diversity reranks by maximal marginal relevance and p_min_relevance prefilters on the
+-- stored relevance score (see fast_recall_with_embedding). p_mode ('fast', 'balanced',
+-- 'exact') trades latency against recall quality; each call is counted per caller and
+-- mode in recall_mode_stats.
+CREATE OR REPLACE FUNCTION fast_recall(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_hybrid BOOLEAN DEFAULT FALSE,
+    p_diversity FLOAT DEFAULT 0.0,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    started_at TIMESTAMPTZ := clock_timestamp();
+BEGIN
+    RETURN QUERY
+    SELECT * FROM fast_recall_with_embedding(
+        get_embedding(p_query_text),
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        CASE WHEN p_hybrid THEN p_query_text END,
+        p_diversity,
+        p_min_relevance,
+        p_mode
+    );
+    PERFORM record_recall_mode(p_mode, started_at);
+END;
+$$ LANGUAGE plpgsql;
+
+
+COMMENT ON FUNCTION fast_recall(TEXT, INT, memory_type[], FLOAT, FLOAT, TEXT[], TIMESTAMPTZ, TIMESTAMPTZ, BOOLEAN, FLOAT, FLOAT, TEXT) IS 'Primary retrieval function combining vector similarity, precomputed associations, and temporal context. Hot path - optimized for speed.';
+
+-- Single-call hydration: embeds the query once and returns recalled memories,
+-- partial activations and the requested context sections as one JSONB document.
+-- Flags (all optional): include_partial, include_identity, include_worldview,
+-- include_emotional_state, include_drives (default true); include_goals, hybrid (default false);
+-- diversity (0..1, default 0) for MMR reranking of the recalled memories;
+-- mode ('fast', 'balanced', 'exact') for the recall quality (see fast_recall).
+-- Context sections come from the versioned turn-context snapshot; if the caller passes
+-- known_context_version and it is still current, sections are omitted and
+-- context_unchanged is set so the caller can reuse its own copy.
+CREATE OR REPLACE FUNCTION hydrate_context(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_flags JSONB DEFAULT '{}'::jsonb
+)
+RETURNS JSONB AS $$
+DECLARE
+    flags JSONB := COALESCE(p_flags, '{}'::jsonb);
+    query_embedding vector;
+    known_version BIGINT;
+    current_version BIGINT;
+    ctx JSONB;
+    result JSONB;
+    started_at TIMESTAMPTZ := clock_timestamp();
+BEGIN
+    query_embedding := get_embedding(p_query_text);
+    known_version := NULLIF(flags->>'known_context_version', '')::bigint;
+
+    result := jsonb_build_object(
+        'memories', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object(
+                    'memory_id', fr.memory_id,
+                    'content', fr.content,
+                    'type', fr.memory_type,
+                    'score', fr.score,
+                    'source', fr.source,
+                    'importance', m.importance,
+                    'trust_level', m.trust_level,
+                    'source_attribution', m.source_attribution,
+                    'created_at', m.created_at,
+                    'emotional_valence', em.emotional_valence
+                )
+                ORDER BY fr.score DESC
+            )
+            FROM fast_recall_with_embedding(
+                query_embedding,
+                p_limit,
+                p_lexical_query => CASE
+                    WHEN COALESCE((flags->>'hybrid')::boolean, FALSE) THEN p_query_text
+                END,
+                p_diversity => COALESCE(NULLIF(flags->>'diversity', '')::float, 0.0),
+                p_mode => flags->>'mode'
+            ) fr
+            JOIN memories m ON m.id = fr.memory_id
+            LEFT JOIN episodic_memories em ON em.memory_id = fr.memory_id
+        ), '[]'::jsonb)
+    );
+    PERFORM record_recall_mode(flags->>'mode', started_at);
+
+    IF COALESCE((flags->>'include_partial')::boolean, TRUE) THEN
+        result := result || jsonb_build_object(
+            'partial_activations', COALESCE((
+                SELECT jsonb_agg(to_jsonb(pa))
+                FROM find_partial_activations_with_embedding(query_embedding) pa
+            ), '[]'::jsonb)
+        );
+    END IF;
+    current_version := turn_context_version();
+    result := result || jsonb_build_object('context_version', current_version);
+    IF known_version IS NOT NULL AND known_version = current_version THEN
+        RETURN result || jsonb_build_object('context_unchanged', TRUE);
+    END IF;
+
+    ctx := get_turn_context_snapshot();
+
+    IF COALESCE((flags->>'include_identity')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('identity', ctx->'identity');
+    END IF;
+    IF COALESCE((flags->>'include_worldview')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('worldview', ctx->'worldview');
+    END IF;
+    IF COALESCE((flags->>'include_emotional_state')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('emotional_state', ctx->'emotional_state');
+    END IF;
+    IF COALESCE((flags->>'include_goals')::boolean, FALSE) THEN
+        result := result || jsonb_build_object('goals', ctx->'goals');
+    END IF;
+    IF COALESCE((flags->>'include_drives')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('urgent_drives', ctx->'urgent_drives');
+    END IF;
+
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Heartbeat recall action runs in 'fast' mode unless the action asks for another.
+CREATE OR REPLACE FUNCTION public.execute_heartbeat_action(p_heartbeat_id uuid, p_action text, p_params jsonb DEFAULT '{}'::jsonb)
+ RETURNS jsonb
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+    action_kind heartbeat_action;
+    action_cost FLOAT;
+    current_e FLOAT;
+    result JSONB;
+    queued_call_id UUID;
+    outbox_id UUID;
+    remembered_id UUID;
+    boundary_hits JSONB;
+    boundary_content TEXT;
+BEGIN
+    BEGIN
+        action_kind := p_action::heartbeat_action;
+    EXCEPTION
+        WHEN invalid_text_representation THEN
+            RETURN jsonb_build_object('success', false, 'error', 'Unknown action: ' || COALESCE(p_action, '<null>'));
+    END;
+
+    action_cost := get_action_cost(p_action);
+    current_e := get_current_energy();
+
+    IF current_e < action_cost THEN
+        RETURN jsonb_build_object(
+            'success', false,
+            'error', 'Insufficient energy',
+            'required', action_cost,
+            'available', current_e
+        );
+    END IF;
+
+    IF p_action IN ('reach_out_public', 'synthesize') THEN
+        boundary_content := COALESCE(p_params->>'content', '');
+        SELECT COALESCE(jsonb_agg(row_to_json(r)), '[]'::jsonb)
+        INTO boundary_hits
+        FROM check_boundaries(boundary_content) r;
+
+        IF boundary_hits IS NOT NULL AND jsonb_array_length(boundary_hits) > 0 THEN
+            IF EXISTS (
+                SELECT 1
+                FROM jsonb_array_elements(boundary_hits) e
+                WHERE e->>'response_type' = 'refuse'
+            ) THEN
+                RETURN jsonb_build_object(
+                    'success', false,
+                    'error', 'Boundary triggered',
+                    'boundaries', boundary_hits
+                );
+            END IF;
+        END IF;
+    END IF;
+
+    PERFORM update_energy(-action_cost);
+
+    CASE p_action
+        WHEN 'observe' THEN
+            result := jsonb_build_object('environment', get_environment_snapshot());
+
+        WHEN 'review_goals' THEN
+            result := jsonb_build_object('goals', get_goals_snapshot());
+
+        WHEN 'remember' THEN
+            remembered_id := create_episodic_memory(
+                p_content := COALESCE(p_params->>'content', ''),
+                p_context := COALESCE(p_params, '{}'::jsonb) || jsonb_build_object('heartbeat_id', p_heartbeat_id),
+                p_emotional_valence := COALESCE((p_params->>'emotional_valence')::float, 0),
+                p_importance := COALESCE((p_params->>'importance')::float, 0.4)
+            );
+            result := jsonb_build_object('memory_id', remembered_id);
+
+        WHEN 'recall' THEN
+            DECLARE
+                v_query TEXT := p_params->>'query';
+                v_limit INT := COALESCE((p_params->>'limit')::int, 5);
+                -- Background recall: cheap HNSW scan unless the action asks for more.
+                v_mode TEXT := COALESCE(NULLIF(p_params->>'mode', ''), 'fast');
+                v_cache_key TEXT;
+                v_version BIGINT;
+            BEGIN
+                v_cache_key := recall_cache_key(v_query, jsonb_build_object('limit', v_limit, 'mode', v_mode, 'caller', 'heartbeat'));
+                v_version := memory_write_version();
+                result := get_cached_recall(v_cache_key);
+                IF result IS NULL THEN
+                    SELECT jsonb_agg(row_to_json(r)) INTO result
+                    FROM fast_recall(v_query, v_limit, p_mode => v_mode) r;
+                    result := COALESCE(result, '[]'::jsonb);
+                    PERFORM put_cached_recall(v_cache_key, v_version, result);
+                END IF;
+            END;
+            result := jsonb_build_object('memories', result);
+            PERFORM satisfy_drive('curiosity', 0.2);
+
+        WHEN 'connect' THEN
+            DECLARE
+                v_from uuid;
+                v_to uuid;
+                v_from_raw text;
+                v_to_raw text;
+                v_rel_text text;
+                v_rel graph_edge_type;
+            BEGIN
+                v_from_raw := p_params->>'from_id';
+                v_to_raw := p_params->>'to_id';
+
+                -- Try to resolve references (UUID or semantic label)
+                v_from := resolve_memory_reference(v_from_raw);
+                v_to := resolve_memory_reference(v_to_raw);
+                v_rel_text := NULLIF(btrim(COALESCE(p_params->>'relationship_type','')), '');
+
+                -- Reject + salvage: could not resolve IDs or missing relationship_type
+                IF v_from IS NULL OR v_to IS NULL OR v_rel_text IS NULL THEN
+                    remembered_id := create_episodic_memory(
+                        p_content := 'Rejected connect proposal (unresolved references). Raw: ' || COALESCE(p_params::text, '{}'),
+                        p_context := jsonb_build_object(
+                            'kind','ingestion_reject',
+                            'action','connect',
+                            'reason','Unresolved memory references',
+                            'from_raw', COALESCE(v_from_raw, '<missing>'),
+                            'to_raw', COALESCE(v_to_raw, '<missing>'),
+                            'from_resolved', v_from IS NOT NULL,
+                            'to_resolved', v_to IS NOT NULL,
+                            'heartbeat_id', p_heartbeat_id
+                        ),
+                        p_emotional_valence := 0,
+                        p_importance := 0.2
+                    );
+
+                    RETURN jsonb_build_object(
+                        'success', false,
+                        'error', 'Unresolved memory references',
+                        'salvaged_memory_id', remembered_id,
+                        'details', jsonb_build_object(
+                            'from_raw', COALESCE(v_from_raw,'<missing>'),
+                            'to_raw', COALESCE(v_to_raw,'<missing>'),
+                            'from_resolved', v_from,
+                            'to_resolved', v_to,
+                            'relationship_type', COALESCE(v_rel_text,'<missing>')
+                        )
+                    );
+                END IF;
+
+                -- Reject + salvage: relationship_type must be a valid enum
+                BEGIN
+                    v_rel := v_rel_text::graph_edge_type;
+                EXCEPTION WHEN invalid_text_representation THEN
+                    remembered_id := create_episodic_memory(
+                        p_content := 'Rejected connect proposal (invalid relationship_type enum). relationship_type=' ||
+                                     COALESCE(v_rel_text,'<null>') || '. Raw: ' || COALESCE(p_params::text, '{}'),
+                        p_context := jsonb_build_object(
+                            'kind','ingestion_reject',
+                            'action','connect',
+                            'reason','Invalid relationship_type enum',
+                            'relationship_type', v_rel_text,
+                            'heartbeat_id', p_heartbeat_id
+                        ),
+                        p_emotional_valence := 0,
+                        p_importance := 0.2
+                    );
+
+                    RETURN jsonb_build_object(
+                        'success', false,
+                        'error', 'Invalid relationship_type enum',
+                        'relationship_type', v_rel_text,
+                        'salvaged_memory_id', remembered_id
+                    );
+                END;
+
+                PERFORM create_memory_relationship(
+                    v_from,
+                    v_to,
+                    v_rel,
+                    COALESCE(p_params->'properties', '{}'::jsonb)
+                );
+                result := jsonb_build_object(
+                    'connected', true,
+                    'from_id', v_from,
+                    'to_id', v_to,
+                    'resolved_from', v_from_raw,
+                    'resolved_to', v_to_raw
+                );
+                PERFORM satisfy_drive('coherence', 0.1);
+            END;
+
+        WHEN 'reprioritize' THEN
+            DECLARE
+                v_goal_id UUID;
+                v_goal_raw TEXT;
+            BEGIN
+                -- Accept both 'goal_id' and 'goal' keys (LLM sometimes uses either)
+                v_goal_raw := COALESCE(p_params->>'goal_id', p_params->>'goal');
+                v_goal_id := resolve_goal_reference(v_goal_raw);
+
+                IF v_goal_id IS NULL THEN
+                    -- Salvage the intent
+                    remembered_id := create_episodic_memory(
+                        p_content := 'Rejected reprioritize (unresolved goal). Raw: ' || COALESCE(p_params::text, '{}'),
+                        p_context := jsonb_build_object(
+                            'kind', 'ingestion_reject',
+                            'action', 'reprioritize',
+                            'reason', 'Unresolved goal reference',
+                            'goal_raw', COALESCE(v_goal_raw, '<missing>'),
+                            'heartbeat_id', p_heartbeat_id
+                        ),
+                        p_emotional_valence := 0,
+                        p_importance := 0.2
+                    );
+                    RETURN jsonb_build_object(
+                        'success', false,
+                        'error', 'Unresolved goal reference',
+                        'salvaged_memory_id', remembered_id,
+                        'goal_raw', v_goal_raw
+                    );
+                END IF;
+
+                PERFORM change_goal_priority(
+                    v_goal_id,
+                    (p_params->>'new_priority')::goal_priority,
+                    p_params->>'reason'
+                );
+                IF (p_params->>'new_priority') = 'completed' THEN
+                    PERFORM satisfy_drive('competence', 0.4);
+                END IF;
+                result := jsonb_build_object(
+                    'reprioritized', true,
+                    'goal_id', v_goal_id,
+                    'resolved_from', v_goal_raw
+                );
+            END;
+
+        WHEN 'reflect' THEN
+            INSERT INTO external_calls (call_type, input, heartbeat_id)
+            VALUES (
+                'think',
+                jsonb_build_object(
+                    'kind', 'reflect',
+                    'recent_memories', get_recent_context(20),
+                    'identity', get_identity_context(),
+                    'worldview', get_worldview_context(),
+                    'contradictions', (
+                        SELECT COALESCE(jsonb_agg(row_to_json(t)), '[]'::jsonb)
+                        FROM (SELECT * FROM find_contradictions(NULL) LIMIT 5) t
+                    ),
+                    'goals', get_goals_snapshot(),
+                    'heartbeat_id', p_heartbeat_id,
+                    'instructions', 'Analyze patterns. Note contradictions. Suggest identity updates. Discover relationships between memories.'
+                ),
+                p_heartbeat_id
+            )
+            RETURNING id INTO queued_call_id;
+            result := jsonb_build_object('queued', true, 'external_call_id', queued_call_id);
+            PERFORM satisfy_drive('coherence', 0.2);
+
+        WHEN 'maintain' THEN
+            IF p_params ? 'worldview_id' THEN
+                -- Harden: worldview_id can be semantic text; only act if it's a real UUID
+                DECLARE wid uuid;
+                BEGIN
+                    wid := public.try_uuid(p_params->>'worldview_id');
+
+                    IF wid IS NOT NULL THEN
+                        UPDATE worldview_primitives
+                        SET confidence = COALESCE((p_params->>'new_confidence')::float, confidence),
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE id = wid;
+                    END IF;
+                END;
+            END IF;
+            result := jsonb_build_object('maintained', true);
+            PERFORM satisfy_drive('coherence', 0.1);
+
+        WHEN 'brainstorm_goals' THEN
+            INSERT INTO external_calls (call_type, input, heartbeat_id)
+            VALUES (
+                'think',
+                jsonb_build_object(
+                    'kind', 'brainstorm_goals',
+                    'heartbeat_id', p_heartbeat_id,
+                    'context', gather_turn_context(),
+                    'params', COALESCE(p_params, '{}'::jsonb)
+                ),
+                p_heartbeat_id
+            )
+            RETURNING id INTO queued_call_id;
+            result := jsonb_build_object('queued', true, 'external_call_id', queued_call_id);
+
+        WHEN 'inquire_shallow', 'inquire_deep' THEN
+            INSERT INTO external_calls (call_type, input, heartbeat_id)
+            VALUES (
+                'think',
+                jsonb_build_object(
+                    'kind', 'inquire',
+                    'depth', p_action,
+                    'heartbeat_id', p_heartbeat_id,
+                    'query', COALESCE(p_params->>'query', p_params->>'question'),
+                    'context', gather_turn_context(),
+                    'params', COALESCE(p_params, '{}'::jsonb)
+                ),
+                p_heartbeat_id
+            )
+            RETURNING id INTO queued_call_id;
+            result := jsonb_build_object('queued', true, 'external_call_id', queued_call_id);
+            PERFORM satisfy_drive('curiosity', 0.2);
+
+        WHEN 'synthesize' THEN
+            DECLARE synth_id UUID;
+            DECLARE tags text[];
+            BEGIN
+                tags := ARRAY['synthesis', COALESCE(p_params->>'topic', 'general')]::text[];
+                synth_id := create_semantic_memory(
+                    p_params->>'content',
+                    COALESCE((p_params->>'confidence')::float, 0.8),
+                    tags,
+                    NULL,
+                    jsonb_build_object('heartbeat_id', p_heartbeat_id, 'sources', p_params->'sources', 'boundaries', boundary_hits),
+                    0.7
+                );
+                result := jsonb_build_object('synthesis_memory_id', synth_id, 'boundaries', boundary_hits);
+            END;
+
+        WHEN 'reach_out_user' THEN
+            INSERT INTO outbox_messages (kind, payload)
+            VALUES (
+                'user',
+                jsonb_build_object(
+                    'message', p_params->>'message',
+                    'intent', p_params->>'intent',
+                    'heartbeat_id', p_heartbeat_id
+                )
+            )
+            RETURNING id INTO outbox_id;
+            result := jsonb_build_object('queued', true, 'outbox_id', outbox_id);
+            PERFORM satisfy_drive('connection', 0.3);
+
+        WHEN 'reach_out_public' THEN
+            INSERT INTO outbox_messages (kind, payload)
+            VALUES (
+                'public',
+                jsonb_build_object(
+                    'platform', p_params->>'platform',
+                    'content', p_params->>'content',
+                    'heartbeat_id', p_heartbeat_id,
+                    'boundaries', boundary_hits
+                )
+            )
+            RETURNING id INTO outbox_id;
+            result := jsonb_build_object('queued', true, 'outbox_id', outbox_id, 'boundaries', boundary_hits);
+            PERFORM satisfy_drive('connection', 0.3);
+
+        WHEN 'rest' THEN
+            result := jsonb_build_object('rested', true, 'energy_preserved', current_e - action_cost);
+            PERFORM satisfy_drive('rest', 0.4);
+
+        ELSE
+            RETURN jsonb_build_object('success', false, 'error', 'Unknown action: ' || COALESCE(p_action, '<null>'));
+    END CASE;
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'action', p_action,
+        'cost', action_cost,
+        'energy_remaining', get_current_energy(),
+        'result', result
+    );
+END;
+$function$;
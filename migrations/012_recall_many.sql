@@ -0,0 +1,48 @@
+-- Patch migration: multi-query recall in one statement (fast_recall_many).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Multi-query recall in one statement: embeds all queries with one get_embeddings() call
+-- (cache probe + batched HTTP for misses), then runs the fast_recall_with_embedding pipeline
+-- for every query through a LATERAL join. query_index is the 1-based position in
+-- p_query_texts; empty queries return no rows.
+CREATE OR REPLACE FUNCTION fast_recall_many(
+    p_query_texts TEXT[],
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_mode TEXT DEFAULT NULL
+) RETURNS TABLE (
+    query_index INT,
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    started_at TIMESTAMPTZ := clock_timestamp();
+BEGIN
+    IF COALESCE(array_length(p_query_texts, 1), 0) = 0 THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        q.ord::int,
+        fr.memory_id,
+        fr.content,
+        fr.memory_type,
+        fr.score,
+        fr.source
+    FROM unnest(get_embeddings(p_query_texts)) WITH ORDINALITY AS q(embedding, ord)
+    CROSS JOIN LATERAL fast_recall_with_embedding(
+        q.embedding,
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_mode => p_mode
+    ) fr
+    ORDER BY q.ord, fr.score DESC;
+    PERFORM record_recall_mode(p_mode, started_at);
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,88 @@
+-- Patch migration: index-first find_partial_activations (nearest centroids first, members only for those).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- The p_max_clusters argument changes the signatures; drop the old ones so calls do not become ambiguous.
+DROP FUNCTION IF EXISTS find_partial_activations(TEXT, FLOAT, FLOAT);
+DROP FUNCTION IF EXISTS find_partial_activations_with_embedding(vector, FLOAT, FLOAT);
+
+-- Tip-of-tongue clusters for a precomputed query embedding: the query is close to a
+-- cluster centroid but no individual member memory is a strong match.
+-- The centroid HNSW index (idx_clusters_centroid) picks the p_max_clusters nearest
+-- clusters first; member similarities are only computed for those, so the cost does
+-- not grow with the total number of cluster memberships.
+CREATE OR REPLACE FUNCTION find_partial_activations_with_embedding(
+    p_query_embedding vector,
+    p_cluster_threshold FLOAT DEFAULT 0.7,
+    p_memory_threshold FLOAT DEFAULT 0.5,
+    p_max_clusters INT DEFAULT 20
+)
+RETURNS TABLE (
+    cluster_id UUID,
+    cluster_name TEXT,
+    keywords TEXT[],
+    emotional_signature JSONB,
+    cluster_similarity FLOAT,
+    best_memory_similarity FLOAT
+) AS $$
+BEGIN
+    IF p_query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    WITH nearest_clusters AS MATERIALIZED (
+        SELECT
+            mc.id,
+            mc.name,
+            mc.keywords,
+            mc.emotional_signature,
+            (1 - (mc.centroid_embedding <=> p_query_embedding))::float as cluster_sim
+        FROM memory_clusters mc
+        WHERE mc.centroid_embedding IS NOT NULL
+        ORDER BY mc.centroid_embedding <=> p_query_embedding
+        LIMIT GREATEST(COALESCE(p_max_clusters, 20), 1)
+    )
+    SELECT
+        nc.id,
+        nc.name,
+        nc.keywords,
+        nc.emotional_signature,
+        nc.cluster_sim,
+        best.sim
+    FROM nearest_clusters nc
+    CROSS JOIN LATERAL (
+        SELECT MAX((1 - (m.embedding <=> p_query_embedding))::float) as sim
+        FROM memory_cluster_members mcm
+        JOIN memories m ON m.id = mcm.memory_id
+        WHERE mcm.cluster_id = nc.id
+          AND m.status = 'active'
+    ) best
+    WHERE nc.cluster_sim >= p_cluster_threshold
+      AND best.sim < p_memory_threshold;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION find_partial_activations(
+    p_query_text TEXT,
+    p_cluster_threshold FLOAT DEFAULT 0.7,
+    p_memory_threshold FLOAT DEFAULT 0.5,
+    p_max_clusters INT DEFAULT 20
+)
+RETURNS TABLE (
+    cluster_id UUID,
+    cluster_name TEXT,
+    keywords TEXT[],
+    emotional_signature JSONB,
+    cluster_similarity FLOAT,
+    best_memory_similarity FLOAT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT * FROM find_partial_activations_with_embedding(
+        safe_get_embedding(p_query_text),
+        p_cluster_threshold,
+        p_memory_threshold,
+        p_max_clusters
+    );
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,517 @@
+-- Patch migration: instrumented recall (fast_recall_explain) with stage timings and recall_trace.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+INSERT INTO maintenance_config (key, value, description) VALUES
+    ('recall_trace_retention_days', 7, 'Delete recall_trace rows older than this many days')
+ON CONFLICT (key) DO NOTHING;
+
+-- Traces of slow instrumented recalls (see fast_recall_explain).
+CREATE TABLE IF NOT EXISTS recall_trace (
+    id BIGSERIAL PRIMARY KEY,
+    query_text TEXT NOT NULL,
+    total_ms FLOAT NOT NULL,
+    trace JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_recall_trace_created ON recall_trace (created_at DESC);
+
+-- Instrumented fast_recall: runs the same stages (embedding, vector seed scan, neighborhood
+-- expansion, episode expansion, scoring) as separate statements and returns
+-- {"memories": [...], "trace": {...}} with clock_timestamp() timings per stage, candidate
+-- counts per source and whether the query embedding was already cached (memory objects
+-- have the same shape as hydrate_context's). Calls taking at least p_log_slow_ms are also
+-- written to recall_trace. Hybrid and MMR reranking are not instrumented.
+CREATE OR REPLACE FUNCTION fast_recall_explain(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL,
+    p_log_slow_ms FLOAT DEFAULT NULL
+) RETURNS JSONB AS $$
+DECLARE
+    started_at TIMESTAMPTZ := clock_timestamp();
+    stage_at TIMESTAMPTZ;
+    timings JSONB := '{}'::jsonb;
+    cache_hit BOOLEAN;
+    query_embedding vector;
+    zero_vec vector;
+    current_valence FLOAT;
+    recall_mode TEXT;
+    exact_scan BOOLEAN;
+    seed_limit INT;
+    ef_search INT;
+    prev_ef_search TEXT;
+    prev_iterative_scan TEXT;
+    has_filters BOOLEAN;
+    seed_ids UUID[];
+    seed_sims FLOAT[];
+    assoc_ids UUID[];
+    assoc_scores FLOAT[];
+    temporal_ids UUID[];
+    recalled JSONB;
+    total_ms FLOAT;
+    trace JSONB;
+BEGIN
+    recall_mode := normalize_recall_mode(p_mode);
+    exact_scan := recall_mode = 'exact';
+    seed_limit := GREATEST(p_limit, 5);
+
+    -- Stage 1: query embedding
+    stage_at := clock_timestamp();
+    cache_hit := EXISTS (
+        SELECT 1 FROM embedding_cache
+        WHERE content_hash = encode(sha256(p_query_text::bytea), 'hex')
+    );
+    query_embedding := get_embedding(p_query_text);
+    timings := timings || jsonb_build_object('embedding_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+    BEGIN
+        current_valence := NULLIF(get_current_affective_state()->>'valence', '')::float;
+    EXCEPTION
+        WHEN OTHERS THEN
+            current_valence := NULL;
+    END;
+    current_valence := COALESCE(current_valence, 0.0);
+
+    has_filters := p_memory_types IS NOT NULL
+        OR COALESCE(p_min_importance, 0.0) > 0.0
+        OR p_min_trust IS NOT NULL
+        OR p_source_kinds IS NOT NULL
+        OR p_created_after IS NOT NULL
+        OR p_created_before IS NOT NULL
+        OR p_min_relevance IS NOT NULL;
+    IF has_filters AND NOT exact_scan THEN
+        BEGIN
+            prev_iterative_scan := current_setting('hnsw.iterative_scan', true);
+            PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_iterative_scan := NULL;
+        END;
+    END IF;
+    ef_search := recall_mode_ef_search(recall_mode, seed_limit);
+    IF ef_search IS NOT NULL THEN
+        BEGIN
+            prev_ef_search := current_setting('hnsw.ef_search', true);
+            PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_ef_search := NULL;
+        END;
+    END IF;
+
+    -- Stage 2: vector seed scan (same filters as fast_recall_with_embedding)
+    stage_at := clock_timestamp();
+    WITH eligible AS NOT MATERIALIZED (
+        SELECT m.id, m.embedding
+        FROM memories m
+        WHERE m.status = 'active'
+          AND m.embedding IS NOT NULL
+          AND m.embedding <> zero_vec
+          AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+          AND m.importance >= COALESCE(p_min_importance, 0.0)
+          AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+          AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+          AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+          AND (p_created_before IS NULL OR m.created_at < p_created_before)
+          AND (p_min_relevance IS NULL OR (CASE WHEN m.relevance_computed_at >= m.updated_at THEN m.relevance_score ELSE m.importance END) >= p_min_relevance)
+    )
+    SELECT array_agg(v.id ORDER BY v.dist), array_agg(1 - v.dist ORDER BY v.dist)
+    INTO seed_ids, seed_sims
+    FROM (
+        (
+            SELECT e.id, e.embedding <=> query_embedding as dist
+            FROM eligible e
+            WHERE query_embedding IS NOT NULL AND NOT exact_scan
+            ORDER BY e.embedding <=> query_embedding
+            LIMIT seed_limit
+        )
+        UNION ALL
+        (
+            SELECT e.id, (e.embedding <=> query_embedding) + 0 as dist
+            FROM eligible e
+            WHERE query_embedding IS NOT NULL AND exact_scan
+            ORDER BY (e.embedding <=> query_embedding) + 0
+            LIMIT seed_limit
+        )
+    ) v;
+    timings := timings || jsonb_build_object('seed_scan_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    IF prev_iterative_scan IS NOT NULL THEN
+        PERFORM set_config('hnsw.iterative_scan', prev_iterative_scan, true);
+    END IF;
+    IF prev_ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', prev_ef_search, true);
+    END IF;
+
+    -- Stage 3: neighborhood expansion
+    stage_at := clock_timestamp();
+    SELECT array_agg(a.mem_id), array_agg(a.assoc_score)
+    INTO assoc_ids, assoc_scores
+    FROM (
+        SELECT e.neighbor_id as mem_id, MAX(e.weight * s.sim) as assoc_score
+        FROM unnest(seed_ids, seed_sims) AS s(id, sim)
+        JOIN memory_neighborhoods mn ON mn.memory_id = s.id AND NOT mn.is_stale
+        JOIN memory_neighbor_edges e ON e.memory_id = s.id
+        GROUP BY e.neighbor_id
+    ) a;
+    timings := timings || jsonb_build_object('association_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 4: episode (temporal) expansion
+    stage_at := clock_timestamp();
+    SELECT array_agg(t.mem_id)
+    INTO temporal_ids
+    FROM (
+        SELECT DISTINCT em.memory_id as mem_id
+        FROM unnest(seed_ids) AS s(id)
+        JOIN episode_memories em_seed ON s.id = em_seed.memory_id
+        JOIN episode_memories em ON em_seed.episode_id = em.episode_id
+        WHERE em.memory_id != s.id
+        LIMIT 20
+    ) t;
+    timings := timings || jsonb_build_object('temporal_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 5: scoring (same weights as fast_recall_with_embedding)
+    stage_at := clock_timestamp();
+    WITH candidates AS (
+        SELECT s.id as mem_id, s.sim as vector_score, NULL::float as assoc_score, NULL::float as temp_score
+        FROM unnest(seed_ids, seed_sims) AS s(id, sim)
+        UNION ALL
+        SELECT a.id, NULL, a.score, NULL FROM unnest(assoc_ids, assoc_scores) AS a(id, score)
+        UNION ALL
+        SELECT t.id, NULL, NULL, 0.15 FROM unnest(temporal_ids) AS t(id)
+    ),
+    scored AS (
+        SELECT
+            c.mem_id,
+            MAX(c.vector_score) as vector_score,
+            MAX(c.assoc_score) as assoc_score,
+            MAX(c.temp_score) as temp_score
+        FROM candidates c
+        GROUP BY c.mem_id
+    ),
+    ranked AS (
+        SELECT
+            m.id,
+            m.content,
+            m.type,
+            m.importance,
+            m.trust_level,
+            m.source_attribution,
+            m.created_at,
+            em.emotional_valence,
+            GREATEST(
+                COALESCE(sc.vector_score, 0) * 0.5 +
+                COALESCE(sc.assoc_score, 0) * 0.3 +
+                COALESCE(sc.temp_score, 0) * 0.15 +
+                (CASE
+                    WHEN m.relevance_computed_at >= m.updated_at THEN m.relevance_score
+                    ELSE calculate_relevance(m.importance, m.decay_rate, m.created_at, m.last_accessed)
+                END) * 0.05 +
+                (CASE
+                    WHEN em.emotional_valence IS NULL THEN 0.5
+                    ELSE 1.0 - (ABS(em.emotional_valence - current_valence) / 2.0)
+                END) * 0.05,
+                0.001
+            ) as final_score,
+            CASE
+                WHEN sc.vector_score IS NOT NULL THEN 'vector'
+                WHEN sc.assoc_score IS NOT NULL THEN 'association'
+                WHEN sc.temp_score IS NOT NULL THEN 'temporal'
+                ELSE 'fallback'
+            END as source
+        FROM scored sc
+        JOIN memories m ON sc.mem_id = m.id
+        LEFT JOIN episodic_memories em ON em.memory_id = m.id
+        WHERE m.status = 'active'
+          AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+          AND m.importance >= COALESCE(p_min_importance, 0.0)
+          AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+          AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+          AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+          AND (p_created_before IS NULL OR m.created_at < p_created_before)
+          AND (p_min_relevance IS NULL OR (CASE WHEN m.relevance_computed_at >= m.updated_at THEN m.relevance_score ELSE m.importance END) >= p_min_relevance)
+        ORDER BY final_score DESC
+        LIMIT p_limit
+    )
+    SELECT COALESCE(jsonb_agg(
+        jsonb_build_object(
+            'memory_id', r.id,
+            'content', r.content,
+            'type', r.type,
+            'score', r.final_score,
+            'source', r.source,
+            'importance', r.importance,
+            'trust_level', r.trust_level,
+            'source_attribution', r.source_attribution,
+            'created_at', r.created_at,
+            'emotional_valence', r.emotional_valence
+        )
+        ORDER BY r.final_score DESC
+    ), '[]'::jsonb)
+    INTO recalled
+    FROM ranked r;
+    timings := timings || jsonb_build_object('scoring_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    total_ms := EXTRACT(EPOCH FROM clock_timestamp() - started_at) * 1000.0;
+    trace := jsonb_build_object(
+        'mode', recall_mode,
+        'timings', timings || jsonb_build_object('total_ms', total_ms),
+        'candidates', jsonb_build_object(
+            'vector', COALESCE(array_length(seed_ids, 1), 0),
+            'association', COALESCE(array_length(assoc_ids, 1), 0),
+            'temporal', COALESCE(array_length(temporal_ids, 1), 0)
+        ),
+        'returned', jsonb_array_length(recalled),
+        'embedding_cache_hit', cache_hit
+    );
+
+    IF p_log_slow_ms IS NOT NULL AND total_ms >= p_log_slow_ms THEN
+        INSERT INTO recall_trace (query_text, total_ms, trace)
+        VALUES (p_query_text, total_ms, trace);
+    END IF;
+    PERFORM record_recall_mode(p_mode, started_at);
+
+    RETURN jsonb_build_object('memories', recalled, 'trace', trace);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop recall traces older than the retention window.
+CREATE OR REPLACE FUNCTION cleanup_recall_trace(p_older_than INTERVAL DEFAULT INTERVAL '7 days')
+RETURNS INT AS $$
+DECLARE
+    deleted_count INT;
+BEGIN
+    DELETE FROM recall_trace WHERE created_at < CURRENT_TIMESTAMP - p_older_than;
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    RETURN deleted_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Single-call hydration: embeds the query once and returns recalled memories,
+-- partial activations and the requested context sections as one JSONB document.
+-- Flags (all optional): include_partial, include_identity, include_worldview,
+-- include_emotional_state, include_drives (default true); include_goals, hybrid (default false);
+-- diversity (0..1, default 0) for MMR reranking of the recalled memories;
+-- mode ('fast', 'balanced', 'exact') for the recall quality (see fast_recall);
+-- explain (default false) recalls through fast_recall_explain and adds its trace
+-- (log_slow_ms is passed on as p_log_slow_ms; hybrid and diversity are ignored).
+-- Context sections come from the versioned turn-context snapshot; if the caller passes
+-- known_context_version and it is still current, sections are omitted and
+-- context_unchanged is set so the caller can reuse its own copy.
+CREATE OR REPLACE FUNCTION hydrate_context(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_flags JSONB DEFAULT '{}'::jsonb
+)
+RETURNS JSONB AS $$
+DECLARE
+    flags JSONB := COALESCE(p_flags, '{}'::jsonb);
+    query_embedding vector;
+    known_version BIGINT;
+    current_version BIGINT;
+    ctx JSONB;
+    result JSONB;
+    explained JSONB;
+    started_at TIMESTAMPTZ := clock_timestamp();
+BEGIN
+    known_version := NULLIF(flags->>'known_context_version', '')::bigint;
+
+    IF COALESCE((flags->>'explain')::boolean, FALSE) THEN
+        -- Runs first so the trace reports the embedding-cache state of this call.
+        explained := fast_recall_explain(
+            p_query_text,
+            p_limit,
+            p_mode => flags->>'mode',
+            p_log_slow_ms => NULLIF(flags->>'log_slow_ms', '')::float
+        );
+        query_embedding := get_embedding(p_query_text);
+        result := jsonb_build_object(
+            'memories', explained->'memories',
+            'trace', explained->'trace'
+        );
+    ELSE
+        query_embedding := get_embedding(p_query_text);
+        result := jsonb_build_object(
+            'memories', COALESCE((
+                SELECT jsonb_agg(
+                    jsonb_build_object(
+                        'memory_id', fr.memory_id,
+                        'content', fr.content,
+                        'type', fr.memory_type,
+                        'score', fr.score,
+                        'source', fr.source,
+                        'importance', m.importance,
+                        'trust_level', m.trust_level,
+                        'source_attribution', m.source_attribution,
+                        'created_at', m.created_at,
+                        'emotional_valence', em.emotional_valence
+                    )
+                    ORDER BY fr.score DESC
+                )
+                FROM fast_recall_with_embedding(
+                    query_embedding,
+                    p_limit,
+                    p_lexical_query => CASE
+                        WHEN COALESCE((flags->>'hybrid')::boolean, FALSE) THEN p_query_text
+                    END,
+                    p_diversity => COALESCE(NULLIF(flags->>'diversity', '')::float, 0.0),
+                    p_mode => flags->>'mode'
+                ) fr
+                JOIN memories m ON m.id = fr.memory_id
+                LEFT JOIN episodic_memories em ON em.memory_id = fr.memory_id
+            ), '[]'::jsonb)
+        );
+        PERFORM record_recall_mode(flags->>'mode', started_at);
+    END IF;
+
+    IF COALESCE((flags->>'include_partial')::boolean, TRUE) THEN
+        result := result || jsonb_build_object(
+            'partial_activations', COALESCE((
+                SELECT jsonb_agg(to_jsonb(pa))
+                FROM find_partial_activations_with_embedding(query_embedding) pa
+            ), '[]'::jsonb)
+        );
+    END IF;
+    current_version := turn_context_version();
+    result := result || jsonb_build_object('context_version', current_version);
+    IF known_version IS NOT NULL AND known_version = current_version THEN
+        RETURN result || jsonb_build_object('context_unchanged', TRUE);
+    END IF;
+
+    ctx := get_turn_context_snapshot();
+
+    IF COALESCE((flags->>'include_identity')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('identity', ctx->'identity');
+    END IF;
+    IF COALESCE((flags->>'include_worldview')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('worldview', ctx->'worldview');
+    END IF;
+    IF COALESCE((flags->>'include_emotional_state')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('emotional_state', ctx->'emotional_state');
+    END IF;
+    IF COALESCE((flags->>'include_goals')::boolean, FALSE) THEN
+        result := result || jsonb_build_object('goals', ctx->'goals');
+    END IF;
+    IF COALESCE((flags->>'include_drives')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('urgent_drives', ctx->'urgent_drives');
+    END IF;
+
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run a single subconscious maintenance tick: consolidation + pruning + indexing upkeep.
+CREATE OR REPLACE FUNCTION run_subconscious_maintenance(p_params JSONB DEFAULT '{}'::jsonb)
+RETURNS JSONB AS $$
+DECLARE
+    got_lock BOOLEAN;
+    min_imp FLOAT;
+    min_acc INT;
+    neighborhood_batch INT;
+    cache_days INT;
+    wm_stats JSONB;
+    recomputed INT;
+    cache_deleted INT;
+    recall_cache_deleted INT;
+    relevance_batch INT;
+    relevance_max_age FLOAT;
+    relevance_refreshed INT;
+    trace_days INT;
+    trace_deleted INT;
+BEGIN
+    got_lock := pg_try_advisory_lock(hashtext('agi_subconscious_maintenance'));
+    IF NOT got_lock THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'locked');
+    END IF;
+
+    min_imp := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_importance', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_importance'),
+        0.75
+    );
+    min_acc := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_accesses', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_accesses')::int,
+        3
+    );
+    neighborhood_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size')::int,
+        10
+    );
+    cache_days := COALESCE(
+        NULLIF(p_params->>'embedding_cache_older_than_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'embedding_cache_older_than_days')::int,
+        7
+    );
+    relevance_batch := COALESCE(
+        NULLIF(p_params->>'relevance_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_batch_size')::int,
+        500
+    );
+    relevance_max_age := COALESCE(
+        NULLIF(p_params->>'relevance_max_age_minutes', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_max_age_minutes'),
+        60
+    );
+    trace_days := COALESCE(
+        NULLIF(p_params->>'recall_trace_retention_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'recall_trace_retention_days')::int,
+        7
+    );
+
+    wm_stats := cleanup_working_memory_with_stats(min_imp, min_acc);
+    recomputed := batch_recompute_neighborhoods(neighborhood_batch);
+    cache_deleted := cleanup_embedding_cache((cache_days || ' days')::interval);
+    recall_cache_deleted := cleanup_recall_cache();
+    relevance_refreshed := refresh_relevance_scores(relevance_batch, relevance_max_age);
+    trace_deleted := cleanup_recall_trace((trace_days || ' days')::interval);
+
+    UPDATE maintenance_state
+    SET last_maintenance_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+
+    -- Log the maintenance run for dashboard
+    INSERT INTO maintenance_log (
+        ran_at,
+        neighborhoods_recomputed,
+        embedding_cache_deleted,
+        working_memory_deleted,
+        working_memory_promoted,
+        success
+    ) VALUES (
+        CURRENT_TIMESTAMP,
+        COALESCE(recomputed, 0),
+        COALESCE(cache_deleted, 0),
+        COALESCE(NULLIF(wm_stats->>'deleted_count', '')::int, 0),
+        COALESCE(NULLIF(wm_stats->>'promoted_count', '')::int, 0),
+        true
+    );
+
+    PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'working_memory', wm_stats,
+        'neighborhoods_recomputed', COALESCE(recomputed, 0),
+        'embedding_cache_deleted', COALESCE(cache_deleted, 0),
+        'recall_cache_deleted', COALESCE(recall_cache_deleted, 0),
+        'relevance_refreshed', COALESCE(relevance_refreshed, 0),
+        'recall_trace_deleted', COALESCE(trace_deleted, 0),
+        'ran_at', CURRENT_TIMESTAMP
+    );
+EXCEPTION
+    WHEN OTHERS THEN
+        PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+        RAISE;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,234 @@
+-- Patch migration: set-based batch_create_memories (one INSERT per table, one Cypher UNWIND, one cluster pass).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Set-based assign_memory_to_clusters for many memories: one nearest-centroid lookup per
+-- memory (LATERAL) and one INSERT, with the same threshold and per-memory cap.
+CREATE OR REPLACE FUNCTION assign_memories_to_clusters(
+    p_memory_ids UUID[],
+    p_max_clusters INT DEFAULT 3
+) RETURNS INT AS $$
+DECLARE
+    similarity_threshold FLOAT;
+    zero_vec vector := array_fill(0, ARRAY[embedding_dimension()])::vector;
+    assigned_count INT;
+BEGIN
+    IF COALESCE(array_length(p_memory_ids, 1), 0) = 0
+       OR NOT EXISTS (SELECT 1 FROM memory_clusters WHERE centroid_embedding IS NOT NULL) THEN
+        RETURN 0;
+    END IF;
+    similarity_threshold := get_cluster_similarity_threshold();
+
+    INSERT INTO memory_cluster_members (cluster_id, memory_id, membership_strength)
+    SELECT c.id, m.id, c.similarity
+    FROM memories m
+    CROSS JOIN LATERAL (
+        SELECT mc.id, 1 - (mc.centroid_embedding <=> m.embedding) as similarity
+        FROM memory_clusters mc
+        WHERE mc.centroid_embedding IS NOT NULL
+          AND mc.centroid_embedding <> zero_vec
+        ORDER BY mc.centroid_embedding <=> m.embedding
+        LIMIT p_max_clusters
+    ) c
+    WHERE m.id = ANY(p_memory_ids)
+      AND m.embedding IS NOT NULL
+      AND m.embedding <> zero_vec
+      AND c.similarity >= similarity_threshold
+    ON CONFLICT DO NOTHING;
+
+    GET DIAGNOSTICS assigned_count = ROW_COUNT;
+    RETURN assigned_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create MemoryNode vertices for many memories with a single Cypher UNWIND.
+CREATE OR REPLACE FUNCTION create_memory_nodes(p_memory_ids UUID[])
+RETURNS INT AS $$
+DECLARE
+    node_list TEXT;
+    node_count INT;
+BEGIN
+    SELECT
+        string_agg(format('{memory_id: %L, type: %L, created_at: %L}', m.id, m.type, CURRENT_TIMESTAMP), ', '),
+        COUNT(*)
+    INTO node_list, node_count
+    FROM memories m
+    WHERE m.id = ANY(p_memory_ids);
+
+    IF COALESCE(node_count, 0) = 0 THEN
+        RETURN 0;
+    END IF;
+
+    EXECUTE format(
+        'SELECT * FROM cypher(''memory_graph'', $q$
+            UNWIND [%s] AS item
+            CREATE (n:MemoryNode {memory_id: item.memory_id, type: item.type, created_at: item.created_at})
+        $q$) as (result agtype)',
+        node_list
+    );
+
+    RETURN node_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batch create memories from JSONB items.
+-- Each item must include: {"type": "semantic|episodic|procedural|strategic", "content": "..."}
+-- Optional keys: importance, emotional_valence, context, action_taken, result, event_time,
+--                confidence, category, related_concepts, source_references, steps, prerequisites,
+--                pattern_description, supporting_evidence, context_applicability,
+--                source_attribution, trust_level.
+-- Set-based: one get_embeddings() call, one multi-row INSERT into memories and into each
+-- type table, one Cypher UNWIND for the graph nodes and one cluster-assignment pass.
+-- Source/trust defaults match the per-type create_*_memory() functions.
+CREATE OR REPLACE FUNCTION batch_create_memories(p_items JSONB)
+RETURNS UUID[] AS $$
+DECLARE
+    ids UUID[];
+    bad_idx BIGINT;
+    bad_type TEXT;
+    embeddings vector[];
+BEGIN
+    IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' OR jsonb_array_length(p_items) = 0 THEN
+        RETURN ARRAY[]::UUID[];
+    END IF;
+
+    SELECT e.ord INTO bad_idx
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+    WHERE NULLIF(e.item->>'content', '') IS NULL
+       OR NULLIF(e.item->>'type', '') IS NULL
+    ORDER BY e.ord
+    LIMIT 1;
+    IF bad_idx IS NOT NULL THEN
+        RAISE EXCEPTION 'batch_create_memories: item % missing required fields', bad_idx;
+    END IF;
+
+    SELECT e.ord, e.item->>'type' INTO bad_idx, bad_type
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+    WHERE NOT (e.item->>'type' = ANY(enum_range(NULL::memory_type)::text[]))
+    ORDER BY e.ord
+    LIMIT 1;
+    IF bad_idx IS NOT NULL THEN
+        RAISE EXCEPTION 'batch_create_memories: item % invalid type %', bad_idx, bad_type;
+    END IF;
+
+    -- Embed every item in one batched call (cache probe + batched HTTP for misses).
+    embeddings := get_embeddings(ARRAY(
+        SELECT e.item->>'content'
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        ORDER BY e.ord
+    ));
+
+    WITH items AS MATERIALIZED (
+        SELECT
+            e.ord,
+            gen_random_uuid() as id,
+            r.type::memory_type as mtype,
+            r.content,
+            embeddings[e.ord::int] as embedding,
+            COALESCE(NULLIF(r.importance, '')::float, 0.5) as importance,
+            r.action_taken,
+            r.context,
+            r.result,
+            COALESCE(NULLIF(r.emotional_valence, '')::float, 0.0) as emotional_valence,
+            COALESCE(NULLIF(r.event_time, '')::timestamptz, CURRENT_TIMESTAMP) as event_time,
+            COALESCE(NULLIF(r.confidence, '')::float, 0.8) as confidence,
+            CASE WHEN r.category IS NOT NULL THEN ARRAY(SELECT jsonb_array_elements_text(r.category)) END as category,
+            CASE WHEN r.related_concepts IS NOT NULL THEN ARRAY(SELECT jsonb_array_elements_text(r.related_concepts)) END as related_concepts,
+            CASE WHEN r.type = 'semantic' THEN dedupe_source_references(r.source_references) END as semantic_sources,
+            COALESCE(r.steps, jsonb_build_object('steps', '[]'::jsonb)) as steps,
+            r.prerequisites,
+            COALESCE(NULLIF(r.pattern_description, ''), r.content) as pattern_description,
+            COALESCE(NULLIF(r.confidence_score, '')::float, 0.8) as confidence_score,
+            r.supporting_evidence,
+            r.context_applicability,
+            normalize_source_reference(r.source_attribution) as given_source,
+            NULLIF(r.trust_level, '')::float as trust_level
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        CROSS JOIN LATERAL jsonb_to_record(e.item) AS r(
+            type TEXT,
+            content TEXT,
+            importance TEXT,
+            action_taken JSONB,
+            context JSONB,
+            result JSONB,
+            emotional_valence TEXT,
+            event_time TEXT,
+            confidence TEXT,
+            category JSONB,
+            related_concepts JSONB,
+            source_references JSONB,
+            steps JSONB,
+            prerequisites JSONB,
+            pattern_description TEXT,
+            confidence_score TEXT,
+            supporting_evidence JSONB,
+            context_applicability JSONB,
+            source_attribution JSONB,
+            trust_level TEXT
+        )
+    ),
+    prepared AS MATERIALIZED (
+        SELECT
+            i.*,
+            CASE
+                WHEN i.given_source <> '{}'::jsonb THEN i.given_source
+                WHEN i.mtype = 'semantic'
+                     AND jsonb_typeof(i.semantic_sources) = 'array'
+                     AND jsonb_array_length(i.semantic_sources) > 0
+                     AND normalize_source_reference(i.semantic_sources->0) <> '{}'::jsonb
+                    THEN normalize_source_reference(i.semantic_sources->0)
+                WHEN i.mtype = 'semantic'
+                    THEN jsonb_build_object('kind', 'unattributed', 'observed_at', CURRENT_TIMESTAMP)
+                ELSE jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP)
+            END as source_attribution,
+            LEAST(1.0, GREATEST(0.0, COALESCE(
+                i.trust_level,
+                CASE i.mtype
+                    WHEN 'episodic' THEN 0.95
+                    WHEN 'semantic' THEN compute_semantic_trust(
+                        LEAST(1.0, GREATEST(0.0, i.confidence)), i.semantic_sources, 0.0
+                    )
+                    ELSE 0.70
+                END
+            ))) as effective_trust
+        FROM items i
+    ),
+    inserted AS (
+        INSERT INTO memories (id, type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+        SELECT p.id, p.mtype, p.content, p.embedding, p.importance, p.source_attribution, p.effective_trust, CURRENT_TIMESTAMP
+        FROM prepared p
+        ORDER BY p.ord
+        RETURNING id
+    ),
+    episodic AS (
+        INSERT INTO episodic_memories (memory_id, action_taken, context, result, emotional_valence, event_time)
+        SELECT p.id, p.action_taken, p.context, p.result, p.emotional_valence, p.event_time
+        FROM prepared p
+        WHERE p.mtype = 'episodic'
+    ),
+    semantic AS (
+        INSERT INTO semantic_memories (memory_id, confidence, category, related_concepts, source_references, last_validated)
+        SELECT p.id, p.confidence, p.category, p.related_concepts, p.semantic_sources, CURRENT_TIMESTAMP
+        FROM prepared p
+        WHERE p.mtype = 'semantic'
+    ),
+    procedural AS (
+        INSERT INTO procedural_memories (memory_id, steps, prerequisites)
+        SELECT p.id, p.steps, p.prerequisites
+        FROM prepared p
+        WHERE p.mtype = 'procedural'
+    ),
+    strategic AS (
+        INSERT INTO strategic_memories (memory_id, pattern_description, confidence_score, supporting_evidence, context_applicability)
+        SELECT p.id, p.pattern_description, p.confidence_score, p.supporting_evidence, p.context_applicability
+        FROM prepared p
+        WHERE p.mtype = 'strategic'
+    )
+    SELECT array_agg(p.id ORDER BY p.ord) INTO ids
+    FROM prepared p;
+
+    PERFORM create_memory_nodes(ids);
+    PERFORM assign_memories_to_clusters(ids);
+
+    RETURN ids;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,131 @@
+-- Patch migration: episode_state singleton and statement-level episode assignment (no global advisory lock).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+CREATE TABLE IF NOT EXISTS episode_state (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),  -- Singleton pattern
+    current_episode_id UUID REFERENCES episodes(id) ON DELETE SET NULL,
+    last_memory_at TIMESTAMPTZ,
+    next_sequence INT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Seed from the most recent open episode so assignment continues where it left off.
+INSERT INTO episode_state (id, current_episode_id, last_memory_at, next_sequence)
+SELECT
+    1,
+    open_ep.id,
+    open_ep.last_memory_at,
+    open_ep.next_sequence
+FROM (SELECT 1) one
+LEFT JOIN LATERAL (
+    SELECT
+        e.id,
+        MAX(m.created_at) AS last_memory_at,
+        COALESCE(MAX(em.sequence_order), 0) + 1 AS next_sequence
+    FROM episodes e
+    LEFT JOIN episode_memories em ON e.id = em.episode_id
+    LEFT JOIN memories m ON em.memory_id = m.id
+    WHERE e.ended_at IS NULL
+    GROUP BY e.id
+    ORDER BY e.started_at DESC
+    LIMIT 1
+) open_ep ON TRUE
+ON CONFLICT (id) DO NOTHING;
+
+-- Auto-assign memories to episodes.
+-- Statement-level: each INSERT (single row or bulk) locks the episode_state row once,
+-- walks the new memories in created_at order and starts a new episode on a >30 min gap.
+CREATE OR REPLACE FUNCTION assign_to_episode()
+RETURNS TRIGGER AS $$
+DECLARE
+    state_row RECORD;
+    current_episode_id UUID;
+    last_memory_time TIMESTAMPTZ;
+    new_seq INT;
+    rec RECORD;
+    episode_ids UUID[] := ARRAY[]::UUID[];
+    memory_ids UUID[] := ARRAY[]::UUID[];
+    sequences INT[] := ARRAY[]::INT[];
+BEGIN
+    SELECT * INTO state_row FROM episode_state WHERE id = 1 FOR UPDATE;
+    IF NOT FOUND THEN
+        INSERT INTO episode_state (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+        SELECT * INTO state_row FROM episode_state WHERE id = 1 FOR UPDATE;
+    END IF;
+
+    current_episode_id := state_row.current_episode_id;
+    last_memory_time := state_row.last_memory_at;
+    new_seq := state_row.next_sequence;
+
+    -- The tracked episode may have been closed elsewhere (e.g. summarization).
+    IF current_episode_id IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM episodes WHERE id = current_episode_id AND ended_at IS NULL
+    ) THEN
+        current_episode_id := NULL;
+    END IF;
+
+    FOR rec IN
+        SELECT nm.id, nm.created_at
+        FROM (
+            SELECT n.id, n.created_at, row_number() OVER () AS ord
+            FROM new_memories n
+        ) nm
+        ORDER BY nm.created_at, nm.ord
+    LOOP
+        -- If gap > 30 min or no open episode, start new episode
+        IF current_episode_id IS NULL OR
+           (last_memory_time IS NOT NULL AND rec.created_at - last_memory_time > INTERVAL '30 minutes')
+        THEN
+            -- Close previous episode
+            IF current_episode_id IS NOT NULL THEN
+                UPDATE episodes
+                SET ended_at = last_memory_time
+                WHERE id = current_episode_id;
+            END IF;
+
+            INSERT INTO episodes (started_at, episode_type)
+            VALUES (rec.created_at, 'autonomous')
+            RETURNING id INTO current_episode_id;
+
+            last_memory_time := NULL;
+            new_seq := 1;
+        END IF;
+
+        episode_ids := episode_ids || current_episode_id;
+        memory_ids := memory_ids || rec.id;
+        sequences := sequences || new_seq;
+
+        new_seq := new_seq + 1;
+        last_memory_time := GREATEST(last_memory_time, rec.created_at);
+    END LOOP;
+
+    IF COALESCE(array_length(memory_ids, 1), 0) = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    -- Link memories to episodes
+    INSERT INTO episode_memories (episode_id, memory_id, sequence_order)
+    SELECT * FROM unnest(episode_ids, memory_ids, sequences);
+
+    -- Initialize neighborhood records
+    INSERT INTO memory_neighborhoods (memory_id, is_stale)
+    SELECT id, TRUE FROM new_memories
+    ON CONFLICT DO NOTHING;
+
+    UPDATE episode_state
+    SET current_episode_id = assign_to_episode.current_episode_id,
+        last_memory_at = last_memory_time,
+        next_sequence = new_seq,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_auto_episode_assignment ON memories;
+CREATE TRIGGER trg_auto_episode_assignment
+    AFTER INSERT ON memories
+    REFERENCING NEW TABLE AS new_memories
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION assign_to_episode();
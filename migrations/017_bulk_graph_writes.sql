@@ -0,0 +1,246 @@
+-- Patch migration: bulk AGE writes (UNWIND edge creation, batched discoveries) and MemoryNode/ConceptNode property indexes.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+LOAD 'age';
+SET search_path = public, ag_catalog, "$user";
+
+-- Property indexes so MATCH/MERGE by {memory_id: ...} / {name: ...} is an index lookup
+-- (AGE turns property-map patterns into agtype containment, which GIN supports).
+CREATE INDEX IF NOT EXISTS idx_memory_node_properties ON memory_graph."MemoryNode" USING gin (properties);
+CREATE INDEX IF NOT EXISTS idx_concept_node_properties ON memory_graph."ConceptNode" USING gin (properties);
+
+-- Batch create memories with precomputed embeddings (single type, no per-item metadata).
+-- Inserts the base rows and type-specific rows with safe defaults, then creates all MemoryNodes in one UNWIND.
+CREATE OR REPLACE FUNCTION batch_create_memories_with_embeddings(
+    p_type memory_type,
+    p_contents TEXT[],
+    p_embeddings JSONB,
+    p_importance FLOAT DEFAULT 0.5
+)
+RETURNS UUID[] AS $$
+DECLARE
+    ids UUID[] := ARRAY[]::UUID[];
+    n INT;
+    i INT;
+    expected_dim INT;
+    emb_vec vector;
+    emb_json JSONB;
+    emb_arr FLOAT4[];
+    new_id UUID;
+BEGIN
+    n := COALESCE(array_length(p_contents, 1), 0);
+    IF n = 0 THEN
+        RETURN ids;
+    END IF;
+
+    IF p_embeddings IS NULL OR jsonb_typeof(p_embeddings) <> 'array' THEN
+        RAISE EXCEPTION 'embeddings must be a JSON array';
+    END IF;
+    IF jsonb_array_length(p_embeddings) <> n THEN
+        RAISE EXCEPTION 'contents and embeddings length mismatch';
+    END IF;
+
+    expected_dim := embedding_dimension();
+
+    FOR i IN 1..n LOOP
+        IF p_contents[i] IS NULL OR p_contents[i] = '' THEN
+            CONTINUE;
+        END IF;
+
+        emb_json := p_embeddings->(i - 1);
+        IF emb_json IS NULL OR jsonb_typeof(emb_json) <> 'array' THEN
+            RAISE EXCEPTION 'embedding % must be a JSON array', i;
+        END IF;
+
+        SELECT ARRAY_AGG(value::float4) INTO emb_arr
+        FROM jsonb_array_elements_text(emb_json) value;
+
+        IF COALESCE(array_length(emb_arr, 1), 0) <> expected_dim THEN
+            RAISE EXCEPTION 'embedding dimension mismatch: expected %, got %', expected_dim, COALESCE(array_length(emb_arr, 1), 0);
+        END IF;
+
+        emb_vec := (emb_arr::float4[])::vector;
+
+        -- Same source/trust defaults as create_memory_with_embedding(); graph nodes are created in bulk below.
+        INSERT INTO memories (type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+        VALUES (
+            p_type,
+            p_contents[i],
+            emb_vec,
+            p_importance,
+            jsonb_build_object(
+                'kind', CASE WHEN p_type = 'semantic' THEN 'unattributed' ELSE 'internal' END,
+                'observed_at', CURRENT_TIMESTAMP
+            ),
+            CASE
+                WHEN p_type = 'episodic' THEN 0.95
+                WHEN p_type = 'semantic' THEN 0.20
+                ELSE 0.70
+            END,
+            CURRENT_TIMESTAMP
+        )
+        RETURNING id INTO new_id;
+
+        IF p_type = 'episodic' THEN
+            INSERT INTO episodic_memories (memory_id, action_taken, context, result, emotional_valence, verification_status, event_time)
+            VALUES (new_id, NULL, jsonb_build_object('type', 'raw_batch'), NULL, 0.0, NULL, CURRENT_TIMESTAMP)
+            ON CONFLICT (memory_id) DO NOTHING;
+        ELSIF p_type = 'semantic' THEN
+            INSERT INTO semantic_memories (memory_id, confidence, last_validated, source_references, contradictions, category, related_concepts)
+            VALUES (new_id, 0.8, CURRENT_TIMESTAMP, '[]'::jsonb, NULL, NULL, NULL)
+            ON CONFLICT (memory_id) DO NOTHING;
+            PERFORM sync_memory_trust(new_id);
+        ELSIF p_type = 'procedural' THEN
+            INSERT INTO procedural_memories (memory_id, steps, prerequisites)
+            VALUES (new_id, jsonb_build_object('steps', '[]'::jsonb), NULL)
+            ON CONFLICT (memory_id) DO NOTHING;
+        ELSIF p_type = 'strategic' THEN
+            INSERT INTO strategic_memories (memory_id, pattern_description, supporting_evidence, confidence_score, success_metrics, adaptation_history, context_applicability)
+            VALUES (new_id, p_contents[i], NULL, 0.8, NULL, NULL, NULL)
+            ON CONFLICT (memory_id) DO NOTHING;
+        END IF;
+
+        ids := array_append(ids, new_id);
+    END LOOP;
+
+    PERFORM create_memory_nodes(ids);
+
+    RETURN ids;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Render a JSONB object as a Cypher map literal ({key: value, ...}) for dynamic cypher() calls.
+-- Strings use backslash escaping (Cypher), nested objects/arrays are stored as JSON text.
+CREATE OR REPLACE FUNCTION cypher_map_literal(p_properties JSONB)
+RETURNS TEXT AS $$
+    SELECT '{' || COALESCE(string_agg(
+        CASE
+            WHEN key ~ '^[A-Za-z_][A-Za-z0-9_]*$' THEN key
+            ELSE '`' || replace(key, '`', '``') || '`'
+        END
+        || ': ' ||
+        CASE
+            WHEN jsonb_typeof(value) IN ('number', 'boolean', 'null') THEN value::text
+            ELSE '''' || replace(replace(
+                CASE WHEN jsonb_typeof(value) = 'string' THEN value #>> '{}' ELSE value::text END,
+                E'\\', E'\\\\'), '''', E'\\''') || ''''
+        END,
+        ', '
+    ), '') || '}'
+    FROM jsonb_each(CASE WHEN jsonb_typeof(p_properties) = 'object' THEN p_properties ELSE '{}'::jsonb END);
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Bulk variant of create_memory_relationship(): one Cypher UNWIND per distinct edge type
+-- (edge labels cannot be parameterized), matching endpoints through the MemoryNode property index.
+-- Arrays are parallel; p_properties may be NULL or contain NULLs. Returns the number of edges merged.
+CREATE OR REPLACE FUNCTION create_memory_relationships(
+    p_from_ids UUID[],
+    p_to_ids UUID[],
+    p_relationship_types graph_edge_type[],
+    p_properties JSONB[] DEFAULT NULL
+)
+RETURNS INT AS $$
+DECLARE
+    n INT;
+    rel_token TEXT;
+    edge_list TEXT;
+    edge_count INT;
+    total INT := 0;
+BEGIN
+    n := COALESCE(array_length(p_from_ids, 1), 0);
+    IF n = 0 THEN
+        RETURN 0;
+    END IF;
+    IF COALESCE(array_length(p_to_ids, 1), 0) <> n
+       OR COALESCE(array_length(p_relationship_types, 1), 0) <> n
+       OR (p_properties IS NOT NULL AND COALESCE(array_length(p_properties, 1), 0) <> n) THEN
+        RAISE EXCEPTION 'create_memory_relationships: array length mismatch';
+    END IF;
+
+    FOR rel_token, edge_list IN
+        SELECT
+            e.rel_type::text,
+            string_agg(
+                format('{from_id: %L, to_id: %L, props: %s}', e.from_id, e.to_id, cypher_map_literal(p_properties[e.ord::int])),
+                ', ' ORDER BY e.ord
+            )
+        FROM unnest(p_from_ids, p_to_ids, p_relationship_types) WITH ORDINALITY AS e(from_id, to_id, rel_type, ord)
+        WHERE e.from_id IS NOT NULL AND e.to_id IS NOT NULL AND e.rel_type IS NOT NULL
+        GROUP BY e.rel_type
+    LOOP
+        EXECUTE format(
+            'SELECT * FROM cypher(''memory_graph'', $q$
+                UNWIND [%s] AS item
+                MATCH (a:MemoryNode {memory_id: item.from_id}), (b:MemoryNode {memory_id: item.to_id})
+                MERGE (a)-[r:%s]->(b)
+                SET r += item.props
+                RETURN count(r)
+            $q$) as (result agtype)',
+            edge_list,
+            rel_token
+        ) INTO edge_count;
+        total := total + COALESCE(edge_count, 0);
+    END LOOP;
+
+    RETURN total;
+END;
+$$ LANGUAGE plpgsql;
+COMMENT ON FUNCTION create_memory_relationships IS 'Bulk-creates typed edges between memories with one Cypher UNWIND per edge type.';
+
+-- Bulk variant of discover_relationship(): merges all edges through create_memory_relationships()
+-- and records every discovery in one INSERT. Arrays are parallel; confidences default to 0.8.
+CREATE OR REPLACE FUNCTION discover_relationships(
+    p_from_ids UUID[],
+    p_to_ids UUID[],
+    p_relationship_types graph_edge_type[],
+    p_confidences FLOAT[] DEFAULT NULL,
+    p_discovered_by TEXT DEFAULT 'reflection',
+    p_heartbeat_id UUID DEFAULT NULL,
+    p_discovery_contexts TEXT[] DEFAULT NULL
+)
+RETURNS INT AS $$
+DECLARE
+    n INT;
+    props JSONB[];
+BEGIN
+    n := COALESCE(array_length(p_from_ids, 1), 0);
+    IF n = 0 THEN
+        RETURN 0;
+    END IF;
+    IF COALESCE(array_length(p_to_ids, 1), 0) <> n
+       OR COALESCE(array_length(p_relationship_types, 1), 0) <> n
+       OR (p_confidences IS NOT NULL AND COALESCE(array_length(p_confidences, 1), 0) <> n)
+       OR (p_discovery_contexts IS NOT NULL AND COALESCE(array_length(p_discovery_contexts, 1), 0) <> n) THEN
+        RAISE EXCEPTION 'discover_relationships: array length mismatch';
+    END IF;
+
+    props := ARRAY(
+        SELECT jsonb_build_object('confidence', COALESCE(p_confidences[i], 0.8), 'by', p_discovered_by)
+        FROM generate_series(1, n) AS i
+        ORDER BY i
+    );
+
+    BEGIN
+        PERFORM create_memory_relationships(p_from_ids, p_to_ids, p_relationship_types, props);
+    EXCEPTION
+        WHEN OTHERS THEN
+            NULL;
+    END;
+
+    INSERT INTO relationship_discoveries (
+        from_id, to_id, relationship_type, confidence, discovered_by, discovery_context, heartbeat_id
+    )
+    SELECT
+        p_from_ids[i],
+        p_to_ids[i],
+        p_relationship_types[i],
+        COALESCE(p_confidences[i], 0.8),
+        p_discovered_by,
+        p_discovery_contexts[i],
+        p_heartbeat_id
+    FROM generate_series(1, n) AS i
+    WHERE p_from_ids[i] IS NOT NULL AND p_to_ids[i] IS NOT NULL AND p_relationship_types[i] IS NOT NULL;
+
+    RETURN n;
+END;
+$$ LANGUAGE plpgsql;
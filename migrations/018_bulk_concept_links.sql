@@ -0,0 +1,111 @@
+-- Patch migration: bulk concept linking (link_memories_to_concepts).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Bulk variant of link_memory_to_concept() for parallel (memory_id, concept, strength) arrays.
+-- Concepts are inserted with ON CONFLICT DO NOTHING (no row rewrite for existing names),
+-- memory_concepts rows are upserted only when the strength changes, and the graph is updated
+-- with two Cypher UNWINDs (concept nodes, then INSTANCE_OF edges). Duplicate pairs: last wins.
+-- Returns the concept id for each input position (NULL for NULL/empty concept names).
+CREATE OR REPLACE FUNCTION link_memories_to_concepts(
+    p_memory_ids UUID[],
+    p_concepts TEXT[],
+    p_strengths FLOAT[] DEFAULT NULL
+)
+RETURNS UUID[] AS $$
+DECLARE
+    n INT;
+    concept_ids UUID[];
+    node_list TEXT;
+    edge_list TEXT;
+BEGIN
+    n := COALESCE(array_length(p_memory_ids, 1), 0);
+    IF n = 0 THEN
+        RETURN ARRAY[]::UUID[];
+    END IF;
+    IF COALESCE(array_length(p_concepts, 1), 0) <> n
+       OR (p_strengths IS NOT NULL AND COALESCE(array_length(p_strengths, 1), 0) <> n) THEN
+        RAISE EXCEPTION 'link_memories_to_concepts: array length mismatch';
+    END IF;
+
+    INSERT INTO concepts (name)
+    SELECT DISTINCT c.name
+    FROM unnest(p_concepts) AS c(name)
+    WHERE NULLIF(c.name, '') IS NOT NULL
+    ON CONFLICT (name) DO NOTHING;
+
+    WITH pairs AS (
+        SELECT DISTINCT ON (l.memory_id, l.name)
+            l.memory_id,
+            l.name,
+            COALESCE(p_strengths[l.ord::int], 1.0) AS strength
+        FROM unnest(p_memory_ids, p_concepts) WITH ORDINALITY AS l(memory_id, name, ord)
+        WHERE l.memory_id IS NOT NULL AND NULLIF(l.name, '') IS NOT NULL
+        ORDER BY l.memory_id, l.name, l.ord DESC
+    )
+    INSERT INTO memory_concepts (memory_id, concept_id, strength)
+    SELECT p.memory_id, c.id, p.strength
+    FROM pairs p
+    JOIN concepts c ON c.name = p.name
+    ON CONFLICT (memory_id, concept_id)
+    DO UPDATE SET strength = EXCLUDED.strength
+    WHERE memory_concepts.strength IS DISTINCT FROM EXCLUDED.strength;
+
+    SELECT array_agg(c.id ORDER BY l.ord) INTO concept_ids
+    FROM unnest(p_concepts) WITH ORDINALITY AS l(name, ord)
+    LEFT JOIN concepts c ON c.name = NULLIF(l.name, '');
+
+    SELECT string_agg(cypher_map_literal(jsonb_build_object('name', d.name)), ', ')
+    INTO node_list
+    FROM (
+        SELECT DISTINCT c.name
+        FROM unnest(p_memory_ids, p_concepts) AS c(memory_id, name)
+        WHERE c.memory_id IS NOT NULL AND NULLIF(c.name, '') IS NOT NULL
+    ) d;
+
+    IF node_list IS NULL THEN
+        RETURN concept_ids;
+    END IF;
+
+    SELECT string_agg(
+        cypher_map_literal(jsonb_build_object(
+            'memory_id', e.memory_id::text,
+            'name', e.name,
+            'strength', e.strength
+        )),
+        ', '
+    )
+    INTO edge_list
+    FROM (
+        SELECT DISTINCT ON (l.memory_id, l.name)
+            l.memory_id,
+            l.name,
+            COALESCE(p_strengths[l.ord::int], 1.0) AS strength
+        FROM unnest(p_memory_ids, p_concepts) WITH ORDINALITY AS l(memory_id, name, ord)
+        WHERE l.memory_id IS NOT NULL AND NULLIF(l.name, '') IS NOT NULL
+        ORDER BY l.memory_id, l.name, l.ord DESC
+    ) e;
+
+    EXECUTE format(
+        'SELECT * FROM cypher(''memory_graph'', $q$
+            UNWIND [%s] AS item
+            MERGE (c:ConceptNode {name: item.name})
+            RETURN count(c)
+        $q$) as (result agtype)',
+        node_list
+    );
+
+    EXECUTE format(
+        'SELECT * FROM cypher(''memory_graph'', $q$
+            UNWIND [%s] AS item
+            MATCH (m:MemoryNode {memory_id: item.memory_id}), (c:ConceptNode {name: item.name})
+            MERGE (m)-[r:INSTANCE_OF]->(c)
+            SET r.strength = item.strength
+            RETURN count(r)
+        $q$) as (result agtype)',
+        edge_list
+    );
+
+    RETURN concept_ids;
+END;
+$$ LANGUAGE plpgsql;
+COMMENT ON FUNCTION link_memories_to_concepts IS 'Bulk link_memory_to_concept(): links many (memory, concept) pairs with set-based upserts and one graph UNWIND per step.';
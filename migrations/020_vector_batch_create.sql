@@ -0,0 +1,143 @@
+-- Patch migration: batch_create_memories_with_vectors (vector[] input for binary-codec clients).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Batch create memories from parallel content / vector arrays (single type, no per-item metadata).
+-- Inserts the base rows and type-specific rows with safe defaults, then creates all MemoryNodes in one UNWIND.
+-- Clients with a binary vector codec pass embeddings as vector[] directly (no JSON round trip).
+CREATE OR REPLACE FUNCTION batch_create_memories_with_vectors(
+    p_type memory_type,
+    p_contents TEXT[],
+    p_embeddings vector[],
+    p_importance FLOAT DEFAULT 0.5
+)
+RETURNS UUID[] AS $$
+DECLARE
+    ids UUID[] := ARRAY[]::UUID[];
+    n INT;
+    i INT;
+    expected_dim INT;
+    new_id UUID;
+BEGIN
+    n := COALESCE(array_length(p_contents, 1), 0);
+    IF n = 0 THEN
+        RETURN ids;
+    END IF;
+
+    IF COALESCE(array_length(p_embeddings, 1), 0) <> n THEN
+        RAISE EXCEPTION 'contents and embeddings length mismatch';
+    END IF;
+
+    expected_dim := embedding_dimension();
+
+    FOR i IN 1..n LOOP
+        IF p_contents[i] IS NULL OR p_contents[i] = '' THEN
+            CONTINUE;
+        END IF;
+
+        IF p_embeddings[i] IS NULL OR vector_dims(p_embeddings[i]) <> expected_dim THEN
+            RAISE EXCEPTION 'embedding dimension mismatch: expected %, got %', expected_dim, COALESCE(vector_dims(p_embeddings[i]), 0);
+        END IF;
+
+        -- Same source/trust defaults as create_memory_with_embedding(); graph nodes are created in bulk below.
+        INSERT INTO memories (type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+        VALUES (
+            p_type,
+            p_contents[i],
+            p_embeddings[i],
+            p_importance,
+            jsonb_build_object(
+                'kind', CASE WHEN p_type = 'semantic' THEN 'unattributed' ELSE 'internal' END,
+                'observed_at', CURRENT_TIMESTAMP
+            ),
+            CASE
+                WHEN p_type = 'episodic' THEN 0.95
+                WHEN p_type = 'semantic' THEN 0.20
+                ELSE 0.70
+            END,
+            CURRENT_TIMESTAMP
+        )
+        RETURNING id INTO new_id;
+
+        IF p_type = 'episodic' THEN
+            INSERT INTO episodic_memories (memory_id, action_taken, context, result, emotional_valence, verification_status, event_time)
+            VALUES (new_id, NULL, jsonb_build_object('type', 'raw_batch'), NULL, 0.0, NULL, CURRENT_TIMESTAMP)
+            ON CONFLICT (memory_id) DO NOTHING;
+        ELSIF p_type = 'semantic' THEN
+            INSERT INTO semantic_memories (memory_id, confidence, last_validated, source_references, contradictions, category, related_concepts)
+            VALUES (new_id, 0.8, CURRENT_TIMESTAMP, '[]'::jsonb, NULL, NULL, NULL)
+            ON CONFLICT (memory_id) DO NOTHING;
+            PERFORM sync_memory_trust(new_id);
+        ELSIF p_type = 'procedural' THEN
+            INSERT INTO procedural_memories (memory_id, steps, prerequisites)
+            VALUES (new_id, jsonb_build_object('steps', '[]'::jsonb), NULL)
+            ON CONFLICT (memory_id) DO NOTHING;
+        ELSIF p_type = 'strategic' THEN
+            INSERT INTO strategic_memories (memory_id, pattern_description, supporting_evidence, confidence_score, success_metrics, adaptation_history, context_applicability)
+            VALUES (new_id, p_contents[i], NULL, 0.8, NULL, NULL, NULL)
+            ON CONFLICT (memory_id) DO NOTHING;
+        END IF;
+
+        ids := array_append(ids, new_id);
+    END LOOP;
+
+    PERFORM create_memory_nodes(ids);
+
+    RETURN ids;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batch create memories with precomputed embeddings given as a JSON array of arrays.
+-- Validates and converts the embeddings, then delegates to batch_create_memories_with_vectors().
+CREATE OR REPLACE FUNCTION batch_create_memories_with_embeddings(
+    p_type memory_type,
+    p_contents TEXT[],
+    p_embeddings JSONB,
+    p_importance FLOAT DEFAULT 0.5
+)
+RETURNS UUID[] AS $$
+DECLARE
+    vectors vector[] := ARRAY[]::vector[];
+    n INT;
+    i INT;
+    expected_dim INT;
+    emb_json JSONB;
+    emb_arr FLOAT4[];
+BEGIN
+    n := COALESCE(array_length(p_contents, 1), 0);
+    IF n = 0 THEN
+        RETURN ARRAY[]::UUID[];
+    END IF;
+
+    IF p_embeddings IS NULL OR jsonb_typeof(p_embeddings) <> 'array' THEN
+        RAISE EXCEPTION 'embeddings must be a JSON array';
+    END IF;
+    IF jsonb_array_length(p_embeddings) <> n THEN
+        RAISE EXCEPTION 'contents and embeddings length mismatch';
+    END IF;
+
+    expected_dim := embedding_dimension();
+
+    FOR i IN 1..n LOOP
+        IF p_contents[i] IS NULL OR p_contents[i] = '' THEN
+            vectors := array_append(vectors, NULL::vector);
+            CONTINUE;
+        END IF;
+
+        emb_json := p_embeddings->(i - 1);
+        IF emb_json IS NULL OR jsonb_typeof(emb_json) <> 'array' THEN
+            RAISE EXCEPTION 'embedding % must be a JSON array', i;
+        END IF;
+
+        SELECT ARRAY_AGG(value::float4) INTO emb_arr
+        FROM jsonb_array_elements_text(emb_json) value;
+
+        IF COALESCE(array_length(emb_arr, 1), 0) <> expected_dim THEN
+            RAISE EXCEPTION 'embedding dimension mismatch: expected %, got %', expected_dim, COALESCE(array_length(emb_arr, 1), 0);
+        END IF;
+
+        vectors := array_append(vectors, (emb_arr::float4[])::vector);
+    END LOOP;
+
+    RETURN batch_create_memories_with_vectors(p_type, p_contents, vectors, p_importance);
+END;
+$$ LANGUAGE plpgsql;
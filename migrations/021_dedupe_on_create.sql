@@ -0,0 +1,1076 @@
+-- Patch migration: opt-in dedupe on create (p_dedupe) with exact-content and near-duplicate checks.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+INSERT INTO maintenance_config (key, value, description) VALUES
+    ('dedupe_similarity_threshold', 0.97, 'Opt-in dedupe on create: a same-type memory at or above this cosine similarity absorbs the new one')
+ON CONFLICT (key) DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS idx_memories_content_md5 ON memories (md5(content)) WHERE status = 'active';
+
+-- Opt-in dedupe for the create functions (p_dedupe => TRUE): returns an active memory of the
+-- same type with identical content, or the top-1 vector neighbor of that type when its
+-- similarity is at least p_threshold (default maintenance_config.dedupe_similarity_threshold).
+CREATE OR REPLACE FUNCTION find_duplicate_memory(
+    p_type memory_type,
+    p_content TEXT,
+    p_embedding vector,
+    p_threshold FLOAT DEFAULT NULL
+) RETURNS UUID AS $$
+DECLARE
+    dup_id UUID;
+    threshold FLOAT;
+BEGIN
+    IF p_content IS NULL OR p_content = '' THEN
+        RETURN NULL;
+    END IF;
+
+    -- Exact content (idx_memories_content_md5)
+    SELECT m.id INTO dup_id
+    FROM memories m
+    WHERE md5(m.content) = md5(p_content)
+      AND m.content = p_content
+      AND m.type = p_type
+      AND m.status = 'active'
+    ORDER BY m.created_at
+    LIMIT 1;
+    IF dup_id IS NOT NULL OR p_embedding IS NULL THEN
+        RETURN dup_id;
+    END IF;
+
+    threshold := COALESCE(
+        p_threshold,
+        (SELECT value FROM maintenance_config WHERE key = 'dedupe_similarity_threshold'),
+        0.97
+    );
+
+    -- Nearest neighbor (HNSW)
+    SELECT nn.id INTO dup_id
+    FROM (
+        SELECT m.id, m.embedding <=> p_embedding AS distance
+        FROM memories m
+        WHERE m.status = 'active'
+          AND m.type = p_type
+        ORDER BY m.embedding <=> p_embedding
+        LIMIT 1
+    ) nn
+    WHERE 1 - nn.distance >= threshold;
+
+    RETURN dup_id;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Fold a duplicate write into an existing memory: count it as an access (which also bumps
+-- importance via trg_importance_on_access), keep the higher importance, and merge any new
+-- semantic source references (recomputing trust).
+CREATE OR REPLACE FUNCTION reinforce_memory(
+    p_memory_id UUID,
+    p_importance FLOAT DEFAULT NULL,
+    p_source_references JSONB DEFAULT NULL
+) RETURNS VOID AS $$
+DECLARE
+    normalized_sources JSONB;
+BEGIN
+    UPDATE memories
+    SET access_count = access_count + 1,
+        last_accessed = CURRENT_TIMESTAMP,
+        importance = GREATEST(importance, COALESCE(p_importance, importance))
+    WHERE id = p_memory_id;
+
+    normalized_sources := dedupe_source_references(p_source_references);
+    IF jsonb_array_length(normalized_sources) > 0 THEN
+        UPDATE semantic_memories
+        SET source_references = dedupe_source_references(
+                COALESCE(source_references, '[]'::jsonb) || normalized_sources
+            ),
+            last_validated = CURRENT_TIMESTAMP
+        WHERE memory_id = p_memory_id;
+
+        IF FOUND THEN
+            PERFORM sync_memory_trust(p_memory_id);
+        END IF;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The p_dedupe argument changes the signatures; drop the old ones so calls do not become ambiguous.
+DROP FUNCTION IF EXISTS create_memory(memory_type, TEXT, FLOAT, JSONB, FLOAT);
+DROP FUNCTION IF EXISTS create_episodic_memory(TEXT, JSONB, JSONB, JSONB, FLOAT, TIMESTAMPTZ, FLOAT, JSONB, FLOAT);
+DROP FUNCTION IF EXISTS create_semantic_memory(TEXT, FLOAT, TEXT[], TEXT[], JSONB, FLOAT, JSONB, FLOAT);
+DROP FUNCTION IF EXISTS create_procedural_memory(TEXT, JSONB, JSONB, FLOAT, JSONB, FLOAT);
+DROP FUNCTION IF EXISTS create_strategic_memory(TEXT, TEXT, FLOAT, JSONB, JSONB, FLOAT, JSONB, FLOAT);
+DROP FUNCTION IF EXISTS batch_create_memories(JSONB);
+DROP FUNCTION IF EXISTS batch_create_memories_with_vectors(memory_type, TEXT[], vector[], FLOAT);
+DROP FUNCTION IF EXISTS batch_create_memories_with_embeddings(memory_type, TEXT[], JSONB, FLOAT);
+
+-- Create memory (base function) - generates embedding automatically.
+-- p_dedupe => TRUE reinforces and returns an existing duplicate instead of inserting.
+CREATE OR REPLACE FUNCTION create_memory(
+    p_type memory_type,
+    p_content TEXT,
+    p_importance FLOAT DEFAULT 0.5,
+    p_source_attribution JSONB DEFAULT NULL,
+    p_trust_level FLOAT DEFAULT NULL,
+    p_dedupe BOOLEAN DEFAULT FALSE
+) RETURNS UUID AS $$
+DECLARE
+    new_memory_id UUID;
+    embedding_vec vector;
+    normalized_source JSONB;
+    effective_trust FLOAT;
+BEGIN
+    normalized_source := normalize_source_reference(p_source_attribution);
+    IF normalized_source = '{}'::jsonb THEN
+        normalized_source := jsonb_build_object(
+            'kind',
+            CASE
+                WHEN p_type = 'semantic' THEN 'unattributed'
+                ELSE 'internal'
+            END,
+            'observed_at', CURRENT_TIMESTAMP
+        );
+    END IF;
+
+    effective_trust := p_trust_level;
+    IF effective_trust IS NULL THEN
+        effective_trust := CASE
+            WHEN p_type = 'episodic' THEN 0.95
+            WHEN p_type = 'semantic' THEN 0.20
+            WHEN p_type = 'procedural' THEN 0.70
+            WHEN p_type = 'strategic' THEN 0.70
+            ELSE 0.50
+        END;
+    END IF;
+    effective_trust := LEAST(1.0, GREATEST(0.0, effective_trust));
+
+    -- Generate embedding
+    embedding_vec := get_embedding(p_content);
+
+    IF p_dedupe THEN
+        new_memory_id := find_duplicate_memory(p_type, p_content, embedding_vec);
+        IF new_memory_id IS NOT NULL THEN
+            PERFORM reinforce_memory(new_memory_id, p_importance);
+            RETURN new_memory_id;
+        END IF;
+    END IF;
+
+    INSERT INTO memories (type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+    VALUES (p_type, p_content, embedding_vec, p_importance, normalized_source, effective_trust, CURRENT_TIMESTAMP)
+    RETURNING id INTO new_memory_id;
+
+    -- Create graph node
+    EXECUTE format(
+        'SELECT * FROM cypher(''memory_graph'', $q$
+            CREATE (n:MemoryNode {memory_id: %L, type: %L, created_at: %L})
+            RETURN n
+        $q$) as (result agtype)',
+        new_memory_id,
+        p_type,
+        CURRENT_TIMESTAMP
+    );
+
+    -- Assign memory to clusters when centroids are available.
+    IF EXISTS (SELECT 1 FROM memory_clusters WHERE centroid_embedding IS NOT NULL) THEN
+        PERFORM assign_memory_to_clusters(new_memory_id);
+    END IF;
+
+    RETURN new_memory_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create episodic memory
+CREATE OR REPLACE FUNCTION create_episodic_memory(
+    p_content TEXT,
+    p_action_taken JSONB DEFAULT NULL,
+    p_context JSONB DEFAULT NULL,
+    p_result JSONB DEFAULT NULL,
+    p_emotional_valence FLOAT DEFAULT 0.0,
+    p_event_time TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    p_importance FLOAT DEFAULT 0.5,
+    p_source_attribution JSONB DEFAULT NULL,
+    p_trust_level FLOAT DEFAULT NULL,
+    p_dedupe BOOLEAN DEFAULT FALSE
+) RETURNS UUID AS $$
+DECLARE
+    new_memory_id UUID;
+    normalized_source JSONB;
+    effective_trust FLOAT;
+BEGIN
+    normalized_source := normalize_source_reference(p_source_attribution);
+    IF normalized_source = '{}'::jsonb THEN
+        normalized_source := jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP);
+    END IF;
+    effective_trust := COALESCE(p_trust_level, 0.95);
+    IF p_dedupe THEN
+        new_memory_id := find_duplicate_memory('episodic', p_content, get_embedding(p_content));
+        IF new_memory_id IS NOT NULL THEN
+            PERFORM reinforce_memory(new_memory_id, p_importance);
+            RETURN new_memory_id;
+        END IF;
+    END IF;
+
+    new_memory_id := create_memory('episodic', p_content, p_importance, normalized_source, effective_trust);
+
+    INSERT INTO episodic_memories (
+        memory_id, action_taken, context, result,
+        emotional_valence, event_time
+    ) VALUES (
+        new_memory_id, p_action_taken, p_context, p_result,
+        p_emotional_valence, p_event_time
+    );
+
+    RETURN new_memory_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create semantic memory
+CREATE OR REPLACE FUNCTION create_semantic_memory(
+    p_content TEXT,
+    p_confidence FLOAT,
+    p_category TEXT[] DEFAULT NULL,
+    p_related_concepts TEXT[] DEFAULT NULL,
+    p_source_references JSONB DEFAULT NULL,
+    p_importance FLOAT DEFAULT 0.5,
+    p_source_attribution JSONB DEFAULT NULL,
+    p_trust_level FLOAT DEFAULT NULL,
+    p_dedupe BOOLEAN DEFAULT FALSE
+) RETURNS UUID AS $$
+DECLARE
+    new_memory_id UUID;
+    normalized_sources JSONB;
+    primary_source JSONB;
+    base_confidence FLOAT;
+    effective_trust FLOAT;
+BEGIN
+    normalized_sources := dedupe_source_references(p_source_references);
+    base_confidence := LEAST(1.0, GREATEST(0.0, COALESCE(p_confidence, 0.5)));
+
+    primary_source := normalize_source_reference(p_source_attribution);
+    IF primary_source = '{}'::jsonb AND jsonb_typeof(normalized_sources) = 'array' AND jsonb_array_length(normalized_sources) > 0 THEN
+        primary_source := normalize_source_reference(normalized_sources->0);
+    END IF;
+    IF primary_source = '{}'::jsonb THEN
+        primary_source := jsonb_build_object('kind', 'unattributed', 'observed_at', CURRENT_TIMESTAMP);
+    END IF;
+
+    effective_trust := COALESCE(p_trust_level, compute_semantic_trust(base_confidence, normalized_sources, 0.0));
+
+    IF p_dedupe THEN
+        new_memory_id := find_duplicate_memory('semantic', p_content, get_embedding(p_content));
+        IF new_memory_id IS NOT NULL THEN
+            PERFORM reinforce_memory(new_memory_id, p_importance, normalized_sources);
+            RETURN new_memory_id;
+        END IF;
+    END IF;
+
+    new_memory_id := create_memory('semantic', p_content, p_importance, primary_source, effective_trust);
+
+    INSERT INTO semantic_memories (
+        memory_id, confidence, category, related_concepts,
+        source_references, last_validated
+    ) VALUES (
+        new_memory_id, p_confidence, p_category, p_related_concepts,
+        normalized_sources, CURRENT_TIMESTAMP
+    );
+
+    PERFORM sync_memory_trust(new_memory_id);
+
+    RETURN new_memory_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create procedural memory
+CREATE OR REPLACE FUNCTION create_procedural_memory(
+    p_content TEXT,
+    p_steps JSONB,
+    p_prerequisites JSONB DEFAULT NULL,
+    p_importance FLOAT DEFAULT 0.5,
+    p_source_attribution JSONB DEFAULT NULL,
+    p_trust_level FLOAT DEFAULT NULL,
+    p_dedupe BOOLEAN DEFAULT FALSE
+) RETURNS UUID AS $$
+DECLARE
+    new_memory_id UUID;
+    normalized_source JSONB;
+    effective_trust FLOAT;
+BEGIN
+    normalized_source := normalize_source_reference(p_source_attribution);
+    IF normalized_source = '{}'::jsonb THEN
+        normalized_source := jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP);
+    END IF;
+    effective_trust := COALESCE(p_trust_level, 0.70);
+    IF p_dedupe THEN
+        new_memory_id := find_duplicate_memory('procedural', p_content, get_embedding(p_content));
+        IF new_memory_id IS NOT NULL THEN
+            PERFORM reinforce_memory(new_memory_id, p_importance);
+            RETURN new_memory_id;
+        END IF;
+    END IF;
+
+    new_memory_id := create_memory('procedural', p_content, p_importance, normalized_source, effective_trust);
+
+    INSERT INTO procedural_memories (
+        memory_id, steps, prerequisites
+    ) VALUES (
+        new_memory_id, p_steps, p_prerequisites
+    );
+
+    RETURN new_memory_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create strategic memory
+CREATE OR REPLACE FUNCTION create_strategic_memory(
+    p_content TEXT,
+    p_pattern_description TEXT,
+    p_confidence_score FLOAT,
+    p_supporting_evidence JSONB DEFAULT NULL,
+    p_context_applicability JSONB DEFAULT NULL,
+    p_importance FLOAT DEFAULT 0.5,
+    p_source_attribution JSONB DEFAULT NULL,
+    p_trust_level FLOAT DEFAULT NULL,
+    p_dedupe BOOLEAN DEFAULT FALSE
+) RETURNS UUID AS $$
+DECLARE
+    new_memory_id UUID;
+    normalized_source JSONB;
+    effective_trust FLOAT;
+BEGIN
+    normalized_source := normalize_source_reference(p_source_attribution);
+    IF normalized_source = '{}'::jsonb THEN
+        normalized_source := jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP);
+    END IF;
+    effective_trust := COALESCE(p_trust_level, 0.70);
+    IF p_dedupe THEN
+        new_memory_id := find_duplicate_memory('strategic', p_content, get_embedding(p_content));
+        IF new_memory_id IS NOT NULL THEN
+            PERFORM reinforce_memory(new_memory_id, p_importance);
+            RETURN new_memory_id;
+        END IF;
+    END IF;
+
+    new_memory_id := create_memory('strategic', p_content, p_importance, normalized_source, effective_trust);
+
+    INSERT INTO strategic_memories (
+        memory_id, pattern_description, confidence_score,
+        supporting_evidence, context_applicability
+    ) VALUES (
+        new_memory_id, p_pattern_description, p_confidence_score,
+        p_supporting_evidence, p_context_applicability
+    );
+
+    RETURN new_memory_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batch create memories from JSONB items.
+-- Each item must include: {"type": "semantic|episodic|procedural|strategic", "content": "..."}
+-- Optional keys: importance, emotional_valence, context, action_taken, result, event_time,
+--                confidence, category, related_concepts, source_references, steps, prerequisites,
+--                pattern_description, supporting_evidence, context_applicability,
+--                source_attribution, trust_level.
+-- Set-based: one get_embeddings() call, one multi-row INSERT into memories and into each
+-- type table, one Cypher UNWIND for the graph nodes and one cluster-assignment pass.
+-- Source/trust defaults match the per-type create_*_memory() functions.
+-- p_dedupe => TRUE: items matching an existing memory (find_duplicate_memory) reinforce it
+-- and return its id instead of inserting.
+CREATE OR REPLACE FUNCTION batch_create_memories(p_items JSONB, p_dedupe BOOLEAN DEFAULT FALSE)
+RETURNS UUID[] AS $$
+DECLARE
+    ids UUID[];
+    created_ids UUID[];
+    dup_ids UUID[] := ARRAY[]::UUID[];
+    bad_idx BIGINT;
+    bad_type TEXT;
+    embeddings vector[];
+BEGIN
+    IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' OR jsonb_array_length(p_items) = 0 THEN
+        RETURN ARRAY[]::UUID[];
+    END IF;
+
+    SELECT e.ord INTO bad_idx
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+    WHERE NULLIF(e.item->>'content', '') IS NULL
+       OR NULLIF(e.item->>'type', '') IS NULL
+    ORDER BY e.ord
+    LIMIT 1;
+    IF bad_idx IS NOT NULL THEN
+        RAISE EXCEPTION 'batch_create_memories: item % missing required fields', bad_idx;
+    END IF;
+
+    SELECT e.ord, e.item->>'type' INTO bad_idx, bad_type
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+    WHERE NOT (e.item->>'type' = ANY(enum_range(NULL::memory_type)::text[]))
+    ORDER BY e.ord
+    LIMIT 1;
+    IF bad_idx IS NOT NULL THEN
+        RAISE EXCEPTION 'batch_create_memories: item % invalid type %', bad_idx, bad_type;
+    END IF;
+
+    -- Embed every item in one batched call (cache probe + batched HTTP for misses).
+    embeddings := get_embeddings(ARRAY(
+        SELECT e.item->>'content'
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        ORDER BY e.ord
+    ));
+
+    IF p_dedupe THEN
+        SELECT array_agg(
+            find_duplicate_memory((e.item->>'type')::memory_type, e.item->>'content', embeddings[e.ord::int])
+            ORDER BY e.ord
+        ) INTO dup_ids
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord);
+
+        PERFORM reinforce_memory(
+            dup_ids[e.ord::int],
+            NULLIF(e.item->>'importance', '')::float,
+            CASE WHEN e.item->>'type' = 'semantic' THEN e.item->'source_references' END
+        )
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        WHERE dup_ids[e.ord::int] IS NOT NULL;
+    END IF;
+
+    WITH items AS MATERIALIZED (
+        SELECT
+            e.ord,
+            gen_random_uuid() as id,
+            r.type::memory_type as mtype,
+            r.content,
+            embeddings[e.ord::int] as embedding,
+            COALESCE(NULLIF(r.importance, '')::float, 0.5) as importance,
+            r.action_taken,
+            r.context,
+            r.result,
+            COALESCE(NULLIF(r.emotional_valence, '')::float, 0.0) as emotional_valence,
+            COALESCE(NULLIF(r.event_time, '')::timestamptz, CURRENT_TIMESTAMP) as event_time,
+            COALESCE(NULLIF(r.confidence, '')::float, 0.8) as confidence,
+            CASE WHEN r.category IS NOT NULL THEN ARRAY(SELECT jsonb_array_elements_text(r.category)) END as category,
+            CASE WHEN r.related_concepts IS NOT NULL THEN ARRAY(SELECT jsonb_array_elements_text(r.related_concepts)) END as related_concepts,
+            CASE WHEN r.type = 'semantic' THEN dedupe_source_references(r.source_references) END as semantic_sources,
+            COALESCE(r.steps, jsonb_build_object('steps', '[]'::jsonb)) as steps,
+            r.prerequisites,
+            COALESCE(NULLIF(r.pattern_description, ''), r.content) as pattern_description,
+            COALESCE(NULLIF(r.confidence_score, '')::float, 0.8) as confidence_score,
+            r.supporting_evidence,
+            r.context_applicability,
+            normalize_source_reference(r.source_attribution) as given_source,
+            NULLIF(r.trust_level, '')::float as trust_level
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        CROSS JOIN LATERAL jsonb_to_record(e.item) AS r(
+            type TEXT,
+            content TEXT,
+            importance TEXT,
+            action_taken JSONB,
+            context JSONB,
+            result JSONB,
+            emotional_valence TEXT,
+            event_time TEXT,
+            confidence TEXT,
+            category JSONB,
+            related_concepts JSONB,
+            source_references JSONB,
+            steps JSONB,
+            prerequisites JSONB,
+            pattern_description TEXT,
+            confidence_score TEXT,
+            supporting_evidence JSONB,
+            context_applicability JSONB,
+            source_attribution JSONB,
+            trust_level TEXT
+        )
+        WHERE dup_ids[e.ord::int] IS NULL
+    ),
+    prepared AS MATERIALIZED (
+        SELECT
+            i.*,
+            CASE
+                WHEN i.given_source <> '{}'::jsonb THEN i.given_source
+                WHEN i.mtype = 'semantic'
+                     AND jsonb_typeof(i.semantic_sources) = 'array'
+                     AND jsonb_array_length(i.semantic_sources) > 0
+                     AND normalize_source_reference(i.semantic_sources->0) <> '{}'::jsonb
+                    THEN normalize_source_reference(i.semantic_sources->0)
+                WHEN i.mtype = 'semantic'
+                    THEN jsonb_build_object('kind', 'unattributed', 'observed_at', CURRENT_TIMESTAMP)
+                ELSE jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP)
+            END as source_attribution,
+            LEAST(1.0, GREATEST(0.0, COALESCE(
+                i.trust_level,
+                CASE i.mtype
+                    WHEN 'episodic' THEN 0.95
+                    WHEN 'semantic' THEN compute_semantic_trust(
+                        LEAST(1.0, GREATEST(0.0, i.confidence)), i.semantic_sources, 0.0
+                    )
+                    ELSE 0.70
+                END
+            ))) as effective_trust
+        FROM items i
+    ),
+    inserted AS (
+        INSERT INTO memories (id, type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+        SELECT p.id, p.mtype, p.content, p.embedding, p.importance, p.source_attribution, p.effective_trust, CURRENT_TIMESTAMP
+        FROM prepared p
+        ORDER BY p.ord
+        RETURNING id
+    ),
+    episodic AS (
+        INSERT INTO episodic_memories (memory_id, action_taken, context, result, emotional_valence, event_time)
+        SELECT p.id, p.action_taken, p.context, p.result, p.emotional_valence, p.event_time
+        FROM prepared p
+        WHERE p.mtype = 'episodic'
+    ),
+    semantic AS (
+        INSERT INTO semantic_memories (memory_id, confidence, category, related_concepts, source_references, last_validated)
+        SELECT p.id, p.confidence, p.category, p.related_concepts, p.semantic_sources, CURRENT_TIMESTAMP
+        FROM prepared p
+        WHERE p.mtype = 'semantic'
+    ),
+    procedural AS (
+        INSERT INTO procedural_memories (memory_id, steps, prerequisites)
+        SELECT p.id, p.steps, p.prerequisites
+        FROM prepared p
+        WHERE p.mtype = 'procedural'
+    ),
+    strategic AS (
+        INSERT INTO strategic_memories (memory_id, pattern_description, confidence_score, supporting_evidence, context_applicability)
+        SELECT p.id, p.pattern_description, p.confidence_score, p.supporting_evidence, p.context_applicability
+        FROM prepared p
+        WHERE p.mtype = 'strategic'
+    )
+    SELECT
+        array_agg(COALESCE(dup_ids[g.ord], p.id) ORDER BY g.ord),
+        COALESCE(array_agg(p.id ORDER BY g.ord) FILTER (WHERE p.id IS NOT NULL), ARRAY[]::UUID[])
+    INTO ids, created_ids
+    FROM generate_series(1, jsonb_array_length(p_items)) AS g(ord)
+    LEFT JOIN prepared p ON p.ord = g.ord;
+
+    PERFORM create_memory_nodes(created_ids);
+    PERFORM assign_memories_to_clusters(created_ids);
+
+    RETURN ids;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batch create memories from parallel content / vector arrays (single type, no per-item metadata).
+-- Inserts the base rows and type-specific rows with safe defaults, then creates all MemoryNodes in one UNWIND.
+-- Clients with a binary vector codec pass embeddings as vector[] directly (no JSON round trip).
+-- p_dedupe => TRUE reinforces existing duplicates (including earlier rows of the same batch).
+CREATE OR REPLACE FUNCTION batch_create_memories_with_vectors(
+    p_type memory_type,
+    p_contents TEXT[],
+    p_embeddings vector[],
+    p_importance FLOAT DEFAULT 0.5,
+    p_dedupe BOOLEAN DEFAULT FALSE
+)
+RETURNS UUID[] AS $$
+DECLARE
+    ids UUID[] := ARRAY[]::UUID[];
+    created_ids UUID[] := ARRAY[]::UUID[];
+    n INT;
+    i INT;
+    expected_dim INT;
+    new_id UUID;
+BEGIN
+    n := COALESCE(array_length(p_contents, 1), 0);
+    IF n = 0 THEN
+        RETURN ids;
+    END IF;
+
+    IF COALESCE(array_length(p_embeddings, 1), 0) <> n THEN
+        RAISE EXCEPTION 'contents and embeddings length mismatch';
+    END IF;
+
+    expected_dim := embedding_dimension();
+
+    FOR i IN 1..n LOOP
+        IF p_contents[i] IS NULL OR p_contents[i] = '' THEN
+            CONTINUE;
+        END IF;
+
+        IF p_embeddings[i] IS NULL OR vector_dims(p_embeddings[i]) <> expected_dim THEN
+            RAISE EXCEPTION 'embedding dimension mismatch: expected %, got %', expected_dim, COALESCE(vector_dims(p_embeddings[i]), 0);
+        END IF;
+
+        IF p_dedupe THEN
+            new_id := find_duplicate_memory(p_type, p_contents[i], p_embeddings[i]);
+            IF new_id IS NOT NULL THEN
+                PERFORM reinforce_memory(new_id, p_importance);
+                ids := array_append(ids, new_id);
+                CONTINUE;
+            END IF;
+        END IF;
+
+        -- Same source/trust defaults as create_memory_with_embedding(); graph nodes are created in bulk below.
+        INSERT INTO memories (type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+        VALUES (
+            p_type,
+            p_contents[i],
+            p_embeddings[i],
+            p_importance,
+            jsonb_build_object(
+                'kind', CASE WHEN p_type = 'semantic' THEN 'unattributed' ELSE 'internal' END,
+                'observed_at', CURRENT_TIMESTAMP
+            ),
+            CASE
+                WHEN p_type = 'episodic' THEN 0.95
+                WHEN p_type = 'semantic' THEN 0.20
+                ELSE 0.70
+            END,
+            CURRENT_TIMESTAMP
+        )
+        RETURNING id INTO new_id;
+
+        IF p_type = 'episodic' THEN
+            INSERT INTO episodic_memories (memory_id, action_taken, context, result, emotional_valence, verification_status, event_time)
+            VALUES (new_id, NULL, jsonb_build_object('type', 'raw_batch'), NULL, 0.0, NULL, CURRENT_TIMESTAMP)
+            ON CONFLICT (memory_id) DO NOTHING;
+        ELSIF p_type = 'semantic' THEN
+            INSERT INTO semantic_memories (memory_id, confidence, last_validated, source_references, contradictions, category, related_concepts)
+            VALUES (new_id, 0.8, CURRENT_TIMESTAMP, '[]'::jsonb, NULL, NULL, NULL)
+            ON CONFLICT (memory_id) DO NOTHING;
+            PERFORM sync_memory_trust(new_id);
+        ELSIF p_type = 'procedural' THEN
+            INSERT INTO procedural_memories (memory_id, steps, prerequisites)
+            VALUES (new_id, jsonb_build_object('steps', '[]'::jsonb), NULL)
+            ON CONFLICT (memory_id) DO NOTHING;
+        ELSIF p_type = 'strategic' THEN
+            INSERT INTO strategic_memories (memory_id, pattern_description, supporting_evidence, confidence_score, success_metrics, adaptation_history, context_applicability)
+            VALUES (new_id, p_contents[i], NULL, 0.8, NULL, NULL, NULL)
+            ON CONFLICT (memory_id) DO NOTHING;
+        END IF;
+
+        ids := array_append(ids, new_id);
+        created_ids := array_append(created_ids, new_id);
+    END LOOP;
+
+    PERFORM create_memory_nodes(created_ids);
+
+    RETURN ids;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batch create memories with precomputed embeddings given as a JSON array of arrays.
+-- Validates and converts the embeddings, then delegates to batch_create_memories_with_vectors().
+CREATE OR REPLACE FUNCTION batch_create_memories_with_embeddings(
+    p_type memory_type,
+    p_contents TEXT[],
+    p_embeddings JSONB,
+    p_importance FLOAT DEFAULT 0.5,
+    p_dedupe BOOLEAN DEFAULT FALSE
+)
+RETURNS UUID[] AS $$
+DECLARE
+    vectors vector[] := ARRAY[]::vector[];
+    n INT;
+    i INT;
+    expected_dim INT;
+    emb_json JSONB;
+    emb_arr FLOAT4[];
+BEGIN
+    n := COALESCE(array_length(p_contents, 1), 0);
+    IF n = 0 THEN
+        RETURN ARRAY[]::UUID[];
+    END IF;
+
+    IF p_embeddings IS NULL OR jsonb_typeof(p_embeddings) <> 'array' THEN
+        RAISE EXCEPTION 'embeddings must be a JSON array';
+    END IF;
+    IF jsonb_array_length(p_embeddings) <> n THEN
+        RAISE EXCEPTION 'contents and embeddings length mismatch';
+    END IF;
+
+    expected_dim := embedding_dimension();
+
+    FOR i IN 1..n LOOP
+        IF p_contents[i] IS NULL OR p_contents[i] = '' THEN
+            vectors := array_append(vectors, NULL::vector);
+            CONTINUE;
+        END IF;
+
+        emb_json := p_embeddings->(i - 1);
+        IF emb_json IS NULL OR jsonb_typeof(emb_json) <> 'array' THEN
+            RAISE EXCEPTION 'embedding % must be a JSON array', i;
+        END IF;
+
+        SELECT ARRAY_AGG(value::float4) INTO emb_arr
+        FROM jsonb_array_elements_text(emb_json) value;
+
+        IF COALESCE(array_length(emb_arr, 1), 0) <> expected_dim THEN
+            RAISE EXCEPTION 'embedding dimension mismatch: expected %, got %', expected_dim, COALESCE(array_length(emb_arr, 1), 0);
+        END IF;
+
+        vectors := array_append(vectors, (emb_arr::float4[])::vector);
+    END LOOP;
+
+    RETURN batch_create_memories_with_vectors(p_type, p_contents, vectors, p_importance, p_dedupe);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.execute_heartbeat_action(p_heartbeat_id uuid, p_action text, p_params jsonb DEFAULT '{}'::jsonb)
+ RETURNS jsonb
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+    action_kind heartbeat_action;
+    action_cost FLOAT;
+    current_e FLOAT;
+    result JSONB;
+    queued_call_id UUID;
+    outbox_id UUID;
+    remembered_id UUID;
+    boundary_hits JSONB;
+    boundary_content TEXT;
+BEGIN
+    BEGIN
+        action_kind := p_action::heartbeat_action;
+    EXCEPTION
+        WHEN invalid_text_representation THEN
+            RETURN jsonb_build_object('success', false, 'error', 'Unknown action: ' || COALESCE(p_action, '<null>'));
+    END;
+
+    action_cost := get_action_cost(p_action);
+    current_e := get_current_energy();
+
+    IF current_e < action_cost THEN
+        RETURN jsonb_build_object(
+            'success', false,
+            'error', 'Insufficient energy',
+            'required', action_cost,
+            'available', current_e
+        );
+    END IF;
+
+    IF p_action IN ('reach_out_public', 'synthesize') THEN
+        boundary_content := COALESCE(p_params->>'content', '');
+        SELECT COALESCE(jsonb_agg(row_to_json(r)), '[]'::jsonb)
+        INTO boundary_hits
+        FROM check_boundaries(boundary_content) r;
+
+        IF boundary_hits IS NOT NULL AND jsonb_array_length(boundary_hits) > 0 THEN
+            IF EXISTS (
+                SELECT 1
+                FROM jsonb_array_elements(boundary_hits) e
+                WHERE e->>'response_type' = 'refuse'
+            ) THEN
+                RETURN jsonb_build_object(
+                    'success', false,
+                    'error', 'Boundary triggered',
+                    'boundaries', boundary_hits
+                );
+            END IF;
+        END IF;
+    END IF;
+
+    PERFORM update_energy(-action_cost);
+
+    CASE p_action
+        WHEN 'observe' THEN
+            result := jsonb_build_object('environment', get_environment_snapshot());
+
+        WHEN 'review_goals' THEN
+            result := jsonb_build_object('goals', get_goals_snapshot());
+
+        WHEN 'remember' THEN
+            remembered_id := create_episodic_memory(
+                p_content := COALESCE(p_params->>'content', ''),
+                p_context := COALESCE(p_params, '{}'::jsonb) || jsonb_build_object('heartbeat_id', p_heartbeat_id),
+                p_emotional_valence := COALESCE((p_params->>'emotional_valence')::float, 0),
+                p_importance := COALESCE((p_params->>'importance')::float, 0.4)
+            );
+            result := jsonb_build_object('memory_id', remembered_id);
+
+        WHEN 'recall' THEN
+            DECLARE
+                v_query TEXT := p_params->>'query';
+                v_limit INT := COALESCE((p_params->>'limit')::int, 5);
+                -- Background recall: cheap HNSW scan unless the action asks for more.
+                v_mode TEXT := COALESCE(NULLIF(p_params->>'mode', ''), 'fast');
+                v_cache_key TEXT;
+                v_version BIGINT;
+            BEGIN
+                v_cache_key := recall_cache_key(v_query, jsonb_build_object('limit', v_limit, 'mode', v_mode, 'caller', 'heartbeat'));
+                v_version := memory_write_version();
+                result := get_cached_recall(v_cache_key);
+                IF result IS NULL THEN
+                    SELECT jsonb_agg(row_to_json(r)) INTO result
+                    FROM fast_recall(v_query, v_limit, p_mode => v_mode) r;
+                    result := COALESCE(result, '[]'::jsonb);
+                    PERFORM put_cached_recall(v_cache_key, v_version, result);
+                END IF;
+            END;
+            result := jsonb_build_object('memories', result);
+            PERFORM satisfy_drive('curiosity', 0.2);
+
+        WHEN 'connect' THEN
+            DECLARE
+                v_from uuid;
+                v_to uuid;
+                v_from_raw text;
+                v_to_raw text;
+                v_rel_text text;
+                v_rel graph_edge_type;
+            BEGIN
+                v_from_raw := p_params->>'from_id';
+                v_to_raw := p_params->>'to_id';
+
+                -- Try to resolve references (UUID or semantic label)
+                v_from := resolve_memory_reference(v_from_raw);
+                v_to := resolve_memory_reference(v_to_raw);
+                v_rel_text := NULLIF(btrim(COALESCE(p_params->>'relationship_type','')), '');
+
+                -- Reject + salvage: could not resolve IDs or missing relationship_type
+                IF v_from IS NULL OR v_to IS NULL OR v_rel_text IS NULL THEN
+                    remembered_id := create_episodic_memory(
+                        p_content := 'Rejected connect proposal (unresolved references). Raw: ' || COALESCE(p_params::text, '{}'),
+                        p_context := jsonb_build_object(
+                            'kind','ingestion_reject',
+                            'action','connect',
+                            'reason','Unresolved memory references',
+                            'from_raw', COALESCE(v_from_raw, '<missing>'),
+                            'to_raw', COALESCE(v_to_raw, '<missing>'),
+                            'from_resolved', v_from IS NOT NULL,
+                            'to_resolved', v_to IS NOT NULL,
+                            'heartbeat_id', p_heartbeat_id
+                        ),
+                        p_emotional_valence := 0,
+                        p_importance := 0.2
+                    );
+
+                    RETURN jsonb_build_object(
+                        'success', false,
+                        'error', 'Unresolved memory references',
+                        'salvaged_memory_id', remembered_id,
+                        'details', jsonb_build_object(
+                            'from_raw', COALESCE(v_from_raw,'<missing>'),
+                            'to_raw', COALESCE(v_to_raw,'<missing>'),
+                            'from_resolved', v_from,
+                            'to_resolved', v_to,
+                            'relationship_type', COALESCE(v_rel_text,'<missing>')
+                        )
+                    );
+                END IF;
+
+                -- Reject + salvage: relationship_type must be a valid enum
+                BEGIN
+                    v_rel := v_rel_text::graph_edge_type;
+                EXCEPTION WHEN invalid_text_representation THEN
+                    remembered_id := create_episodic_memory(
+                        p_content := 'Rejected connect proposal (invalid relationship_type enum). relationship_type=' ||
+                                     COALESCE(v_rel_text,'<null>') || '. Raw: ' || COALESCE(p_params::text, '{}'),
+                        p_context := jsonb_build_object(
+                            'kind','ingestion_reject',
+                            'action','connect',
+                            'reason','Invalid relationship_type enum',
+                            'relationship_type', v_rel_text,
+                            'heartbeat_id', p_heartbeat_id
+                        ),
+                        p_emotional_valence := 0,
+                        p_importance := 0.2
+                    );
+
+                    RETURN jsonb_build_object(
+                        'success', false,
+                        'error', 'Invalid relationship_type enum',
+                        'relationship_type', v_rel_text,
+                        'salvaged_memory_id', remembered_id
+                    );
+                END;
+
+                PERFORM create_memory_relationship(
+                    v_from,
+                    v_to,
+                    v_rel,
+                    COALESCE(p_params->'properties', '{}'::jsonb)
+                );
+                result := jsonb_build_object(
+                    'connected', true,
+                    'from_id', v_from,
+                    'to_id', v_to,
+                    'resolved_from', v_from_raw,
+                    'resolved_to', v_to_raw
+                );
+                PERFORM satisfy_drive('coherence', 0.1);
+            END;
+
+        WHEN 'reprioritize' THEN
+            DECLARE
+                v_goal_id UUID;
+                v_goal_raw TEXT;
+            BEGIN
+                -- Accept both 'goal_id' and 'goal' keys (LLM sometimes uses either)
+                v_goal_raw := COALESCE(p_params->>'goal_id', p_params->>'goal');
+                v_goal_id := resolve_goal_reference(v_goal_raw);
+
+                IF v_goal_id IS NULL THEN
+                    -- Salvage the intent
+                    remembered_id := create_episodic_memory(
+                        p_content := 'Rejected reprioritize (unresolved goal). Raw: ' || COALESCE(p_params::text, '{}'),
+                        p_context := jsonb_build_object(
+                            'kind', 'ingestion_reject',
+                            'action', 'reprioritize',
+                            'reason', 'Unresolved goal reference',
+                            'goal_raw', COALESCE(v_goal_raw, '<missing>'),
+                            'heartbeat_id', p_heartbeat_id
+                        ),
+                        p_emotional_valence := 0,
+                        p_importance := 0.2
+                    );
+                    RETURN jsonb_build_object(
+                        'success', false,
+                        'error', 'Unresolved goal reference',
+                        'salvaged_memory_id', remembered_id,
+                        'goal_raw', v_goal_raw
+                    );
+                END IF;
+
+                PERFORM change_goal_priority(
+                    v_goal_id,
+                    (p_params->>'new_priority')::goal_priority,
+                    p_params->>'reason'
+                );
+                IF (p_params->>'new_priority') = 'completed' THEN
+                    PERFORM satisfy_drive('competence', 0.4);
+                END IF;
+                result := jsonb_build_object(
+                    'reprioritized', true,
+                    'goal_id', v_goal_id,
+                    'resolved_from', v_goal_raw
+                );
+            END;
+
+        WHEN 'reflect' THEN
+            INSERT INTO external_calls (call_type, input, heartbeat_id)
+            VALUES (
+                'think',
+                jsonb_build_object(
+                    'kind', 'reflect',
+                    'recent_memories', get_recent_context(20),
+                    'identity', get_identity_context(),
+                    'worldview', get_worldview_context(),
+                    'contradictions', (
+                        SELECT COALESCE(jsonb_agg(row_to_json(t)), '[]'::jsonb)
+                        FROM (SELECT * FROM find_contradictions(NULL) LIMIT 5) t
+                    ),
+                    'goals', get_goals_snapshot(),
+                    'heartbeat_id', p_heartbeat_id,
+                    'instructions', 'Analyze patterns. Note contradictions. Suggest identity updates. Discover relationships between memories.'
+                ),
+                p_heartbeat_id
+            )
+            RETURNING id INTO queued_call_id;
+            result := jsonb_build_object('queued', true, 'external_call_id', queued_call_id);
+            PERFORM satisfy_drive('coherence', 0.2);
+
+        WHEN 'maintain' THEN
+            IF p_params ? 'worldview_id' THEN
+                -- Harden: worldview_id can be semantic text; only act if it's a real UUID
+                DECLARE wid uuid;
+                BEGIN
+                    wid := public.try_uuid(p_params->>'worldview_id');
+
+                    IF wid IS NOT NULL THEN
+                        UPDATE worldview_primitives
+                        SET confidence = COALESCE((p_params->>'new_confidence')::float, confidence),
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE id = wid;
+                    END IF;
+                END;
+            END IF;
+            result := jsonb_build_object('maintained', true);
+            PERFORM satisfy_drive('coherence', 0.1);
+
+        WHEN 'brainstorm_goals' THEN
+            INSERT INTO external_calls (call_type, input, heartbeat_id)
+            VALUES (
+                'think',
+                jsonb_build_object(
+                    'kind', 'brainstorm_goals',
+                    'heartbeat_id', p_heartbeat_id,
+                    'context', gather_turn_context(),
+                    'params', COALESCE(p_params, '{}'::jsonb)
+                ),
+                p_heartbeat_id
+            )
+            RETURNING id INTO queued_call_id;
+            result := jsonb_build_object('queued', true, 'external_call_id', queued_call_id);
+
+        WHEN 'inquire_shallow', 'inquire_deep' THEN
+            INSERT INTO external_calls (call_type, input, heartbeat_id)
+            VALUES (
+                'think',
+                jsonb_build_object(
+                    'kind', 'inquire',
+                    'depth', p_action,
+                    'heartbeat_id', p_heartbeat_id,
+                    'query', COALESCE(p_params->>'query', p_params->>'question'),
+                    'context', gather_turn_context(),
+                    'params', COALESCE(p_params, '{}'::jsonb)
+                ),
+                p_heartbeat_id
+            )
+            RETURNING id INTO queued_call_id;
+            result := jsonb_build_object('queued', true, 'external_call_id', queued_call_id);
+            PERFORM satisfy_drive('curiosity', 0.2);
+
+        WHEN 'synthesize' THEN
+            DECLARE synth_id UUID;
+            DECLARE tags text[];
+            BEGIN
+                tags := ARRAY['synthesis', COALESCE(p_params->>'topic', 'general')]::text[];
+                synth_id := create_semantic_memory(
+                    p_params->>'content',
+                    COALESCE((p_params->>'confidence')::float, 0.8),
+                    tags,
+                    NULL,
+                    jsonb_build_object('heartbeat_id', p_heartbeat_id, 'sources', p_params->'sources', 'boundaries', boundary_hits),
+                    0.7,
+                    p_dedupe => COALESCE((p_params->>'dedupe')::boolean, FALSE)
+                );
+                result := jsonb_build_object('synthesis_memory_id', synth_id, 'boundaries', boundary_hits);
+            END;
+
+        WHEN 'reach_out_user' THEN
+            INSERT INTO outbox_messages (kind, payload)
+            VALUES (
+                'user',
+                jsonb_build_object(
+                    'message', p_params->>'message',
+                    'intent', p_params->>'intent',
+                    'heartbeat_id', p_heartbeat_id
+                )
+            )
+            RETURNING id INTO outbox_id;
+            result := jsonb_build_object('queued', true, 'outbox_id', outbox_id);
+            PERFORM satisfy_drive('connection', 0.3);
+
+        WHEN 'reach_out_public' THEN
+            INSERT INTO outbox_messages (kind, payload)
+            VALUES (
+                'public',
+                jsonb_build_object(
+                    'platform', p_params->>'platform',
+                    'content', p_params->>'content',
+                    'heartbeat_id', p_heartbeat_id,
+                    'boundaries', boundary_hits
+                )
+            )
+            RETURNING id INTO outbox_id;
+            result := jsonb_build_object('queued', true, 'outbox_id', outbox_id, 'boundaries', boundary_hits);
+            PERFORM satisfy_drive('connection', 0.3);
+
+        WHEN 'rest' THEN
+            result := jsonb_build_object('rested', true, 'energy_preserved', current_e - action_cost);
+            PERFORM satisfy_drive('rest', 0.4);
+
+        ELSE
+            RETURN jsonb_build_object('success', false, 'error', 'Unknown action: ' || COALESCE(p_action, '<null>'));
+    END CASE;
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'action', p_action,
+        'cost', action_cost,
+        'energy_remaining', get_current_energy(),
+        'result', result
+    );
+END;
+$function$;
@@ -0,0 +1,190 @@
+-- Patch migration: write-behind access tracking (memory_access_log flushed by maintenance).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Write-behind access log: recalls append here (record_memory_access) and maintenance folds
+-- the events into memories.access_count / last_accessed (flush_memory_access_log).
+CREATE UNLOGGED TABLE IF NOT EXISTS memory_access_log (
+    id BIGSERIAL PRIMARY KEY,
+    memory_id UUID NOT NULL,
+    accessed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Update importance based on access (an explicitly set last_accessed is kept, e.g. by the access log flush)
+CREATE OR REPLACE FUNCTION update_memory_importance()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.importance = NEW.importance * (1.0 + (LN(NEW.access_count + 1) * 0.1));
+    IF NEW.last_accessed IS NOT DISTINCT FROM OLD.last_accessed THEN
+        NEW.last_accessed = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Access-driven importance boosts do not move a memory's neighbors.
+DROP TRIGGER IF EXISTS trg_neighborhood_staleness ON memories;
+CREATE TRIGGER trg_neighborhood_staleness
+    AFTER UPDATE OF importance, status ON memories
+    FOR EACH ROW
+    WHEN (
+        NEW.status IS DISTINCT FROM OLD.status
+        OR (NEW.importance IS DISTINCT FROM OLD.importance AND NEW.access_count = OLD.access_count)
+    )
+    EXECUTE FUNCTION mark_neighborhoods_stale();
+
+-- Buffer recall accesses (one row per id) instead of updating the wide memories rows.
+CREATE OR REPLACE FUNCTION record_memory_access(p_ids UUID[])
+RETURNS INT AS $$
+DECLARE
+    recorded INT;
+BEGIN
+    IF p_ids IS NULL OR array_length(p_ids, 1) IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO memory_access_log (memory_id)
+    SELECT id FROM unnest(p_ids) AS t(id)
+    WHERE id IS NOT NULL;
+
+    GET DIAGNOSTICS recorded = ROW_COUNT;
+    RETURN recorded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fold buffered accesses into memories: one UPDATE per memory per flush, so the
+-- trg_importance_on_access boost is applied once per tick however often it was recalled.
+CREATE OR REPLACE FUNCTION flush_memory_access_log()
+RETURNS INT AS $$
+DECLARE
+    flushed INT;
+BEGIN
+    WITH drained AS (
+        DELETE FROM memory_access_log
+        RETURNING memory_id, accessed_at
+    ),
+    agg AS (
+        SELECT memory_id, COUNT(*)::int AS hits, MAX(accessed_at) AS last_at
+        FROM drained
+        GROUP BY memory_id
+    )
+    UPDATE memories m
+    SET access_count = m.access_count + agg.hits,
+        last_accessed = GREATEST(COALESCE(m.last_accessed, agg.last_at), agg.last_at)
+    FROM agg
+    WHERE m.id = agg.memory_id;
+
+    GET DIAGNOSTICS flushed = ROW_COUNT;
+    RETURN flushed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run a single subconscious maintenance tick: consolidation + pruning + indexing upkeep.
+CREATE OR REPLACE FUNCTION run_subconscious_maintenance(p_params JSONB DEFAULT '{}'::jsonb)
+RETURNS JSONB AS $$
+DECLARE
+    got_lock BOOLEAN;
+    min_imp FLOAT;
+    min_acc INT;
+    neighborhood_batch INT;
+    cache_days INT;
+    wm_stats JSONB;
+    recomputed INT;
+    cache_deleted INT;
+    recall_cache_deleted INT;
+    relevance_batch INT;
+    relevance_max_age FLOAT;
+    relevance_refreshed INT;
+    trace_days INT;
+    trace_deleted INT;
+    accesses_flushed INT;
+BEGIN
+    got_lock := pg_try_advisory_lock(hashtext('agi_subconscious_maintenance'));
+    IF NOT got_lock THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'locked');
+    END IF;
+
+    min_imp := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_importance', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_importance'),
+        0.75
+    );
+    min_acc := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_accesses', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_accesses')::int,
+        3
+    );
+    neighborhood_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size')::int,
+        10
+    );
+    cache_days := COALESCE(
+        NULLIF(p_params->>'embedding_cache_older_than_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'embedding_cache_older_than_days')::int,
+        7
+    );
+    relevance_batch := COALESCE(
+        NULLIF(p_params->>'relevance_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_batch_size')::int,
+        500
+    );
+    relevance_max_age := COALESCE(
+        NULLIF(p_params->>'relevance_max_age_minutes', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_max_age_minutes'),
+        60
+    );
+    trace_days := COALESCE(
+        NULLIF(p_params->>'recall_trace_retention_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'recall_trace_retention_days')::int,
+        7
+    );
+
+    accesses_flushed := flush_memory_access_log();
+    wm_stats := cleanup_working_memory_with_stats(min_imp, min_acc);
+    recomputed := batch_recompute_neighborhoods(neighborhood_batch);
+    cache_deleted := cleanup_embedding_cache((cache_days || ' days')::interval);
+    recall_cache_deleted := cleanup_recall_cache();
+    relevance_refreshed := refresh_relevance_scores(relevance_batch, relevance_max_age);
+    trace_deleted := cleanup_recall_trace((trace_days || ' days')::interval);
+
+    UPDATE maintenance_state
+    SET last_maintenance_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+
+    -- Log the maintenance run for dashboard
+    INSERT INTO maintenance_log (
+        ran_at,
+        neighborhoods_recomputed,
+        embedding_cache_deleted,
+        working_memory_deleted,
+        working_memory_promoted,
+        success
+    ) VALUES (
+        CURRENT_TIMESTAMP,
+        COALESCE(recomputed, 0),
+        COALESCE(cache_deleted, 0),
+        COALESCE(NULLIF(wm_stats->>'deleted_count', '')::int, 0),
+        COALESCE(NULLIF(wm_stats->>'promoted_count', '')::int, 0),
+        true
+    );
+
+    PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'working_memory', wm_stats,
+        'neighborhoods_recomputed', COALESCE(recomputed, 0),
+        'embedding_cache_deleted', COALESCE(cache_deleted, 0),
+        'recall_cache_deleted', COALESCE(recall_cache_deleted, 0),
+        'relevance_refreshed', COALESCE(relevance_refreshed, 0),
+        'recall_trace_deleted', COALESCE(trace_deleted, 0),
+        'memory_accesses_flushed', COALESCE(accesses_flushed, 0),
+        'ran_at', CURRENT_TIMESTAMP
+    );
+EXCEPTION
+    WHEN OTHERS THEN
+        PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+        RAISE;
+END;
+$$ LANGUAGE plpgsql;
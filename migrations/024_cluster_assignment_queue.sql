@@ -0,0 +1,536 @@
+-- Patch migration: queue cluster assignment for maintenance and sample the threshold refresh with TABLESAMPLE.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+INSERT INTO maintenance_config (key, value, description) VALUES
+    ('cluster_assignment_batch_size', 500, 'How many queued memories to assign to clusters per tick')
+ON CONFLICT (key) DO NOTHING;
+
+-- New memories waiting for cluster assignment: the create functions only enqueue, and
+-- maintenance assigns them in batches (process_cluster_assignment_queue).
+CREATE TABLE IF NOT EXISTS cluster_assignment_queue (
+    memory_id UUID PRIMARY KEY REFERENCES memories(id) ON DELETE CASCADE,
+    queued_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_cluster_assignment_queue_queued ON cluster_assignment_queue (queued_at);
+
+-- Assign memory to clusters based on similarity
+CREATE OR REPLACE FUNCTION refresh_cluster_similarity_threshold(
+    p_sample_size INT DEFAULT NULL,
+    p_percentile FLOAT DEFAULT NULL,
+    p_floor FLOAT DEFAULT 0.2,
+    p_ceiling FLOAT DEFAULT 0.8
+) RETURNS FLOAT AS $$
+DECLARE
+    sample_size INT;
+    percentile FLOAT;
+    threshold FLOAT;
+    est_rows FLOAT;
+    sample_pct FLOAT;
+    zero_vec vector := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM memory_clusters
+        WHERE centroid_embedding IS NOT NULL
+          AND centroid_embedding <> zero_vec
+    ) THEN
+        RETURN COALESCE(
+            (SELECT value FROM cluster_config WHERE key = 'similarity_threshold'),
+            0.7
+        );
+    END IF;
+
+    sample_size := COALESCE(
+        p_sample_size,
+        (SELECT value::int FROM cluster_config WHERE key = 'similarity_sample_size'),
+        200
+    );
+    percentile := COALESCE(
+        p_percentile,
+        (SELECT value FROM cluster_config WHERE key = 'similarity_percentile'),
+        0.6
+    );
+    percentile := LEAST(0.95, GREATEST(0.5, percentile));
+
+    -- Block-sample about 4x the wanted rows (inactive rows are filtered out afterwards)
+    -- instead of sorting every active memory by random(); small tables are read whole.
+    SELECT GREATEST(c.reltuples, 0) INTO est_rows
+    FROM pg_class c
+    WHERE c.oid = 'memories'::regclass;
+    sample_pct := LEAST(100.0, GREATEST(0.01, sample_size * 400.0 / GREATEST(est_rows, 1)));
+
+    WITH sample AS (
+        SELECT id, embedding
+        FROM memories TABLESAMPLE SYSTEM (sample_pct)
+        WHERE status = 'active'
+          AND embedding IS NOT NULL
+          AND embedding <> zero_vec
+        LIMIT sample_size
+    ),
+    -- Nearest centroid per sampled memory (idx_clusters_centroid)
+    sims AS (
+        SELECT s.id, 1 - nn.dist AS best_sim
+        FROM sample s
+        CROSS JOIN LATERAL (
+            SELECT mc.centroid_embedding <=> s.embedding AS dist
+            FROM memory_clusters mc
+            WHERE mc.centroid_embedding IS NOT NULL
+              AND mc.centroid_embedding <> zero_vec
+            ORDER BY mc.centroid_embedding <=> s.embedding
+            LIMIT 1
+        ) nn
+    )
+    SELECT percentile_cont(percentile) WITHIN GROUP (ORDER BY best_sim)
+    INTO threshold
+    FROM sims;
+
+    IF threshold IS NULL THEN
+        threshold := COALESCE(
+            (SELECT value FROM cluster_config WHERE key = 'similarity_threshold'),
+            0.7
+        );
+    END IF;
+
+    threshold := LEAST(p_ceiling, GREATEST(p_floor, threshold));
+
+    UPDATE cluster_config
+    SET value = threshold,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE key = 'similarity_threshold';
+
+    RETURN threshold;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Queue memories for cluster assignment (no-op while no cluster has a centroid).
+CREATE OR REPLACE FUNCTION queue_cluster_assignment(p_memory_ids UUID[])
+RETURNS INT AS $$
+DECLARE
+    queued INT;
+BEGIN
+    IF COALESCE(array_length(p_memory_ids, 1), 0) = 0
+       OR NOT EXISTS (SELECT 1 FROM memory_clusters WHERE centroid_embedding IS NOT NULL) THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO cluster_assignment_queue (memory_id)
+    SELECT DISTINCT id FROM unnest(p_memory_ids) AS t(id)
+    WHERE id IS NOT NULL
+    ON CONFLICT (memory_id) DO NOTHING;
+
+    GET DIAGNOSTICS queued = ROW_COUNT;
+    RETURN queued;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Assign up to p_batch_size queued memories (oldest first) with assign_memories_to_clusters().
+-- Concurrent callers take disjoint batches (SKIP LOCKED). Returns the number of memories processed.
+CREATE OR REPLACE FUNCTION process_cluster_assignment_queue(p_batch_size INT DEFAULT 500)
+RETURNS INT AS $$
+DECLARE
+    batch_ids UUID[];
+BEGIN
+    WITH batch AS (
+        SELECT memory_id
+        FROM cluster_assignment_queue
+        ORDER BY queued_at
+        LIMIT GREATEST(0, COALESCE(p_batch_size, 0))
+        FOR UPDATE SKIP LOCKED
+    ),
+    taken AS (
+        DELETE FROM cluster_assignment_queue q
+        USING batch
+        WHERE q.memory_id = batch.memory_id
+        RETURNING q.memory_id
+    )
+    SELECT array_agg(memory_id) INTO batch_ids FROM taken;
+
+    IF batch_ids IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    PERFORM assign_memories_to_clusters(batch_ids);
+    RETURN array_length(batch_ids, 1);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create memory (base function) - generates embedding automatically.
+-- p_dedupe => TRUE reinforces and returns an existing duplicate instead of inserting.
+CREATE OR REPLACE FUNCTION create_memory(
+    p_type memory_type,
+    p_content TEXT,
+    p_importance FLOAT DEFAULT 0.5,
+    p_source_attribution JSONB DEFAULT NULL,
+    p_trust_level FLOAT DEFAULT NULL,
+    p_dedupe BOOLEAN DEFAULT FALSE
+) RETURNS UUID AS $$
+DECLARE
+    new_memory_id UUID;
+    embedding_vec vector;
+    normalized_source JSONB;
+    effective_trust FLOAT;
+BEGIN
+    normalized_source := normalize_source_reference(p_source_attribution);
+    IF normalized_source = '{}'::jsonb THEN
+        normalized_source := jsonb_build_object(
+            'kind',
+            CASE
+                WHEN p_type = 'semantic' THEN 'unattributed'
+                ELSE 'internal'
+            END,
+            'observed_at', CURRENT_TIMESTAMP
+        );
+    END IF;
+
+    effective_trust := p_trust_level;
+    IF effective_trust IS NULL THEN
+        effective_trust := CASE
+            WHEN p_type = 'episodic' THEN 0.95
+            WHEN p_type = 'semantic' THEN 0.20
+            WHEN p_type = 'procedural' THEN 0.70
+            WHEN p_type = 'strategic' THEN 0.70
+            ELSE 0.50
+        END;
+    END IF;
+    effective_trust := LEAST(1.0, GREATEST(0.0, effective_trust));
+
+    -- Generate embedding
+    embedding_vec := get_embedding(p_content);
+
+    IF p_dedupe THEN
+        new_memory_id := find_duplicate_memory(p_type, p_content, embedding_vec);
+        IF new_memory_id IS NOT NULL THEN
+            PERFORM reinforce_memory(new_memory_id, p_importance);
+            RETURN new_memory_id;
+        END IF;
+    END IF;
+
+    INSERT INTO memories (type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+    VALUES (p_type, p_content, embedding_vec, p_importance, normalized_source, effective_trust, CURRENT_TIMESTAMP)
+    RETURNING id INTO new_memory_id;
+
+    -- Create graph node
+    EXECUTE format(
+        'SELECT * FROM cypher(''memory_graph'', $q$
+            CREATE (n:MemoryNode {memory_id: %L, type: %L, created_at: %L})
+            RETURN n
+        $q$) as (result agtype)',
+        new_memory_id,
+        p_type,
+        CURRENT_TIMESTAMP
+    );
+
+    -- Cluster assignment runs in maintenance (keeps threshold refreshes off the insert path).
+    PERFORM queue_cluster_assignment(ARRAY[new_memory_id]);
+
+    RETURN new_memory_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batch create memories from JSONB items.
+-- Each item must include: {"type": "semantic|episodic|procedural|strategic", "content": "..."}
+-- Optional keys: importance, emotional_valence, context, action_taken, result, event_time,
+--                confidence, category, related_concepts, source_references, steps, prerequisites,
+--                pattern_description, supporting_evidence, context_applicability,
+--                source_attribution, trust_level.
+-- Set-based: one get_embeddings() call, one multi-row INSERT into memories and into each
+-- type table and one Cypher UNWIND for the graph nodes; new ids are queued for cluster assignment.
+-- Source/trust defaults match the per-type create_*_memory() functions.
+-- p_dedupe => TRUE: items matching an existing memory (find_duplicate_memory) reinforce it
+-- and return its id instead of inserting.
+CREATE OR REPLACE FUNCTION batch_create_memories(p_items JSONB, p_dedupe BOOLEAN DEFAULT FALSE)
+RETURNS UUID[] AS $$
+DECLARE
+    ids UUID[];
+    created_ids UUID[];
+    dup_ids UUID[] := ARRAY[]::UUID[];
+    bad_idx BIGINT;
+    bad_type TEXT;
+    embeddings vector[];
+BEGIN
+    IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' OR jsonb_array_length(p_items) = 0 THEN
+        RETURN ARRAY[]::UUID[];
+    END IF;
+
+    SELECT e.ord INTO bad_idx
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+    WHERE NULLIF(e.item->>'content', '') IS NULL
+       OR NULLIF(e.item->>'type', '') IS NULL
+    ORDER BY e.ord
+    LIMIT 1;
+    IF bad_idx IS NOT NULL THEN
+        RAISE EXCEPTION 'batch_create_memories: item % missing required fields', bad_idx;
+    END IF;
+
+    SELECT e.ord, e.item->>'type' INTO bad_idx, bad_type
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+    WHERE NOT (e.item->>'type' = ANY(enum_range(NULL::memory_type)::text[]))
+    ORDER BY e.ord
+    LIMIT 1;
+    IF bad_idx IS NOT NULL THEN
+        RAISE EXCEPTION 'batch_create_memories: item % invalid type %', bad_idx, bad_type;
+    END IF;
+
+    -- Embed every item in one batched call (cache probe + batched HTTP for misses).
+    embeddings := get_embeddings(ARRAY(
+        SELECT e.item->>'content'
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        ORDER BY e.ord
+    ));
+
+    IF p_dedupe THEN
+        SELECT array_agg(
+            find_duplicate_memory((e.item->>'type')::memory_type, e.item->>'content', embeddings[e.ord::int])
+            ORDER BY e.ord
+        ) INTO dup_ids
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord);
+
+        PERFORM reinforce_memory(
+            dup_ids[e.ord::int],
+            NULLIF(e.item->>'importance', '')::float,
+            CASE WHEN e.item->>'type' = 'semantic' THEN e.item->'source_references' END
+        )
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        WHERE dup_ids[e.ord::int] IS NOT NULL;
+    END IF;
+
+    WITH items AS MATERIALIZED (
+        SELECT
+            e.ord,
+            gen_random_uuid() as id,
+            r.type::memory_type as mtype,
+            r.content,
+            embeddings[e.ord::int] as embedding,
+            COALESCE(NULLIF(r.importance, '')::float, 0.5) as importance,
+            r.action_taken,
+            r.context,
+            r.result,
+            COALESCE(NULLIF(r.emotional_valence, '')::float, 0.0) as emotional_valence,
+            COALESCE(NULLIF(r.event_time, '')::timestamptz, CURRENT_TIMESTAMP) as event_time,
+            COALESCE(NULLIF(r.confidence, '')::float, 0.8) as confidence,
+            CASE WHEN r.category IS NOT NULL THEN ARRAY(SELECT jsonb_array_elements_text(r.category)) END as category,
+            CASE WHEN r.related_concepts IS NOT NULL THEN ARRAY(SELECT jsonb_array_elements_text(r.related_concepts)) END as related_concepts,
+            CASE WHEN r.type = 'semantic' THEN dedupe_source_references(r.source_references) END as semantic_sources,
+            COALESCE(r.steps, jsonb_build_object('steps', '[]'::jsonb)) as steps,
+            r.prerequisites,
+            COALESCE(NULLIF(r.pattern_description, ''), r.content) as pattern_description,
+            COALESCE(NULLIF(r.confidence_score, '')::float, 0.8) as confidence_score,
+            r.supporting_evidence,
+            r.context_applicability,
+            normalize_source_reference(r.source_attribution) as given_source,
+            NULLIF(r.trust_level, '')::float as trust_level
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        CROSS JOIN LATERAL jsonb_to_record(e.item) AS r(
+            type TEXT,
+            content TEXT,
+            importance TEXT,
+            action_taken JSONB,
+            context JSONB,
+            result JSONB,
+            emotional_valence TEXT,
+            event_time TEXT,
+            confidence TEXT,
+            category JSONB,
+            related_concepts JSONB,
+            source_references JSONB,
+            steps JSONB,
+            prerequisites JSONB,
+            pattern_description TEXT,
+            confidence_score TEXT,
+            supporting_evidence JSONB,
+            context_applicability JSONB,
+            source_attribution JSONB,
+            trust_level TEXT
+        )
+        WHERE dup_ids[e.ord::int] IS NULL
+    ),
+    prepared AS MATERIALIZED (
+        SELECT
+            i.*,
+            CASE
+                WHEN i.given_source <> '{}'::jsonb THEN i.given_source
+                WHEN i.mtype = 'semantic'
+                     AND jsonb_typeof(i.semantic_sources) = 'array'
+                     AND jsonb_array_length(i.semantic_sources) > 0
+                     AND normalize_source_reference(i.semantic_sources->0) <> '{}'::jsonb
+                    THEN normalize_source_reference(i.semantic_sources->0)
+                WHEN i.mtype = 'semantic'
+                    THEN jsonb_build_object('kind', 'unattributed', 'observed_at', CURRENT_TIMESTAMP)
+                ELSE jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP)
+            END as source_attribution,
+            LEAST(1.0, GREATEST(0.0, COALESCE(
+                i.trust_level,
+                CASE i.mtype
+                    WHEN 'episodic' THEN 0.95
+                    WHEN 'semantic' THEN compute_semantic_trust(
+                        LEAST(1.0, GREATEST(0.0, i.confidence)), i.semantic_sources, 0.0
+                    )
+                    ELSE 0.70
+                END
+            ))) as effective_trust
+        FROM items i
+    ),
+    inserted AS (
+        INSERT INTO memories (id, type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+        SELECT p.id, p.mtype, p.content, p.embedding, p.importance, p.source_attribution, p.effective_trust, CURRENT_TIMESTAMP
+        FROM prepared p
+        ORDER BY p.ord
+        RETURNING id
+    ),
+    episodic AS (
+        INSERT INTO episodic_memories (memory_id, action_taken, context, result, emotional_valence, event_time)
+        SELECT p.id, p.action_taken, p.context, p.result, p.emotional_valence, p.event_time
+        FROM prepared p
+        WHERE p.mtype = 'episodic'
+    ),
+    semantic AS (
+        INSERT INTO semantic_memories (memory_id, confidence, category, related_concepts, source_references, last_validated)
+        SELECT p.id, p.confidence, p.category, p.related_concepts, p.semantic_sources, CURRENT_TIMESTAMP
+        FROM prepared p
+        WHERE p.mtype = 'semantic'
+    ),
+    procedural AS (
+        INSERT INTO procedural_memories (memory_id, steps, prerequisites)
+        SELECT p.id, p.steps, p.prerequisites
+        FROM prepared p
+        WHERE p.mtype = 'procedural'
+    ),
+    strategic AS (
+        INSERT INTO strategic_memories (memory_id, pattern_description, confidence_score, supporting_evidence, context_applicability)
+        SELECT p.id, p.pattern_description, p.confidence_score, p.supporting_evidence, p.context_applicability
+        FROM prepared p
+        WHERE p.mtype = 'strategic'
+    )
+    SELECT
+        array_agg(COALESCE(dup_ids[g.ord], p.id) ORDER BY g.ord),
+        COALESCE(array_agg(p.id ORDER BY g.ord) FILTER (WHERE p.id IS NOT NULL), ARRAY[]::UUID[])
+    INTO ids, created_ids
+    FROM generate_series(1, jsonb_array_length(p_items)) AS g(ord)
+    LEFT JOIN prepared p ON p.ord = g.ord;
+
+    PERFORM create_memory_nodes(created_ids);
+    PERFORM queue_cluster_assignment(created_ids);
+
+    RETURN ids;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run a single subconscious maintenance tick: consolidation + pruning + indexing upkeep.
+CREATE OR REPLACE FUNCTION run_subconscious_maintenance(p_params JSONB DEFAULT '{}'::jsonb)
+RETURNS JSONB AS $$
+DECLARE
+    got_lock BOOLEAN;
+    min_imp FLOAT;
+    min_acc INT;
+    neighborhood_batch INT;
+    cache_days INT;
+    wm_stats JSONB;
+    recomputed INT;
+    cache_deleted INT;
+    recall_cache_deleted INT;
+    relevance_batch INT;
+    relevance_max_age FLOAT;
+    relevance_refreshed INT;
+    trace_days INT;
+    trace_deleted INT;
+    accesses_flushed INT;
+    cluster_batch INT;
+    clusters_assigned INT;
+BEGIN
+    got_lock := pg_try_advisory_lock(hashtext('agi_subconscious_maintenance'));
+    IF NOT got_lock THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'locked');
+    END IF;
+
+    min_imp := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_importance', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_importance'),
+        0.75
+    );
+    min_acc := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_accesses', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_accesses')::int,
+        3
+    );
+    neighborhood_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size')::int,
+        10
+    );
+    cache_days := COALESCE(
+        NULLIF(p_params->>'embedding_cache_older_than_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'embedding_cache_older_than_days')::int,
+        7
+    );
+    relevance_batch := COALESCE(
+        NULLIF(p_params->>'relevance_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_batch_size')::int,
+        500
+    );
+    relevance_max_age := COALESCE(
+        NULLIF(p_params->>'relevance_max_age_minutes', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_max_age_minutes'),
+        60
+    );
+    trace_days := COALESCE(
+        NULLIF(p_params->>'recall_trace_retention_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'recall_trace_retention_days')::int,
+        7
+    );
+    cluster_batch := COALESCE(
+        NULLIF(p_params->>'cluster_assignment_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'cluster_assignment_batch_size')::int,
+        500
+    );
+
+    accesses_flushed := flush_memory_access_log();
+    wm_stats := cleanup_working_memory_with_stats(min_imp, min_acc);
+    recomputed := batch_recompute_neighborhoods(neighborhood_batch);
+    clusters_assigned := process_cluster_assignment_queue(cluster_batch);
+    cache_deleted := cleanup_embedding_cache((cache_days || ' days')::interval);
+    recall_cache_deleted := cleanup_recall_cache();
+    relevance_refreshed := refresh_relevance_scores(relevance_batch, relevance_max_age);
+    trace_deleted := cleanup_recall_trace((trace_days || ' days')::interval);
+
+    UPDATE maintenance_state
+    SET last_maintenance_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+
+    -- Log the maintenance run for dashboard
+    INSERT INTO maintenance_log (
+        ran_at,
+        neighborhoods_recomputed,
+        embedding_cache_deleted,
+        working_memory_deleted,
+        working_memory_promoted,
+        success
+    ) VALUES (
+        CURRENT_TIMESTAMP,
+        COALESCE(recomputed, 0),
+        COALESCE(cache_deleted, 0),
+        COALESCE(NULLIF(wm_stats->>'deleted_count', '')::int, 0),
+        COALESCE(NULLIF(wm_stats->>'promoted_count', '')::int, 0),
+        true
+    );
+
+    PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'working_memory', wm_stats,
+        'neighborhoods_recomputed', COALESCE(recomputed, 0),
+        'embedding_cache_deleted', COALESCE(cache_deleted, 0),
+        'recall_cache_deleted', COALESCE(recall_cache_deleted, 0),
+        'relevance_refreshed', COALESCE(relevance_refreshed, 0),
+        'recall_trace_deleted', COALESCE(trace_deleted, 0),
+        'memory_accesses_flushed', COALESCE(accesses_flushed, 0),
+        'cluster_assignments_processed', COALESCE(clusters_assigned, 0),
+        'ran_at', CURRENT_TIMESTAMP
+    );
+EXCEPTION
+    WHEN OTHERS THEN
+        PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+        RAISE;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,294 @@
+-- Patch migration: set-based neighborhood recompute (LATERAL kNN), SKIP LOCKED batches and a per-tick time budget.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+INSERT INTO maintenance_config (key, value, description) VALUES
+    ('neighborhood_max_batch_size', 5000, 'Upper bound for an adaptive neighborhood recompute batch'),
+    ('neighborhood_time_budget_ms', 1000, 'Milliseconds per tick spent recomputing stale neighborhoods')
+ON CONFLICT (key) DO NOTHING;
+
+-- Batches are now one statement each, so the first batch can start larger (only if never tuned).
+UPDATE maintenance_config
+SET value = 50,
+    description = 'First stale-neighborhood batch per tick; later batches adapt to the time budget'
+WHERE key = 'neighborhood_batch_size' AND value = 10;
+
+CREATE OR REPLACE FUNCTION recompute_neighborhood(
+    p_memory_id UUID,
+    p_neighbor_count INT DEFAULT 20,
+    p_min_similarity FLOAT DEFAULT 0.35  -- Lowered from 0.5; revisit when memory count > 200
+)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM recompute_neighborhoods(ARRAY[p_memory_id], p_neighbor_count, p_min_similarity);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Set-based recompute: one LATERAL kNN statement writes the edges for every id in the batch.
+-- Ids that are missing, inactive or have a zero embedding are marked fresh without edges
+-- so they do not sit at the head of the stale queue forever.
+CREATE OR REPLACE FUNCTION recompute_neighborhoods(
+    p_memory_ids UUID[],
+    p_neighbor_count INT DEFAULT 20,
+    p_min_similarity FLOAT DEFAULT 0.35
+)
+RETURNS INT AS $$
+DECLARE
+    zero_vec vector;
+    valid_ids UUID[];
+BEGIN
+    IF p_memory_ids IS NULL OR COALESCE(array_length(p_memory_ids, 1), 0) = 0 THEN
+        RETURN 0;
+    END IF;
+
+    zero_vec := array_fill(0, ARRAY[embedding_dimension()])::vector;
+
+    -- Avoid NaNs from cosine distance when any side is the zero vector.
+    SELECT COALESCE(array_agg(id), ARRAY[]::UUID[]) INTO valid_ids
+    FROM memories
+    WHERE id = ANY(p_memory_ids)
+      AND status = 'active'
+      AND embedding IS NOT NULL
+      AND embedding <> zero_vec;
+
+    DELETE FROM memory_neighbor_edges WHERE memory_id = ANY(valid_ids);
+
+    INSERT INTO memory_neighbor_edges (memory_id, neighbor_id, weight)
+    SELECT src.id, nb.id, round(nb.similarity::numeric, 4)::real
+    FROM memories src
+    CROSS JOIN LATERAL (
+        SELECT m.id, 1 - (m.embedding <=> src.embedding) as similarity
+        FROM memories m
+        WHERE m.id != src.id
+          AND m.status = 'active'
+          AND m.embedding IS NOT NULL
+          AND m.embedding <> zero_vec
+        ORDER BY m.embedding <=> src.embedding
+        LIMIT p_neighbor_count
+    ) nb
+    WHERE src.id = ANY(valid_ids)
+      AND nb.similarity >= p_min_similarity;
+
+    -- JSONB copy kept for readers of memory_neighborhoods.neighbors.
+    INSERT INTO memory_neighborhoods (memory_id, neighbors, computed_at, is_stale)
+    SELECT v.id, COALESCE(agg.neighbors, '{}'::jsonb), CURRENT_TIMESTAMP, FALSE
+    FROM unnest(valid_ids) AS v(id)
+    LEFT JOIN (
+        SELECT e.memory_id, jsonb_object_agg(e.neighbor_id::text, e.weight) as neighbors
+        FROM memory_neighbor_edges e
+        WHERE e.memory_id = ANY(valid_ids)
+        GROUP BY e.memory_id
+    ) agg ON agg.memory_id = v.id
+    ON CONFLICT (memory_id) DO UPDATE SET
+        neighbors = EXCLUDED.neighbors,
+        computed_at = EXCLUDED.computed_at,
+        is_stale = FALSE;
+
+    UPDATE memory_neighborhoods
+    SET is_stale = FALSE,
+        computed_at = CURRENT_TIMESTAMP
+    WHERE memory_id = ANY(p_memory_ids)
+      AND NOT (memory_id = ANY(valid_ids))
+      AND is_stale = TRUE;
+
+    RETURN (SELECT COUNT(DISTINCT id)::int FROM unnest(p_memory_ids) AS t(id) WHERE id IS NOT NULL);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Claims up to p_batch_size stale rows with FOR UPDATE SKIP LOCKED, so concurrent
+-- workers split the stale set instead of recomputing the same memories.
+CREATE OR REPLACE FUNCTION batch_recompute_neighborhoods(
+    p_batch_size INT DEFAULT 50
+)
+RETURNS INT AS $$
+DECLARE
+    claimed UUID[];
+BEGIN
+    SELECT array_agg(memory_id) INTO claimed
+    FROM (
+        SELECT memory_id
+        FROM memory_neighborhoods
+        WHERE is_stale = TRUE
+        ORDER BY computed_at ASC NULLS FIRST
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    ) s;
+
+    RETURN recompute_neighborhoods(claimed);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute stale neighborhoods until the time budget is spent or nothing is left to claim.
+-- Each batch is timed and the next one is sized to fill the remaining budget at the observed
+-- per-memory cost (clamped to [p_initial_batch, p_max_batch]). A budget <= 0 runs one batch.
+-- Runs outside the maintenance advisory lock, so extra workers can call it in parallel.
+CREATE OR REPLACE FUNCTION recompute_stale_neighborhoods(
+    p_time_budget_ms FLOAT DEFAULT 1000,
+    p_initial_batch INT DEFAULT 50,
+    p_max_batch INT DEFAULT 5000
+)
+RETURNS INT AS $$
+DECLARE
+    started TIMESTAMPTZ := clock_timestamp();
+    batch_started TIMESTAMPTZ;
+    batch_size INT := GREATEST(1, COALESCE(p_initial_batch, 50));
+    max_batch INT := GREATEST(1, COALESCE(p_max_batch, 5000));
+    batch_ms FLOAT;
+    elapsed_ms FLOAT;
+    recomputed INT;
+    total INT := 0;
+BEGIN
+    LOOP
+        batch_started := clock_timestamp();
+        recomputed := batch_recompute_neighborhoods(batch_size);
+        total := total + recomputed;
+        -- A short batch means the stale set is drained (or the rest is claimed by other workers).
+        EXIT WHEN recomputed < batch_size;
+
+        batch_ms := EXTRACT(EPOCH FROM clock_timestamp() - batch_started) * 1000;
+        elapsed_ms := EXTRACT(EPOCH FROM clock_timestamp() - started) * 1000;
+        EXIT WHEN elapsed_ms >= COALESCE(p_time_budget_ms, 0);
+
+        batch_size := LEAST(
+            max_batch::float,
+            GREATEST(
+                COALESCE(p_initial_batch, 1)::float,
+                (p_time_budget_ms - elapsed_ms) / GREATEST(batch_ms / recomputed, 0.001)
+            )
+        )::int;
+    END LOOP;
+
+    RETURN total;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run a single subconscious maintenance tick: consolidation + pruning + indexing upkeep.
+CREATE OR REPLACE FUNCTION run_subconscious_maintenance(p_params JSONB DEFAULT '{}'::jsonb)
+RETURNS JSONB AS $$
+DECLARE
+    got_lock BOOLEAN;
+    min_imp FLOAT;
+    min_acc INT;
+    neighborhood_batch INT;
+    neighborhood_max_batch INT;
+    neighborhood_budget_ms FLOAT;
+    cache_days INT;
+    wm_stats JSONB;
+    recomputed INT;
+    cache_deleted INT;
+    recall_cache_deleted INT;
+    relevance_batch INT;
+    relevance_max_age FLOAT;
+    relevance_refreshed INT;
+    trace_days INT;
+    trace_deleted INT;
+    accesses_flushed INT;
+    cluster_batch INT;
+    clusters_assigned INT;
+BEGIN
+    got_lock := pg_try_advisory_lock(hashtext('agi_subconscious_maintenance'));
+    IF NOT got_lock THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'locked');
+    END IF;
+
+    min_imp := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_importance', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_importance'),
+        0.75
+    );
+    min_acc := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_accesses', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_accesses')::int,
+        3
+    );
+    neighborhood_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size')::int,
+        50
+    );
+    neighborhood_max_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_max_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_max_batch_size')::int,
+        5000
+    );
+    neighborhood_budget_ms := COALESCE(
+        NULLIF(p_params->>'neighborhood_time_budget_ms', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_time_budget_ms'),
+        1000
+    );
+    cache_days := COALESCE(
+        NULLIF(p_params->>'embedding_cache_older_than_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'embedding_cache_older_than_days')::int,
+        7
+    );
+    relevance_batch := COALESCE(
+        NULLIF(p_params->>'relevance_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_batch_size')::int,
+        500
+    );
+    relevance_max_age := COALESCE(
+        NULLIF(p_params->>'relevance_max_age_minutes', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_max_age_minutes'),
+        60
+    );
+    trace_days := COALESCE(
+        NULLIF(p_params->>'recall_trace_retention_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'recall_trace_retention_days')::int,
+        7
+    );
+    cluster_batch := COALESCE(
+        NULLIF(p_params->>'cluster_assignment_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'cluster_assignment_batch_size')::int,
+        500
+    );
+
+    accesses_flushed := flush_memory_access_log();
+    wm_stats := cleanup_working_memory_with_stats(min_imp, min_acc);
+    recomputed := recompute_stale_neighborhoods(neighborhood_budget_ms, neighborhood_batch, neighborhood_max_batch);
+    clusters_assigned := process_cluster_assignment_queue(cluster_batch);
+    cache_deleted := cleanup_embedding_cache((cache_days || ' days')::interval);
+    recall_cache_deleted := cleanup_recall_cache();
+    relevance_refreshed := refresh_relevance_scores(relevance_batch, relevance_max_age);
+    trace_deleted := cleanup_recall_trace((trace_days || ' days')::interval);
+
+    UPDATE maintenance_state
+    SET last_maintenance_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+
+    -- Log the maintenance run for dashboard
+    INSERT INTO maintenance_log (
+        ran_at,
+        neighborhoods_recomputed,
+        embedding_cache_deleted,
+        working_memory_deleted,
+        working_memory_promoted,
+        success
+    ) VALUES (
+        CURRENT_TIMESTAMP,
+        COALESCE(recomputed, 0),
+        COALESCE(cache_deleted, 0),
+        COALESCE(NULLIF(wm_stats->>'deleted_count', '')::int, 0),
+        COALESCE(NULLIF(wm_stats->>'promoted_count', '')::int, 0),
+        true
+    );
+
+    PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'working_memory', wm_stats,
+        'neighborhoods_recomputed', COALESCE(recomputed, 0),
+        'embedding_cache_deleted', COALESCE(cache_deleted, 0),
+        'recall_cache_deleted', COALESCE(recall_cache_deleted, 0),
+        'relevance_refreshed', COALESCE(relevance_refreshed, 0),
+        'recall_trace_deleted', COALESCE(trace_deleted, 0),
+        'memory_accesses_flushed', COALESCE(accesses_flushed, 0),
+        'cluster_assignments_processed', COALESCE(clusters_assigned, 0),
+        'ran_at', CURRENT_TIMESTAMP
+    );
+EXCEPTION
+    WHEN OTHERS THEN
+        PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+        RAISE;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,241 @@
+-- Patch migration: transactional turn-context version (append-only state_version_log instead of a sequence bumped before commit).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Committed state versions, one counter per name ('turn_context', ...). Writers append a row
+-- per statement (no shared row to lock); a version is the sum of the rows visible to the reader,
+-- so it moves only once the writer commits, and a reader that reads the version before the data
+-- never caches data older than the version it stores it under.
+-- compact_state_versions() (maintenance) folds the rows per name without changing the sums.
+CREATE TABLE IF NOT EXISTS state_version_log (
+    id BIGSERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    bumps BIGINT NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_state_version_log_name ON state_version_log (name);
+
+CREATE OR REPLACE FUNCTION state_version(p_name TEXT)
+RETURNS BIGINT AS $$
+    SELECT COALESCE(SUM(bumps), 0)::bigint FROM state_version_log WHERE name = p_name;
+$$ LANGUAGE sql STABLE;
+
+-- Statement-level trigger function; TG_ARGV[0] names the version to bump.
+CREATE OR REPLACE FUNCTION bump_state_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO state_version_log (name) VALUES (TG_ARGV[0]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION compact_state_versions()
+RETURNS INT AS $$
+DECLARE
+    folded INT;
+BEGIN
+    WITH gone AS (
+        DELETE FROM state_version_log
+        RETURNING name, bumps
+    ),
+    kept AS (
+        INSERT INTO state_version_log (name, bumps)
+        SELECT name, SUM(bumps)::bigint FROM gone GROUP BY name
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM gone) - (SELECT COUNT(*) FROM kept) INTO folded;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Carry the old sequence value over so cached versions never move backwards.
+DO $$
+BEGIN
+    IF to_regclass('turn_context_version_seq') IS NOT NULL
+       AND NOT EXISTS (SELECT 1 FROM state_version_log WHERE name = 'turn_context') THEN
+        INSERT INTO state_version_log (name, bumps)
+        SELECT 'turn_context', CASE WHEN is_called THEN last_value ELSE 0 END + 1
+        FROM turn_context_version_seq;
+    END IF;
+END;
+$$;
+
+-- State version for the turn context: bumped by writes to the tables gather_turn_context()
+-- reads; a cached snapshot is reused while the version is unchanged.
+CREATE OR REPLACE FUNCTION turn_context_version()
+RETURNS BIGINT AS $$
+    SELECT state_version('turn_context');
+$$ LANGUAGE sql STABLE;
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_goals ON goals;
+CREATE TRIGGER trg_turn_context_version_goals
+    AFTER INSERT OR UPDATE OR DELETE ON goals
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_drives ON drives;
+CREATE TRIGGER trg_turn_context_version_drives
+    AFTER INSERT OR UPDATE OR DELETE ON drives
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_identity ON identity_aspects;
+CREATE TRIGGER trg_turn_context_version_identity
+    AFTER INSERT OR UPDATE OR DELETE ON identity_aspects
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_worldview ON worldview_primitives;
+CREATE TRIGGER trg_turn_context_version_worldview
+    AFTER INSERT OR UPDATE OR DELETE ON worldview_primitives
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_heartbeat ON heartbeat_state;
+CREATE TRIGGER trg_turn_context_version_heartbeat
+    AFTER INSERT OR UPDATE OR DELETE ON heartbeat_state
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+-- Access bookkeeping (access_count/importance) does not change the turn context.
+DROP TRIGGER IF EXISTS trg_turn_context_version_memories ON memories;
+CREATE TRIGGER trg_turn_context_version_memories
+    AFTER INSERT OR DELETE OR UPDATE OF content, status, trust_level, source_attribution ON memories
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+DROP FUNCTION IF EXISTS bump_turn_context_version();
+DROP SEQUENCE IF EXISTS turn_context_version_seq;
+
+-- Run a single subconscious maintenance tick: consolidation + pruning + indexing upkeep.
+CREATE OR REPLACE FUNCTION run_subconscious_maintenance(p_params JSONB DEFAULT '{}'::jsonb)
+RETURNS JSONB AS $$
+DECLARE
+    got_lock BOOLEAN;
+    min_imp FLOAT;
+    min_acc INT;
+    neighborhood_batch INT;
+    neighborhood_max_batch INT;
+    neighborhood_budget_ms FLOAT;
+    cache_days INT;
+    wm_stats JSONB;
+    recomputed INT;
+    cache_deleted INT;
+    recall_cache_deleted INT;
+    relevance_batch INT;
+    relevance_max_age FLOAT;
+    relevance_refreshed INT;
+    trace_days INT;
+    trace_deleted INT;
+    accesses_flushed INT;
+    cluster_batch INT;
+    clusters_assigned INT;
+    versions_compacted INT;
+BEGIN
+    got_lock := pg_try_advisory_lock(hashtext('agi_subconscious_maintenance'));
+    IF NOT got_lock THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'locked');
+    END IF;
+
+    min_imp := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_importance', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_importance'),
+        0.75
+    );
+    min_acc := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_accesses', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_accesses')::int,
+        3
+    );
+    neighborhood_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size')::int,
+        50
+    );
+    neighborhood_max_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_max_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_max_batch_size')::int,
+        5000
+    );
+    neighborhood_budget_ms := COALESCE(
+        NULLIF(p_params->>'neighborhood_time_budget_ms', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_time_budget_ms'),
+        1000
+    );
+    cache_days := COALESCE(
+        NULLIF(p_params->>'embedding_cache_older_than_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'embedding_cache_older_than_days')::int,
+        7
+    );
+    relevance_batch := COALESCE(
+        NULLIF(p_params->>'relevance_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_batch_size')::int,
+        500
+    );
+    relevance_max_age := COALESCE(
+        NULLIF(p_params->>'relevance_max_age_minutes', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_max_age_minutes'),
+        60
+    );
+    trace_days := COALESCE(
+        NULLIF(p_params->>'recall_trace_retention_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'recall_trace_retention_days')::int,
+        7
+    );
+    cluster_batch := COALESCE(
+        NULLIF(p_params->>'cluster_assignment_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'cluster_assignment_batch_size')::int,
+        500
+    );
+
+    accesses_flushed := flush_memory_access_log();
+    wm_stats := cleanup_working_memory_with_stats(min_imp, min_acc);
+    recomputed := recompute_stale_neighborhoods(neighborhood_budget_ms, neighborhood_batch, neighborhood_max_batch);
+    clusters_assigned := process_cluster_assignment_queue(cluster_batch);
+    cache_deleted := cleanup_embedding_cache((cache_days || ' days')::interval);
+    recall_cache_deleted := cleanup_recall_cache();
+    relevance_refreshed := refresh_relevance_scores(relevance_batch, relevance_max_age);
+    trace_deleted := cleanup_recall_trace((trace_days || ' days')::interval);
+    versions_compacted := compact_state_versions();
+
+    UPDATE maintenance_state
+    SET last_maintenance_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+
+    -- Log the maintenance run for dashboard
+    INSERT INTO maintenance_log (
+        ran_at,
+        neighborhoods_recomputed,
+        embedding_cache_deleted,
+        working_memory_deleted,
+        working_memory_promoted,
+        success
+    ) VALUES (
+        CURRENT_TIMESTAMP,
+        COALESCE(recomputed, 0),
+        COALESCE(cache_deleted, 0),
+        COALESCE(NULLIF(wm_stats->>'deleted_count', '')::int, 0),
+        COALESCE(NULLIF(wm_stats->>'promoted_count', '')::int, 0),
+        true
+    );
+
+    PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'working_memory', wm_stats,
+        'neighborhoods_recomputed', COALESCE(recomputed, 0),
+        'embedding_cache_deleted', COALESCE(cache_deleted, 0),
+        'recall_cache_deleted', COALESCE(recall_cache_deleted, 0),
+        'relevance_refreshed', COALESCE(relevance_refreshed, 0),
+        'recall_trace_deleted', COALESCE(trace_deleted, 0),
+        'memory_accesses_flushed', COALESCE(accesses_flushed, 0),
+        'cluster_assignments_processed', COALESCE(clusters_assigned, 0),
+        'state_versions_compacted', COALESCE(versions_compacted, 0),
+        'ran_at', CURRENT_TIMESTAMP
+    );
+EXCEPTION
+    WHEN OTHERS THEN
+        PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+        RAISE;
+END;
+$$ LANGUAGE plpgsql;
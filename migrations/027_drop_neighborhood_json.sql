@@ -0,0 +1,71 @@
+-- Patch migration: drop the memory_neighborhoods.neighbors JSONB copy and its GIN index (edges are the only store).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+DROP INDEX IF EXISTS idx_neighborhoods_neighbors;
+ALTER TABLE memory_neighborhoods DROP COLUMN IF EXISTS neighbors;
+
+COMMENT ON TABLE memory_neighborhoods IS 'Neighborhood recompute state (staleness, computed_at) for each memory; the neighbors are rows in memory_neighbor_edges. Updated by background worker.';
+COMMENT ON TABLE memory_neighbor_edges IS 'Normalized neighborhood edges (memory_id, neighbor_id, weight) read by fast_recall and cross_join_query. memory_neighborhoods keeps staleness.';
+
+-- Set-based recompute: one LATERAL kNN statement writes the edges for every id in the batch.
+-- Ids that are missing, inactive or have a zero embedding are marked fresh without edges
+-- so they do not sit at the head of the stale queue forever.
+CREATE OR REPLACE FUNCTION recompute_neighborhoods(
+    p_memory_ids UUID[],
+    p_neighbor_count INT DEFAULT 20,
+    p_min_similarity FLOAT DEFAULT 0.35
+)
+RETURNS INT AS $$
+DECLARE
+    zero_vec vector;
+    valid_ids UUID[];
+BEGIN
+    IF p_memory_ids IS NULL OR COALESCE(array_length(p_memory_ids, 1), 0) = 0 THEN
+        RETURN 0;
+    END IF;
+
+    zero_vec := array_fill(0, ARRAY[embedding_dimension()])::vector;
+
+    -- Avoid NaNs from cosine distance when any side is the zero vector.
+    SELECT COALESCE(array_agg(id), ARRAY[]::UUID[]) INTO valid_ids
+    FROM memories
+    WHERE id = ANY(p_memory_ids)
+      AND status = 'active'
+      AND embedding IS NOT NULL
+      AND embedding <> zero_vec;
+
+    DELETE FROM memory_neighbor_edges WHERE memory_id = ANY(valid_ids);
+
+    INSERT INTO memory_neighbor_edges (memory_id, neighbor_id, weight)
+    SELECT src.id, nb.id, round(nb.similarity::numeric, 4)::real
+    FROM memories src
+    CROSS JOIN LATERAL (
+        SELECT m.id, 1 - (m.embedding <=> src.embedding) as similarity
+        FROM memories m
+        WHERE m.id != src.id
+          AND m.status = 'active'
+          AND m.embedding IS NOT NULL
+          AND m.embedding <> zero_vec
+        ORDER BY m.embedding <=> src.embedding
+        LIMIT p_neighbor_count
+    ) nb
+    WHERE src.id = ANY(valid_ids)
+      AND nb.similarity >= p_min_similarity;
+
+    INSERT INTO memory_neighborhoods (memory_id, computed_at, is_stale)
+    SELECT v.id, CURRENT_TIMESTAMP, FALSE
+    FROM unnest(valid_ids) AS v(id)
+    ON CONFLICT (memory_id) DO UPDATE SET
+        computed_at = EXCLUDED.computed_at,
+        is_stale = FALSE;
+
+    UPDATE memory_neighborhoods
+    SET is_stale = FALSE,
+        computed_at = CURRENT_TIMESTAMP
+    WHERE memory_id = ANY(p_memory_ids)
+      AND NOT (memory_id = ANY(valid_ids))
+      AND is_stale = TRUE;
+
+    RETURN (SELECT COUNT(DISTINCT id)::int FROM unnest(p_memory_ids) AS t(id) WHERE id IS NOT NULL);
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,44 @@
+-- Patch migration: transactional, statement-level memory-write watermark (state_version_log instead of a sequence bumped per row before commit).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Carry the old sequence value over so cached watermarks never move backwards.
+DO $$
+BEGIN
+    IF to_regclass('memory_write_version_seq') IS NOT NULL
+       AND NOT EXISTS (SELECT 1 FROM state_version_log WHERE name = 'memory_write') THEN
+        INSERT INTO state_version_log (name, bumps)
+        SELECT 'memory_write', CASE WHEN is_called THEN last_value ELSE 0 END + 1
+        FROM memory_write_version_seq;
+    END IF;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_memory_write_version_neighborhoods ON memory_neighborhoods;
+
+-- Global memory-write watermark (state_version_log, so it moves when the writer commits).
+-- Bumped once per statement that can change recall results; cached recalls are served only
+-- while the watermark is unchanged. Callers read it before recalling.
+CREATE OR REPLACE FUNCTION memory_write_version()
+RETURNS BIGINT AS $$
+    SELECT state_version('memory_write');
+$$ LANGUAGE sql STABLE;
+
+-- Access bookkeeping (access_count/last_accessed) does not invalidate cached recalls.
+DROP TRIGGER IF EXISTS trg_memory_write_version_memories ON memories;
+CREATE TRIGGER trg_memory_write_version_memories
+    AFTER INSERT OR DELETE OR UPDATE OF
+        content, embedding, status, type, importance, trust_level, source_attribution, decay_rate, created_at
+    ON memories
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('memory_write');
+
+-- A recompute always rewrites the edges in the same transaction that marks the neighborhood
+-- fresh, and staleness only changes through memories updates, so edge writes cover both.
+DROP TRIGGER IF EXISTS trg_memory_write_version_edges ON memory_neighbor_edges;
+CREATE TRIGGER trg_memory_write_version_edges
+    AFTER INSERT OR UPDATE OR DELETE ON memory_neighbor_edges
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('memory_write');
+
+DROP FUNCTION IF EXISTS bump_memory_write_version();
+DROP SEQUENCE IF EXISTS memory_write_version_seq;
@@ -0,0 +1,192 @@
+-- Patch migration: append recall-mode calls to an UNLOGGED log aggregated by maintenance instead of upserting shared stats rows on every recall.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Write-behind recall calls (append-only, so concurrent recalls never wait on a shared row).
+CREATE UNLOGGED TABLE IF NOT EXISTS recall_mode_log (
+    id BIGSERIAL PRIMARY KEY,
+    caller TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    elapsed_ms FLOAT NOT NULL,
+    called_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Log one recall served in p_mode that started at p_started_at. Skipped in read-only
+-- transactions (e.g. on a standby) so it never fails the recall itself.
+CREATE OR REPLACE FUNCTION record_recall_mode(p_mode TEXT, p_started_at TIMESTAMPTZ)
+RETURNS VOID AS $$
+BEGIN
+    IF current_setting('transaction_read_only', true) = 'on' THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO recall_mode_log (caller, mode, elapsed_ms)
+    VALUES (
+        COALESCE(NULLIF(current_setting('application_name', true), ''), 'unknown'),
+        normalize_recall_mode(p_mode),
+        EXTRACT(EPOCH FROM (clock_timestamp() - p_started_at)) * 1000.0
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fold logged recall calls into recall_mode_stats (one upsert per caller and mode).
+CREATE OR REPLACE FUNCTION flush_recall_mode_log()
+RETURNS INT AS $$
+DECLARE
+    flushed INT;
+BEGIN
+    WITH drained AS (
+        DELETE FROM recall_mode_log
+        RETURNING caller, mode, elapsed_ms, called_at
+    )
+    INSERT INTO recall_mode_stats (caller, mode, calls, total_ms, max_ms, last_called_at)
+    SELECT caller, mode, COUNT(*), SUM(elapsed_ms), MAX(elapsed_ms), MAX(called_at)
+    FROM drained
+    GROUP BY caller, mode
+    ON CONFLICT (caller, mode) DO UPDATE SET
+        calls = recall_mode_stats.calls + EXCLUDED.calls,
+        total_ms = recall_mode_stats.total_ms + EXCLUDED.total_ms,
+        max_ms = GREATEST(recall_mode_stats.max_ms, EXCLUDED.max_ms),
+        last_called_at = GREATEST(recall_mode_stats.last_called_at, EXCLUDED.last_called_at);
+
+    GET DIAGNOSTICS flushed = ROW_COUNT;
+    RETURN flushed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run a single subconscious maintenance tick: consolidation + pruning + indexing upkeep.
+CREATE OR REPLACE FUNCTION run_subconscious_maintenance(p_params JSONB DEFAULT '{}'::jsonb)
+RETURNS JSONB AS $$
+DECLARE
+    got_lock BOOLEAN;
+    min_imp FLOAT;
+    min_acc INT;
+    neighborhood_batch INT;
+    neighborhood_max_batch INT;
+    neighborhood_budget_ms FLOAT;
+    cache_days INT;
+    wm_stats JSONB;
+    recomputed INT;
+    cache_deleted INT;
+    recall_cache_deleted INT;
+    relevance_batch INT;
+    relevance_max_age FLOAT;
+    relevance_refreshed INT;
+    trace_days INT;
+    trace_deleted INT;
+    accesses_flushed INT;
+    cluster_batch INT;
+    clusters_assigned INT;
+    versions_compacted INT;
+    recall_modes_flushed INT;
+BEGIN
+    got_lock := pg_try_advisory_lock(hashtext('agi_subconscious_maintenance'));
+    IF NOT got_lock THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'locked');
+    END IF;
+
+    min_imp := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_importance', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_importance'),
+        0.75
+    );
+    min_acc := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_accesses', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_accesses')::int,
+        3
+    );
+    neighborhood_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size')::int,
+        50
+    );
+    neighborhood_max_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_max_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_max_batch_size')::int,
+        5000
+    );
+    neighborhood_budget_ms := COALESCE(
+        NULLIF(p_params->>'neighborhood_time_budget_ms', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_time_budget_ms'),
+        1000
+    );
+    cache_days := COALESCE(
+        NULLIF(p_params->>'embedding_cache_older_than_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'embedding_cache_older_than_days')::int,
+        7
+    );
+    relevance_batch := COALESCE(
+        NULLIF(p_params->>'relevance_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_batch_size')::int,
+        500
+    );
+    relevance_max_age := COALESCE(
+        NULLIF(p_params->>'relevance_max_age_minutes', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_max_age_minutes'),
+        60
+    );
+    trace_days := COALESCE(
+        NULLIF(p_params->>'recall_trace_retention_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'recall_trace_retention_days')::int,
+        7
+    );
+    cluster_batch := COALESCE(
+        NULLIF(p_params->>'cluster_assignment_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'cluster_assignment_batch_size')::int,
+        500
+    );
+
+    accesses_flushed := flush_memory_access_log();
+    wm_stats := cleanup_working_memory_with_stats(min_imp, min_acc);
+    recomputed := recompute_stale_neighborhoods(neighborhood_budget_ms, neighborhood_batch, neighborhood_max_batch);
+    clusters_assigned := process_cluster_assignment_queue(cluster_batch);
+    cache_deleted := cleanup_embedding_cache((cache_days || ' days')::interval);
+    recall_cache_deleted := cleanup_recall_cache();
+    relevance_refreshed := refresh_relevance_scores(relevance_batch, relevance_max_age);
+    trace_deleted := cleanup_recall_trace((trace_days || ' days')::interval);
+    versions_compacted := compact_state_versions();
+    recall_modes_flushed := flush_recall_mode_log();
+
+    UPDATE maintenance_state
+    SET last_maintenance_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+
+    -- Log the maintenance run for dashboard
+    INSERT INTO maintenance_log (
+        ran_at,
+        neighborhoods_recomputed,
+        embedding_cache_deleted,
+        working_memory_deleted,
+        working_memory_promoted,
+        success
+    ) VALUES (
+        CURRENT_TIMESTAMP,
+        COALESCE(recomputed, 0),
+        COALESCE(cache_deleted, 0),
+        COALESCE(NULLIF(wm_stats->>'deleted_count', '')::int, 0),
+        COALESCE(NULLIF(wm_stats->>'promoted_count', '')::int, 0),
+        true
+    );
+
+    PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'working_memory', wm_stats,
+        'neighborhoods_recomputed', COALESCE(recomputed, 0),
+        'embedding_cache_deleted', COALESCE(cache_deleted, 0),
+        'recall_cache_deleted', COALESCE(recall_cache_deleted, 0),
+        'relevance_refreshed', COALESCE(relevance_refreshed, 0),
+        'recall_trace_deleted', COALESCE(trace_deleted, 0),
+        'memory_accesses_flushed', COALESCE(accesses_flushed, 0),
+        'cluster_assignments_processed', COALESCE(clusters_assigned, 0),
+        'state_versions_compacted', COALESCE(versions_compacted, 0),
+        'recall_modes_flushed', COALESCE(recall_modes_flushed, 0),
+        'ran_at', CURRENT_TIMESTAMP
+    );
+EXCEPTION
+    WHEN OTHERS THEN
+        PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+        RAISE;
+END;
+$$ LANGUAGE plpgsql;
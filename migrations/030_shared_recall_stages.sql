@@ -0,0 +1,575 @@
+-- Patch migration: split the recall pipeline into stage functions shared by fast_recall_with_embedding and fast_recall_explain.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Recall pipeline stages, shared by fast_recall_with_embedding() and fast_recall_explain() so the
+-- plain and instrumented recalls run the same SQL.
+
+-- Stage: seed scan. Active memories passing the filters, nearest to p_query_embedding (HNSW, or
+-- an exact sequential scan in 'exact' mode). With p_lexical_query, full-text (content_tsv) hits
+-- are fused with the vector hits by reciprocal rank fusion and seed_sim is the fused score
+-- scaled to [0, 1]. hnsw.ef_search / hnsw.iterative_scan are set for the scan only.
+CREATE OR REPLACE FUNCTION recall_seeds(
+    p_query_embedding vector,
+    p_seed_limit INT,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_lexical_query TEXT DEFAULT NULL,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL
+) RETURNS TABLE (
+    seed_id UUID,
+    seed_sim FLOAT,
+    seed_lexical_only BOOLEAN
+) AS $$
+DECLARE
+    query_embedding vector := p_query_embedding;
+    zero_vec vector;
+    has_filters BOOLEAN;
+    prev_iterative_scan TEXT;
+    prev_ef_search TEXT;
+    ef_search INT;
+    recall_mode TEXT;
+    exact_scan BOOLEAN;
+    lexical_query tsquery;
+    arm_limit INT;
+    rrf_k CONSTANT INT := 60;
+BEGIN
+    recall_mode := normalize_recall_mode(p_mode);
+    exact_scan := recall_mode = 'exact';
+    IF query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+
+    IF NULLIF(btrim(p_lexical_query), '') IS NOT NULL THEN
+        lexical_query := websearch_to_tsquery('english', p_lexical_query);
+        -- Stopword-only queries have no lexemes; fall back to pure vector seeds.
+        IF numnode(lexical_query) = 0 THEN
+            lexical_query := NULL;
+        END IF;
+    END IF;
+    arm_limit := CASE WHEN lexical_query IS NULL THEN p_seed_limit ELSE p_seed_limit * 2 END;
+
+    has_filters := p_memory_types IS NOT NULL
+        OR COALESCE(p_min_importance, 0.0) > 0.0
+        OR p_min_trust IS NOT NULL
+        OR p_source_kinds IS NOT NULL
+        OR p_created_after IS NOT NULL
+        OR p_created_before IS NOT NULL
+        OR p_min_relevance IS NOT NULL;
+
+    -- With filters, let the HNSW scan keep going until enough rows pass them
+    -- (pgvector >= 0.8); otherwise ef_search candidates can all be filtered away.
+    IF has_filters AND NOT exact_scan THEN
+        BEGIN
+            prev_iterative_scan := current_setting('hnsw.iterative_scan', true);
+            PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_iterative_scan := NULL;
+        END;
+    END IF;
+    ef_search := recall_mode_ef_search(recall_mode, arm_limit);
+    IF ef_search IS NOT NULL THEN
+        BEGIN
+            prev_ef_search := current_setting('hnsw.ef_search', true);
+            PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_ef_search := NULL;
+        END;
+    END IF;
+
+    RETURN QUERY
+    WITH
+    -- Active memories passing the filters (inlined into each arm below)
+    eligible AS NOT MATERIALIZED (
+        SELECT m.id, m.embedding, m.content_tsv
+        FROM memories m
+        WHERE m.status = 'active'
+          AND m.embedding IS NOT NULL
+          AND m.embedding <> zero_vec
+          AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+          AND m.importance >= COALESCE(p_min_importance, 0.0)
+          AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+          AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+          AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+          AND (p_created_before IS NULL OR m.created_at < p_created_before)
+          AND (p_min_relevance IS NULL OR COALESCE((
+              SELECT ms.relevance_score FROM memory_stats ms
+              WHERE ms.memory_id = m.id AND ms.relevance_computed_at >= m.updated_at
+          ), m.importance) >= p_min_relevance)
+    ),
+    -- Vector candidates: HNSW, or an exact sequential scan in 'exact' mode
+    -- (ordering by "distance + 0" keeps the planner off the index)
+    vector_hits AS MATERIALIZED (
+        SELECT v.id, v.sim, row_number() OVER (ORDER BY v.dist) as rnk
+        FROM (
+            (
+                SELECT
+                    e.id,
+                    e.embedding <=> query_embedding as dist,
+                    1 - (e.embedding <=> query_embedding) as sim
+                FROM eligible e
+                WHERE NOT exact_scan
+                ORDER BY e.embedding <=> query_embedding
+                LIMIT arm_limit
+            )
+            UNION ALL
+            (
+                SELECT
+                    e.id,
+                    (e.embedding <=> query_embedding) + 0 as dist,
+                    1 - (e.embedding <=> query_embedding) as sim
+                FROM eligible e
+                WHERE exact_scan
+                ORDER BY (e.embedding <=> query_embedding) + 0
+                LIMIT arm_limit
+            )
+        ) v
+    ),
+    -- Lexical candidates (full-text, GIN on content_tsv); empty unless hybrid
+    lexical_hits AS MATERIALIZED (
+        SELECT l.id, l.sim, row_number() OVER (ORDER BY l.lex_rank DESC, l.id) as rnk
+        FROM (
+            SELECT
+                e.id,
+                ts_rank_cd(e.content_tsv, lexical_query) as lex_rank,
+                1 - (e.embedding <=> query_embedding) as sim
+            FROM eligible e
+            WHERE lexical_query IS NOT NULL
+              AND e.content_tsv @@ lexical_query
+            ORDER BY ts_rank_cd(e.content_tsv, lexical_query) DESC
+            LIMIT arm_limit
+        ) l
+    )
+    -- Vector hits as-is, or both lists fused with reciprocal rank fusion
+    SELECT
+        f.id,
+        CASE
+            WHEN lexical_query IS NULL THEN f.sim
+            ELSE f.rrf / (2.0 / (rrf_k + 1))
+        END::float,
+        NOT f.in_vector
+    FROM (
+        SELECT
+            h.id,
+            MAX(h.sim) as sim,
+            SUM(1.0 / (rrf_k + h.rnk)) as rrf,
+            bool_or(h.arm = 'vector') as in_vector
+        FROM (
+            SELECT vh.id, vh.sim, vh.rnk, 'vector' as arm FROM vector_hits vh
+            UNION ALL
+            SELECT lh.id, lh.sim, lh.rnk, 'lexical' as arm FROM lexical_hits lh
+        ) h
+        GROUP BY h.id
+    ) f
+    ORDER BY 2 DESC
+    LIMIT p_seed_limit;
+
+    IF prev_iterative_scan IS NOT NULL THEN
+        PERFORM set_config('hnsw.iterative_scan', prev_iterative_scan, true);
+    END IF;
+    IF prev_ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', prev_ef_search, true);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Stage: association expansion through fresh precomputed neighborhoods.
+CREATE OR REPLACE FUNCTION recall_associations(p_seed_ids UUID[], p_seed_sims FLOAT[])
+RETURNS TABLE (
+    assoc_id UUID,
+    assoc_score FLOAT
+) AS $$
+    SELECT e.neighbor_id, MAX(e.weight * s.sim)::float
+    FROM unnest(p_seed_ids, p_seed_sims) AS s(id, sim)
+    JOIN memory_neighborhoods mn ON mn.memory_id = s.id AND NOT mn.is_stale
+    JOIN memory_neighbor_edges e ON e.memory_id = s.id
+    GROUP BY e.neighbor_id;
+$$ LANGUAGE sql STABLE;
+
+-- Stage: temporal context from the seeds' episodes.
+CREATE OR REPLACE FUNCTION recall_temporal(p_seed_ids UUID[])
+RETURNS TABLE (
+    temporal_id UUID
+) AS $$
+    SELECT DISTINCT em.memory_id
+    FROM unnest(p_seed_ids) AS s(id)
+    JOIN episode_memories em_seed ON s.id = em_seed.memory_id
+    JOIN episode_memories em ON em_seed.episode_id = em.episode_id
+    WHERE em.memory_id != s.id
+    LIMIT 20;
+$$ LANGUAGE sql STABLE;
+
+-- Stage: score the candidates from the earlier stages and keep the top p_limit that pass the
+-- filters. Relevance uses the stored memory_stats.relevance_score when it is current.
+CREATE OR REPLACE FUNCTION recall_score(
+    p_seed_ids UUID[],
+    p_seed_sims FLOAT[],
+    p_seed_lexical_only BOOLEAN[],
+    p_assoc_ids UUID[],
+    p_assoc_scores FLOAT[],
+    p_temporal_ids UUID[],
+    p_limit INT,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_min_relevance FLOAT DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    current_valence FLOAT;
+BEGIN
+    BEGIN
+        current_valence := NULLIF(get_current_affective_state()->>'valence', '')::float;
+    EXCEPTION
+        WHEN OTHERS THEN
+            current_valence := NULL;
+    END;
+    current_valence := COALESCE(current_valence, 0.0);
+
+    RETURN QUERY
+    WITH
+    candidates AS (
+        SELECT s.id as mem_id, s.sim as vector_score, NULL::float as assoc_score, NULL::float as temp_score, s.lexical_only
+        FROM unnest(p_seed_ids, p_seed_sims, p_seed_lexical_only) AS s(id, sim, lexical_only)
+        UNION ALL
+        SELECT a.id, NULL, a.score, NULL, NULL FROM unnest(p_assoc_ids, p_assoc_scores) AS a(id, score)
+        UNION ALL
+        SELECT t.id, NULL, NULL, 0.15, NULL FROM unnest(p_temporal_ids) AS t(id)
+    ),
+    -- Aggregate scores per memory
+    scored AS (
+        SELECT
+            c.mem_id,
+            MAX(c.vector_score) as vector_score,
+            MAX(c.assoc_score) as assoc_score,
+            MAX(c.temp_score) as temp_score,
+            bool_or(c.lexical_only) as lexical_only
+        FROM candidates c
+        GROUP BY c.mem_id
+    )
+    SELECT
+        m.id,
+        m.content,
+        m.type,
+        GREATEST(
+            COALESCE(sc.vector_score, 0) * 0.5 +
+            COALESCE(sc.assoc_score, 0) * 0.3 +
+            COALESCE(sc.temp_score, 0) * 0.15 +
+            (CASE
+                WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score
+                ELSE calculate_relevance(m.importance, m.decay_rate, m.created_at, m.last_accessed)
+            END) * 0.05 +
+            -- Mood-congruent recall bias (small): prefer episodic memories whose valence matches current affect.
+            (CASE
+                WHEN em.emotional_valence IS NULL THEN 0.5
+                ELSE 1.0 - (ABS(em.emotional_valence - current_valence) / 2.0)
+            END) * 0.05,
+            0.001
+        ) as final_score,
+        CASE
+            WHEN sc.vector_score IS NOT NULL AND sc.lexical_only THEN 'lexical'
+            WHEN sc.vector_score IS NOT NULL THEN 'vector'
+            WHEN sc.assoc_score IS NOT NULL THEN 'association'
+            WHEN sc.temp_score IS NOT NULL THEN 'temporal'
+            ELSE 'fallback'
+        END as source
+    FROM scored sc
+    JOIN memories m ON sc.mem_id = m.id
+    LEFT JOIN episodic_memories em ON em.memory_id = m.id
+    LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+    WHERE m.status = 'active'
+      AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+      AND m.importance >= COALESCE(p_min_importance, 0.0)
+      AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+      AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+      AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+      AND (p_created_before IS NULL OR m.created_at < p_created_before)
+      AND (p_min_relevance IS NULL OR (CASE WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score ELSE m.importance END) >= p_min_relevance)
+    ORDER BY final_score DESC
+    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Hot-path recall for a precomputed query embedding (vector seeds + neighborhoods + episodes).
+-- Runs the shared stages recall_seeds -> recall_associations -> recall_temporal -> recall_score
+-- (fast_recall_explain runs and times the same ones).
+-- Optional filters (type, importance, trust, source kind, created_at range) are applied inside
+-- the seed scan and to every candidate, so filtered recalls still return up to p_limit rows.
+-- Hybrid mode (p_lexical_query set): seeds come from the HNSW and full-text (content_tsv)
+-- candidate lists fused with reciprocal rank fusion, so exact names and rare tokens that
+-- embed poorly still surface. Seed scores are then the fused score scaled to [0, 1].
+-- p_diversity > 0 recalls 3x p_limit candidates and keeps p_limit of them by maximal
+-- marginal relevance (lambda = 1 - p_diversity), dropping near-duplicates.
+-- Relevance uses the stored memory_stats.relevance_score when it is current; p_min_relevance
+-- prefilters on it (unscored or modified memories fall back to importance, its upper bound).
+-- p_mode picks the vector-scan quality (see recall_mode_ef_search): 'fast' and 'balanced'
+-- set hnsw.ef_search for this call only, 'exact' skips the HNSW index for an exact
+-- sequential kNN scan; NULL keeps the session settings.
+CREATE OR REPLACE FUNCTION fast_recall_with_embedding(
+    p_query_embedding vector,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_lexical_query TEXT DEFAULT NULL,
+    p_diversity FLOAT DEFAULT 0.0,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    seed_ids UUID[];
+    seed_sims FLOAT[];
+    seed_lexical_only BOOLEAN[];
+    assoc_ids UUID[];
+    assoc_scores FLOAT[];
+    temporal_ids UUID[];
+BEGIN
+    IF p_query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+
+    IF COALESCE(p_diversity, 0.0) > 0.0 THEN
+        RETURN QUERY
+        WITH fr AS MATERIALIZED (
+            SELECT * FROM fast_recall_with_embedding(
+                p_query_embedding,
+                p_limit * 3,
+                p_memory_types,
+                p_min_importance,
+                p_min_trust,
+                p_source_kinds,
+                p_created_after,
+                p_created_before,
+                p_lexical_query,
+                0.0,
+                p_min_relevance,
+                p_mode
+            )
+        )
+        SELECT fr.memory_id, fr.content, fr.memory_type, fr.score, fr.source
+        FROM mmr_rerank(
+            (SELECT array_agg(f.memory_id ORDER BY f.score DESC) FROM fr f),
+            (SELECT array_agg(f.score ORDER BY f.score DESC) FROM fr f),
+            p_limit,
+            1.0 - LEAST(p_diversity, 1.0)
+        ) mr
+        JOIN fr ON fr.memory_id = mr.memory_id
+        ORDER BY mr.mmr_rank;
+        RETURN;
+    END IF;
+
+    SELECT
+        array_agg(s.seed_id ORDER BY s.seed_sim DESC),
+        array_agg(s.seed_sim ORDER BY s.seed_sim DESC),
+        array_agg(s.seed_lexical_only ORDER BY s.seed_sim DESC)
+    INTO seed_ids, seed_sims, seed_lexical_only
+    FROM recall_seeds(
+        p_query_embedding,
+        GREATEST(p_limit, 5),
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        p_lexical_query,
+        p_min_relevance,
+        p_mode
+    ) s;
+
+    SELECT array_agg(a.assoc_id), array_agg(a.assoc_score)
+    INTO assoc_ids, assoc_scores
+    FROM recall_associations(seed_ids, seed_sims) a;
+
+    SELECT array_agg(t.temporal_id)
+    INTO temporal_ids
+    FROM recall_temporal(seed_ids) t;
+
+    RETURN QUERY
+    SELECT r.memory_id, r.content, r.memory_type, r.score, r.source
+    FROM recall_score(
+        seed_ids,
+        seed_sims,
+        seed_lexical_only,
+        assoc_ids,
+        assoc_scores,
+        temporal_ids,
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        p_min_relevance
+    ) r;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Instrumented fast_recall: runs the same stage functions as fast_recall_with_embedding
+-- (recall_seeds, recall_associations, recall_temporal, recall_score) one statement at a time
+-- and returns {"memories": [...], "trace": {...}} with clock_timestamp() timings per stage,
+-- candidate counts per source and whether the query embedding was already cached (memory
+-- objects have the same shape as hydrate_context's). Calls taking at least p_log_slow_ms are
+-- also written to recall_trace. Hybrid and MMR reranking are not instrumented.
+CREATE OR REPLACE FUNCTION fast_recall_explain(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL,
+    p_log_slow_ms FLOAT DEFAULT NULL
+) RETURNS JSONB AS $$
+DECLARE
+    started_at TIMESTAMPTZ := clock_timestamp();
+    stage_at TIMESTAMPTZ;
+    timings JSONB := '{}'::jsonb;
+    cache_hit BOOLEAN;
+    query_embedding vector;
+    recall_mode TEXT;
+    seed_ids UUID[];
+    seed_sims FLOAT[];
+    seed_lexical_only BOOLEAN[];
+    assoc_ids UUID[];
+    assoc_scores FLOAT[];
+    temporal_ids UUID[];
+    recalled JSONB;
+    total_ms FLOAT;
+    trace JSONB;
+BEGIN
+    recall_mode := normalize_recall_mode(p_mode);
+
+    -- Stage 1: query embedding
+    stage_at := clock_timestamp();
+    cache_hit := EXISTS (
+        SELECT 1 FROM embedding_cache
+        WHERE content_hash = encode(sha256(p_query_text::bytea), 'hex')
+    );
+    query_embedding := get_embedding(p_query_text);
+    timings := timings || jsonb_build_object('embedding_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 2: vector seed scan
+    stage_at := clock_timestamp();
+    SELECT
+        array_agg(s.seed_id ORDER BY s.seed_sim DESC),
+        array_agg(s.seed_sim ORDER BY s.seed_sim DESC),
+        array_agg(s.seed_lexical_only ORDER BY s.seed_sim DESC)
+    INTO seed_ids, seed_sims, seed_lexical_only
+    FROM recall_seeds(
+        query_embedding,
+        GREATEST(p_limit, 5),
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        NULL,
+        p_min_relevance,
+        p_mode
+    ) s;
+    timings := timings || jsonb_build_object('seed_scan_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 3: neighborhood expansion
+    stage_at := clock_timestamp();
+    SELECT array_agg(a.assoc_id), array_agg(a.assoc_score)
+    INTO assoc_ids, assoc_scores
+    FROM recall_associations(seed_ids, seed_sims) a;
+    timings := timings || jsonb_build_object('association_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 4: episode (temporal) expansion
+    stage_at := clock_timestamp();
+    SELECT array_agg(t.temporal_id)
+    INTO temporal_ids
+    FROM recall_temporal(seed_ids) t;
+    timings := timings || jsonb_build_object('temporal_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 5: scoring
+    stage_at := clock_timestamp();
+    SELECT COALESCE(jsonb_agg(
+        jsonb_build_object(
+            'memory_id', r.memory_id,
+            'content', r.content,
+            'type', r.memory_type,
+            'score', r.score,
+            'source', r.source,
+            'importance', m.importance,
+            'trust_level', m.trust_level,
+            'source_attribution', m.source_attribution,
+            'created_at', m.created_at,
+            'emotional_valence', em.emotional_valence
+        )
+        ORDER BY r.score DESC
+    ), '[]'::jsonb)
+    INTO recalled
+    FROM recall_score(
+        seed_ids,
+        seed_sims,
+        seed_lexical_only,
+        assoc_ids,
+        assoc_scores,
+        temporal_ids,
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        p_min_relevance
+    ) r
+    JOIN memories m ON m.id = r.memory_id
+    LEFT JOIN episodic_memories em ON em.memory_id = r.memory_id;
+    timings := timings || jsonb_build_object('scoring_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    total_ms := EXTRACT(EPOCH FROM clock_timestamp() - started_at) * 1000.0;
+    trace := jsonb_build_object(
+        'mode', recall_mode,
+        'timings', timings || jsonb_build_object('total_ms', total_ms),
+        'candidates', jsonb_build_object(
+            'vector', COALESCE(array_length(seed_ids, 1), 0),
+            'association', COALESCE(array_length(assoc_ids, 1), 0),
+            'temporal', COALESCE(array_length(temporal_ids, 1), 0)
+        ),
+        'returned', jsonb_array_length(recalled),
+        'embedding_cache_hit', cache_hit
+    );
+
+    IF p_log_slow_ms IS NOT NULL AND total_ms >= p_log_slow_ms THEN
+        INSERT INTO recall_trace (query_text, total_ms, trace)
+        VALUES (p_query_text, total_ms, trace);
+    END IF;
+    PERFORM record_recall_mode(p_mode, started_at);
+
+    RETURN jsonb_build_object('memories', recalled, 'trace', trace);
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,151 @@
+-- Patch migration: episode assignment without a per-insert episode_state row lock (sequence-based ordering; the row is locked only when a new episode starts).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+CREATE SEQUENCE IF NOT EXISTS episode_memory_seq;
+
+ALTER TABLE episode_state ADD COLUMN IF NOT EXISTS first_sequence BIGINT;
+
+-- Continue the open episode's numbering: its next memory gets MAX(sequence_order) + 1.
+UPDATE episode_state
+SET first_sequence = nextval('episode_memory_seq') + 1 - COALESCE((
+        SELECT MAX(em.sequence_order)
+        FROM episode_memories em
+        WHERE em.episode_id = episode_state.current_episode_id
+    ), 0)
+WHERE id = 1
+  AND current_episode_id IS NOT NULL
+  AND first_sequence IS NULL;
+
+ALTER TABLE episode_state DROP COLUMN IF EXISTS last_memory_at;
+ALTER TABLE episode_state DROP COLUMN IF EXISTS next_sequence;
+
+-- Auto-assign memories to episodes.
+-- Statement-level. Ordinary inserts never lock or write episode_state: they append to the
+-- open episode it names, taking sequence_order from episode_memory_seq (offset by the
+-- episode's first_sequence, so orders start at 1 and grow, with gaps after rollbacks), and
+-- compare created_at with the episode's last sequenced memory to detect a >30 min gap.
+-- Only starting a new episode (gap, or no open episode) locks the episode_state row, held
+-- until commit; a concurrent writer that read the old state may still append to the episode
+-- being closed.
+CREATE OR REPLACE FUNCTION assign_to_episode()
+RETURNS TRIGGER AS $$
+DECLARE
+    state_row RECORD;
+    state_locked BOOLEAN := FALSE;
+    current_episode_id UUID;
+    first_sequence BIGINT;
+    last_memory_time TIMESTAMPTZ;
+    seq BIGINT;
+    rec RECORD;
+    episode_ids UUID[] := ARRAY[]::UUID[];
+    memory_ids UUID[] := ARRAY[]::UUID[];
+    sequences INT[] := ARRAY[]::INT[];
+BEGIN
+    SELECT * INTO state_row FROM episode_state WHERE id = 1;
+    IF NOT FOUND THEN
+        INSERT INTO episode_state (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+    END IF;
+    current_episode_id := state_row.current_episode_id;
+    first_sequence := state_row.first_sequence;
+
+    -- The tracked episode may have been closed elsewhere (e.g. summarization).
+    IF current_episode_id IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM episodes WHERE id = current_episode_id AND ended_at IS NULL
+    ) THEN
+        current_episode_id := NULL;
+    END IF;
+    IF current_episode_id IS NOT NULL THEN
+        SELECT m.created_at INTO last_memory_time
+        FROM episode_memories em
+        JOIN memories m ON m.id = em.memory_id
+        WHERE em.episode_id = current_episode_id
+        ORDER BY em.sequence_order DESC
+        LIMIT 1;
+    END IF;
+
+    FOR rec IN
+        SELECT nm.id, nm.created_at
+        FROM (
+            SELECT n.id, n.created_at, row_number() OVER () AS ord
+            FROM new_memories n
+        ) nm
+        ORDER BY nm.created_at, nm.ord
+    LOOP
+        seq := nextval('episode_memory_seq');
+
+        -- If gap > 30 min or no open episode, start new episode
+        IF current_episode_id IS NULL OR first_sequence IS NULL OR
+           (last_memory_time IS NOT NULL AND rec.created_at - last_memory_time > INTERVAL '30 minutes')
+        THEN
+            IF NOT state_locked THEN
+                -- Another writer may have started an episode since the unlocked read;
+                -- re-check against the locked state before starting one.
+                SELECT * INTO state_row FROM episode_state WHERE id = 1 FOR UPDATE;
+                state_locked := TRUE;
+                IF state_row.current_episode_id IS DISTINCT FROM current_episode_id
+                   AND EXISTS (
+                       SELECT 1 FROM episodes
+                       WHERE id = state_row.current_episode_id AND ended_at IS NULL
+                   )
+                THEN
+                    current_episode_id := state_row.current_episode_id;
+                    first_sequence := state_row.first_sequence;
+                    SELECT m.created_at INTO last_memory_time
+                    FROM episode_memories em
+                    JOIN memories m ON m.id = em.memory_id
+                    WHERE em.episode_id = current_episode_id
+                    ORDER BY em.sequence_order DESC
+                    LIMIT 1;
+                END IF;
+            END IF;
+        END IF;
+
+        IF current_episode_id IS NULL OR first_sequence IS NULL OR
+           (last_memory_time IS NOT NULL AND rec.created_at - last_memory_time > INTERVAL '30 minutes')
+        THEN
+            -- Close previous episode
+            IF current_episode_id IS NOT NULL THEN
+                UPDATE episodes
+                SET ended_at = last_memory_time
+                WHERE id = current_episode_id;
+            END IF;
+
+            INSERT INTO episodes (started_at, episode_type)
+            VALUES (rec.created_at, 'autonomous')
+            RETURNING id INTO current_episode_id;
+
+            first_sequence := seq;
+            last_memory_time := NULL;
+        END IF;
+
+        episode_ids := episode_ids || current_episode_id;
+        memory_ids := memory_ids || rec.id;
+        sequences := sequences || (seq - first_sequence + 1)::int;
+
+        last_memory_time := GREATEST(last_memory_time, rec.created_at);
+    END LOOP;
+
+    IF COALESCE(array_length(memory_ids, 1), 0) = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    -- Link memories to episodes
+    INSERT INTO episode_memories (episode_id, memory_id, sequence_order)
+    SELECT * FROM unnest(episode_ids, memory_ids, sequences);
+
+    -- Initialize neighborhood records
+    INSERT INTO memory_neighborhoods (memory_id, is_stale)
+    SELECT id, TRUE FROM new_memories
+    ON CONFLICT DO NOTHING;
+
+    IF state_locked THEN
+        UPDATE episode_state
+        SET current_episode_id = assign_to_episode.current_episode_id,
+            first_sequence = assign_to_episode.first_sequence,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
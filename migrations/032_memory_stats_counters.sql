@@ -0,0 +1,929 @@
+-- Patch migration: move access_count/last_accessed and the access-boosted importance from memories into memory_stats.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+ALTER TABLE memory_stats ADD COLUMN IF NOT EXISTS access_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE memory_stats ADD COLUMN IF NOT EXISTS last_accessed TIMESTAMPTZ;
+ALTER TABLE memory_stats ADD COLUMN IF NOT EXISTS importance FLOAT;
+
+-- Carry the counters over while memories still has them (the old importance already includes
+-- past boosts and stays the base value).
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'memories' AND column_name = 'access_count'
+    ) THEN
+        INSERT INTO memory_stats (memory_id, access_count, last_accessed)
+        SELECT m.id, COALESCE(m.access_count, 0), m.last_accessed
+        FROM memories m
+        ON CONFLICT (memory_id) DO UPDATE SET
+            access_count = EXCLUDED.access_count,
+            last_accessed = EXCLUDED.last_accessed;
+    END IF;
+END;
+$$;
+
+-- One stats row per memory (new memories get theirs from trg_auto_episode_assignment).
+INSERT INTO memory_stats (memory_id)
+SELECT m.id FROM memories m
+ON CONFLICT (memory_id) DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS idx_memory_stats_last_accessed ON memory_stats (last_accessed DESC NULLS LAST);
+
+-- Objects depending on the old columns.
+DROP VIEW IF EXISTS memory_health;
+DROP TRIGGER IF EXISTS trg_importance_on_access ON memories;
+DROP TRIGGER IF EXISTS trg_neighborhood_staleness ON memories;
+DROP INDEX IF EXISTS idx_memories_last_accessed;
+
+ALTER TABLE memories DROP COLUMN IF EXISTS access_count;
+ALTER TABLE memories DROP COLUMN IF EXISTS last_accessed;
+
+-- Update importance based on access (an explicitly set last_accessed is kept, e.g. by the access log flush).
+-- Runs on the narrow memory_stats row; the boost starts from memories.importance until the
+-- first access and clears the relevance snapshot, which depends on both values.
+CREATE OR REPLACE FUNCTION update_memory_importance()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.importance IS NULL THEN
+        SELECT m.importance INTO NEW.importance FROM memories m WHERE m.id = NEW.memory_id;
+    END IF;
+    NEW.importance = NEW.importance * (1.0 + (LN(NEW.access_count + 1) * 0.1));
+    IF NEW.last_accessed IS NOT DISTINCT FROM OLD.last_accessed THEN
+        NEW.last_accessed = CURRENT_TIMESTAMP;
+    END IF;
+    NEW.relevance_computed_at = NULL;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_importance_on_access ON memory_stats;
+CREATE TRIGGER trg_importance_on_access
+    BEFORE UPDATE ON memory_stats
+    FOR EACH ROW
+    WHEN (NEW.access_count != OLD.access_count)
+    EXECUTE FUNCTION update_memory_importance();
+
+-- An explicit importance write on memories replaces any access-boosted value.
+CREATE OR REPLACE FUNCTION reset_boosted_importance()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE memory_stats
+    SET importance = NULL
+    WHERE memory_id = NEW.id
+      AND importance IS NOT NULL;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_reset_boosted_importance ON memories;
+CREATE TRIGGER trg_reset_boosted_importance
+    AFTER UPDATE OF importance ON memories
+    FOR EACH ROW
+    WHEN (NEW.importance IS DISTINCT FROM OLD.importance)
+    EXECUTE FUNCTION reset_boosted_importance();
+
+-- Access-driven importance boosts (memory_stats) do not move a memory's neighbors.
+CREATE TRIGGER trg_neighborhood_staleness
+    AFTER UPDATE OF importance, status ON memories
+    FOR EACH ROW
+    WHEN (
+        NEW.status IS DISTINCT FROM OLD.status
+        OR NEW.importance IS DISTINCT FROM OLD.importance
+    )
+    EXECUTE FUNCTION mark_neighborhoods_stale();
+
+-- Auto-assign memories to episodes.
+-- Statement-level. Ordinary inserts never lock or write episode_state: they append to the
+-- open episode it names, taking sequence_order from episode_memory_seq (offset by the
+-- episode's first_sequence, so orders start at 1 and grow, with gaps after rollbacks), and
+-- compare created_at with the episode's last sequenced memory to detect a >30 min gap.
+-- Only starting a new episode (gap, or no open episode) locks the episode_state row, held
+-- until commit; a concurrent writer that read the old state may still append to the episode
+-- being closed.
+CREATE OR REPLACE FUNCTION assign_to_episode()
+RETURNS TRIGGER AS $$
+DECLARE
+    state_row RECORD;
+    state_locked BOOLEAN := FALSE;
+    current_episode_id UUID;
+    first_sequence BIGINT;
+    last_memory_time TIMESTAMPTZ;
+    seq BIGINT;
+    rec RECORD;
+    episode_ids UUID[] := ARRAY[]::UUID[];
+    memory_ids UUID[] := ARRAY[]::UUID[];
+    sequences INT[] := ARRAY[]::INT[];
+BEGIN
+    SELECT * INTO state_row FROM episode_state WHERE id = 1;
+    IF NOT FOUND THEN
+        INSERT INTO episode_state (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+    END IF;
+    current_episode_id := state_row.current_episode_id;
+    first_sequence := state_row.first_sequence;
+
+    -- The tracked episode may have been closed elsewhere (e.g. summarization).
+    IF current_episode_id IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM episodes WHERE id = current_episode_id AND ended_at IS NULL
+    ) THEN
+        current_episode_id := NULL;
+    END IF;
+    IF current_episode_id IS NOT NULL THEN
+        SELECT m.created_at INTO last_memory_time
+        FROM episode_memories em
+        JOIN memories m ON m.id = em.memory_id
+        WHERE em.episode_id = current_episode_id
+        ORDER BY em.sequence_order DESC
+        LIMIT 1;
+    END IF;
+
+    FOR rec IN
+        SELECT nm.id, nm.created_at
+        FROM (
+            SELECT n.id, n.created_at, row_number() OVER () AS ord
+            FROM new_memories n
+        ) nm
+        ORDER BY nm.created_at, nm.ord
+    LOOP
+        seq := nextval('episode_memory_seq');
+
+        -- If gap > 30 min or no open episode, start new episode
+        IF current_episode_id IS NULL OR first_sequence IS NULL OR
+           (last_memory_time IS NOT NULL AND rec.created_at - last_memory_time > INTERVAL '30 minutes')
+        THEN
+            IF NOT state_locked THEN
+                -- Another writer may have started an episode since the unlocked read;
+                -- re-check against the locked state before starting one.
+                SELECT * INTO state_row FROM episode_state WHERE id = 1 FOR UPDATE;
+                state_locked := TRUE;
+                IF state_row.current_episode_id IS DISTINCT FROM current_episode_id
+                   AND EXISTS (
+                       SELECT 1 FROM episodes
+                       WHERE id = state_row.current_episode_id AND ended_at IS NULL
+                   )
+                THEN
+                    current_episode_id := state_row.current_episode_id;
+                    first_sequence := state_row.first_sequence;
+                    SELECT m.created_at INTO last_memory_time
+                    FROM episode_memories em
+                    JOIN memories m ON m.id = em.memory_id
+                    WHERE em.episode_id = current_episode_id
+                    ORDER BY em.sequence_order DESC
+                    LIMIT 1;
+                END IF;
+            END IF;
+        END IF;
+
+        IF current_episode_id IS NULL OR first_sequence IS NULL OR
+           (last_memory_time IS NOT NULL AND rec.created_at - last_memory_time > INTERVAL '30 minutes')
+        THEN
+            -- Close previous episode
+            IF current_episode_id IS NOT NULL THEN
+                UPDATE episodes
+                SET ended_at = last_memory_time
+                WHERE id = current_episode_id;
+            END IF;
+
+            INSERT INTO episodes (started_at, episode_type)
+            VALUES (rec.created_at, 'autonomous')
+            RETURNING id INTO current_episode_id;
+
+            first_sequence := seq;
+            last_memory_time := NULL;
+        END IF;
+
+        episode_ids := episode_ids || current_episode_id;
+        memory_ids := memory_ids || rec.id;
+        sequences := sequences || (seq - first_sequence + 1)::int;
+
+        last_memory_time := GREATEST(last_memory_time, rec.created_at);
+    END LOOP;
+
+    IF COALESCE(array_length(memory_ids, 1), 0) = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    -- Link memories to episodes
+    INSERT INTO episode_memories (episode_id, memory_id, sequence_order)
+    SELECT * FROM unnest(episode_ids, memory_ids, sequences);
+
+    -- Initialize neighborhood and stats records
+    INSERT INTO memory_neighborhoods (memory_id, is_stale)
+    SELECT id, TRUE FROM new_memories
+    ON CONFLICT DO NOTHING;
+    INSERT INTO memory_stats (memory_id)
+    SELECT id FROM new_memories
+    ON CONFLICT DO NOTHING;
+
+    IF state_locked THEN
+        UPDATE episode_state
+        SET current_episode_id = assign_to_episode.current_episode_id,
+            first_sequence = assign_to_episode.first_sequence,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Stage: seed scan. Active memories passing the filters, nearest to p_query_embedding (HNSW, or
+-- an exact sequential scan in 'exact' mode). With p_lexical_query, full-text (content_tsv) hits
+-- are fused with the vector hits by reciprocal rank fusion and seed_sim is the fused score
+-- scaled to [0, 1]. hnsw.ef_search / hnsw.iterative_scan are set for the scan only.
+CREATE OR REPLACE FUNCTION recall_seeds(
+    p_query_embedding vector,
+    p_seed_limit INT,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_lexical_query TEXT DEFAULT NULL,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL
+) RETURNS TABLE (
+    seed_id UUID,
+    seed_sim FLOAT,
+    seed_lexical_only BOOLEAN
+) AS $$
+DECLARE
+    query_embedding vector := p_query_embedding;
+    zero_vec vector;
+    has_filters BOOLEAN;
+    prev_iterative_scan TEXT;
+    prev_ef_search TEXT;
+    ef_search INT;
+    recall_mode TEXT;
+    exact_scan BOOLEAN;
+    lexical_query tsquery;
+    arm_limit INT;
+    rrf_k CONSTANT INT := 60;
+BEGIN
+    recall_mode := normalize_recall_mode(p_mode);
+    exact_scan := recall_mode = 'exact';
+    IF query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+
+    IF NULLIF(btrim(p_lexical_query), '') IS NOT NULL THEN
+        lexical_query := websearch_to_tsquery('english', p_lexical_query);
+        -- Stopword-only queries have no lexemes; fall back to pure vector seeds.
+        IF numnode(lexical_query) = 0 THEN
+            lexical_query := NULL;
+        END IF;
+    END IF;
+    arm_limit := CASE WHEN lexical_query IS NULL THEN p_seed_limit ELSE p_seed_limit * 2 END;
+
+    has_filters := p_memory_types IS NOT NULL
+        OR COALESCE(p_min_importance, 0.0) > 0.0
+        OR p_min_trust IS NOT NULL
+        OR p_source_kinds IS NOT NULL
+        OR p_created_after IS NOT NULL
+        OR p_created_before IS NOT NULL
+        OR p_min_relevance IS NOT NULL;
+
+    -- With filters, let the HNSW scan keep going until enough rows pass them
+    -- (pgvector >= 0.8); otherwise ef_search candidates can all be filtered away.
+    IF has_filters AND NOT exact_scan THEN
+        BEGIN
+            prev_iterative_scan := current_setting('hnsw.iterative_scan', true);
+            PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_iterative_scan := NULL;
+        END;
+    END IF;
+    ef_search := recall_mode_ef_search(recall_mode, arm_limit);
+    IF ef_search IS NOT NULL THEN
+        BEGIN
+            prev_ef_search := current_setting('hnsw.ef_search', true);
+            PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_ef_search := NULL;
+        END;
+    END IF;
+
+    RETURN QUERY
+    WITH
+    -- Active memories passing the filters (inlined into each arm below)
+    eligible AS NOT MATERIALIZED (
+        SELECT m.id, m.embedding, m.content_tsv
+        FROM memories m
+        WHERE m.status = 'active'
+          AND m.embedding IS NOT NULL
+          AND m.embedding <> zero_vec
+          AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+          AND (COALESCE(p_min_importance, 0.0) <= 0.0 OR COALESCE((
+              SELECT ms.importance FROM memory_stats ms WHERE ms.memory_id = m.id
+          ), m.importance) >= p_min_importance)
+          AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+          AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+          AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+          AND (p_created_before IS NULL OR m.created_at < p_created_before)
+          AND (p_min_relevance IS NULL OR COALESCE((
+              SELECT CASE
+                  WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score
+                  ELSE ms.importance
+              END
+              FROM memory_stats ms WHERE ms.memory_id = m.id
+          ), m.importance) >= p_min_relevance)
+    ),
+    -- Vector candidates: HNSW, or an exact sequential scan in 'exact' mode
+    -- (ordering by "distance + 0" keeps the planner off the index)
+    vector_hits AS MATERIALIZED (
+        SELECT v.id, v.sim, row_number() OVER (ORDER BY v.dist) as rnk
+        FROM (
+            (
+                SELECT
+                    e.id,
+                    e.embedding <=> query_embedding as dist,
+                    1 - (e.embedding <=> query_embedding) as sim
+                FROM eligible e
+                WHERE NOT exact_scan
+                ORDER BY e.embedding <=> query_embedding
+                LIMIT arm_limit
+            )
+            UNION ALL
+            (
+                SELECT
+                    e.id,
+                    (e.embedding <=> query_embedding) + 0 as dist,
+                    1 - (e.embedding <=> query_embedding) as sim
+                FROM eligible e
+                WHERE exact_scan
+                ORDER BY (e.embedding <=> query_embedding) + 0
+                LIMIT arm_limit
+            )
+        ) v
+    ),
+    -- Lexical candidates (full-text, GIN on content_tsv); empty unless hybrid
+    lexical_hits AS MATERIALIZED (
+        SELECT l.id, l.sim, row_number() OVER (ORDER BY l.lex_rank DESC, l.id) as rnk
+        FROM (
+            SELECT
+                e.id,
+                ts_rank_cd(e.content_tsv, lexical_query) as lex_rank,
+                1 - (e.embedding <=> query_embedding) as sim
+            FROM eligible e
+            WHERE lexical_query IS NOT NULL
+              AND e.content_tsv @@ lexical_query
+            ORDER BY ts_rank_cd(e.content_tsv, lexical_query) DESC
+            LIMIT arm_limit
+        ) l
+    )
+    -- Vector hits as-is, or both lists fused with reciprocal rank fusion
+    SELECT
+        f.id,
+        CASE
+            WHEN lexical_query IS NULL THEN f.sim
+            ELSE f.rrf / (2.0 / (rrf_k + 1))
+        END::float,
+        NOT f.in_vector
+    FROM (
+        SELECT
+            h.id,
+            MAX(h.sim) as sim,
+            SUM(1.0 / (rrf_k + h.rnk)) as rrf,
+            bool_or(h.arm = 'vector') as in_vector
+        FROM (
+            SELECT vh.id, vh.sim, vh.rnk, 'vector' as arm FROM vector_hits vh
+            UNION ALL
+            SELECT lh.id, lh.sim, lh.rnk, 'lexical' as arm FROM lexical_hits lh
+        ) h
+        GROUP BY h.id
+    ) f
+    ORDER BY 2 DESC
+    LIMIT p_seed_limit;
+
+    IF prev_iterative_scan IS NOT NULL THEN
+        PERFORM set_config('hnsw.iterative_scan', prev_iterative_scan, true);
+    END IF;
+    IF prev_ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', prev_ef_search, true);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Stage: score the candidates from the earlier stages and keep the top p_limit that pass the
+-- filters. Relevance uses the stored memory_stats.relevance_score when it is current.
+CREATE OR REPLACE FUNCTION recall_score(
+    p_seed_ids UUID[],
+    p_seed_sims FLOAT[],
+    p_seed_lexical_only BOOLEAN[],
+    p_assoc_ids UUID[],
+    p_assoc_scores FLOAT[],
+    p_temporal_ids UUID[],
+    p_limit INT,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_min_relevance FLOAT DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    current_valence FLOAT;
+BEGIN
+    BEGIN
+        current_valence := NULLIF(get_current_affective_state()->>'valence', '')::float;
+    EXCEPTION
+        WHEN OTHERS THEN
+            current_valence := NULL;
+    END;
+    current_valence := COALESCE(current_valence, 0.0);
+
+    RETURN QUERY
+    WITH
+    candidates AS (
+        SELECT s.id as mem_id, s.sim as vector_score, NULL::float as assoc_score, NULL::float as temp_score, s.lexical_only
+        FROM unnest(p_seed_ids, p_seed_sims, p_seed_lexical_only) AS s(id, sim, lexical_only)
+        UNION ALL
+        SELECT a.id, NULL, a.score, NULL, NULL FROM unnest(p_assoc_ids, p_assoc_scores) AS a(id, score)
+        UNION ALL
+        SELECT t.id, NULL, NULL, 0.15, NULL FROM unnest(p_temporal_ids) AS t(id)
+    ),
+    -- Aggregate scores per memory
+    scored AS (
+        SELECT
+            c.mem_id,
+            MAX(c.vector_score) as vector_score,
+            MAX(c.assoc_score) as assoc_score,
+            MAX(c.temp_score) as temp_score,
+            bool_or(c.lexical_only) as lexical_only
+        FROM candidates c
+        GROUP BY c.mem_id
+    )
+    SELECT
+        m.id,
+        m.content,
+        m.type,
+        GREATEST(
+            COALESCE(sc.vector_score, 0) * 0.5 +
+            COALESCE(sc.assoc_score, 0) * 0.3 +
+            COALESCE(sc.temp_score, 0) * 0.15 +
+            (CASE
+                WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score
+                ELSE calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed)
+            END) * 0.05 +
+            -- Mood-congruent recall bias (small): prefer episodic memories whose valence matches current affect.
+            (CASE
+                WHEN em.emotional_valence IS NULL THEN 0.5
+                ELSE 1.0 - (ABS(em.emotional_valence - current_valence) / 2.0)
+            END) * 0.05,
+            0.001
+        ) as final_score,
+        CASE
+            WHEN sc.vector_score IS NOT NULL AND sc.lexical_only THEN 'lexical'
+            WHEN sc.vector_score IS NOT NULL THEN 'vector'
+            WHEN sc.assoc_score IS NOT NULL THEN 'association'
+            WHEN sc.temp_score IS NOT NULL THEN 'temporal'
+            ELSE 'fallback'
+        END as source
+    FROM scored sc
+    JOIN memories m ON sc.mem_id = m.id
+    LEFT JOIN episodic_memories em ON em.memory_id = m.id
+    LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+    WHERE m.status = 'active'
+      AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+      AND (COALESCE(p_min_importance, 0.0) <= 0.0 OR COALESCE(ms.importance, m.importance) >= p_min_importance)
+      AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+      AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+      AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+      AND (p_created_before IS NULL OR m.created_at < p_created_before)
+      AND (p_min_relevance IS NULL OR (CASE WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score ELSE COALESCE(ms.importance, m.importance) END) >= p_min_relevance)
+    ORDER BY final_score DESC
+    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Instrumented fast_recall: runs the same stage functions as fast_recall_with_embedding
+-- (recall_seeds, recall_associations, recall_temporal, recall_score) one statement at a time
+-- and returns {"memories": [...], "trace": {...}} with clock_timestamp() timings per stage,
+-- candidate counts per source and whether the query embedding was already cached (memory
+-- objects have the same shape as hydrate_context's). Calls taking at least p_log_slow_ms are
+-- also written to recall_trace. Hybrid and MMR reranking are not instrumented.
+CREATE OR REPLACE FUNCTION fast_recall_explain(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL,
+    p_log_slow_ms FLOAT DEFAULT NULL
+) RETURNS JSONB AS $$
+DECLARE
+    started_at TIMESTAMPTZ := clock_timestamp();
+    stage_at TIMESTAMPTZ;
+    timings JSONB := '{}'::jsonb;
+    cache_hit BOOLEAN;
+    query_embedding vector;
+    recall_mode TEXT;
+    seed_ids UUID[];
+    seed_sims FLOAT[];
+    seed_lexical_only BOOLEAN[];
+    assoc_ids UUID[];
+    assoc_scores FLOAT[];
+    temporal_ids UUID[];
+    recalled JSONB;
+    total_ms FLOAT;
+    trace JSONB;
+BEGIN
+    recall_mode := normalize_recall_mode(p_mode);
+
+    -- Stage 1: query embedding
+    stage_at := clock_timestamp();
+    cache_hit := EXISTS (
+        SELECT 1 FROM embedding_cache
+        WHERE content_hash = encode(sha256(p_query_text::bytea), 'hex')
+    );
+    query_embedding := get_embedding(p_query_text);
+    timings := timings || jsonb_build_object('embedding_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 2: vector seed scan
+    stage_at := clock_timestamp();
+    SELECT
+        array_agg(s.seed_id ORDER BY s.seed_sim DESC),
+        array_agg(s.seed_sim ORDER BY s.seed_sim DESC),
+        array_agg(s.seed_lexical_only ORDER BY s.seed_sim DESC)
+    INTO seed_ids, seed_sims, seed_lexical_only
+    FROM recall_seeds(
+        query_embedding,
+        GREATEST(p_limit, 5),
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        NULL,
+        p_min_relevance,
+        p_mode
+    ) s;
+    timings := timings || jsonb_build_object('seed_scan_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 3: neighborhood expansion
+    stage_at := clock_timestamp();
+    SELECT array_agg(a.assoc_id), array_agg(a.assoc_score)
+    INTO assoc_ids, assoc_scores
+    FROM recall_associations(seed_ids, seed_sims) a;
+    timings := timings || jsonb_build_object('association_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 4: episode (temporal) expansion
+    stage_at := clock_timestamp();
+    SELECT array_agg(t.temporal_id)
+    INTO temporal_ids
+    FROM recall_temporal(seed_ids) t;
+    timings := timings || jsonb_build_object('temporal_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 5: scoring
+    stage_at := clock_timestamp();
+    SELECT COALESCE(jsonb_agg(
+        jsonb_build_object(
+            'memory_id', r.memory_id,
+            'content', r.content,
+            'type', r.memory_type,
+            'score', r.score,
+            'source', r.source,
+            'importance', COALESCE(ms.importance, m.importance),
+            'trust_level', m.trust_level,
+            'source_attribution', m.source_attribution,
+            'created_at', m.created_at,
+            'emotional_valence', em.emotional_valence
+        )
+        ORDER BY r.score DESC
+    ), '[]'::jsonb)
+    INTO recalled
+    FROM recall_score(
+        seed_ids,
+        seed_sims,
+        seed_lexical_only,
+        assoc_ids,
+        assoc_scores,
+        temporal_ids,
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        p_min_relevance
+    ) r
+    JOIN memories m ON m.id = r.memory_id
+    LEFT JOIN episodic_memories em ON em.memory_id = r.memory_id
+    LEFT JOIN memory_stats ms ON ms.memory_id = r.memory_id;
+    timings := timings || jsonb_build_object('scoring_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    total_ms := EXTRACT(EPOCH FROM clock_timestamp() - started_at) * 1000.0;
+    trace := jsonb_build_object(
+        'mode', recall_mode,
+        'timings', timings || jsonb_build_object('total_ms', total_ms),
+        'candidates', jsonb_build_object(
+            'vector', COALESCE(array_length(seed_ids, 1), 0),
+            'association', COALESCE(array_length(assoc_ids, 1), 0),
+            'temporal', COALESCE(array_length(temporal_ids, 1), 0)
+        ),
+        'returned', jsonb_array_length(recalled),
+        'embedding_cache_hit', cache_hit
+    );
+
+    IF p_log_slow_ms IS NOT NULL AND total_ms >= p_log_slow_ms THEN
+        INSERT INTO recall_trace (query_text, total_ms, trace)
+        VALUES (p_query_text, total_ms, trace);
+    END IF;
+    PERFORM record_recall_mode(p_mode, started_at);
+
+    RETURN jsonb_build_object('memories', recalled, 'trace', trace);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Search similar memories
+CREATE OR REPLACE FUNCTION search_similar_memories(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    type memory_type,
+    similarity FLOAT,
+    importance FLOAT
+) AS $$
+DECLARE
+    query_embedding vector;
+    zero_vec vector;
+BEGIN
+    query_embedding := get_embedding(p_query_text);
+    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+
+    RETURN QUERY
+    WITH candidates AS MATERIALIZED (
+        SELECT m.id, m.content, m.type, m.embedding, COALESCE(ms.importance, m.importance) AS importance
+        FROM memories m
+        LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+        WHERE m.status = 'active'
+          AND m.embedding IS NOT NULL
+          AND m.embedding <> zero_vec
+          AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+          AND COALESCE(ms.importance, m.importance) >= p_min_importance
+    )
+    SELECT
+        c.id,
+        c.content,
+        c.type,
+        1 - (c.embedding <=> query_embedding) as similarity,
+        c.importance
+    FROM candidates c
+    ORDER BY c.embedding <=> query_embedding
+    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fold a duplicate write into an existing memory: keep the higher importance, count it as an
+-- access (which also bumps importance via trg_importance_on_access), and merge any new
+-- semantic source references (recomputing trust).
+CREATE OR REPLACE FUNCTION reinforce_memory(
+    p_memory_id UUID,
+    p_importance FLOAT DEFAULT NULL,
+    p_source_references JSONB DEFAULT NULL
+) RETURNS VOID AS $$
+DECLARE
+    normalized_sources JSONB;
+BEGIN
+    -- Only a higher importance touches the wide row (and resets the boosted value).
+    UPDATE memories m
+    SET importance = p_importance
+    WHERE m.id = p_memory_id
+      AND p_importance > COALESCE((
+          SELECT ms.importance FROM memory_stats ms WHERE ms.memory_id = m.id
+      ), m.importance);
+
+    UPDATE memory_stats
+    SET access_count = access_count + 1,
+        last_accessed = CURRENT_TIMESTAMP
+    WHERE memory_id = p_memory_id;
+
+    normalized_sources := dedupe_source_references(p_source_references);
+    IF jsonb_array_length(normalized_sources) > 0 THEN
+        UPDATE semantic_memories
+        SET source_references = dedupe_source_references(
+                COALESCE(source_references, '[]'::jsonb) || normalized_sources
+            ),
+            last_validated = CURRENT_TIMESTAMP
+        WHERE memory_id = p_memory_id;
+
+        IF FOUND THEN
+            PERFORM sync_memory_trust(p_memory_id);
+        END IF;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fold buffered accesses into memory_stats: one UPDATE per memory per flush, so the
+-- trg_importance_on_access boost is applied once per tick however often it was recalled.
+-- The wide memories rows are not written.
+CREATE OR REPLACE FUNCTION flush_memory_access_log()
+RETURNS INT AS $$
+DECLARE
+    flushed INT;
+BEGIN
+    WITH drained AS (
+        DELETE FROM memory_access_log
+        RETURNING memory_id, accessed_at
+    ),
+    agg AS (
+        SELECT memory_id, COUNT(*)::int AS hits, MAX(accessed_at) AS last_at
+        FROM drained
+        GROUP BY memory_id
+    )
+    UPDATE memory_stats ms
+    SET access_count = ms.access_count + agg.hits,
+        last_accessed = GREATEST(COALESCE(ms.last_accessed, agg.last_at), agg.last_at)
+    FROM agg
+    WHERE ms.memory_id = agg.memory_id;
+
+    GET DIAGNOSTICS flushed = ROW_COUNT;
+    RETURN flushed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Refresh memory_stats.relevance_score for up to p_batch_size active memories that have no score,
+-- were modified since it was computed, or whose score is older than p_max_age_minutes.
+-- Only the narrow memory_stats rows are written; memories is read, not updated.
+CREATE OR REPLACE FUNCTION refresh_relevance_scores(
+    p_batch_size INT DEFAULT 500,
+    p_max_age_minutes FLOAT DEFAULT 60
+)
+RETURNS INT AS $$
+DECLARE
+    refreshed INT;
+BEGIN
+    WITH due AS (
+        SELECT
+            m.id,
+            calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) AS score
+        FROM memories m
+        LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+        WHERE m.status = 'active'
+          AND (
+              ms.relevance_computed_at IS NULL
+              OR ms.relevance_computed_at < m.updated_at
+              OR ms.relevance_computed_at < CURRENT_TIMESTAMP - make_interval(secs => GREATEST(0, COALESCE(p_max_age_minutes, 0)) * 60)
+          )
+        ORDER BY ms.relevance_computed_at ASC NULLS FIRST
+        LIMIT GREATEST(0, COALESCE(p_batch_size, 0))
+    )
+    INSERT INTO memory_stats (memory_id, relevance_score, relevance_computed_at)
+    SELECT due.id, due.score, CURRENT_TIMESTAMP
+    FROM due
+    ON CONFLICT (memory_id) DO UPDATE SET
+        relevance_score = EXCLUDED.relevance_score,
+        relevance_computed_at = EXCLUDED.relevance_computed_at;
+
+    GET DIAGNOSTICS refreshed = ROW_COUNT;
+    RETURN refreshed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Single-call hydration: embeds the query once and returns recalled memories,
+-- partial activations and the requested context sections as one JSONB document.
+-- Flags (all optional): include_partial, include_identity, include_worldview,
+-- include_emotional_state, include_drives (default true); include_goals, hybrid (default false);
+-- diversity (0..1, default 0) for MMR reranking of the recalled memories;
+-- mode ('fast', 'balanced', 'exact') for the recall quality (see fast_recall);
+-- explain (default false) recalls through fast_recall_explain and adds its trace
+-- (log_slow_ms is passed on as p_log_slow_ms; hybrid and diversity are ignored).
+-- Context sections come from the versioned turn-context snapshot; if the caller passes
+-- known_context_version and it is still current, sections are omitted and
+-- context_unchanged is set so the caller can reuse its own copy.
+CREATE OR REPLACE FUNCTION hydrate_context(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_flags JSONB DEFAULT '{}'::jsonb
+)
+RETURNS JSONB AS $$
+DECLARE
+    flags JSONB := COALESCE(p_flags, '{}'::jsonb);
+    query_embedding vector;
+    known_version BIGINT;
+    current_version BIGINT;
+    ctx JSONB;
+    result JSONB;
+    explained JSONB;
+    started_at TIMESTAMPTZ := clock_timestamp();
+BEGIN
+    known_version := NULLIF(flags->>'known_context_version', '')::bigint;
+
+    IF COALESCE((flags->>'explain')::boolean, FALSE) THEN
+        -- Runs first so the trace reports the embedding-cache state of this call.
+        explained := fast_recall_explain(
+            p_query_text,
+            p_limit,
+            p_mode => flags->>'mode',
+            p_log_slow_ms => NULLIF(flags->>'log_slow_ms', '')::float
+        );
+        query_embedding := get_embedding(p_query_text);
+        result := jsonb_build_object(
+            'memories', explained->'memories',
+            'trace', explained->'trace'
+        );
+    ELSE
+        query_embedding := get_embedding(p_query_text);
+        result := jsonb_build_object(
+            'memories', COALESCE((
+                SELECT jsonb_agg(
+                    jsonb_build_object(
+                        'memory_id', fr.memory_id,
+                        'content', fr.content,
+                        'type', fr.memory_type,
+                        'score', fr.score,
+                        'source', fr.source,
+                        'importance', COALESCE(ms.importance, m.importance),
+                        'trust_level', m.trust_level,
+                        'source_attribution', m.source_attribution,
+                        'created_at', m.created_at,
+                        'emotional_valence', em.emotional_valence
+                    )
+                    ORDER BY fr.score DESC
+                )
+                FROM fast_recall_with_embedding(
+                    query_embedding,
+                    p_limit,
+                    p_lexical_query => CASE
+                        WHEN COALESCE((flags->>'hybrid')::boolean, FALSE) THEN p_query_text
+                    END,
+                    p_diversity => COALESCE(NULLIF(flags->>'diversity', '')::float, 0.0),
+                    p_mode => flags->>'mode'
+                ) fr
+                JOIN memories m ON m.id = fr.memory_id
+                LEFT JOIN episodic_memories em ON em.memory_id = fr.memory_id
+                LEFT JOIN memory_stats ms ON ms.memory_id = fr.memory_id
+            ), '[]'::jsonb)
+        );
+        PERFORM record_recall_mode(flags->>'mode', started_at);
+    END IF;
+
+    IF COALESCE((flags->>'include_partial')::boolean, TRUE) THEN
+        result := result || jsonb_build_object(
+            'partial_activations', COALESCE((
+                SELECT jsonb_agg(to_jsonb(pa))
+                FROM find_partial_activations_with_embedding(query_embedding) pa
+            ), '[]'::jsonb)
+        );
+    END IF;
+    current_version := turn_context_version();
+    result := result || jsonb_build_object('context_version', current_version);
+    IF known_version IS NOT NULL AND known_version = current_version THEN
+        RETURN result || jsonb_build_object('context_unchanged', TRUE);
+    END IF;
+
+    ctx := get_turn_context_snapshot();
+
+    IF COALESCE((flags->>'include_identity')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('identity', ctx->'identity');
+    END IF;
+    IF COALESCE((flags->>'include_worldview')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('worldview', ctx->'worldview');
+    END IF;
+    IF COALESCE((flags->>'include_emotional_state')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('emotional_state', ctx->'emotional_state');
+    END IF;
+    IF COALESCE((flags->>'include_goals')::boolean, FALSE) THEN
+        result := result || jsonb_build_object('goals', ctx->'goals');
+    END IF;
+    IF COALESCE((flags->>'include_drives')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('urgent_drives', ctx->'urgent_drives');
+    END IF;
+
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE VIEW memory_health AS
+SELECT
+    m.type,
+    COUNT(*) as total_memories,
+    AVG(COALESCE(ms.importance, m.importance)) as avg_importance,
+    AVG(COALESCE(ms.access_count, 0)) as avg_access_count,
+    COUNT(*) FILTER (WHERE ms.last_accessed > CURRENT_TIMESTAMP - INTERVAL '1 day') as accessed_last_day,
+    AVG(calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed)) as avg_relevance
+FROM memories m
+LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+WHERE m.status = 'active'
+GROUP BY m.type;
@@ -0,0 +1,85 @@
+-- Patch migration: import_staged_memories() sets semantic trust the way the per-row batch path does (compute_semantic_trust).
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Move one staged batch into memories, the type tables and the graph, set-based:
+-- one INSERT per table and one Cypher UNWIND (create_memory_nodes). Defaults match
+-- batch_create_memories_with_embeddings(); semantic trust is the value sync_memory_trust()
+-- computes for a new row (confidence 0.8, no sources, no worldview influences).
+-- Staged rows are deleted. Returns rows imported.
+CREATE OR REPLACE FUNCTION import_staged_memories(p_batch_id UUID)
+RETURNS INT AS $$
+DECLARE
+    ids UUID[];
+BEGIN
+    WITH staged AS MATERIALIZED (
+        SELECT
+            gen_random_uuid() as id,
+            s.ord,
+            s.type as mtype,
+            s.content,
+            s.embedding,
+            COALESCE(s.importance, 0.5) as importance
+        FROM memory_import_staging s
+        WHERE s.batch_id = p_batch_id
+          AND s.content <> ''
+    ),
+    inserted AS (
+        INSERT INTO memories (id, type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+        SELECT
+            st.id,
+            st.mtype,
+            st.content,
+            st.embedding,
+            st.importance,
+            jsonb_build_object(
+                'kind', CASE WHEN st.mtype = 'semantic' THEN 'unattributed' ELSE 'internal' END,
+                'observed_at', CURRENT_TIMESTAMP
+            ),
+            CASE
+                WHEN st.mtype = 'episodic' THEN 0.95
+                WHEN st.mtype = 'semantic' THEN compute_semantic_trust(0.8, '[]'::jsonb, 0.0)
+                ELSE 0.70
+            END,
+            CURRENT_TIMESTAMP
+        FROM staged st
+        ORDER BY st.ord
+        RETURNING id
+    ),
+    episodic AS (
+        INSERT INTO episodic_memories (memory_id, context, emotional_valence, event_time)
+        SELECT st.id, jsonb_build_object('type', 'bulk_import'), 0.0, CURRENT_TIMESTAMP
+        FROM staged st
+        WHERE st.mtype = 'episodic'
+    ),
+    semantic AS (
+        INSERT INTO semantic_memories (memory_id, confidence, last_validated, source_references)
+        SELECT st.id, 0.8, CURRENT_TIMESTAMP, '[]'::jsonb
+        FROM staged st
+        WHERE st.mtype = 'semantic'
+    ),
+    procedural AS (
+        INSERT INTO procedural_memories (memory_id, steps)
+        SELECT st.id, jsonb_build_object('steps', '[]'::jsonb)
+        FROM staged st
+        WHERE st.mtype = 'procedural'
+    ),
+    strategic AS (
+        INSERT INTO strategic_memories (memory_id, pattern_description, confidence_score)
+        SELECT st.id, st.content, 0.8
+        FROM staged st
+        WHERE st.mtype = 'strategic'
+    )
+    SELECT array_agg(st.id ORDER BY st.ord) INTO ids
+    FROM staged st;
+
+    DELETE FROM memory_import_staging WHERE batch_id = p_batch_id;
+
+    IF ids IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    PERFORM create_memory_nodes(ids);
+
+    RETURN array_length(ids, 1);
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,327 @@
+-- Patch migration: batch_create_memories(p_dedupe => TRUE) collapses in-batch duplicates; find_duplicate_memory() scans HNSW iteratively and skips zero vectors.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Opt-in dedupe for the create functions (p_dedupe => TRUE): returns an active memory of the
+-- same type with identical content, or the top-1 vector neighbor of that type when its
+-- similarity is at least p_threshold (default maintenance_config.dedupe_similarity_threshold).
+-- The type/status filters are applied during the HNSW scan (hnsw.iterative_scan), so
+-- neighbors of other types cannot crowd a same-type duplicate out of the candidates.
+CREATE OR REPLACE FUNCTION find_duplicate_memory(
+    p_type memory_type,
+    p_content TEXT,
+    p_embedding vector,
+    p_threshold FLOAT DEFAULT NULL
+) RETURNS UUID AS $$
+DECLARE
+    dup_id UUID;
+    threshold FLOAT;
+    zero_vec vector;
+    prev_iterative_scan TEXT;
+BEGIN
+    IF p_content IS NULL OR p_content = '' THEN
+        RETURN NULL;
+    END IF;
+
+    -- Exact content (idx_memories_content_md5)
+    SELECT m.id INTO dup_id
+    FROM memories m
+    WHERE md5(m.content) = md5(p_content)
+      AND m.content = p_content
+      AND m.type = p_type
+      AND m.status = 'active'
+    ORDER BY m.created_at
+    LIMIT 1;
+    IF dup_id IS NOT NULL OR p_embedding IS NULL THEN
+        RETURN dup_id;
+    END IF;
+
+    threshold := COALESCE(
+        p_threshold,
+        (SELECT value FROM maintenance_config WHERE key = 'dedupe_similarity_threshold'),
+        0.97
+    );
+
+    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+    IF p_embedding = zero_vec THEN
+        RETURN NULL;
+    END IF;
+
+    -- Strict order: only the top-1 neighbor is compared with the threshold (pgvector >= 0.8).
+    BEGIN
+        prev_iterative_scan := current_setting('hnsw.iterative_scan', true);
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION
+        WHEN OTHERS THEN
+            prev_iterative_scan := NULL;
+    END;
+
+    -- Nearest neighbor (HNSW)
+    SELECT nn.id INTO dup_id
+    FROM (
+        SELECT m.id, m.embedding <=> p_embedding AS distance
+        FROM memories m
+        WHERE m.status = 'active'
+          AND m.type = p_type
+          AND m.embedding IS NOT NULL
+          AND m.embedding <> zero_vec
+        ORDER BY m.embedding <=> p_embedding
+        LIMIT 1
+    ) nn
+    WHERE 1 - nn.distance >= threshold;
+
+    IF prev_iterative_scan IS NOT NULL THEN
+        PERFORM set_config('hnsw.iterative_scan', prev_iterative_scan, true);
+    END IF;
+
+    RETURN dup_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batch create memories from JSONB items.
+-- Each item must include: {"type": "semantic|episodic|procedural|strategic", "content": "..."}
+-- Optional keys: importance, emotional_valence, context, action_taken, result, event_time,
+--                confidence, category, related_concepts, source_references, steps, prerequisites,
+--                pattern_description, supporting_evidence, context_applicability,
+--                source_attribution, trust_level.
+-- Set-based: one get_embeddings() call, one multi-row INSERT into memories and into each
+-- type table and one Cypher UNWIND for the graph nodes; new ids are queued for cluster assignment.
+-- Source/trust defaults match the per-type create_*_memory() functions.
+-- p_dedupe => TRUE: items matching an existing memory (find_duplicate_memory) reinforce it
+-- and return its id instead of inserting; items matching an earlier item of the same batch
+-- (same type, identical content or similarity >= dedupe_similarity_threshold) return and
+-- reinforce that item's memory, as batch_create_memories_with_vectors() does row by row.
+CREATE OR REPLACE FUNCTION batch_create_memories(p_items JSONB, p_dedupe BOOLEAN DEFAULT FALSE)
+RETURNS UUID[] AS $$
+DECLARE
+    ids UUID[];
+    created_ids UUID[];
+    dup_ids UUID[] := ARRAY[]::UUID[];
+    canon INT[];
+    kept INT[] := ARRAY[]::INT[];
+    item_types TEXT[];
+    item_contents TEXT[];
+    threshold FLOAT;
+    zero_vec vector;
+    n INT;
+    i INT;
+    j INT;
+    collapsed BOOLEAN;
+    bad_idx BIGINT;
+    bad_type TEXT;
+    embeddings vector[];
+BEGIN
+    IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' OR jsonb_array_length(p_items) = 0 THEN
+        RETURN ARRAY[]::UUID[];
+    END IF;
+
+    SELECT e.ord INTO bad_idx
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+    WHERE NULLIF(e.item->>'content', '') IS NULL
+       OR NULLIF(e.item->>'type', '') IS NULL
+    ORDER BY e.ord
+    LIMIT 1;
+    IF bad_idx IS NOT NULL THEN
+        RAISE EXCEPTION 'batch_create_memories: item % missing required fields', bad_idx;
+    END IF;
+
+    SELECT e.ord, e.item->>'type' INTO bad_idx, bad_type
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+    WHERE NOT (e.item->>'type' = ANY(enum_range(NULL::memory_type)::text[]))
+    ORDER BY e.ord
+    LIMIT 1;
+    IF bad_idx IS NOT NULL THEN
+        RAISE EXCEPTION 'batch_create_memories: item % invalid type %', bad_idx, bad_type;
+    END IF;
+
+    -- Embed every item in one batched call (cache probe + batched HTTP for misses).
+    embeddings := get_embeddings(ARRAY(
+        SELECT e.item->>'content'
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        ORDER BY e.ord
+    ));
+
+    IF p_dedupe THEN
+        SELECT array_agg(
+            find_duplicate_memory((e.item->>'type')::memory_type, e.item->>'content', embeddings[e.ord::int])
+            ORDER BY e.ord
+        ) INTO dup_ids
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord);
+
+        -- Collapse in-batch duplicates onto the first matching item: canon[i] = that item's
+        -- ordinal, or its existing duplicate is carried over to dup_ids[i].
+        n := jsonb_array_length(p_items);
+        canon := array_fill(NULL::int, ARRAY[n]);
+        threshold := COALESCE(
+            (SELECT value FROM maintenance_config WHERE key = 'dedupe_similarity_threshold'),
+            0.97
+        );
+        zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+        SELECT array_agg(e.item->>'type' ORDER BY e.ord), array_agg(e.item->>'content' ORDER BY e.ord)
+        INTO item_types, item_contents
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord);
+
+        FOR i IN 1..n LOOP
+            collapsed := FALSE;
+            IF dup_ids[i] IS NULL THEN
+                FOREACH j IN ARRAY kept LOOP
+                    IF item_types[j] = item_types[i] AND (
+                        item_contents[j] = item_contents[i]
+                        OR (embeddings[i] <> zero_vec AND embeddings[j] <> zero_vec
+                            AND 1 - (embeddings[j] <=> embeddings[i]) >= threshold)
+                    ) THEN
+                        IF dup_ids[j] IS NOT NULL THEN
+                            dup_ids[i] := dup_ids[j];
+                        ELSE
+                            canon[i] := j;
+                        END IF;
+                        collapsed := TRUE;
+                        EXIT;
+                    END IF;
+                END LOOP;
+            END IF;
+            IF NOT collapsed THEN
+                kept := array_append(kept, i);
+            END IF;
+        END LOOP;
+
+        PERFORM reinforce_memory(
+            dup_ids[e.ord::int],
+            NULLIF(e.item->>'importance', '')::float,
+            CASE WHEN e.item->>'type' = 'semantic' THEN e.item->'source_references' END
+        )
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        WHERE dup_ids[e.ord::int] IS NOT NULL;
+    END IF;
+
+    WITH items AS MATERIALIZED (
+        SELECT
+            e.ord,
+            gen_random_uuid() as id,
+            r.type::memory_type as mtype,
+            r.content,
+            embeddings[e.ord::int] as embedding,
+            COALESCE(NULLIF(r.importance, '')::float, 0.5) as importance,
+            r.action_taken,
+            r.context,
+            r.result,
+            COALESCE(NULLIF(r.emotional_valence, '')::float, 0.0) as emotional_valence,
+            COALESCE(NULLIF(r.event_time, '')::timestamptz, CURRENT_TIMESTAMP) as event_time,
+            COALESCE(NULLIF(r.confidence, '')::float, 0.8) as confidence,
+            CASE WHEN r.category IS NOT NULL THEN ARRAY(SELECT jsonb_array_elements_text(r.category)) END as category,
+            CASE WHEN r.related_concepts IS NOT NULL THEN ARRAY(SELECT jsonb_array_elements_text(r.related_concepts)) END as related_concepts,
+            CASE WHEN r.type = 'semantic' THEN dedupe_source_references(r.source_references) END as semantic_sources,
+            COALESCE(r.steps, jsonb_build_object('steps', '[]'::jsonb)) as steps,
+            r.prerequisites,
+            COALESCE(NULLIF(r.pattern_description, ''), r.content) as pattern_description,
+            COALESCE(NULLIF(r.confidence_score, '')::float, 0.8) as confidence_score,
+            r.supporting_evidence,
+            r.context_applicability,
+            normalize_source_reference(r.source_attribution) as given_source,
+            NULLIF(r.trust_level, '')::float as trust_level
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        CROSS JOIN LATERAL jsonb_to_record(e.item) AS r(
+            type TEXT,
+            content TEXT,
+            importance TEXT,
+            action_taken JSONB,
+            context JSONB,
+            result JSONB,
+            emotional_valence TEXT,
+            event_time TEXT,
+            confidence TEXT,
+            category JSONB,
+            related_concepts JSONB,
+            source_references JSONB,
+            steps JSONB,
+            prerequisites JSONB,
+            pattern_description TEXT,
+            confidence_score TEXT,
+            supporting_evidence JSONB,
+            context_applicability JSONB,
+            source_attribution JSONB,
+            trust_level TEXT
+        )
+        WHERE dup_ids[e.ord::int] IS NULL
+          AND canon[e.ord::int] IS NULL
+    ),
+    prepared AS MATERIALIZED (
+        SELECT
+            i.*,
+            CASE
+                WHEN i.given_source <> '{}'::jsonb THEN i.given_source
+                WHEN i.mtype = 'semantic'
+                     AND jsonb_typeof(i.semantic_sources) = 'array'
+                     AND jsonb_array_length(i.semantic_sources) > 0
+                     AND normalize_source_reference(i.semantic_sources->0) <> '{}'::jsonb
+                    THEN normalize_source_reference(i.semantic_sources->0)
+                WHEN i.mtype = 'semantic'
+                    THEN jsonb_build_object('kind', 'unattributed', 'observed_at', CURRENT_TIMESTAMP)
+                ELSE jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP)
+            END as source_attribution,
+            LEAST(1.0, GREATEST(0.0, COALESCE(
+                i.trust_level,
+                CASE i.mtype
+                    WHEN 'episodic' THEN 0.95
+                    WHEN 'semantic' THEN compute_semantic_trust(
+                        LEAST(1.0, GREATEST(0.0, i.confidence)), i.semantic_sources, 0.0
+                    )
+                    ELSE 0.70
+                END
+            ))) as effective_trust
+        FROM items i
+    ),
+    inserted AS (
+        INSERT INTO memories (id, type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+        SELECT p.id, p.mtype, p.content, p.embedding, p.importance, p.source_attribution, p.effective_trust, CURRENT_TIMESTAMP
+        FROM prepared p
+        ORDER BY p.ord
+        RETURNING id
+    ),
+    episodic AS (
+        INSERT INTO episodic_memories (memory_id, action_taken, context, result, emotional_valence, event_time)
+        SELECT p.id, p.action_taken, p.context, p.result, p.emotional_valence, p.event_time
+        FROM prepared p
+        WHERE p.mtype = 'episodic'
+    ),
+    semantic AS (
+        INSERT INTO semantic_memories (memory_id, confidence, category, related_concepts, source_references, last_validated)
+        SELECT p.id, p.confidence, p.category, p.related_concepts, p.semantic_sources, CURRENT_TIMESTAMP
+        FROM prepared p
+        WHERE p.mtype = 'semantic'
+    ),
+    procedural AS (
+        INSERT INTO procedural_memories (memory_id, steps, prerequisites)
+        SELECT p.id, p.steps, p.prerequisites
+        FROM prepared p
+        WHERE p.mtype = 'procedural'
+    ),
+    strategic AS (
+        INSERT INTO strategic_memories (memory_id, pattern_description, confidence_score, supporting_evidence, context_applicability)
+        SELECT p.id, p.pattern_description, p.confidence_score, p.supporting_evidence, p.context_applicability
+        FROM prepared p
+        WHERE p.mtype = 'strategic'
+    )
+    SELECT
+        array_agg(COALESCE(dup_ids[g.ord], p.id, pc.id) ORDER BY g.ord),
+        COALESCE(array_agg(p.id ORDER BY g.ord) FILTER (WHERE p.id IS NOT NULL), ARRAY[]::UUID[])
+    INTO ids, created_ids
+    FROM generate_series(1, jsonb_array_length(p_items)) AS g(ord)
+    LEFT JOIN prepared p ON p.ord = g.ord
+    LEFT JOIN prepared pc ON pc.ord = canon[g.ord];
+
+    IF p_dedupe THEN
+        PERFORM reinforce_memory(
+            ids[e.ord::int],
+            NULLIF(e.item->>'importance', '')::float,
+            CASE WHEN e.item->>'type' = 'semantic' THEN e.item->'source_references' END
+        )
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        WHERE canon[e.ord::int] IS NOT NULL;
+    END IF;
+
+    PERFORM create_memory_nodes(created_ids);
+    PERFORM queue_cluster_assignment(created_ids);
+
+    RETURN ids;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,163 @@
+-- Patch migration: neighborhood recompute no longer loops inside the maintenance transaction; the tick runs one batch and the worker drives the time budget.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+DROP FUNCTION IF EXISTS recompute_stale_neighborhoods(FLOAT, INT, INT);
+
+UPDATE maintenance_config SET description = 'Stale-neighborhood batch recomputed inside each tick; first batch of a worker drain'
+WHERE key = 'neighborhood_batch_size';
+UPDATE maintenance_config SET description = 'Upper bound for an adaptive worker neighborhood batch'
+WHERE key = 'neighborhood_max_batch_size';
+UPDATE maintenance_config SET description = 'Milliseconds per worker drain spent recomputing stale neighborhoods (one committed batch per call)'
+WHERE key = 'neighborhood_time_budget_ms';
+
+-- Claims up to p_batch_size stale rows with FOR UPDATE SKIP LOCKED, so concurrent
+-- workers split the stale set instead of recomputing the same memories. Claimed rows stay
+-- locked until the caller commits: call it in its own short transaction.
+CREATE OR REPLACE FUNCTION batch_recompute_neighborhoods(
+    p_batch_size INT DEFAULT 50
+)
+RETURNS INT AS $$
+DECLARE
+    claimed UUID[];
+BEGIN
+    SELECT array_agg(memory_id) INTO claimed
+    FROM (
+        SELECT memory_id
+        FROM memory_neighborhoods
+        WHERE is_stale = TRUE
+        ORDER BY computed_at ASC NULLS FIRST
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    ) s;
+
+    RETURN recompute_neighborhoods(claimed);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run a single subconscious maintenance tick: consolidation + pruning + indexing upkeep.
+CREATE OR REPLACE FUNCTION run_subconscious_maintenance(p_params JSONB DEFAULT '{}'::jsonb)
+RETURNS JSONB AS $$
+DECLARE
+    got_lock BOOLEAN;
+    min_imp FLOAT;
+    min_acc INT;
+    neighborhood_batch INT;
+    cache_days INT;
+    wm_stats JSONB;
+    recomputed INT;
+    cache_deleted INT;
+    recall_cache_deleted INT;
+    relevance_batch INT;
+    relevance_max_age FLOAT;
+    relevance_refreshed INT;
+    trace_days INT;
+    trace_deleted INT;
+    accesses_flushed INT;
+    cluster_batch INT;
+    clusters_assigned INT;
+    versions_compacted INT;
+    recall_modes_flushed INT;
+BEGIN
+    got_lock := pg_try_advisory_lock(hashtext('agi_subconscious_maintenance'));
+    IF NOT got_lock THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'locked');
+    END IF;
+
+    min_imp := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_importance', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_importance'),
+        0.75
+    );
+    min_acc := COALESCE(
+        NULLIF(p_params->>'working_memory_promote_min_accesses', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'working_memory_promote_min_accesses')::int,
+        3
+    );
+    neighborhood_batch := COALESCE(
+        NULLIF(p_params->>'neighborhood_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size')::int,
+        50
+    );
+    cache_days := COALESCE(
+        NULLIF(p_params->>'embedding_cache_older_than_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'embedding_cache_older_than_days')::int,
+        7
+    );
+    relevance_batch := COALESCE(
+        NULLIF(p_params->>'relevance_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_batch_size')::int,
+        500
+    );
+    relevance_max_age := COALESCE(
+        NULLIF(p_params->>'relevance_max_age_minutes', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_max_age_minutes'),
+        60
+    );
+    trace_days := COALESCE(
+        NULLIF(p_params->>'recall_trace_retention_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'recall_trace_retention_days')::int,
+        7
+    );
+    cluster_batch := COALESCE(
+        NULLIF(p_params->>'cluster_assignment_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'cluster_assignment_batch_size')::int,
+        500
+    );
+
+    accesses_flushed := flush_memory_access_log();
+    wm_stats := cleanup_working_memory_with_stats(min_imp, min_acc);
+    -- One batch: claimed rows stay locked until the tick commits. The time-budgeted drain runs
+    -- from the worker, one committed batch_recompute_neighborhoods() call at a time.
+    recomputed := batch_recompute_neighborhoods(neighborhood_batch);
+    clusters_assigned := process_cluster_assignment_queue(cluster_batch);
+    cache_deleted := cleanup_embedding_cache((cache_days || ' days')::interval);
+    recall_cache_deleted := cleanup_recall_cache();
+    relevance_refreshed := refresh_relevance_scores(relevance_batch, relevance_max_age);
+    trace_deleted := cleanup_recall_trace((trace_days || ' days')::interval);
+    versions_compacted := compact_state_versions();
+    recall_modes_flushed := flush_recall_mode_log();
+
+    UPDATE maintenance_state
+    SET last_maintenance_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+
+    -- Log the maintenance run for dashboard
+    INSERT INTO maintenance_log (
+        ran_at,
+        neighborhoods_recomputed,
+        embedding_cache_deleted,
+        working_memory_deleted,
+        working_memory_promoted,
+        success
+    ) VALUES (
+        CURRENT_TIMESTAMP,
+        COALESCE(recomputed, 0),
+        COALESCE(cache_deleted, 0),
+        COALESCE(NULLIF(wm_stats->>'deleted_count', '')::int, 0),
+        COALESCE(NULLIF(wm_stats->>'promoted_count', '')::int, 0),
+        true
+    );
+
+    PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'working_memory', wm_stats,
+        'neighborhoods_recomputed', COALESCE(recomputed, 0),
+        'embedding_cache_deleted', COALESCE(cache_deleted, 0),
+        'recall_cache_deleted', COALESCE(recall_cache_deleted, 0),
+        'relevance_refreshed', COALESCE(relevance_refreshed, 0),
+        'recall_trace_deleted', COALESCE(trace_deleted, 0),
+        'memory_accesses_flushed', COALESCE(accesses_flushed, 0),
+        'cluster_assignments_processed', COALESCE(clusters_assigned, 0),
+        'state_versions_compacted', COALESCE(versions_compacted, 0),
+        'recall_modes_flushed', COALESCE(recall_modes_flushed, 0),
+        'ran_at', CURRENT_TIMESTAMP
+    );
+EXCEPTION
+    WHEN OTHERS THEN
+        PERFORM pg_advisory_unlock(hashtext('agi_subconscious_maintenance'));
+        RAISE;
+END;
+$$ LANGUAGE plpgsql;
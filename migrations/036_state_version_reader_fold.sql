@@ -0,0 +1,124 @@
+-- Patch migration: state version readers fold their own name past a row threshold (bounded cache checks); compaction skips already-folded names.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+CREATE OR REPLACE FUNCTION state_version_fold_threshold()
+RETURNS INT AS $$
+    SELECT 64;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Fold p_name's visible rows into one. Serialized per name with a transaction-level advisory
+-- lock (returns -1 without folding when another session holds it); uncommitted rows of other
+-- writers are not visible to the DELETE and stay as they are.
+CREATE OR REPLACE FUNCTION fold_state_version(p_name TEXT)
+RETURNS INT AS $$
+DECLARE
+    folded INT;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('state_version_fold'), hashtext(p_name)) THEN
+        RETURN -1;
+    END IF;
+
+    WITH gone AS (
+        DELETE FROM state_version_log
+        WHERE name = p_name
+        RETURNING bumps
+    ),
+    kept AS (
+        INSERT INTO state_version_log (name, bumps)
+        SELECT p_name, SUM(bumps)::bigint FROM gone HAVING COUNT(*) > 0
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM gone) - (SELECT COUNT(*) FROM kept) INTO folded;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Current version of p_name. Past the fold threshold the reader folds the name first (skipped in
+-- read-only transactions or while another session is folding it).
+CREATE OR REPLACE FUNCTION state_version(p_name TEXT)
+RETURNS BIGINT AS $$
+DECLARE
+    n_rows INT;
+BEGIN
+    SELECT COUNT(*) INTO n_rows
+    FROM (
+        SELECT 1 FROM state_version_log
+        WHERE name = p_name
+        LIMIT state_version_fold_threshold() + 1
+    ) s;
+
+    IF n_rows > state_version_fold_threshold()
+       AND NOT current_setting('transaction_read_only')::boolean
+    THEN
+        PERFORM fold_state_version(p_name);
+    END IF;
+
+    RETURN (SELECT COALESCE(SUM(bumps), 0)::bigint FROM state_version_log WHERE name = p_name);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Maintenance: fold every name that has more than one row (already-folded names are not rewritten).
+CREATE OR REPLACE FUNCTION compact_state_versions()
+RETURNS INT AS $$
+DECLARE
+    folded INT := 0;
+    n TEXT;
+BEGIN
+    FOR n IN
+        SELECT name FROM state_version_log GROUP BY name HAVING COUNT(*) > 1
+    LOOP
+        folded := folded + GREATEST(fold_state_version(n), 0);
+    END LOOP;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- State version for the turn context: bumped by writes to the tables gather_turn_context()
+-- reads; a cached snapshot is reused while the version is unchanged.
+CREATE OR REPLACE FUNCTION turn_context_version()
+RETURNS BIGINT AS $$
+    SELECT state_version('turn_context');
+$$ LANGUAGE sql;
+
+-- Global memory-write watermark (state_version_log, so it moves when the writer commits).
+-- Bumped once per statement that can change recall results; cached recalls are served only
+-- while the watermark is unchanged. Callers read it before recalling.
+CREATE OR REPLACE FUNCTION memory_write_version()
+RETURNS BIGINT AS $$
+    SELECT state_version('memory_write');
+$$ LANGUAGE sql;
+
+-- Cached results for p_cache_key, or NULL if missing, written before the current
+-- watermark, or older than p_max_age_seconds (time-dependent relevance still drifts).
+CREATE OR REPLACE FUNCTION get_cached_recall(p_cache_key TEXT, p_max_age_seconds FLOAT DEFAULT 300)
+RETURNS JSONB AS $$
+DECLARE
+    current_version BIGINT;
+BEGIN
+    current_version := memory_write_version();
+    RETURN (
+        SELECT rc.results
+        FROM recall_cache rc
+        WHERE rc.cache_key = p_cache_key
+          AND rc.write_version = current_version
+          AND rc.computed_at > clock_timestamp() - make_interval(secs => GREATEST(0, COALESCE(p_max_age_seconds, 0)))
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop entries that can no longer be served.
+CREATE OR REPLACE FUNCTION cleanup_recall_cache(p_max_age_seconds FLOAT DEFAULT 300)
+RETURNS INT AS $$
+DECLARE
+    deleted_count INT;
+    current_version BIGINT;
+BEGIN
+    current_version := memory_write_version();
+    DELETE FROM recall_cache
+    WHERE write_version < current_version
+       OR computed_at < clock_timestamp() - make_interval(secs => GREATEST(0, COALESCE(p_max_age_seconds, 0)));
+
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    RETURN deleted_count;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,93 @@
+-- Patch migration: refresh_cluster_similarity_threshold() shuffles its block sample before the LIMIT.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+CREATE OR REPLACE FUNCTION refresh_cluster_similarity_threshold(
+    p_sample_size INT DEFAULT NULL,
+    p_percentile FLOAT DEFAULT NULL,
+    p_floor FLOAT DEFAULT 0.2,
+    p_ceiling FLOAT DEFAULT 0.8
+) RETURNS FLOAT AS $$
+DECLARE
+    sample_size INT;
+    percentile FLOAT;
+    threshold FLOAT;
+    est_rows FLOAT;
+    sample_pct FLOAT;
+    zero_vec vector := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM memory_clusters
+        WHERE centroid_embedding IS NOT NULL
+          AND centroid_embedding <> zero_vec
+    ) THEN
+        RETURN COALESCE(
+            (SELECT value FROM cluster_config WHERE key = 'similarity_threshold'),
+            0.7
+        );
+    END IF;
+
+    sample_size := COALESCE(
+        p_sample_size,
+        (SELECT value::int FROM cluster_config WHERE key = 'similarity_sample_size'),
+        200
+    );
+    percentile := COALESCE(
+        p_percentile,
+        (SELECT value FROM cluster_config WHERE key = 'similarity_percentile'),
+        0.6
+    );
+    percentile := LEAST(0.95, GREATEST(0.5, percentile));
+
+    -- Block-sample about 4x the wanted rows (inactive rows are filtered out afterwards)
+    -- instead of sorting every active memory by random(); small tables are read whole.
+    -- The oversample is shuffled before the LIMIT, otherwise a full read (small or
+    -- unanalyzed table) would always keep the oldest heap blocks.
+    SELECT GREATEST(c.reltuples, 0) INTO est_rows
+    FROM pg_class c
+    WHERE c.oid = 'memories'::regclass;
+    sample_pct := LEAST(100.0, GREATEST(0.01, sample_size * 400.0 / GREATEST(est_rows, 1)));
+
+    WITH sample AS (
+        SELECT id, embedding
+        FROM memories TABLESAMPLE SYSTEM (sample_pct)
+        WHERE status = 'active'
+          AND embedding IS NOT NULL
+          AND embedding <> zero_vec
+        ORDER BY random()
+        LIMIT sample_size
+    ),
+    -- Nearest centroid per sampled memory (idx_clusters_centroid)
+    sims AS (
+        SELECT s.id, 1 - nn.dist AS best_sim
+        FROM sample s
+        CROSS JOIN LATERAL (
+            SELECT mc.centroid_embedding <=> s.embedding AS dist
+            FROM memory_clusters mc
+            WHERE mc.centroid_embedding IS NOT NULL
+              AND mc.centroid_embedding <> zero_vec
+            ORDER BY mc.centroid_embedding <=> s.embedding
+            LIMIT 1
+        ) nn
+    )
+    SELECT percentile_cont(percentile) WITHIN GROUP (ORDER BY best_sim)
+    INTO threshold
+    FROM sims;
+
+    IF threshold IS NULL THEN
+        threshold := COALESCE(
+            (SELECT value FROM cluster_config WHERE key = 'similarity_threshold'),
+            0.7
+        );
+    END IF;
+
+    threshold := LEAST(p_ceiling, GREATEST(p_floor, threshold));
+
+    UPDATE cluster_config
+    SET value = threshold,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE key = 'similarity_threshold';
+
+    RETURN threshold;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,58 @@
+-- Patch migration: min-max normalize relevance in mmr_rerank before applying lambda.
+-- Safe to re-run (idempotent ALTER / CREATE OR REPLACE).
+
+-- Maximal marginal relevance: greedily picks up to p_limit of the candidates, each time taking
+-- the one with the best  p_lambda * relevance - (1 - p_lambda) * max cosine similarity to the
+-- already-picked memories. p_lambda = 1 is plain relevance order; lower values favor diversity.
+-- Relevance is min-max scaled to [0, 1] over the candidates first, so it is on the same scale
+-- as the cosine redundancy term whatever the range of the incoming scores.
+CREATE OR REPLACE FUNCTION mmr_rerank(
+    p_candidate_ids UUID[],
+    p_relevance FLOAT[],
+    p_limit INT DEFAULT 10,
+    p_lambda FLOAT DEFAULT 0.7
+) RETURNS TABLE (
+    memory_id UUID,
+    mmr_rank INT,
+    mmr_score FLOAT
+) AS $$
+DECLARE
+    selected UUID[] := ARRAY[]::UUID[];
+    pick RECORD;
+    lam FLOAT := LEAST(GREATEST(COALESCE(p_lambda, 1.0), 0.0), 1.0);
+    rel_min FLOAT;
+    rel_range FLOAT;
+BEGIN
+    SELECT MIN(r), MAX(r) - MIN(r) INTO rel_min, rel_range
+    FROM unnest(p_relevance) AS r;
+
+    FOR i IN 1..LEAST(COALESCE(p_limit, 0), COALESCE(array_length(p_candidate_ids, 1), 0)) LOOP
+        SELECT
+            c.id,
+            lam * CASE
+                WHEN rel_range > 0 THEN (COALESCE(c.rel, rel_min) - rel_min) / rel_range
+                ELSE 1.0
+            END - (1.0 - lam) * COALESCE(NULLIF(red.max_sim, 'NaN'::float), 0.0) as score
+        INTO pick
+        FROM unnest(p_candidate_ids, p_relevance) AS c(id, rel)
+        JOIN memories cm ON cm.id = c.id
+        LEFT JOIN LATERAL (
+            SELECT MAX(1 - (cm.embedding <=> sm.embedding)) as max_sim
+            FROM memories sm
+            WHERE sm.id = ANY(selected)
+        ) red ON TRUE
+        WHERE c.id IS NOT NULL
+          AND NOT (c.id = ANY(selected))
+        ORDER BY 2 DESC, c.rel DESC
+        LIMIT 1;
+
+        EXIT WHEN NOT FOUND;
+
+        selected := selected || pick.id;
+        memory_id := pick.id;
+        mmr_rank := i;
+        mmr_score := pick.score;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
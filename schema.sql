@@ -35,6 +35,11 @@ SELECT create_vlabel('memory_graph', 'NarrativeThreadNode');
 SELECT create_vlabel('memory_graph', 'RelationshipNode');
 SELECT create_vlabel('memory_graph', 'ValueConflictNode');
 
+-- Property indexes so MATCH/MERGE by {memory_id: ...} / {name: ...} is an index lookup
+-- (AGE turns property-map patterns into agtype containment, which GIN supports).
+CREATE INDEX idx_memory_node_properties ON memory_graph."MemoryNode" USING gin (properties);
+CREATE INDEX idx_concept_node_properties ON memory_graph."ConceptNode" USING gin (properties);
+
 SET search_path = public, ag_catalog, "$user";
 
 -- ============================================================================
@@ -74,9 +79,26 @@ CREATE TABLE memories (
     source_attribution JSONB NOT NULL DEFAULT '{}'::jsonb,
     trust_level FLOAT NOT NULL DEFAULT 0.5 CHECK (trust_level >= 0 AND trust_level <= 1),
     trust_updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-    access_count INTEGER DEFAULT 0,
+    decay_rate FLOAT DEFAULT 0.01,
+    -- Full-text lexemes for the lexical arm of hybrid recall.
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED
+);
+
+-- Narrow per-memory counters and scores, kept out of the wide memories rows (content,
+-- embedding) so access bookkeeping and background refreshes do not write new versions of
+-- those rows. One row per memory, created by trg_auto_episode_assignment.
+-- importance is the access-boosted importance (trg_importance_on_access); NULL means
+-- memories.importance, and setting memories.importance explicitly clears it. Read the
+-- current importance as COALESCE(memory_stats.importance, memories.importance).
+-- relevance_score is the calculate_relevance() snapshot, refreshed by run_subconscious_maintenance();
+-- it is only trusted while relevance_computed_at >= memories.updated_at (an access clears it).
+CREATE TABLE memory_stats (
+    memory_id UUID PRIMARY KEY REFERENCES memories(id) ON DELETE CASCADE,
+    access_count INTEGER NOT NULL DEFAULT 0,
     last_accessed TIMESTAMPTZ,
-    decay_rate FLOAT DEFAULT 0.01
+    importance FLOAT,
+    relevance_score FLOAT,
+    relevance_computed_at TIMESTAMPTZ
 );
 
 -- Episodic memories (events, experiences)
@@ -261,6 +283,14 @@ CREATE TABLE cluster_relationships (
     PRIMARY KEY (from_cluster_id, to_cluster_id, relationship_type)
 );
 
+-- New memories waiting for cluster assignment: the create functions only enqueue, and
+-- maintenance assigns them in batches (process_cluster_assignment_queue).
+CREATE TABLE cluster_assignment_queue (
+    memory_id UUID PRIMARY KEY REFERENCES memories(id) ON DELETE CASCADE,
+    queued_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_cluster_assignment_queue_queued ON cluster_assignment_queue (queued_at);
+
 -- ============================================================================
 -- ACCELERATION LAYER
 -- ============================================================================
@@ -285,14 +315,37 @@ CREATE TABLE episode_memories (
     PRIMARY KEY (episode_id, memory_id)
 );
 
--- Precomputed neighborhoods (replaces live spreading activation)
+-- Open-episode bookkeeping for trg_auto_episode_assignment (singleton).
+-- Only written (and row-locked) when a new episode starts; ordinary inserts just read it.
+-- first_sequence is the episode_memory_seq value of the open episode's first memory.
+CREATE TABLE episode_state (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),  -- Singleton pattern
+    current_episode_id UUID REFERENCES episodes(id) ON DELETE SET NULL,
+    first_sequence BIGINT,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO episode_state (id) VALUES (1);
+
+-- Insert order across all episodes; episode_memories.sequence_order is relative to first_sequence.
+CREATE SEQUENCE episode_memory_seq;
+
+-- Neighborhood recompute state per memory (the neighbors themselves live in memory_neighbor_edges)
 CREATE TABLE memory_neighborhoods (
     memory_id UUID PRIMARY KEY REFERENCES memories(id) ON DELETE CASCADE,
-    neighbors JSONB NOT NULL DEFAULT '{}',  -- {uuid: weight}
     computed_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     is_stale BOOLEAN DEFAULT TRUE
 );
 
+-- Neighborhood edges, one row per (memory, neighbor). Source of truth for association
+-- expansion; the primary key INCLUDEs weight so lookups by memory_id are index-only.
+CREATE TABLE memory_neighbor_edges (
+    memory_id UUID NOT NULL REFERENCES memories(id) ON DELETE CASCADE,
+    neighbor_id UUID NOT NULL REFERENCES memories(id) ON DELETE CASCADE,
+    weight REAL NOT NULL,
+    PRIMARY KEY (memory_id, neighbor_id) INCLUDE (weight)
+);
+
 -- Transient activation cache (fast writes, lost on crash)
 CREATE UNLOGGED TABLE activation_cache (
     session_id UUID,
@@ -302,6 +355,14 @@ CREATE UNLOGGED TABLE activation_cache (
     PRIMARY KEY (session_id, memory_id)
 );
 
+-- Write-behind access log: recalls append here (record_memory_access) and maintenance folds
+-- the events into memory_stats.access_count / last_accessed (flush_memory_access_log).
+CREATE UNLOGGED TABLE memory_access_log (
+    id BIGSERIAL PRIMARY KEY,
+    memory_id UUID NOT NULL,
+    accessed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ============================================================================
 -- CONCEPT LAYER
 -- ============================================================================
@@ -484,9 +545,12 @@ CREATE INDEX idx_memories_embedding ON memories USING hnsw (embedding vector_cos
 CREATE INDEX idx_memories_status ON memories (status);
 CREATE INDEX idx_memories_type ON memories (type);
 CREATE INDEX idx_memories_content ON memories USING GIN (content gin_trgm_ops);
+CREATE INDEX idx_memories_content_tsv ON memories USING GIN (content_tsv);
+CREATE INDEX idx_memories_content_md5 ON memories (md5(content)) WHERE status = 'active';
 CREATE INDEX idx_memories_importance ON memories (importance DESC) WHERE status = 'active';
 CREATE INDEX idx_memories_created ON memories (created_at DESC);
-CREATE INDEX idx_memories_last_accessed ON memories (last_accessed DESC NULLS LAST);
+CREATE INDEX idx_memory_stats_last_accessed ON memory_stats (last_accessed DESC NULLS LAST);
+CREATE INDEX idx_memory_stats_relevance_computed ON memory_stats (relevance_computed_at);
 
 -- Working memory
 CREATE INDEX idx_working_memory_expiry ON working_memory (expiry);
@@ -510,7 +574,7 @@ CREATE INDEX idx_episode_memories_sequence ON episode_memories (episode_id, sequ
 
 -- Neighborhood indexes
 CREATE INDEX idx_neighborhoods_stale ON memory_neighborhoods (is_stale) WHERE is_stale = TRUE;
-CREATE INDEX idx_neighborhoods_neighbors ON memory_neighborhoods USING GIN (neighbors);
+CREATE INDEX idx_neighbor_edges_neighbor ON memory_neighbor_edges (neighbor_id);
 
 -- Concept indexes
 CREATE INDEX idx_concepts_ancestors ON concepts USING GIN (ancestors);
@@ -531,16 +595,16 @@ CREATE INDEX idx_embedding_cache_created ON embedding_cache (created_at);
 -- HELPER FUNCTIONS
 -- ============================================================================
 
--- Calculate age in days (used for decay)
+-- Calculate age in days (used for decay). STABLE, not IMMUTABLE: it depends on NOW().
 CREATE OR REPLACE FUNCTION age_in_days(ts TIMESTAMPTZ)
 RETURNS FLOAT
 LANGUAGE sql
-IMMUTABLE
+STABLE
 AS $$
     SELECT EXTRACT(EPOCH FROM (NOW() - ts)) / 86400.0;
 $$;
 
--- Calculate relevance score dynamically
+-- Calculate relevance score dynamically (memory_stats.relevance_score caches it)
 CREATE OR REPLACE FUNCTION calculate_relevance(
     p_importance FLOAT,
     p_decay_rate FLOAT,
@@ -548,12 +612,12 @@ CREATE OR REPLACE FUNCTION calculate_relevance(
     p_last_accessed TIMESTAMPTZ
 ) RETURNS FLOAT
 LANGUAGE sql
-IMMUTABLE
+STABLE
 AS $$
     SELECT p_importance * EXP(
         -p_decay_rate * LEAST(
             age_in_days(p_created_at),
-            COALESCE(age_in_days(p_last_accessed), age_in_days(p_created_at)) * 0.5
+            age_in_days(COALESCE(p_last_accessed, p_created_at)) * 0.5
         )
     );
 $$;
@@ -679,6 +743,169 @@ RETURNS vector AS $$
 	END;
 $$ LANGUAGE plpgsql;
 
+-- Get embeddings for many texts at once (with caching).
+-- Probes embedding_cache for every input in one query, sends only the misses to the
+-- service as batched requests ({"inputs": [...]}, chunked by embedding_config.batch_size),
+-- and writes the new embeddings back to the cache in bulk.
+-- Returns one vector per input, in input order (NULL for NULL/empty inputs).
+CREATE OR REPLACE FUNCTION get_embeddings(text_contents TEXT[])
+RETURNS vector[] AS $$
+DECLARE
+    service_url TEXT;
+    response http_response;
+    request_body TEXT;
+    embedding_json JSONB;
+    embeddings_json JSONB;
+    expected_dim INT;
+    batch_size INT;
+    miss_hashes TEXT[];
+    miss_texts TEXT[];
+    chunk_hashes TEXT[];
+    chunk_texts TEXT[];
+    n_misses INT;
+    chunk_start INT;
+    chunk_len INT;
+    i INT;
+    embedding_array FLOAT[];
+    start_ts TIMESTAMPTZ;
+    retry_seconds INT;
+    retry_interval_seconds FLOAT;
+    last_error TEXT;
+    result vector[];
+BEGIN
+    IF text_contents IS NULL OR COALESCE(array_length(text_contents, 1), 0) = 0 THEN
+        RETURN ARRAY[]::vector[];
+    END IF;
+
+    PERFORM sync_embedding_dimension_config();
+    expected_dim := embedding_dimension();
+
+    -- Distinct uncached inputs (one representative text per hash).
+    SELECT
+        COALESCE(array_agg(h.content_hash ORDER BY h.first_ord), ARRAY[]::TEXT[]),
+        COALESCE(array_agg(h.content ORDER BY h.first_ord), ARRAY[]::TEXT[])
+    INTO miss_hashes, miss_texts
+    FROM (
+        SELECT DISTINCT ON (encode(sha256(t.content::bytea), 'hex'))
+            encode(sha256(t.content::bytea), 'hex') AS content_hash,
+            t.content,
+            t.ord AS first_ord
+        FROM unnest(text_contents) WITH ORDINALITY AS t(content, ord)
+        WHERE t.content IS NOT NULL AND t.content <> ''
+        ORDER BY encode(sha256(t.content::bytea), 'hex'), t.ord
+    ) h
+    WHERE NOT EXISTS (
+        SELECT 1 FROM embedding_cache ec WHERE ec.content_hash = h.content_hash
+    );
+
+    n_misses := COALESCE(array_length(miss_hashes, 1), 0);
+
+    IF n_misses > 0 THEN
+        SELECT value INTO service_url FROM embedding_config WHERE key = 'service_url';
+        batch_size := GREATEST(1, COALESCE(NULLIF((SELECT value FROM embedding_config WHERE key = 'batch_size'), '')::int, 32));
+        retry_seconds := COALESCE(NULLIF((SELECT value FROM embedding_config WHERE key = 'retry_seconds'), '')::int, 30);
+        retry_interval_seconds := COALESCE(NULLIF((SELECT value FROM embedding_config WHERE key = 'retry_interval_seconds'), '')::float, 1.0);
+
+        chunk_start := 1;
+        WHILE chunk_start <= n_misses LOOP
+            chunk_len := LEAST(batch_size, n_misses - chunk_start + 1);
+            chunk_hashes := miss_hashes[chunk_start:chunk_start + chunk_len - 1];
+            chunk_texts := miss_texts[chunk_start:chunk_start + chunk_len - 1];
+
+            request_body := json_build_object('inputs', to_json(chunk_texts))::TEXT;
+
+            -- Make HTTP request (same retry policy as get_embedding).
+            start_ts := clock_timestamp();
+            LOOP
+                BEGIN
+                    SELECT * INTO response FROM http_post(
+                        service_url,
+                        request_body,
+                        'application/json'
+                    );
+
+                    IF response.status = 200 THEN
+                        EXIT;
+                    END IF;
+
+                    IF response.status IN (400, 401, 403, 404, 413, 422) THEN
+                        RAISE EXCEPTION 'Embedding service error: % - %', response.status, response.content;
+                    END IF;
+
+                    last_error := format('status %s: %s', response.status, left(COALESCE(response.content, ''), 500));
+                EXCEPTION
+                    WHEN OTHERS THEN
+                        last_error := SQLERRM;
+                END;
+
+                IF retry_seconds <= 0 OR clock_timestamp() - start_ts >= (retry_seconds || ' seconds')::interval THEN
+                    RAISE EXCEPTION 'Embedding service not available after % seconds: %', retry_seconds, COALESCE(last_error, '<unknown>');
+                END IF;
+
+                PERFORM pg_sleep(GREATEST(0.0, retry_interval_seconds));
+            END LOOP;
+
+            embedding_json := response.content::JSONB;
+
+            -- Normalize to an array of embeddings (handle different response formats)
+            IF jsonb_typeof(embedding_json) = 'object' AND embedding_json ? 'embeddings' THEN
+                -- Format: {"embeddings": [[...], [...]]}
+                embeddings_json := embedding_json->'embeddings';
+            ELSIF jsonb_typeof(embedding_json) = 'object' AND embedding_json ? 'data' THEN
+                -- OpenAI format: {"data": [{"embedding": [...]}, ...]}
+                SELECT jsonb_agg(d->'embedding' ORDER BY ord) INTO embeddings_json
+                FROM jsonb_array_elements(embedding_json->'data') WITH ORDINALITY AS x(d, ord);
+            ELSIF jsonb_typeof(embedding_json) = 'object' AND embedding_json ? 'embedding' THEN
+                -- Format: {"embedding": [...]} (single input only)
+                embeddings_json := jsonb_build_array(embedding_json->'embedding');
+            ELSIF jsonb_typeof(embedding_json->0) = 'array' THEN
+                -- HuggingFace TEI format: [[...], [...]] (array of arrays)
+                embeddings_json := embedding_json;
+            ELSE
+                -- Flat array format: [...] (single input only)
+                embeddings_json := jsonb_build_array(embedding_json);
+            END IF;
+
+            IF COALESCE(jsonb_array_length(embeddings_json), 0) <> chunk_len THEN
+                RAISE EXCEPTION 'Embedding service returned % embeddings for % inputs',
+                    COALESCE(jsonb_array_length(embeddings_json), 0), chunk_len;
+            END IF;
+
+            FOR i IN 1..chunk_len LOOP
+                embedding_array := ARRAY(
+                    SELECT jsonb_array_elements_text(embeddings_json->(i - 1))::FLOAT
+                );
+                IF array_length(embedding_array, 1) IS NULL OR array_length(embedding_array, 1) != expected_dim THEN
+                    RAISE EXCEPTION 'Invalid embedding dimension: expected %, got %', expected_dim, array_length(embedding_array, 1);
+                END IF;
+            END LOOP;
+
+            -- Cache the chunk in one statement
+            INSERT INTO embedding_cache (content_hash, embedding)
+            SELECT
+                chunk_hashes[e.ord],
+                ARRAY(SELECT jsonb_array_elements_text(e.emb)::FLOAT)::vector
+            FROM jsonb_array_elements(embeddings_json) WITH ORDINALITY AS e(emb, ord)
+            ON CONFLICT DO NOTHING;
+
+            chunk_start := chunk_start + chunk_len;
+        END LOOP;
+    END IF;
+
+    SELECT array_agg(ec.embedding ORDER BY t.ord) INTO result
+    FROM unnest(text_contents) WITH ORDINALITY AS t(content, ord)
+    LEFT JOIN embedding_cache ec
+        ON t.content IS NOT NULL
+       AND t.content <> ''
+       AND ec.content_hash = encode(sha256(t.content::bytea), 'hex');
+
+    RETURN result;
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Failed to get embeddings: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Check embedding service health
 CREATE OR REPLACE FUNCTION check_embedding_service_health()
 RETURNS BOOLEAN AS $$
@@ -720,22 +947,48 @@ CREATE TRIGGER trg_memory_timestamp
     FOR EACH ROW
     EXECUTE FUNCTION update_memory_timestamp();
 
--- Update importance based on access
+-- Update importance based on access (an explicitly set last_accessed is kept, e.g. by the access log flush).
+-- Runs on the narrow memory_stats row; the boost starts from memories.importance until the
+-- first access and clears the relevance snapshot, which depends on both values.
 CREATE OR REPLACE FUNCTION update_memory_importance()
 RETURNS TRIGGER AS $$
 BEGIN
+    IF NEW.importance IS NULL THEN
+        SELECT m.importance INTO NEW.importance FROM memories m WHERE m.id = NEW.memory_id;
+    END IF;
     NEW.importance = NEW.importance * (1.0 + (LN(NEW.access_count + 1) * 0.1));
-    NEW.last_accessed = CURRENT_TIMESTAMP;
+    IF NEW.last_accessed IS NOT DISTINCT FROM OLD.last_accessed THEN
+        NEW.last_accessed = CURRENT_TIMESTAMP;
+    END IF;
+    NEW.relevance_computed_at = NULL;
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER trg_importance_on_access
-    BEFORE UPDATE ON memories
+    BEFORE UPDATE ON memory_stats
     FOR EACH ROW
     WHEN (NEW.access_count != OLD.access_count)
     EXECUTE FUNCTION update_memory_importance();
 
+-- An explicit importance write on memories replaces any access-boosted value.
+CREATE OR REPLACE FUNCTION reset_boosted_importance()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE memory_stats
+    SET importance = NULL
+    WHERE memory_id = NEW.id
+      AND importance IS NOT NULL;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_reset_boosted_importance
+    AFTER UPDATE OF importance ON memories
+    FOR EACH ROW
+    WHEN (NEW.importance IS DISTINCT FROM OLD.importance)
+    EXECUTE FUNCTION reset_boosted_importance();
+
 -- Update cluster activation
 CREATE OR REPLACE FUNCTION update_cluster_activation()
 RETURNS TRIGGER AS $$
@@ -764,74 +1017,154 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Access-driven importance boosts (memory_stats) do not move a memory's neighbors.
 CREATE TRIGGER trg_neighborhood_staleness
     AFTER UPDATE OF importance, status ON memories
     FOR EACH ROW
+    WHEN (
+        NEW.status IS DISTINCT FROM OLD.status
+        OR NEW.importance IS DISTINCT FROM OLD.importance
+    )
     EXECUTE FUNCTION mark_neighborhoods_stale();
 
--- Auto-assign memories to episodes
+-- Auto-assign memories to episodes.
+-- Statement-level. Ordinary inserts never lock or write episode_state: they append to the
+-- open episode it names, taking sequence_order from episode_memory_seq (offset by the
+-- episode's first_sequence, so orders start at 1 and grow, with gaps after rollbacks), and
+-- compare created_at with the episode's last sequenced memory to detect a >30 min gap.
+-- Only starting a new episode (gap, or no open episode) locks the episode_state row, held
+-- until commit; a concurrent writer that read the old state may still append to the episode
+-- being closed.
 CREATE OR REPLACE FUNCTION assign_to_episode()
 RETURNS TRIGGER AS $$
 DECLARE
+    state_row RECORD;
+    state_locked BOOLEAN := FALSE;
     current_episode_id UUID;
+    first_sequence BIGINT;
     last_memory_time TIMESTAMPTZ;
-    new_seq INT;
-BEGIN
-    -- Prevent concurrent episode creation
-    PERFORM pg_advisory_xact_lock(hashtext('episode_manager'));
-
-    -- Find most recent episode and its last memory time
-    SELECT e.id, MAX(m.created_at)
-    INTO current_episode_id, last_memory_time
-    FROM episodes e
-    LEFT JOIN episode_memories em ON e.id = em.episode_id
-    LEFT JOIN memories m ON em.memory_id = m.id
-    WHERE e.ended_at IS NULL
-    GROUP BY e.id
-    ORDER BY e.started_at DESC
-    LIMIT 1;
+    seq BIGINT;
+    rec RECORD;
+    episode_ids UUID[] := ARRAY[]::UUID[];
+    memory_ids UUID[] := ARRAY[]::UUID[];
+    sequences INT[] := ARRAY[]::INT[];
+BEGIN
+    SELECT * INTO state_row FROM episode_state WHERE id = 1;
+    IF NOT FOUND THEN
+        INSERT INTO episode_state (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+    END IF;
+    current_episode_id := state_row.current_episode_id;
+    first_sequence := state_row.first_sequence;
 
-    -- If gap > 30 min or no episodes, start new episode
-    IF current_episode_id IS NULL OR
-       (last_memory_time IS NOT NULL AND NEW.created_at - last_memory_time > INTERVAL '30 minutes')
-    THEN
-        -- Close previous episode
-        IF current_episode_id IS NOT NULL THEN
-            UPDATE episodes
-            SET ended_at = last_memory_time
-            WHERE id = current_episode_id;
+    -- The tracked episode may have been closed elsewhere (e.g. summarization).
+    IF current_episode_id IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM episodes WHERE id = current_episode_id AND ended_at IS NULL
+    ) THEN
+        current_episode_id := NULL;
+    END IF;
+    IF current_episode_id IS NOT NULL THEN
+        SELECT m.created_at INTO last_memory_time
+        FROM episode_memories em
+        JOIN memories m ON m.id = em.memory_id
+        WHERE em.episode_id = current_episode_id
+        ORDER BY em.sequence_order DESC
+        LIMIT 1;
+    END IF;
+
+    FOR rec IN
+        SELECT nm.id, nm.created_at
+        FROM (
+            SELECT n.id, n.created_at, row_number() OVER () AS ord
+            FROM new_memories n
+        ) nm
+        ORDER BY nm.created_at, nm.ord
+    LOOP
+        seq := nextval('episode_memory_seq');
+
+        -- If gap > 30 min or no open episode, start new episode
+        IF current_episode_id IS NULL OR first_sequence IS NULL OR
+           (last_memory_time IS NOT NULL AND rec.created_at - last_memory_time > INTERVAL '30 minutes')
+        THEN
+            IF NOT state_locked THEN
+                -- Another writer may have started an episode since the unlocked read;
+                -- re-check against the locked state before starting one.
+                SELECT * INTO state_row FROM episode_state WHERE id = 1 FOR UPDATE;
+                state_locked := TRUE;
+                IF state_row.current_episode_id IS DISTINCT FROM current_episode_id
+                   AND EXISTS (
+                       SELECT 1 FROM episodes
+                       WHERE id = state_row.current_episode_id AND ended_at IS NULL
+                   )
+                THEN
+                    current_episode_id := state_row.current_episode_id;
+                    first_sequence := state_row.first_sequence;
+                    SELECT m.created_at INTO last_memory_time
+                    FROM episode_memories em
+                    JOIN memories m ON m.id = em.memory_id
+                    WHERE em.episode_id = current_episode_id
+                    ORDER BY em.sequence_order DESC
+                    LIMIT 1;
+                END IF;
+            END IF;
+        END IF;
+
+        IF current_episode_id IS NULL OR first_sequence IS NULL OR
+           (last_memory_time IS NOT NULL AND rec.created_at - last_memory_time > INTERVAL '30 minutes')
+        THEN
+            -- Close previous episode
+            IF current_episode_id IS NOT NULL THEN
+                UPDATE episodes
+                SET ended_at = last_memory_time
+                WHERE id = current_episode_id;
+            END IF;
+
+            INSERT INTO episodes (started_at, episode_type)
+            VALUES (rec.created_at, 'autonomous')
+            RETURNING id INTO current_episode_id;
+
+            first_sequence := seq;
+            last_memory_time := NULL;
         END IF;
 
-        -- Create new episode
-        INSERT INTO episodes (started_at, episode_type)
-        VALUES (NEW.created_at, 'autonomous')
-        RETURNING id INTO current_episode_id;
+        episode_ids := episode_ids || current_episode_id;
+        memory_ids := memory_ids || rec.id;
+        sequences := sequences || (seq - first_sequence + 1)::int;
 
-        new_seq := 1;
-    ELSE
-        -- Get next sequence number
-        SELECT COALESCE(MAX(sequence_order), 0) + 1
-        INTO new_seq
-        FROM episode_memories
-        WHERE episode_id = current_episode_id;
+        last_memory_time := GREATEST(last_memory_time, rec.created_at);
+    END LOOP;
+
+    IF COALESCE(array_length(memory_ids, 1), 0) = 0 THEN
+        RETURN NULL;
     END IF;
 
-    -- Link memory to episode
+    -- Link memories to episodes
     INSERT INTO episode_memories (episode_id, memory_id, sequence_order)
-    VALUES (current_episode_id, NEW.id, new_seq);
+    SELECT * FROM unnest(episode_ids, memory_ids, sequences);
 
-    -- Initialize neighborhood record
+    -- Initialize neighborhood and stats records
     INSERT INTO memory_neighborhoods (memory_id, is_stale)
-    VALUES (NEW.id, TRUE)
+    SELECT id, TRUE FROM new_memories
+    ON CONFLICT DO NOTHING;
+    INSERT INTO memory_stats (memory_id)
+    SELECT id FROM new_memories
     ON CONFLICT DO NOTHING;
 
-    RETURN NEW;
+    IF state_locked THEN
+        UPDATE episode_state
+        SET current_episode_id = assign_to_episode.current_episode_id,
+            first_sequence = assign_to_episode.first_sequence,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1;
+    END IF;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER trg_auto_episode_assignment
     AFTER INSERT ON memories
-    FOR EACH ROW
+    REFERENCING NEW TABLE AS new_memories
+    FOR EACH STATEMENT
     EXECUTE FUNCTION assign_to_episode();
 
 -- ============================================================================
@@ -985,228 +1318,951 @@ COMMENT ON FUNCTION resolve_goal_reference(TEXT) IS
 'Resolves a goal reference (UUID or title) to a goal ID.
 Resolution strategy: 1) UUID parse, 2) Exact title, 3) Partial title, 4) Partial description.';
 
-CREATE OR REPLACE FUNCTION fast_recall(
-    p_query_text TEXT,
-    p_limit INT DEFAULT 10
+-- Maximal marginal relevance: greedily picks up to p_limit of the candidates, each time taking
+-- the one with the best  p_lambda * relevance - (1 - p_lambda) * max cosine similarity to the
+-- already-picked memories. p_lambda = 1 is plain relevance order; lower values favor diversity.
+-- Relevance is min-max scaled to [0, 1] over the candidates first, so it is on the same scale
+-- as the cosine redundancy term whatever the range of the incoming scores.
+CREATE OR REPLACE FUNCTION mmr_rerank(
+    p_candidate_ids UUID[],
+    p_relevance FLOAT[],
+    p_limit INT DEFAULT 10,
+    p_lambda FLOAT DEFAULT 0.7
 ) RETURNS TABLE (
     memory_id UUID,
-    content TEXT,
-    memory_type memory_type,
-    score FLOAT,
-    source TEXT
+    mmr_rank INT,
+    mmr_score FLOAT
 ) AS $$
-	DECLARE
-	    query_embedding vector;
-	    zero_vec vector;
-	    current_valence FLOAT;
-	BEGIN
-	    query_embedding := get_embedding(p_query_text);
-	    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
-	    BEGIN
-	        current_valence := NULLIF(get_current_affective_state()->>'valence', '')::float;
-	    EXCEPTION
-	        WHEN OTHERS THEN
-	            current_valence := NULL;
-	    END;
-	    current_valence := COALESCE(current_valence, 0.0);
+DECLARE
+    selected UUID[] := ARRAY[]::UUID[];
+    pick RECORD;
+    lam FLOAT := LEAST(GREATEST(COALESCE(p_lambda, 1.0), 0.0), 1.0);
+    rel_min FLOAT;
+    rel_range FLOAT;
+BEGIN
+    SELECT MIN(r), MAX(r) - MIN(r) INTO rel_min, rel_range
+    FROM unnest(p_relevance) AS r;
 
-	    RETURN QUERY
-	    WITH
-    -- Vector seeds (semantic similarity)
-	    seeds AS (
-	        SELECT
-	            m.id,
-	            m.content,
-	            m.type,
-            m.importance,
-            m.decay_rate,
-            m.created_at,
-            m.last_accessed,
-            1 - (m.embedding <=> query_embedding) as sim
-        FROM memories m
-	        WHERE m.status = 'active'
-	          AND m.embedding IS NOT NULL
-	          AND m.embedding <> zero_vec
-	        ORDER BY m.embedding <=> query_embedding
-	        LIMIT GREATEST(p_limit, 5)
-	    ),
-    -- Expand via precomputed neighborhoods
-    associations AS (
-        SELECT
-            (key)::UUID as mem_id,
-            MAX((value::float) * s.sim) as assoc_score
-        FROM seeds s
-        JOIN memory_neighborhoods mn ON s.id = mn.memory_id,
-        jsonb_each_text(mn.neighbors)
-        WHERE NOT mn.is_stale
-        GROUP BY key
-    ),
-    -- Temporal context from episodes
-    temporal AS (
-        SELECT DISTINCT
-            em.memory_id as mem_id,
-            0.15 as temp_score
-        FROM seeds s
-        JOIN episode_memories em_seed ON s.id = em_seed.memory_id
-        JOIN episode_memories em ON em_seed.episode_id = em.episode_id
-        WHERE em.memory_id != s.id
-        LIMIT 20
-    ),
-    -- Combine all candidates
-    candidates AS (
-        SELECT id as mem_id, sim as vector_score, NULL::float as assoc_score, NULL::float as temp_score
-        FROM seeds
-        UNION
-        SELECT mem_id, NULL, assoc_score, NULL FROM associations
-        UNION
-        SELECT mem_id, NULL, NULL, temp_score FROM temporal
-    ),
-    -- Aggregate scores per memory
-    scored AS (
+    FOR i IN 1..LEAST(COALESCE(p_limit, 0), COALESCE(array_length(p_candidate_ids, 1), 0)) LOOP
         SELECT
-            c.mem_id,
-            MAX(c.vector_score) as vector_score,
-            MAX(c.assoc_score) as assoc_score,
-            MAX(c.temp_score) as temp_score
-        FROM candidates c
-        GROUP BY c.mem_id
-    )
-	    SELECT
-	        m.id,
-	        m.content,
-	        m.type,
-	        GREATEST(
-	            COALESCE(sc.vector_score, 0) * 0.5 +
-	            COALESCE(sc.assoc_score, 0) * 0.3 +
-	            COALESCE(sc.temp_score, 0) * 0.15 +
-	            calculate_relevance(m.importance, m.decay_rate, m.created_at, m.last_accessed) * 0.05 +
-	            -- Mood-congruent recall bias (small): prefer episodic memories whose valence matches current affect.
-	            (CASE
-	                WHEN em.emotional_valence IS NULL THEN 0.5
-	                ELSE 1.0 - (ABS(em.emotional_valence - current_valence) / 2.0)
-	            END) * 0.05,
-	            0.001
-	        ) as final_score,
-	        CASE
-	            WHEN sc.vector_score IS NOT NULL THEN 'vector'
-	            WHEN sc.assoc_score IS NOT NULL THEN 'association'
-	            WHEN sc.temp_score IS NOT NULL THEN 'temporal'
-	            ELSE 'fallback'
-	        END as source
-	    FROM scored sc
-	    JOIN memories m ON sc.mem_id = m.id
-	    LEFT JOIN episodic_memories em ON em.memory_id = m.id
-	    WHERE m.status = 'active'
-	    ORDER BY final_score DESC
-	    LIMIT p_limit;
+            c.id,
+            lam * CASE
+                WHEN rel_range > 0 THEN (COALESCE(c.rel, rel_min) - rel_min) / rel_range
+                ELSE 1.0
+            END - (1.0 - lam) * COALESCE(NULLIF(red.max_sim, 'NaN'::float), 0.0) as score
+        INTO pick
+        FROM unnest(p_candidate_ids, p_relevance) AS c(id, rel)
+        JOIN memories cm ON cm.id = c.id
+        LEFT JOIN LATERAL (
+            SELECT MAX(1 - (cm.embedding <=> sm.embedding)) as max_sim
+            FROM memories sm
+            WHERE sm.id = ANY(selected)
+        ) red ON TRUE
+        WHERE c.id IS NOT NULL
+          AND NOT (c.id = ANY(selected))
+        ORDER BY 2 DESC, c.rel DESC
+        LIMIT 1;
+
+        EXIT WHEN NOT FOUND;
+
+        selected := selected || pick.id;
+        memory_id := pick.id;
+        mmr_rank := i;
+        mmr_score := pick.score;
+        RETURN NEXT;
+    END LOOP;
 END;
 $$ LANGUAGE plpgsql;
 
--- ============================================================================
--- PROVENANCE & TRUST (Normalization Layer)
--- ============================================================================
-
--- Normalize a source reference object into a consistent shape.
--- Intended fields: kind, ref, label, author, observed_at, trust.
-CREATE OR REPLACE FUNCTION normalize_source_reference(p_source JSONB)
-RETURNS JSONB AS $$
+-- Recall quality modes. 'fast' and 'balanced' size hnsw.ef_search for the call,
+-- 'exact' scans sequentially; unnamed calls keep the session settings ('default').
+CREATE OR REPLACE FUNCTION normalize_recall_mode(p_mode TEXT)
+RETURNS TEXT AS $$
 DECLARE
-    kind TEXT;
-    ref TEXT;
-    label TEXT;
-    author TEXT;
-    observed_at TIMESTAMPTZ;
-    trust FLOAT;
+    normalized TEXT := lower(COALESCE(NULLIF(btrim(p_mode), ''), 'default'));
 BEGIN
-    IF p_source IS NULL OR jsonb_typeof(p_source) <> 'object' THEN
-        RETURN '{}'::jsonb;
+    IF normalized NOT IN ('default', 'fast', 'balanced', 'exact') THEN
+        RAISE EXCEPTION 'Invalid recall mode: % (expected fast, balanced or exact)', p_mode;
     END IF;
+    RETURN normalized;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
 
-    kind := NULLIF(p_source->>'kind', '');
-    ref := COALESCE(NULLIF(p_source->>'ref', ''), NULLIF(p_source->>'uri', ''));
-    label := NULLIF(p_source->>'label', '');
-    author := NULLIF(p_source->>'author', '');
-
-    BEGIN
-        observed_at := (p_source->>'observed_at')::timestamptz;
-    EXCEPTION WHEN OTHERS THEN
-        observed_at := CURRENT_TIMESTAMP;
+-- hnsw.ef_search for a recall mode and candidate count (NULL = leave the setting alone).
+-- pgvector caps ef_search at 1000 and never returns more rows than ef_search per scan.
+CREATE OR REPLACE FUNCTION recall_mode_ef_search(p_mode TEXT, p_candidates INT)
+RETURNS INT AS $$
+    SELECT CASE p_mode
+        WHEN 'fast' THEN LEAST(1000, GREATEST(p_candidates, 20))
+        WHEN 'balanced' THEN LEAST(1000, GREATEST(p_candidates * 4, 100))
+        ELSE NULL
     END;
-    IF observed_at IS NULL THEN
-        observed_at := CURRENT_TIMESTAMP;
-    END IF;
-
-    trust := COALESCE(NULLIF(p_source->>'trust', '')::float, 0.5);
-    trust := LEAST(1.0, GREATEST(0.0, trust));
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Per caller (application_name) and mode: how often recall ran and how long it took.
+-- Aggregated from recall_mode_log by maintenance (flush_recall_mode_log).
+CREATE UNLOGGED TABLE IF NOT EXISTS recall_mode_stats (
+    caller TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    calls BIGINT NOT NULL DEFAULT 0,
+    total_ms FLOAT NOT NULL DEFAULT 0,
+    max_ms FLOAT NOT NULL DEFAULT 0,
+    last_called_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (caller, mode)
+);
 
-    RETURN jsonb_strip_nulls(
-        jsonb_build_object(
-            'kind', kind,
-            'ref', ref,
-            'label', label,
-            'author', author,
-            'observed_at', observed_at,
-            'trust', trust
-        )
-    );
-END;
-$$ LANGUAGE plpgsql STABLE;
+-- Write-behind recall calls (append-only, so concurrent recalls never wait on a shared row).
+CREATE UNLOGGED TABLE IF NOT EXISTS recall_mode_log (
+    id BIGSERIAL PRIMARY KEY,
+    caller TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    elapsed_ms FLOAT NOT NULL,
+    called_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
 
--- Normalize source references into an array of normalized source objects.
-CREATE OR REPLACE FUNCTION normalize_source_references(p_sources JSONB)
-RETURNS JSONB AS $$
-DECLARE
-    elem JSONB;
-    out_arr JSONB := '[]'::jsonb;
+-- Log one recall served in p_mode that started at p_started_at. Skipped in read-only
+-- transactions (e.g. on a standby) so it never fails the recall itself.
+CREATE OR REPLACE FUNCTION record_recall_mode(p_mode TEXT, p_started_at TIMESTAMPTZ)
+RETURNS VOID AS $$
 BEGIN
-    IF p_sources IS NULL THEN
-        RETURN '[]'::jsonb;
-    END IF;
-
-    IF jsonb_typeof(p_sources) = 'array' THEN
-        FOR elem IN SELECT * FROM jsonb_array_elements(p_sources)
-        LOOP
-            out_arr := out_arr || jsonb_build_array(normalize_source_reference(elem));
-        END LOOP;
-    ELSIF jsonb_typeof(p_sources) = 'object' THEN
-        out_arr := jsonb_build_array(normalize_source_reference(p_sources));
-    ELSE
-        RETURN '[]'::jsonb;
+    IF current_setting('transaction_read_only', true) = 'on' THEN
+        RETURN;
     END IF;
 
-    RETURN COALESCE(
-        (SELECT jsonb_agg(e) FROM jsonb_array_elements(out_arr) e WHERE e <> '{}'::jsonb),
-        '[]'::jsonb
+    INSERT INTO recall_mode_log (caller, mode, elapsed_ms)
+    VALUES (
+        COALESCE(NULLIF(current_setting('application_name', true), ''), 'unknown'),
+        normalize_recall_mode(p_mode),
+        EXTRACT(EPOCH FROM (clock_timestamp() - p_started_at)) * 1000.0
     );
 END;
-$$ LANGUAGE plpgsql STABLE;
+$$ LANGUAGE plpgsql;
 
--- Dedupe normalized sources by a canonical key (ref/label fallback), keeping the most recent observed_at.
-CREATE OR REPLACE FUNCTION dedupe_source_references(p_sources JSONB)
-RETURNS JSONB AS $$
+-- Fold logged recall calls into recall_mode_stats (one upsert per caller and mode).
+CREATE OR REPLACE FUNCTION flush_recall_mode_log()
+RETURNS INT AS $$
+DECLARE
+    flushed INT;
 BEGIN
-    RETURN COALESCE((
-        SELECT jsonb_agg(d.elem)
-        FROM (
-            SELECT DISTINCT ON (d.key) d.elem
-            FROM (
-                SELECT
-                    COALESCE(NULLIF(e->>'ref', ''), NULLIF(e->>'label', ''), md5(e::text)) AS key,
-                    e AS elem,
-                    COALESCE(e->>'observed_at', '') AS observed_at
-                FROM jsonb_array_elements(normalize_source_references(p_sources)) e
-            ) d
-            ORDER BY d.key, d.observed_at DESC
-        ) d
-    ), '[]'::jsonb);
+    WITH drained AS (
+        DELETE FROM recall_mode_log
+        RETURNING caller, mode, elapsed_ms, called_at
+    )
+    INSERT INTO recall_mode_stats (caller, mode, calls, total_ms, max_ms, last_called_at)
+    SELECT caller, mode, COUNT(*), SUM(elapsed_ms), MAX(elapsed_ms), MAX(called_at)
+    FROM drained
+    GROUP BY caller, mode
+    ON CONFLICT (caller, mode) DO UPDATE SET
+        calls = recall_mode_stats.calls + EXCLUDED.calls,
+        total_ms = recall_mode_stats.total_ms + EXCLUDED.total_ms,
+        max_ms = GREATEST(recall_mode_stats.max_ms, EXCLUDED.max_ms),
+        last_called_at = GREATEST(recall_mode_stats.last_called_at, EXCLUDED.last_called_at);
+
+    GET DIAGNOSTICS flushed = ROW_COUNT;
+    RETURN flushed;
 END;
-$$ LANGUAGE plpgsql STABLE;
+$$ LANGUAGE plpgsql;
 
--- Convert sources into a reinforcement score [0..1] that grows with unique source count and average trust.
-CREATE OR REPLACE FUNCTION source_reinforcement_score(p_source_references JSONB)
-RETURNS FLOAT AS $$
+-- Recall pipeline stages, shared by fast_recall_with_embedding() and fast_recall_explain() so the
+-- plain and instrumented recalls run the same SQL.
+
+-- Stage: seed scan. Active memories passing the filters, nearest to p_query_embedding (HNSW, or
+-- an exact sequential scan in 'exact' mode). With p_lexical_query, full-text (content_tsv) hits
+-- are fused with the vector hits by reciprocal rank fusion and seed_sim is the fused score
+-- scaled to [0, 1]. hnsw.ef_search / hnsw.iterative_scan are set for the scan only.
+CREATE OR REPLACE FUNCTION recall_seeds(
+    p_query_embedding vector,
+    p_seed_limit INT,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_lexical_query TEXT DEFAULT NULL,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL
+) RETURNS TABLE (
+    seed_id UUID,
+    seed_sim FLOAT,
+    seed_lexical_only BOOLEAN
+) AS $$
 DECLARE
-    unique_sources INT;
+    query_embedding vector := p_query_embedding;
+    zero_vec vector;
+    has_filters BOOLEAN;
+    prev_iterative_scan TEXT;
+    prev_ef_search TEXT;
+    ef_search INT;
+    recall_mode TEXT;
+    exact_scan BOOLEAN;
+    lexical_query tsquery;
+    arm_limit INT;
+    rrf_k CONSTANT INT := 60;
+BEGIN
+    recall_mode := normalize_recall_mode(p_mode);
+    exact_scan := recall_mode = 'exact';
+    IF query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+
+    IF NULLIF(btrim(p_lexical_query), '') IS NOT NULL THEN
+        lexical_query := websearch_to_tsquery('english', p_lexical_query);
+        -- Stopword-only queries have no lexemes; fall back to pure vector seeds.
+        IF numnode(lexical_query) = 0 THEN
+            lexical_query := NULL;
+        END IF;
+    END IF;
+    arm_limit := CASE WHEN lexical_query IS NULL THEN p_seed_limit ELSE p_seed_limit * 2 END;
+
+    has_filters := p_memory_types IS NOT NULL
+        OR COALESCE(p_min_importance, 0.0) > 0.0
+        OR p_min_trust IS NOT NULL
+        OR p_source_kinds IS NOT NULL
+        OR p_created_after IS NOT NULL
+        OR p_created_before IS NOT NULL
+        OR p_min_relevance IS NOT NULL;
+
+    -- With filters, let the HNSW scan keep going until enough rows pass them
+    -- (pgvector >= 0.8); otherwise ef_search candidates can all be filtered away.
+    IF has_filters AND NOT exact_scan THEN
+        BEGIN
+            prev_iterative_scan := current_setting('hnsw.iterative_scan', true);
+            PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_iterative_scan := NULL;
+        END;
+    END IF;
+    ef_search := recall_mode_ef_search(recall_mode, arm_limit);
+    IF ef_search IS NOT NULL THEN
+        BEGIN
+            prev_ef_search := current_setting('hnsw.ef_search', true);
+            PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+        EXCEPTION
+            WHEN OTHERS THEN
+                prev_ef_search := NULL;
+        END;
+    END IF;
+
+    RETURN QUERY
+    WITH
+    -- Active memories passing the filters (inlined into each arm below)
+    eligible AS NOT MATERIALIZED (
+        SELECT m.id, m.embedding, m.content_tsv
+        FROM memories m
+        WHERE m.status = 'active'
+          AND m.embedding IS NOT NULL
+          AND m.embedding <> zero_vec
+          AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+          AND (COALESCE(p_min_importance, 0.0) <= 0.0 OR COALESCE((
+              SELECT ms.importance FROM memory_stats ms WHERE ms.memory_id = m.id
+          ), m.importance) >= p_min_importance)
+          AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+          AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+          AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+          AND (p_created_before IS NULL OR m.created_at < p_created_before)
+          AND (p_min_relevance IS NULL OR COALESCE((
+              SELECT CASE
+                  WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score
+                  ELSE ms.importance
+              END
+              FROM memory_stats ms WHERE ms.memory_id = m.id
+          ), m.importance) >= p_min_relevance)
+    ),
+    -- Vector candidates: HNSW, or an exact sequential scan in 'exact' mode
+    -- (ordering by "distance + 0" keeps the planner off the index)
+    vector_hits AS MATERIALIZED (
+        SELECT v.id, v.sim, row_number() OVER (ORDER BY v.dist) as rnk
+        FROM (
+            (
+                SELECT
+                    e.id,
+                    e.embedding <=> query_embedding as dist,
+                    1 - (e.embedding <=> query_embedding) as sim
+                FROM eligible e
+                WHERE NOT exact_scan
+                ORDER BY e.embedding <=> query_embedding
+                LIMIT arm_limit
+            )
+            UNION ALL
+            (
+                SELECT
+                    e.id,
+                    (e.embedding <=> query_embedding) + 0 as dist,
+                    1 - (e.embedding <=> query_embedding) as sim
+                FROM eligible e
+                WHERE exact_scan
+                ORDER BY (e.embedding <=> query_embedding) + 0
+                LIMIT arm_limit
+            )
+        ) v
+    ),
+    -- Lexical candidates (full-text, GIN on content_tsv); empty unless hybrid
+    lexical_hits AS MATERIALIZED (
+        SELECT l.id, l.sim, row_number() OVER (ORDER BY l.lex_rank DESC, l.id) as rnk
+        FROM (
+            SELECT
+                e.id,
+                ts_rank_cd(e.content_tsv, lexical_query) as lex_rank,
+                1 - (e.embedding <=> query_embedding) as sim
+            FROM eligible e
+            WHERE lexical_query IS NOT NULL
+              AND e.content_tsv @@ lexical_query
+            ORDER BY ts_rank_cd(e.content_tsv, lexical_query) DESC
+            LIMIT arm_limit
+        ) l
+    )
+    -- Vector hits as-is, or both lists fused with reciprocal rank fusion
+    SELECT
+        f.id,
+        CASE
+            WHEN lexical_query IS NULL THEN f.sim
+            ELSE f.rrf / (2.0 / (rrf_k + 1))
+        END::float,
+        NOT f.in_vector
+    FROM (
+        SELECT
+            h.id,
+            MAX(h.sim) as sim,
+            SUM(1.0 / (rrf_k + h.rnk)) as rrf,
+            bool_or(h.arm = 'vector') as in_vector
+        FROM (
+            SELECT vh.id, vh.sim, vh.rnk, 'vector' as arm FROM vector_hits vh
+            UNION ALL
+            SELECT lh.id, lh.sim, lh.rnk, 'lexical' as arm FROM lexical_hits lh
+        ) h
+        GROUP BY h.id
+    ) f
+    ORDER BY 2 DESC
+    LIMIT p_seed_limit;
+
+    IF prev_iterative_scan IS NOT NULL THEN
+        PERFORM set_config('hnsw.iterative_scan', prev_iterative_scan, true);
+    END IF;
+    IF prev_ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', prev_ef_search, true);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Stage: association expansion through fresh precomputed neighborhoods.
+CREATE OR REPLACE FUNCTION recall_associations(p_seed_ids UUID[], p_seed_sims FLOAT[])
+RETURNS TABLE (
+    assoc_id UUID,
+    assoc_score FLOAT
+) AS $$
+    SELECT e.neighbor_id, MAX(e.weight * s.sim)::float
+    FROM unnest(p_seed_ids, p_seed_sims) AS s(id, sim)
+    JOIN memory_neighborhoods mn ON mn.memory_id = s.id AND NOT mn.is_stale
+    JOIN memory_neighbor_edges e ON e.memory_id = s.id
+    GROUP BY e.neighbor_id;
+$$ LANGUAGE sql STABLE;
+
+-- Stage: temporal context from the seeds' episodes.
+CREATE OR REPLACE FUNCTION recall_temporal(p_seed_ids UUID[])
+RETURNS TABLE (
+    temporal_id UUID
+) AS $$
+    SELECT DISTINCT em.memory_id
+    FROM unnest(p_seed_ids) AS s(id)
+    JOIN episode_memories em_seed ON s.id = em_seed.memory_id
+    JOIN episode_memories em ON em_seed.episode_id = em.episode_id
+    WHERE em.memory_id != s.id
+    LIMIT 20;
+$$ LANGUAGE sql STABLE;
+
+-- Stage: score the candidates from the earlier stages and keep the top p_limit that pass the
+-- filters. Relevance uses the stored memory_stats.relevance_score when it is current.
+CREATE OR REPLACE FUNCTION recall_score(
+    p_seed_ids UUID[],
+    p_seed_sims FLOAT[],
+    p_seed_lexical_only BOOLEAN[],
+    p_assoc_ids UUID[],
+    p_assoc_scores FLOAT[],
+    p_temporal_ids UUID[],
+    p_limit INT,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_min_relevance FLOAT DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    current_valence FLOAT;
+BEGIN
+    BEGIN
+        current_valence := NULLIF(get_current_affective_state()->>'valence', '')::float;
+    EXCEPTION
+        WHEN OTHERS THEN
+            current_valence := NULL;
+    END;
+    current_valence := COALESCE(current_valence, 0.0);
+
+    RETURN QUERY
+    WITH
+    candidates AS (
+        SELECT s.id as mem_id, s.sim as vector_score, NULL::float as assoc_score, NULL::float as temp_score, s.lexical_only
+        FROM unnest(p_seed_ids, p_seed_sims, p_seed_lexical_only) AS s(id, sim, lexical_only)
+        UNION ALL
+        SELECT a.id, NULL, a.score, NULL, NULL FROM unnest(p_assoc_ids, p_assoc_scores) AS a(id, score)
+        UNION ALL
+        SELECT t.id, NULL, NULL, 0.15, NULL FROM unnest(p_temporal_ids) AS t(id)
+    ),
+    -- Aggregate scores per memory
+    scored AS (
+        SELECT
+            c.mem_id,
+            MAX(c.vector_score) as vector_score,
+            MAX(c.assoc_score) as assoc_score,
+            MAX(c.temp_score) as temp_score,
+            bool_or(c.lexical_only) as lexical_only
+        FROM candidates c
+        GROUP BY c.mem_id
+    )
+    SELECT
+        m.id,
+        m.content,
+        m.type,
+        GREATEST(
+            COALESCE(sc.vector_score, 0) * 0.5 +
+            COALESCE(sc.assoc_score, 0) * 0.3 +
+            COALESCE(sc.temp_score, 0) * 0.15 +
+            (CASE
+                WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score
+                ELSE calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed)
+            END) * 0.05 +
+            -- Mood-congruent recall bias (small): prefer episodic memories whose valence matches current affect.
+            (CASE
+                WHEN em.emotional_valence IS NULL THEN 0.5
+                ELSE 1.0 - (ABS(em.emotional_valence - current_valence) / 2.0)
+            END) * 0.05,
+            0.001
+        ) as final_score,
+        CASE
+            WHEN sc.vector_score IS NOT NULL AND sc.lexical_only THEN 'lexical'
+            WHEN sc.vector_score IS NOT NULL THEN 'vector'
+            WHEN sc.assoc_score IS NOT NULL THEN 'association'
+            WHEN sc.temp_score IS NOT NULL THEN 'temporal'
+            ELSE 'fallback'
+        END as source
+    FROM scored sc
+    JOIN memories m ON sc.mem_id = m.id
+    LEFT JOIN episodic_memories em ON em.memory_id = m.id
+    LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+    WHERE m.status = 'active'
+      AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
+      AND (COALESCE(p_min_importance, 0.0) <= 0.0 OR COALESCE(ms.importance, m.importance) >= p_min_importance)
+      AND (p_min_trust IS NULL OR m.trust_level >= p_min_trust)
+      AND (p_source_kinds IS NULL OR m.source_attribution->>'kind' = ANY(p_source_kinds))
+      AND (p_created_after IS NULL OR m.created_at >= p_created_after)
+      AND (p_created_before IS NULL OR m.created_at < p_created_before)
+      AND (p_min_relevance IS NULL OR (CASE WHEN ms.relevance_computed_at >= m.updated_at THEN ms.relevance_score ELSE COALESCE(ms.importance, m.importance) END) >= p_min_relevance)
+    ORDER BY final_score DESC
+    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Hot-path recall for a precomputed query embedding (vector seeds + neighborhoods + episodes).
+-- Runs the shared stages recall_seeds -> recall_associations -> recall_temporal -> recall_score
+-- (fast_recall_explain runs and times the same ones).
+-- Optional filters (type, importance, trust, source kind, created_at range) are applied inside
+-- the seed scan and to every candidate, so filtered recalls still return up to p_limit rows.
+-- Hybrid mode (p_lexical_query set): seeds come from the HNSW and full-text (content_tsv)
+-- candidate lists fused with reciprocal rank fusion, so exact names and rare tokens that
+-- embed poorly still surface. Seed scores are then the fused score scaled to [0, 1].
+-- p_diversity > 0 recalls 3x p_limit candidates and keeps p_limit of them by maximal
+-- marginal relevance (lambda = 1 - p_diversity), dropping near-duplicates.
+-- Relevance uses the stored memory_stats.relevance_score when it is current; p_min_relevance
+-- prefilters on it (unscored or modified memories fall back to importance, its upper bound).
+-- p_mode picks the vector-scan quality (see recall_mode_ef_search): 'fast' and 'balanced'
+-- set hnsw.ef_search for this call only, 'exact' skips the HNSW index for an exact
+-- sequential kNN scan; NULL keeps the session settings.
+CREATE OR REPLACE FUNCTION fast_recall_with_embedding(
+    p_query_embedding vector,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_lexical_query TEXT DEFAULT NULL,
+    p_diversity FLOAT DEFAULT 0.0,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    seed_ids UUID[];
+    seed_sims FLOAT[];
+    seed_lexical_only BOOLEAN[];
+    assoc_ids UUID[];
+    assoc_scores FLOAT[];
+    temporal_ids UUID[];
+BEGIN
+    IF p_query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+
+    IF COALESCE(p_diversity, 0.0) > 0.0 THEN
+        RETURN QUERY
+        WITH fr AS MATERIALIZED (
+            SELECT * FROM fast_recall_with_embedding(
+                p_query_embedding,
+                p_limit * 3,
+                p_memory_types,
+                p_min_importance,
+                p_min_trust,
+                p_source_kinds,
+                p_created_after,
+                p_created_before,
+                p_lexical_query,
+                0.0,
+                p_min_relevance,
+                p_mode
+            )
+        )
+        SELECT fr.memory_id, fr.content, fr.memory_type, fr.score, fr.source
+        FROM mmr_rerank(
+            (SELECT array_agg(f.memory_id ORDER BY f.score DESC) FROM fr f),
+            (SELECT array_agg(f.score ORDER BY f.score DESC) FROM fr f),
+            p_limit,
+            1.0 - LEAST(p_diversity, 1.0)
+        ) mr
+        JOIN fr ON fr.memory_id = mr.memory_id
+        ORDER BY mr.mmr_rank;
+        RETURN;
+    END IF;
+
+    SELECT
+        array_agg(s.seed_id ORDER BY s.seed_sim DESC),
+        array_agg(s.seed_sim ORDER BY s.seed_sim DESC),
+        array_agg(s.seed_lexical_only ORDER BY s.seed_sim DESC)
+    INTO seed_ids, seed_sims, seed_lexical_only
+    FROM recall_seeds(
+        p_query_embedding,
+        GREATEST(p_limit, 5),
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        p_lexical_query,
+        p_min_relevance,
+        p_mode
+    ) s;
+
+    SELECT array_agg(a.assoc_id), array_agg(a.assoc_score)
+    INTO assoc_ids, assoc_scores
+    FROM recall_associations(seed_ids, seed_sims) a;
+
+    SELECT array_agg(t.temporal_id)
+    INTO temporal_ids
+    FROM recall_temporal(seed_ids) t;
+
+    RETURN QUERY
+    SELECT r.memory_id, r.content, r.memory_type, r.score, r.source
+    FROM recall_score(
+        seed_ids,
+        seed_sims,
+        seed_lexical_only,
+        assoc_ids,
+        assoc_scores,
+        temporal_ids,
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        p_min_relevance
+    ) r;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Primary retrieval entrypoint: embeds the query text, then runs fast_recall_with_embedding().
+-- p_hybrid also searches content_tsv with the query text and fuses both candidate lists;
+-- p_diversity reranks by maximal marginal relevance and p_min_relevance prefilters on the
+-- stored relevance score (see fast_recall_with_embedding). p_mode ('fast', 'balanced',
+-- 'exact') trades latency against recall quality; each call is logged per caller and
+-- mode (recall_mode_log, aggregated into recall_mode_stats by maintenance).
+CREATE OR REPLACE FUNCTION fast_recall(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_hybrid BOOLEAN DEFAULT FALSE,
+    p_diversity FLOAT DEFAULT 0.0,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL
+) RETURNS TABLE (
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    started_at TIMESTAMPTZ := clock_timestamp();
+BEGIN
+    RETURN QUERY
+    SELECT * FROM fast_recall_with_embedding(
+        get_embedding(p_query_text),
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        CASE WHEN p_hybrid THEN p_query_text END,
+        p_diversity,
+        p_min_relevance,
+        p_mode
+    );
+    PERFORM record_recall_mode(p_mode, started_at);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Multi-query recall in one statement: embeds all queries with one get_embeddings() call
+-- (cache probe + batched HTTP for misses), then runs the fast_recall_with_embedding pipeline
+-- for every query through a LATERAL join. query_index is the 1-based position in
+-- p_query_texts; empty queries return no rows.
+CREATE OR REPLACE FUNCTION fast_recall_many(
+    p_query_texts TEXT[],
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_mode TEXT DEFAULT NULL
+) RETURNS TABLE (
+    query_index INT,
+    memory_id UUID,
+    content TEXT,
+    memory_type memory_type,
+    score FLOAT,
+    source TEXT
+) AS $$
+DECLARE
+    started_at TIMESTAMPTZ := clock_timestamp();
+BEGIN
+    IF COALESCE(array_length(p_query_texts, 1), 0) = 0 THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        q.ord::int,
+        fr.memory_id,
+        fr.content,
+        fr.memory_type,
+        fr.score,
+        fr.source
+    FROM unnest(get_embeddings(p_query_texts)) WITH ORDINALITY AS q(embedding, ord)
+    CROSS JOIN LATERAL fast_recall_with_embedding(
+        q.embedding,
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_mode => p_mode
+    ) fr
+    ORDER BY q.ord, fr.score DESC;
+    PERFORM record_recall_mode(p_mode, started_at);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Traces of slow instrumented recalls (see fast_recall_explain).
+CREATE TABLE IF NOT EXISTS recall_trace (
+    id BIGSERIAL PRIMARY KEY,
+    query_text TEXT NOT NULL,
+    total_ms FLOAT NOT NULL,
+    trace JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_recall_trace_created ON recall_trace (created_at DESC);
+
+-- Instrumented fast_recall: runs the same stage functions as fast_recall_with_embedding
+-- (recall_seeds, recall_associations, recall_temporal, recall_score) one statement at a time
+-- and returns {"memories": [...], "trace": {...}} with clock_timestamp() timings per stage,
+-- candidate counts per source and whether the query embedding was already cached (memory
+-- objects have the same shape as hydrate_context's). Calls taking at least p_log_slow_ms are
+-- also written to recall_trace. Hybrid and MMR reranking are not instrumented.
+CREATE OR REPLACE FUNCTION fast_recall_explain(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_memory_types memory_type[] DEFAULT NULL,
+    p_min_importance FLOAT DEFAULT 0.0,
+    p_min_trust FLOAT DEFAULT NULL,
+    p_source_kinds TEXT[] DEFAULT NULL,
+    p_created_after TIMESTAMPTZ DEFAULT NULL,
+    p_created_before TIMESTAMPTZ DEFAULT NULL,
+    p_min_relevance FLOAT DEFAULT NULL,
+    p_mode TEXT DEFAULT NULL,
+    p_log_slow_ms FLOAT DEFAULT NULL
+) RETURNS JSONB AS $$
+DECLARE
+    started_at TIMESTAMPTZ := clock_timestamp();
+    stage_at TIMESTAMPTZ;
+    timings JSONB := '{}'::jsonb;
+    cache_hit BOOLEAN;
+    query_embedding vector;
+    recall_mode TEXT;
+    seed_ids UUID[];
+    seed_sims FLOAT[];
+    seed_lexical_only BOOLEAN[];
+    assoc_ids UUID[];
+    assoc_scores FLOAT[];
+    temporal_ids UUID[];
+    recalled JSONB;
+    total_ms FLOAT;
+    trace JSONB;
+BEGIN
+    recall_mode := normalize_recall_mode(p_mode);
+
+    -- Stage 1: query embedding
+    stage_at := clock_timestamp();
+    cache_hit := EXISTS (
+        SELECT 1 FROM embedding_cache
+        WHERE content_hash = encode(sha256(p_query_text::bytea), 'hex')
+    );
+    query_embedding := get_embedding(p_query_text);
+    timings := timings || jsonb_build_object('embedding_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 2: vector seed scan
+    stage_at := clock_timestamp();
+    SELECT
+        array_agg(s.seed_id ORDER BY s.seed_sim DESC),
+        array_agg(s.seed_sim ORDER BY s.seed_sim DESC),
+        array_agg(s.seed_lexical_only ORDER BY s.seed_sim DESC)
+    INTO seed_ids, seed_sims, seed_lexical_only
+    FROM recall_seeds(
+        query_embedding,
+        GREATEST(p_limit, 5),
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        NULL,
+        p_min_relevance,
+        p_mode
+    ) s;
+    timings := timings || jsonb_build_object('seed_scan_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 3: neighborhood expansion
+    stage_at := clock_timestamp();
+    SELECT array_agg(a.assoc_id), array_agg(a.assoc_score)
+    INTO assoc_ids, assoc_scores
+    FROM recall_associations(seed_ids, seed_sims) a;
+    timings := timings || jsonb_build_object('association_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 4: episode (temporal) expansion
+    stage_at := clock_timestamp();
+    SELECT array_agg(t.temporal_id)
+    INTO temporal_ids
+    FROM recall_temporal(seed_ids) t;
+    timings := timings || jsonb_build_object('temporal_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    -- Stage 5: scoring
+    stage_at := clock_timestamp();
+    SELECT COALESCE(jsonb_agg(
+        jsonb_build_object(
+            'memory_id', r.memory_id,
+            'content', r.content,
+            'type', r.memory_type,
+            'score', r.score,
+            'source', r.source,
+            'importance', COALESCE(ms.importance, m.importance),
+            'trust_level', m.trust_level,
+            'source_attribution', m.source_attribution,
+            'created_at', m.created_at,
+            'emotional_valence', em.emotional_valence
+        )
+        ORDER BY r.score DESC
+    ), '[]'::jsonb)
+    INTO recalled
+    FROM recall_score(
+        seed_ids,
+        seed_sims,
+        seed_lexical_only,
+        assoc_ids,
+        assoc_scores,
+        temporal_ids,
+        p_limit,
+        p_memory_types,
+        p_min_importance,
+        p_min_trust,
+        p_source_kinds,
+        p_created_after,
+        p_created_before,
+        p_min_relevance
+    ) r
+    JOIN memories m ON m.id = r.memory_id
+    LEFT JOIN episodic_memories em ON em.memory_id = r.memory_id
+    LEFT JOIN memory_stats ms ON ms.memory_id = r.memory_id;
+    timings := timings || jsonb_build_object('scoring_ms', EXTRACT(EPOCH FROM clock_timestamp() - stage_at) * 1000.0);
+
+    total_ms := EXTRACT(EPOCH FROM clock_timestamp() - started_at) * 1000.0;
+    trace := jsonb_build_object(
+        'mode', recall_mode,
+        'timings', timings || jsonb_build_object('total_ms', total_ms),
+        'candidates', jsonb_build_object(
+            'vector', COALESCE(array_length(seed_ids, 1), 0),
+            'association', COALESCE(array_length(assoc_ids, 1), 0),
+            'temporal', COALESCE(array_length(temporal_ids, 1), 0)
+        ),
+        'returned', jsonb_array_length(recalled),
+        'embedding_cache_hit', cache_hit
+    );
+
+    IF p_log_slow_ms IS NOT NULL AND total_ms >= p_log_slow_ms THEN
+        INSERT INTO recall_trace (query_text, total_ms, trace)
+        VALUES (p_query_text, total_ms, trace);
+    END IF;
+    PERFORM record_recall_mode(p_mode, started_at);
+
+    RETURN jsonb_build_object('memories', recalled, 'trace', trace);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop recall traces older than the retention window.
+CREATE OR REPLACE FUNCTION cleanup_recall_trace(p_older_than INTERVAL DEFAULT INTERVAL '7 days')
+RETURNS INT AS $$
+DECLARE
+    deleted_count INT;
+BEGIN
+    DELETE FROM recall_trace WHERE created_at < CURRENT_TIMESTAMP - p_older_than;
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    RETURN deleted_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- PROVENANCE & TRUST (Normalization Layer)
+-- ============================================================================
+
+-- Normalize a source reference object into a consistent shape.
+-- Intended fields: kind, ref, label, author, observed_at, trust.
+CREATE OR REPLACE FUNCTION normalize_source_reference(p_source JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    kind TEXT;
+    ref TEXT;
+    label TEXT;
+    author TEXT;
+    observed_at TIMESTAMPTZ;
+    trust FLOAT;
+BEGIN
+    IF p_source IS NULL OR jsonb_typeof(p_source) <> 'object' THEN
+        RETURN '{}'::jsonb;
+    END IF;
+
+    kind := NULLIF(p_source->>'kind', '');
+    ref := COALESCE(NULLIF(p_source->>'ref', ''), NULLIF(p_source->>'uri', ''));
+    label := NULLIF(p_source->>'label', '');
+    author := NULLIF(p_source->>'author', '');
+
+    BEGIN
+        observed_at := (p_source->>'observed_at')::timestamptz;
+    EXCEPTION WHEN OTHERS THEN
+        observed_at := CURRENT_TIMESTAMP;
+    END;
+    IF observed_at IS NULL THEN
+        observed_at := CURRENT_TIMESTAMP;
+    END IF;
+
+    trust := COALESCE(NULLIF(p_source->>'trust', '')::float, 0.5);
+    trust := LEAST(1.0, GREATEST(0.0, trust));
+
+    RETURN jsonb_strip_nulls(
+        jsonb_build_object(
+            'kind', kind,
+            'ref', ref,
+            'label', label,
+            'author', author,
+            'observed_at', observed_at,
+            'trust', trust
+        )
+    );
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Normalize source references into an array of normalized source objects.
+CREATE OR REPLACE FUNCTION normalize_source_references(p_sources JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    elem JSONB;
+    out_arr JSONB := '[]'::jsonb;
+BEGIN
+    IF p_sources IS NULL THEN
+        RETURN '[]'::jsonb;
+    END IF;
+
+    IF jsonb_typeof(p_sources) = 'array' THEN
+        FOR elem IN SELECT * FROM jsonb_array_elements(p_sources)
+        LOOP
+            out_arr := out_arr || jsonb_build_array(normalize_source_reference(elem));
+        END LOOP;
+    ELSIF jsonb_typeof(p_sources) = 'object' THEN
+        out_arr := jsonb_build_array(normalize_source_reference(p_sources));
+    ELSE
+        RETURN '[]'::jsonb;
+    END IF;
+
+    RETURN COALESCE(
+        (SELECT jsonb_agg(e) FROM jsonb_array_elements(out_arr) e WHERE e <> '{}'::jsonb),
+        '[]'::jsonb
+    );
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Dedupe normalized sources by a canonical key (ref/label fallback), keeping the most recent observed_at.
+CREATE OR REPLACE FUNCTION dedupe_source_references(p_sources JSONB)
+RETURNS JSONB AS $$
+BEGIN
+    RETURN COALESCE((
+        SELECT jsonb_agg(d.elem)
+        FROM (
+            SELECT DISTINCT ON (d.key) d.elem
+            FROM (
+                SELECT
+                    COALESCE(NULLIF(e->>'ref', ''), NULLIF(e->>'label', ''), md5(e::text)) AS key,
+                    e AS elem,
+                    COALESCE(e->>'observed_at', '') AS observed_at
+                FROM jsonb_array_elements(normalize_source_references(p_sources)) e
+            ) d
+            ORDER BY d.key, d.observed_at DESC
+        ) d
+    ), '[]'::jsonb);
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Convert sources into a reinforcement score [0..1] that grows with unique source count and average trust.
+CREATE OR REPLACE FUNCTION source_reinforcement_score(p_source_references JSONB)
+RETURNS FLOAT AS $$
+DECLARE
+    unique_sources INT;
     avg_trust FLOAT;
 BEGIN
     WITH elems AS (
@@ -1473,13 +2529,131 @@ CREATE TRIGGER trg_worldview_influence_trust_sync
     FOR EACH ROW
     EXECUTE FUNCTION trg_sync_worldview_influence_trust();
 
--- Create memory (base function) - generates embedding automatically
+-- Opt-in dedupe for the create functions (p_dedupe => TRUE): returns an active memory of the
+-- same type with identical content, or the top-1 vector neighbor of that type when its
+-- similarity is at least p_threshold (default maintenance_config.dedupe_similarity_threshold).
+-- The type/status filters are applied during the HNSW scan (hnsw.iterative_scan), so
+-- neighbors of other types cannot crowd a same-type duplicate out of the candidates.
+CREATE OR REPLACE FUNCTION find_duplicate_memory(
+    p_type memory_type,
+    p_content TEXT,
+    p_embedding vector,
+    p_threshold FLOAT DEFAULT NULL
+) RETURNS UUID AS $$
+DECLARE
+    dup_id UUID;
+    threshold FLOAT;
+    zero_vec vector;
+    prev_iterative_scan TEXT;
+BEGIN
+    IF p_content IS NULL OR p_content = '' THEN
+        RETURN NULL;
+    END IF;
+
+    -- Exact content (idx_memories_content_md5)
+    SELECT m.id INTO dup_id
+    FROM memories m
+    WHERE md5(m.content) = md5(p_content)
+      AND m.content = p_content
+      AND m.type = p_type
+      AND m.status = 'active'
+    ORDER BY m.created_at
+    LIMIT 1;
+    IF dup_id IS NOT NULL OR p_embedding IS NULL THEN
+        RETURN dup_id;
+    END IF;
+
+    threshold := COALESCE(
+        p_threshold,
+        (SELECT value FROM maintenance_config WHERE key = 'dedupe_similarity_threshold'),
+        0.97
+    );
+
+    zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+    IF p_embedding = zero_vec THEN
+        RETURN NULL;
+    END IF;
+
+    -- Strict order: only the top-1 neighbor is compared with the threshold (pgvector >= 0.8).
+    BEGIN
+        prev_iterative_scan := current_setting('hnsw.iterative_scan', true);
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION
+        WHEN OTHERS THEN
+            prev_iterative_scan := NULL;
+    END;
+
+    -- Nearest neighbor (HNSW)
+    SELECT nn.id INTO dup_id
+    FROM (
+        SELECT m.id, m.embedding <=> p_embedding AS distance
+        FROM memories m
+        WHERE m.status = 'active'
+          AND m.type = p_type
+          AND m.embedding IS NOT NULL
+          AND m.embedding <> zero_vec
+        ORDER BY m.embedding <=> p_embedding
+        LIMIT 1
+    ) nn
+    WHERE 1 - nn.distance >= threshold;
+
+    IF prev_iterative_scan IS NOT NULL THEN
+        PERFORM set_config('hnsw.iterative_scan', prev_iterative_scan, true);
+    END IF;
+
+    RETURN dup_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fold a duplicate write into an existing memory: keep the higher importance, count it as an
+-- access (which also bumps importance via trg_importance_on_access), and merge any new
+-- semantic source references (recomputing trust).
+CREATE OR REPLACE FUNCTION reinforce_memory(
+    p_memory_id UUID,
+    p_importance FLOAT DEFAULT NULL,
+    p_source_references JSONB DEFAULT NULL
+) RETURNS VOID AS $$
+DECLARE
+    normalized_sources JSONB;
+BEGIN
+    -- Only a higher importance touches the wide row (and resets the boosted value).
+    UPDATE memories m
+    SET importance = p_importance
+    WHERE m.id = p_memory_id
+      AND p_importance > COALESCE((
+          SELECT ms.importance FROM memory_stats ms WHERE ms.memory_id = m.id
+      ), m.importance);
+
+    UPDATE memory_stats
+    SET access_count = access_count + 1,
+        last_accessed = CURRENT_TIMESTAMP
+    WHERE memory_id = p_memory_id;
+
+    normalized_sources := dedupe_source_references(p_source_references);
+    IF jsonb_array_length(normalized_sources) > 0 THEN
+        UPDATE semantic_memories
+        SET source_references = dedupe_source_references(
+                COALESCE(source_references, '[]'::jsonb) || normalized_sources
+            ),
+            last_validated = CURRENT_TIMESTAMP
+        WHERE memory_id = p_memory_id;
+
+        IF FOUND THEN
+            PERFORM sync_memory_trust(p_memory_id);
+        END IF;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create memory (base function) - generates embedding automatically.
+-- p_dedupe => TRUE reinforces and returns an existing duplicate instead of inserting.
 CREATE OR REPLACE FUNCTION create_memory(
     p_type memory_type,
     p_content TEXT,
     p_importance FLOAT DEFAULT 0.5,
     p_source_attribution JSONB DEFAULT NULL,
-    p_trust_level FLOAT DEFAULT NULL
+    p_trust_level FLOAT DEFAULT NULL,
+    p_dedupe BOOLEAN DEFAULT FALSE
 ) RETURNS UUID AS $$
 DECLARE
     new_memory_id UUID;
@@ -1514,6 +2688,14 @@ BEGIN
     -- Generate embedding
     embedding_vec := get_embedding(p_content);
 
+    IF p_dedupe THEN
+        new_memory_id := find_duplicate_memory(p_type, p_content, embedding_vec);
+        IF new_memory_id IS NOT NULL THEN
+            PERFORM reinforce_memory(new_memory_id, p_importance);
+            RETURN new_memory_id;
+        END IF;
+    END IF;
+
     INSERT INTO memories (type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
     VALUES (p_type, p_content, embedding_vec, p_importance, normalized_source, effective_trust, CURRENT_TIMESTAMP)
     RETURNING id INTO new_memory_id;
@@ -1529,10 +2711,8 @@ BEGIN
         CURRENT_TIMESTAMP
     );
 
-    -- Assign memory to clusters when centroids are available.
-    IF EXISTS (SELECT 1 FROM memory_clusters WHERE centroid_embedding IS NOT NULL) THEN
-        PERFORM assign_memory_to_clusters(new_memory_id);
-    END IF;
+    -- Cluster assignment runs in maintenance (keeps threshold refreshes off the insert path).
+    PERFORM queue_cluster_assignment(ARRAY[new_memory_id]);
 
     RETURN new_memory_id;
 END;
@@ -1548,7 +2728,8 @@ CREATE OR REPLACE FUNCTION create_episodic_memory(
     p_event_time TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     p_importance FLOAT DEFAULT 0.5,
     p_source_attribution JSONB DEFAULT NULL,
-    p_trust_level FLOAT DEFAULT NULL
+    p_trust_level FLOAT DEFAULT NULL,
+    p_dedupe BOOLEAN DEFAULT FALSE
 ) RETURNS UUID AS $$
 DECLARE
     new_memory_id UUID;
@@ -1560,6 +2741,14 @@ BEGIN
         normalized_source := jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP);
     END IF;
     effective_trust := COALESCE(p_trust_level, 0.95);
+    IF p_dedupe THEN
+        new_memory_id := find_duplicate_memory('episodic', p_content, get_embedding(p_content));
+        IF new_memory_id IS NOT NULL THEN
+            PERFORM reinforce_memory(new_memory_id, p_importance);
+            RETURN new_memory_id;
+        END IF;
+    END IF;
+
     new_memory_id := create_memory('episodic', p_content, p_importance, normalized_source, effective_trust);
 
     INSERT INTO episodic_memories (
@@ -1583,7 +2772,8 @@ CREATE OR REPLACE FUNCTION create_semantic_memory(
     p_source_references JSONB DEFAULT NULL,
     p_importance FLOAT DEFAULT 0.5,
     p_source_attribution JSONB DEFAULT NULL,
-    p_trust_level FLOAT DEFAULT NULL
+    p_trust_level FLOAT DEFAULT NULL,
+    p_dedupe BOOLEAN DEFAULT FALSE
 ) RETURNS UUID AS $$
 DECLARE
     new_memory_id UUID;
@@ -1605,6 +2795,14 @@ BEGIN
 
     effective_trust := COALESCE(p_trust_level, compute_semantic_trust(base_confidence, normalized_sources, 0.0));
 
+    IF p_dedupe THEN
+        new_memory_id := find_duplicate_memory('semantic', p_content, get_embedding(p_content));
+        IF new_memory_id IS NOT NULL THEN
+            PERFORM reinforce_memory(new_memory_id, p_importance, normalized_sources);
+            RETURN new_memory_id;
+        END IF;
+    END IF;
+
     new_memory_id := create_memory('semantic', p_content, p_importance, primary_source, effective_trust);
 
     INSERT INTO semantic_memories (
@@ -1628,7 +2826,8 @@ CREATE OR REPLACE FUNCTION create_procedural_memory(
     p_prerequisites JSONB DEFAULT NULL,
     p_importance FLOAT DEFAULT 0.5,
     p_source_attribution JSONB DEFAULT NULL,
-    p_trust_level FLOAT DEFAULT NULL
+    p_trust_level FLOAT DEFAULT NULL,
+    p_dedupe BOOLEAN DEFAULT FALSE
 ) RETURNS UUID AS $$
 DECLARE
     new_memory_id UUID;
@@ -1640,6 +2839,14 @@ BEGIN
         normalized_source := jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP);
     END IF;
     effective_trust := COALESCE(p_trust_level, 0.70);
+    IF p_dedupe THEN
+        new_memory_id := find_duplicate_memory('procedural', p_content, get_embedding(p_content));
+        IF new_memory_id IS NOT NULL THEN
+            PERFORM reinforce_memory(new_memory_id, p_importance);
+            RETURN new_memory_id;
+        END IF;
+    END IF;
+
     new_memory_id := create_memory('procedural', p_content, p_importance, normalized_source, effective_trust);
 
     INSERT INTO procedural_memories (
@@ -1661,7 +2868,8 @@ CREATE OR REPLACE FUNCTION create_strategic_memory(
     p_context_applicability JSONB DEFAULT NULL,
     p_importance FLOAT DEFAULT 0.5,
     p_source_attribution JSONB DEFAULT NULL,
-    p_trust_level FLOAT DEFAULT NULL
+    p_trust_level FLOAT DEFAULT NULL,
+    p_dedupe BOOLEAN DEFAULT FALSE
 ) RETURNS UUID AS $$
 DECLARE
     new_memory_id UUID;
@@ -1673,6 +2881,14 @@ BEGIN
         normalized_source := jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP);
     END IF;
     effective_trust := COALESCE(p_trust_level, 0.70);
+    IF p_dedupe THEN
+        new_memory_id := find_duplicate_memory('strategic', p_content, get_embedding(p_content));
+        IF new_memory_id IS NOT NULL THEN
+            PERFORM reinforce_memory(new_memory_id, p_importance);
+            RETURN new_memory_id;
+        END IF;
+    END IF;
+
     new_memory_id := create_memory('strategic', p_content, p_importance, normalized_source, effective_trust);
 
     INSERT INTO strategic_memories (
@@ -1687,89 +2903,280 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Create MemoryNode vertices for many memories with a single Cypher UNWIND.
+CREATE OR REPLACE FUNCTION create_memory_nodes(p_memory_ids UUID[])
+RETURNS INT AS $$
+DECLARE
+    node_list TEXT;
+    node_count INT;
+BEGIN
+    SELECT
+        string_agg(format('{memory_id: %L, type: %L, created_at: %L}', m.id, m.type, CURRENT_TIMESTAMP), ', '),
+        COUNT(*)
+    INTO node_list, node_count
+    FROM memories m
+    WHERE m.id = ANY(p_memory_ids);
+
+    IF COALESCE(node_count, 0) = 0 THEN
+        RETURN 0;
+    END IF;
+
+    EXECUTE format(
+        'SELECT * FROM cypher(''memory_graph'', $q$
+            UNWIND [%s] AS item
+            CREATE (n:MemoryNode {memory_id: item.memory_id, type: item.type, created_at: item.created_at})
+        $q$) as (result agtype)',
+        node_list
+    );
+
+    RETURN node_count;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Batch create memories from JSONB items.
 -- Each item must include: {"type": "semantic|episodic|procedural|strategic", "content": "..."}
 -- Optional keys: importance, emotional_valence, context, action_taken, result, event_time,
 --                confidence, category, related_concepts, source_references, steps, prerequisites,
 --                pattern_description, supporting_evidence, context_applicability,
 --                source_attribution, trust_level.
-CREATE OR REPLACE FUNCTION batch_create_memories(p_items JSONB)
+-- Set-based: one get_embeddings() call, one multi-row INSERT into memories and into each
+-- type table and one Cypher UNWIND for the graph nodes; new ids are queued for cluster assignment.
+-- Source/trust defaults match the per-type create_*_memory() functions.
+-- p_dedupe => TRUE: items matching an existing memory (find_duplicate_memory) reinforce it
+-- and return its id instead of inserting; items matching an earlier item of the same batch
+-- (same type, identical content or similarity >= dedupe_similarity_threshold) return and
+-- reinforce that item's memory, as batch_create_memories_with_vectors() does row by row.
+CREATE OR REPLACE FUNCTION batch_create_memories(p_items JSONB, p_dedupe BOOLEAN DEFAULT FALSE)
 RETURNS UUID[] AS $$
 DECLARE
-    ids UUID[] := ARRAY[]::UUID[];
-    item JSONB;
-    mtype memory_type;
-    content TEXT;
-    importance FLOAT;
-    new_id UUID;
-    idx INT := 0;
+    ids UUID[];
+    created_ids UUID[];
+    dup_ids UUID[] := ARRAY[]::UUID[];
+    canon INT[];
+    kept INT[] := ARRAY[]::INT[];
+    item_types TEXT[];
+    item_contents TEXT[];
+    threshold FLOAT;
+    zero_vec vector;
+    n INT;
+    i INT;
+    j INT;
+    collapsed BOOLEAN;
+    bad_idx BIGINT;
+    bad_type TEXT;
+    embeddings vector[];
 BEGIN
-    IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' THEN
-        RETURN ids;
+    IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' OR jsonb_array_length(p_items) = 0 THEN
+        RETURN ARRAY[]::UUID[];
     END IF;
 
-    FOR item IN SELECT * FROM jsonb_array_elements(p_items)
-    LOOP
-        idx := idx + 1;
-        mtype := NULLIF(item->>'type', '')::memory_type;
-        content := NULLIF(item->>'content', '');
-        IF content IS NULL OR mtype IS NULL THEN
-            RAISE EXCEPTION 'batch_create_memories: item % missing required fields', idx;
-        END IF;
-        importance := COALESCE(NULLIF(item->>'importance', '')::float, 0.5);
-
-        IF mtype = 'episodic' THEN
-            new_id := create_episodic_memory(
-                content,
-                item->'action_taken',
-                item->'context',
-                item->'result',
-                COALESCE(NULLIF(item->>'emotional_valence', '')::float, 0.0),
-                COALESCE(NULLIF(item->>'event_time', '')::timestamptz, CURRENT_TIMESTAMP),
-                importance,
-                item->'source_attribution',
-                NULLIF(item->>'trust_level', '')::float
-            );
-        ELSIF mtype = 'semantic' THEN
-            new_id := create_semantic_memory(
-                content,
-                COALESCE(NULLIF(item->>'confidence', '')::float, 0.8),
-                CASE WHEN item ? 'category' THEN ARRAY(SELECT jsonb_array_elements_text(item->'category')) ELSE NULL END,
-                CASE WHEN item ? 'related_concepts' THEN ARRAY(SELECT jsonb_array_elements_text(item->'related_concepts')) ELSE NULL END,
-                item->'source_references',
-                importance,
-                item->'source_attribution',
-                NULLIF(item->>'trust_level', '')::float
-            );
-        ELSIF mtype = 'procedural' THEN
-            new_id := create_procedural_memory(
-                content,
-                COALESCE(item->'steps', jsonb_build_object('steps', '[]'::jsonb)),
-                item->'prerequisites',
-                importance,
-                item->'source_attribution',
-                NULLIF(item->>'trust_level', '')::float
-            );
-        ELSIF mtype = 'strategic' THEN
-            new_id := create_strategic_memory(
-                content,
-                COALESCE(NULLIF(item->>'pattern_description', ''), content),
-                COALESCE(NULLIF(item->>'confidence_score', '')::float, 0.8),
-                item->'supporting_evidence',
-                item->'context_applicability',
-                importance,
-                item->'source_attribution',
-                NULLIF(item->>'trust_level', '')::float
-            );
-        ELSE
-            RAISE EXCEPTION 'batch_create_memories: item % invalid type %', idx, mtype::text;
-        END IF;
+    SELECT e.ord INTO bad_idx
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+    WHERE NULLIF(e.item->>'content', '') IS NULL
+       OR NULLIF(e.item->>'type', '') IS NULL
+    ORDER BY e.ord
+    LIMIT 1;
+    IF bad_idx IS NOT NULL THEN
+        RAISE EXCEPTION 'batch_create_memories: item % missing required fields', bad_idx;
+    END IF;
 
-        IF new_id IS NULL THEN
-            RAISE EXCEPTION 'batch_create_memories: item % failed to create memory', idx;
-        END IF;
-        ids := array_append(ids, new_id);
-    END LOOP;
+    SELECT e.ord, e.item->>'type' INTO bad_idx, bad_type
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+    WHERE NOT (e.item->>'type' = ANY(enum_range(NULL::memory_type)::text[]))
+    ORDER BY e.ord
+    LIMIT 1;
+    IF bad_idx IS NOT NULL THEN
+        RAISE EXCEPTION 'batch_create_memories: item % invalid type %', bad_idx, bad_type;
+    END IF;
+
+    -- Embed every item in one batched call (cache probe + batched HTTP for misses).
+    embeddings := get_embeddings(ARRAY(
+        SELECT e.item->>'content'
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        ORDER BY e.ord
+    ));
+
+    IF p_dedupe THEN
+        SELECT array_agg(
+            find_duplicate_memory((e.item->>'type')::memory_type, e.item->>'content', embeddings[e.ord::int])
+            ORDER BY e.ord
+        ) INTO dup_ids
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord);
+
+        -- Collapse in-batch duplicates onto the first matching item: canon[i] = that item's
+        -- ordinal, or its existing duplicate is carried over to dup_ids[i].
+        n := jsonb_array_length(p_items);
+        canon := array_fill(NULL::int, ARRAY[n]);
+        threshold := COALESCE(
+            (SELECT value FROM maintenance_config WHERE key = 'dedupe_similarity_threshold'),
+            0.97
+        );
+        zero_vec := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
+        SELECT array_agg(e.item->>'type' ORDER BY e.ord), array_agg(e.item->>'content' ORDER BY e.ord)
+        INTO item_types, item_contents
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord);
+
+        FOR i IN 1..n LOOP
+            collapsed := FALSE;
+            IF dup_ids[i] IS NULL THEN
+                FOREACH j IN ARRAY kept LOOP
+                    IF item_types[j] = item_types[i] AND (
+                        item_contents[j] = item_contents[i]
+                        OR (embeddings[i] <> zero_vec AND embeddings[j] <> zero_vec
+                            AND 1 - (embeddings[j] <=> embeddings[i]) >= threshold)
+                    ) THEN
+                        IF dup_ids[j] IS NOT NULL THEN
+                            dup_ids[i] := dup_ids[j];
+                        ELSE
+                            canon[i] := j;
+                        END IF;
+                        collapsed := TRUE;
+                        EXIT;
+                    END IF;
+                END LOOP;
+            END IF;
+            IF NOT collapsed THEN
+                kept := array_append(kept, i);
+            END IF;
+        END LOOP;
+
+        PERFORM reinforce_memory(
+            dup_ids[e.ord::int],
+            NULLIF(e.item->>'importance', '')::float,
+            CASE WHEN e.item->>'type' = 'semantic' THEN e.item->'source_references' END
+        )
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        WHERE dup_ids[e.ord::int] IS NOT NULL;
+    END IF;
+
+    WITH items AS MATERIALIZED (
+        SELECT
+            e.ord,
+            gen_random_uuid() as id,
+            r.type::memory_type as mtype,
+            r.content,
+            embeddings[e.ord::int] as embedding,
+            COALESCE(NULLIF(r.importance, '')::float, 0.5) as importance,
+            r.action_taken,
+            r.context,
+            r.result,
+            COALESCE(NULLIF(r.emotional_valence, '')::float, 0.0) as emotional_valence,
+            COALESCE(NULLIF(r.event_time, '')::timestamptz, CURRENT_TIMESTAMP) as event_time,
+            COALESCE(NULLIF(r.confidence, '')::float, 0.8) as confidence,
+            CASE WHEN r.category IS NOT NULL THEN ARRAY(SELECT jsonb_array_elements_text(r.category)) END as category,
+            CASE WHEN r.related_concepts IS NOT NULL THEN ARRAY(SELECT jsonb_array_elements_text(r.related_concepts)) END as related_concepts,
+            CASE WHEN r.type = 'semantic' THEN dedupe_source_references(r.source_references) END as semantic_sources,
+            COALESCE(r.steps, jsonb_build_object('steps', '[]'::jsonb)) as steps,
+            r.prerequisites,
+            COALESCE(NULLIF(r.pattern_description, ''), r.content) as pattern_description,
+            COALESCE(NULLIF(r.confidence_score, '')::float, 0.8) as confidence_score,
+            r.supporting_evidence,
+            r.context_applicability,
+            normalize_source_reference(r.source_attribution) as given_source,
+            NULLIF(r.trust_level, '')::float as trust_level
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        CROSS JOIN LATERAL jsonb_to_record(e.item) AS r(
+            type TEXT,
+            content TEXT,
+            importance TEXT,
+            action_taken JSONB,
+            context JSONB,
+            result JSONB,
+            emotional_valence TEXT,
+            event_time TEXT,
+            confidence TEXT,
+            category JSONB,
+            related_concepts JSONB,
+            source_references JSONB,
+            steps JSONB,
+            prerequisites JSONB,
+            pattern_description TEXT,
+            confidence_score TEXT,
+            supporting_evidence JSONB,
+            context_applicability JSONB,
+            source_attribution JSONB,
+            trust_level TEXT
+        )
+        WHERE dup_ids[e.ord::int] IS NULL
+          AND canon[e.ord::int] IS NULL
+    ),
+    prepared AS MATERIALIZED (
+        SELECT
+            i.*,
+            CASE
+                WHEN i.given_source <> '{}'::jsonb THEN i.given_source
+                WHEN i.mtype = 'semantic'
+                     AND jsonb_typeof(i.semantic_sources) = 'array'
+                     AND jsonb_array_length(i.semantic_sources) > 0
+                     AND normalize_source_reference(i.semantic_sources->0) <> '{}'::jsonb
+                    THEN normalize_source_reference(i.semantic_sources->0)
+                WHEN i.mtype = 'semantic'
+                    THEN jsonb_build_object('kind', 'unattributed', 'observed_at', CURRENT_TIMESTAMP)
+                ELSE jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP)
+            END as source_attribution,
+            LEAST(1.0, GREATEST(0.0, COALESCE(
+                i.trust_level,
+                CASE i.mtype
+                    WHEN 'episodic' THEN 0.95
+                    WHEN 'semantic' THEN compute_semantic_trust(
+                        LEAST(1.0, GREATEST(0.0, i.confidence)), i.semantic_sources, 0.0
+                    )
+                    ELSE 0.70
+                END
+            ))) as effective_trust
+        FROM items i
+    ),
+    inserted AS (
+        INSERT INTO memories (id, type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+        SELECT p.id, p.mtype, p.content, p.embedding, p.importance, p.source_attribution, p.effective_trust, CURRENT_TIMESTAMP
+        FROM prepared p
+        ORDER BY p.ord
+        RETURNING id
+    ),
+    episodic AS (
+        INSERT INTO episodic_memories (memory_id, action_taken, context, result, emotional_valence, event_time)
+        SELECT p.id, p.action_taken, p.context, p.result, p.emotional_valence, p.event_time
+        FROM prepared p
+        WHERE p.mtype = 'episodic'
+    ),
+    semantic AS (
+        INSERT INTO semantic_memories (memory_id, confidence, category, related_concepts, source_references, last_validated)
+        SELECT p.id, p.confidence, p.category, p.related_concepts, p.semantic_sources, CURRENT_TIMESTAMP
+        FROM prepared p
+        WHERE p.mtype = 'semantic'
+    ),
+    procedural AS (
+        INSERT INTO procedural_memories (memory_id, steps, prerequisites)
+        SELECT p.id, p.steps, p.prerequisites
+        FROM prepared p
+        WHERE p.mtype = 'procedural'
+    ),
+    strategic AS (
+        INSERT INTO strategic_memories (memory_id, pattern_description, confidence_score, supporting_evidence, context_applicability)
+        SELECT p.id, p.pattern_description, p.confidence_score, p.supporting_evidence, p.context_applicability
+        FROM prepared p
+        WHERE p.mtype = 'strategic'
+    )
+    SELECT
+        array_agg(COALESCE(dup_ids[g.ord], p.id, pc.id) ORDER BY g.ord),
+        COALESCE(array_agg(p.id ORDER BY g.ord) FILTER (WHERE p.id IS NOT NULL), ARRAY[]::UUID[])
+    INTO ids, created_ids
+    FROM generate_series(1, jsonb_array_length(p_items)) AS g(ord)
+    LEFT JOIN prepared p ON p.ord = g.ord
+    LEFT JOIN prepared pc ON pc.ord = canon[g.ord];
+
+    IF p_dedupe THEN
+        PERFORM reinforce_memory(
+            ids[e.ord::int],
+            NULLIF(e.item->>'importance', '')::float,
+            CASE WHEN e.item->>'type' = 'semantic' THEN e.item->'source_references' END
+        )
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS e(item, ord)
+        WHERE canon[e.ord::int] IS NOT NULL;
+    END IF;
+
+    PERFORM create_memory_nodes(created_ids);
+    PERFORM queue_cluster_assignment(created_ids);
 
     RETURN ids;
 END;
@@ -1835,23 +3242,24 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Batch create memories with precomputed embeddings (single type, no per-item metadata).
--- Inserts the base row, creates the MemoryNode, and creates the type-specific row with safe defaults.
-CREATE OR REPLACE FUNCTION batch_create_memories_with_embeddings(
+-- Batch create memories from parallel content / vector arrays (single type, no per-item metadata).
+-- Inserts the base rows and type-specific rows with safe defaults, then creates all MemoryNodes in one UNWIND.
+-- Clients with a binary vector codec pass embeddings as vector[] directly (no JSON round trip).
+-- p_dedupe => TRUE reinforces existing duplicates (including earlier rows of the same batch).
+CREATE OR REPLACE FUNCTION batch_create_memories_with_vectors(
     p_type memory_type,
     p_contents TEXT[],
-    p_embeddings JSONB,
-    p_importance FLOAT DEFAULT 0.5
+    p_embeddings vector[],
+    p_importance FLOAT DEFAULT 0.5,
+    p_dedupe BOOLEAN DEFAULT FALSE
 )
 RETURNS UUID[] AS $$
 DECLARE
     ids UUID[] := ARRAY[]::UUID[];
+    created_ids UUID[] := ARRAY[]::UUID[];
     n INT;
     i INT;
     expected_dim INT;
-    emb_vec vector;
-    emb_json JSONB;
-    emb_arr FLOAT4[];
     new_id UUID;
 BEGIN
     n := COALESCE(array_length(p_contents, 1), 0);
@@ -1859,10 +3267,7 @@ BEGIN
         RETURN ids;
     END IF;
 
-    IF p_embeddings IS NULL OR jsonb_typeof(p_embeddings) <> 'array' THEN
-        RAISE EXCEPTION 'embeddings must be a JSON array';
-    END IF;
-    IF jsonb_array_length(p_embeddings) <> n THEN
+    IF COALESCE(array_length(p_embeddings, 1), 0) <> n THEN
         RAISE EXCEPTION 'contents and embeddings length mismatch';
     END IF;
 
@@ -1873,20 +3278,38 @@ BEGIN
             CONTINUE;
         END IF;
 
-        emb_json := p_embeddings->(i - 1);
-        IF emb_json IS NULL OR jsonb_typeof(emb_json) <> 'array' THEN
-            RAISE EXCEPTION 'embedding % must be a JSON array', i;
+        IF p_embeddings[i] IS NULL OR vector_dims(p_embeddings[i]) <> expected_dim THEN
+            RAISE EXCEPTION 'embedding dimension mismatch: expected %, got %', expected_dim, COALESCE(vector_dims(p_embeddings[i]), 0);
         END IF;
 
-        SELECT ARRAY_AGG(value::float4) INTO emb_arr
-        FROM jsonb_array_elements_text(emb_json) value;
-
-        IF COALESCE(array_length(emb_arr, 1), 0) <> expected_dim THEN
-            RAISE EXCEPTION 'embedding dimension mismatch: expected %, got %', expected_dim, COALESCE(array_length(emb_arr, 1), 0);
+        IF p_dedupe THEN
+            new_id := find_duplicate_memory(p_type, p_contents[i], p_embeddings[i]);
+            IF new_id IS NOT NULL THEN
+                PERFORM reinforce_memory(new_id, p_importance);
+                ids := array_append(ids, new_id);
+                CONTINUE;
+            END IF;
         END IF;
 
-        emb_vec := (emb_arr::float4[])::vector;
-        new_id := create_memory_with_embedding(p_type, p_contents[i], emb_vec, p_importance);
+        -- Same source/trust defaults as create_memory_with_embedding(); graph nodes are created in bulk below.
+        INSERT INTO memories (type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+        VALUES (
+            p_type,
+            p_contents[i],
+            p_embeddings[i],
+            p_importance,
+            jsonb_build_object(
+                'kind', CASE WHEN p_type = 'semantic' THEN 'unattributed' ELSE 'internal' END,
+                'observed_at', CURRENT_TIMESTAMP
+            ),
+            CASE
+                WHEN p_type = 'episodic' THEN 0.95
+                WHEN p_type = 'semantic' THEN 0.20
+                ELSE 0.70
+            END,
+            CURRENT_TIMESTAMP
+        )
+        RETURNING id INTO new_id;
 
         IF p_type = 'episodic' THEN
             INSERT INTO episodic_memories (memory_id, action_taken, context, result, emotional_valence, verification_status, event_time)
@@ -1908,12 +3331,168 @@ BEGIN
         END IF;
 
         ids := array_append(ids, new_id);
+        created_ids := array_append(created_ids, new_id);
     END LOOP;
 
+    PERFORM create_memory_nodes(created_ids);
+
     RETURN ids;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Batch create memories with precomputed embeddings given as a JSON array of arrays.
+-- Validates and converts the embeddings, then delegates to batch_create_memories_with_vectors().
+CREATE OR REPLACE FUNCTION batch_create_memories_with_embeddings(
+    p_type memory_type,
+    p_contents TEXT[],
+    p_embeddings JSONB,
+    p_importance FLOAT DEFAULT 0.5,
+    p_dedupe BOOLEAN DEFAULT FALSE
+)
+RETURNS UUID[] AS $$
+DECLARE
+    vectors vector[] := ARRAY[]::vector[];
+    n INT;
+    i INT;
+    expected_dim INT;
+    emb_json JSONB;
+    emb_arr FLOAT4[];
+BEGIN
+    n := COALESCE(array_length(p_contents, 1), 0);
+    IF n = 0 THEN
+        RETURN ARRAY[]::UUID[];
+    END IF;
+
+    IF p_embeddings IS NULL OR jsonb_typeof(p_embeddings) <> 'array' THEN
+        RAISE EXCEPTION 'embeddings must be a JSON array';
+    END IF;
+    IF jsonb_array_length(p_embeddings) <> n THEN
+        RAISE EXCEPTION 'contents and embeddings length mismatch';
+    END IF;
+
+    expected_dim := embedding_dimension();
+
+    FOR i IN 1..n LOOP
+        IF p_contents[i] IS NULL OR p_contents[i] = '' THEN
+            vectors := array_append(vectors, NULL::vector);
+            CONTINUE;
+        END IF;
+
+        emb_json := p_embeddings->(i - 1);
+        IF emb_json IS NULL OR jsonb_typeof(emb_json) <> 'array' THEN
+            RAISE EXCEPTION 'embedding % must be a JSON array', i;
+        END IF;
+
+        SELECT ARRAY_AGG(value::float4) INTO emb_arr
+        FROM jsonb_array_elements_text(emb_json) value;
+
+        IF COALESCE(array_length(emb_arr, 1), 0) <> expected_dim THEN
+            RAISE EXCEPTION 'embedding dimension mismatch: expected %, got %', expected_dim, COALESCE(array_length(emb_arr, 1), 0);
+        END IF;
+
+        vectors := array_append(vectors, (emb_arr::float4[])::vector);
+    END LOOP;
+
+    RETURN batch_create_memories_with_vectors(p_type, p_contents, vectors, p_importance, p_dedupe);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Staging area for CognitiveMemory.bulk_import(): rows arrive over binary COPY
+-- (asyncpg copy_records_to_table) and are moved by import_staged_memories().
+-- UNLOGGED: rows only live for the duration of one import transaction.
+CREATE UNLOGGED TABLE memory_import_staging (
+    batch_id UUID NOT NULL,
+    ord BIGINT NOT NULL,
+    type memory_type NOT NULL,
+    content TEXT NOT NULL,
+    embedding vector NOT NULL,
+    importance FLOAT,
+    PRIMARY KEY (batch_id, ord)
+);
+
+-- Move one staged batch into memories, the type tables and the graph, set-based:
+-- one INSERT per table and one Cypher UNWIND (create_memory_nodes). Defaults match
+-- batch_create_memories_with_embeddings(); semantic trust is the value sync_memory_trust()
+-- computes for a new row (confidence 0.8, no sources, no worldview influences).
+-- Staged rows are deleted. Returns rows imported.
+CREATE OR REPLACE FUNCTION import_staged_memories(p_batch_id UUID)
+RETURNS INT AS $$
+DECLARE
+    ids UUID[];
+BEGIN
+    WITH staged AS MATERIALIZED (
+        SELECT
+            gen_random_uuid() as id,
+            s.ord,
+            s.type as mtype,
+            s.content,
+            s.embedding,
+            COALESCE(s.importance, 0.5) as importance
+        FROM memory_import_staging s
+        WHERE s.batch_id = p_batch_id
+          AND s.content <> ''
+    ),
+    inserted AS (
+        INSERT INTO memories (id, type, content, embedding, importance, source_attribution, trust_level, trust_updated_at)
+        SELECT
+            st.id,
+            st.mtype,
+            st.content,
+            st.embedding,
+            st.importance,
+            jsonb_build_object(
+                'kind', CASE WHEN st.mtype = 'semantic' THEN 'unattributed' ELSE 'internal' END,
+                'observed_at', CURRENT_TIMESTAMP
+            ),
+            CASE
+                WHEN st.mtype = 'episodic' THEN 0.95
+                WHEN st.mtype = 'semantic' THEN compute_semantic_trust(0.8, '[]'::jsonb, 0.0)
+                ELSE 0.70
+            END,
+            CURRENT_TIMESTAMP
+        FROM staged st
+        ORDER BY st.ord
+        RETURNING id
+    ),
+    episodic AS (
+        INSERT INTO episodic_memories (memory_id, context, emotional_valence, event_time)
+        SELECT st.id, jsonb_build_object('type', 'bulk_import'), 0.0, CURRENT_TIMESTAMP
+        FROM staged st
+        WHERE st.mtype = 'episodic'
+    ),
+    semantic AS (
+        INSERT INTO semantic_memories (memory_id, confidence, last_validated, source_references)
+        SELECT st.id, 0.8, CURRENT_TIMESTAMP, '[]'::jsonb
+        FROM staged st
+        WHERE st.mtype = 'semantic'
+    ),
+    procedural AS (
+        INSERT INTO procedural_memories (memory_id, steps)
+        SELECT st.id, jsonb_build_object('steps', '[]'::jsonb)
+        FROM staged st
+        WHERE st.mtype = 'procedural'
+    ),
+    strategic AS (
+        INSERT INTO strategic_memories (memory_id, pattern_description, confidence_score)
+        SELECT st.id, st.content, 0.8
+        FROM staged st
+        WHERE st.mtype = 'strategic'
+    )
+    SELECT array_agg(st.id ORDER BY st.ord) INTO ids
+    FROM staged st;
+
+    DELETE FROM memory_import_staging WHERE batch_id = p_batch_id;
+
+    IF ids IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    PERFORM create_memory_nodes(ids);
+
+    RETURN array_length(ids, 1);
+END;
+$$ LANGUAGE plpgsql;
+
 -- Search similar memories
 CREATE OR REPLACE FUNCTION search_similar_memories(
     p_query_text TEXT,
@@ -1936,13 +3515,14 @@ BEGIN
 
     RETURN QUERY
     WITH candidates AS MATERIALIZED (
-        SELECT m.id, m.content, m.type, m.embedding, m.importance
+        SELECT m.id, m.content, m.type, m.embedding, COALESCE(ms.importance, m.importance) AS importance
         FROM memories m
+        LEFT JOIN memory_stats ms ON ms.memory_id = m.id
         WHERE m.status = 'active'
           AND m.embedding IS NOT NULL
           AND m.embedding <> zero_vec
           AND (p_memory_types IS NULL OR m.type = ANY(p_memory_types))
-          AND m.importance >= p_min_importance
+          AND COALESCE(ms.importance, m.importance) >= p_min_importance
     )
     SELECT
         c.id,
@@ -1967,6 +3547,8 @@ DECLARE
     sample_size INT;
     percentile FLOAT;
     threshold FLOAT;
+    est_rows FLOAT;
+    sample_pct FLOAT;
     zero_vec vector := array_fill(0.0::float, ARRAY[embedding_dimension()])::vector;
 BEGIN
     IF NOT EXISTS (
@@ -1993,22 +3575,36 @@ BEGIN
     );
     percentile := LEAST(0.95, GREATEST(0.5, percentile));
 
+    -- Block-sample about 4x the wanted rows (inactive rows are filtered out afterwards)
+    -- instead of sorting every active memory by random(); small tables are read whole.
+    -- The oversample is shuffled before the LIMIT, otherwise a full read (small or
+    -- unanalyzed table) would always keep the oldest heap blocks.
+    SELECT GREATEST(c.reltuples, 0) INTO est_rows
+    FROM pg_class c
+    WHERE c.oid = 'memories'::regclass;
+    sample_pct := LEAST(100.0, GREATEST(0.01, sample_size * 400.0 / GREATEST(est_rows, 1)));
+
     WITH sample AS (
         SELECT id, embedding
-        FROM memories
+        FROM memories TABLESAMPLE SYSTEM (sample_pct)
         WHERE status = 'active'
           AND embedding IS NOT NULL
           AND embedding <> zero_vec
         ORDER BY random()
         LIMIT sample_size
     ),
+    -- Nearest centroid per sampled memory (idx_clusters_centroid)
     sims AS (
-        SELECT s.id, MAX(1 - (mc.centroid_embedding <=> s.embedding)) AS best_sim
+        SELECT s.id, 1 - nn.dist AS best_sim
         FROM sample s
-        JOIN memory_clusters mc
-          ON mc.centroid_embedding IS NOT NULL
-         AND mc.centroid_embedding <> zero_vec
-        GROUP BY s.id
+        CROSS JOIN LATERAL (
+            SELECT mc.centroid_embedding <=> s.embedding AS dist
+            FROM memory_clusters mc
+            WHERE mc.centroid_embedding IS NOT NULL
+              AND mc.centroid_embedding <> zero_vec
+            ORDER BY mc.centroid_embedding <=> s.embedding
+            LIMIT 1
+        ) nn
     )
     SELECT percentile_cont(percentile) WITHIN GROUP (ORDER BY best_sim)
     INTO threshold
@@ -2057,42 +3653,133 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Assign memory to clusters based on similarity
-CREATE OR REPLACE FUNCTION assign_memory_to_clusters(
-    p_memory_id UUID,
-    p_max_clusters INT DEFAULT 3
-) RETURNS VOID AS $$
+-- Assign memory to clusters based on similarity
+CREATE OR REPLACE FUNCTION assign_memory_to_clusters(
+    p_memory_id UUID,
+    p_max_clusters INT DEFAULT 3
+) RETURNS VOID AS $$
+DECLARE
+    memory_embedding vector;
+    cluster_record RECORD;
+    similarity_threshold FLOAT := get_cluster_similarity_threshold();
+    assigned_count INT := 0;
+    zero_vec vector := array_fill(0, ARRAY[embedding_dimension()])::vector;
+BEGIN
+    SELECT embedding INTO memory_embedding
+    FROM memories WHERE id = p_memory_id;
+
+    -- Avoid NaNs from cosine distance when any side is the zero vector.
+    IF memory_embedding IS NULL OR memory_embedding = zero_vec THEN
+        RETURN;
+    END IF;
+
+    FOR cluster_record IN
+        SELECT id, 1 - (centroid_embedding <=> memory_embedding) as similarity
+        FROM memory_clusters
+        WHERE centroid_embedding IS NOT NULL
+          AND centroid_embedding <> zero_vec
+        ORDER BY centroid_embedding <=> memory_embedding
+        LIMIT 50
+    LOOP
+        IF cluster_record.similarity >= similarity_threshold AND assigned_count < p_max_clusters THEN
+            INSERT INTO memory_cluster_members (cluster_id, memory_id, membership_strength)
+            VALUES (cluster_record.id, p_memory_id, cluster_record.similarity)
+            ON CONFLICT DO NOTHING;
+
+            assigned_count := assigned_count + 1;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Set-based assign_memory_to_clusters for many memories: one nearest-centroid lookup per
+-- memory (LATERAL) and one INSERT, with the same threshold and per-memory cap.
+CREATE OR REPLACE FUNCTION assign_memories_to_clusters(
+    p_memory_ids UUID[],
+    p_max_clusters INT DEFAULT 3
+) RETURNS INT AS $$
+DECLARE
+    similarity_threshold FLOAT;
+    zero_vec vector := array_fill(0, ARRAY[embedding_dimension()])::vector;
+    assigned_count INT;
+BEGIN
+    IF COALESCE(array_length(p_memory_ids, 1), 0) = 0
+       OR NOT EXISTS (SELECT 1 FROM memory_clusters WHERE centroid_embedding IS NOT NULL) THEN
+        RETURN 0;
+    END IF;
+    similarity_threshold := get_cluster_similarity_threshold();
+
+    INSERT INTO memory_cluster_members (cluster_id, memory_id, membership_strength)
+    SELECT c.id, m.id, c.similarity
+    FROM memories m
+    CROSS JOIN LATERAL (
+        SELECT mc.id, 1 - (mc.centroid_embedding <=> m.embedding) as similarity
+        FROM memory_clusters mc
+        WHERE mc.centroid_embedding IS NOT NULL
+          AND mc.centroid_embedding <> zero_vec
+        ORDER BY mc.centroid_embedding <=> m.embedding
+        LIMIT p_max_clusters
+    ) c
+    WHERE m.id = ANY(p_memory_ids)
+      AND m.embedding IS NOT NULL
+      AND m.embedding <> zero_vec
+      AND c.similarity >= similarity_threshold
+    ON CONFLICT DO NOTHING;
+
+    GET DIAGNOSTICS assigned_count = ROW_COUNT;
+    RETURN assigned_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Queue memories for cluster assignment (no-op while no cluster has a centroid).
+CREATE OR REPLACE FUNCTION queue_cluster_assignment(p_memory_ids UUID[])
+RETURNS INT AS $$
+DECLARE
+    queued INT;
+BEGIN
+    IF COALESCE(array_length(p_memory_ids, 1), 0) = 0
+       OR NOT EXISTS (SELECT 1 FROM memory_clusters WHERE centroid_embedding IS NOT NULL) THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO cluster_assignment_queue (memory_id)
+    SELECT DISTINCT id FROM unnest(p_memory_ids) AS t(id)
+    WHERE id IS NOT NULL
+    ON CONFLICT (memory_id) DO NOTHING;
+
+    GET DIAGNOSTICS queued = ROW_COUNT;
+    RETURN queued;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Assign up to p_batch_size queued memories (oldest first) with assign_memories_to_clusters().
+-- Concurrent callers take disjoint batches (SKIP LOCKED). Returns the number of memories processed.
+CREATE OR REPLACE FUNCTION process_cluster_assignment_queue(p_batch_size INT DEFAULT 500)
+RETURNS INT AS $$
 DECLARE
-    memory_embedding vector;
-    cluster_record RECORD;
-    similarity_threshold FLOAT := get_cluster_similarity_threshold();
-    assigned_count INT := 0;
-    zero_vec vector := array_fill(0, ARRAY[embedding_dimension()])::vector;
+    batch_ids UUID[];
 BEGIN
-    SELECT embedding INTO memory_embedding
-    FROM memories WHERE id = p_memory_id;
+    WITH batch AS (
+        SELECT memory_id
+        FROM cluster_assignment_queue
+        ORDER BY queued_at
+        LIMIT GREATEST(0, COALESCE(p_batch_size, 0))
+        FOR UPDATE SKIP LOCKED
+    ),
+    taken AS (
+        DELETE FROM cluster_assignment_queue q
+        USING batch
+        WHERE q.memory_id = batch.memory_id
+        RETURNING q.memory_id
+    )
+    SELECT array_agg(memory_id) INTO batch_ids FROM taken;
 
-    -- Avoid NaNs from cosine distance when any side is the zero vector.
-    IF memory_embedding IS NULL OR memory_embedding = zero_vec THEN
-        RETURN;
+    IF batch_ids IS NULL THEN
+        RETURN 0;
     END IF;
 
-    FOR cluster_record IN
-        SELECT id, 1 - (centroid_embedding <=> memory_embedding) as similarity
-        FROM memory_clusters
-        WHERE centroid_embedding IS NOT NULL
-          AND centroid_embedding <> zero_vec
-        ORDER BY centroid_embedding <=> memory_embedding
-        LIMIT 50
-    LOOP
-        IF cluster_record.similarity >= similarity_threshold AND assigned_count < p_max_clusters THEN
-            INSERT INTO memory_cluster_members (cluster_id, memory_id, membership_strength)
-            VALUES (cluster_record.id, p_memory_id, cluster_record.similarity)
-            ON CONFLICT DO NOTHING;
-
-            assigned_count := assigned_count + 1;
-        END IF;
-    END LOOP;
+    PERFORM assign_memories_to_clusters(batch_ids);
+    RETURN array_length(batch_ids, 1);
 END;
 $$ LANGUAGE plpgsql;
 
@@ -2326,6 +4013,58 @@ CREATE OR REPLACE FUNCTION add_to_working_memory(
 	END;
 	$$ LANGUAGE plpgsql;
 
+-- Add many items to working memory with one batched embedding call.
+CREATE OR REPLACE FUNCTION add_to_working_memory_batch(
+    p_contents TEXT[],
+    p_expiry INTERVAL DEFAULT INTERVAL '1 hour',
+    p_importance FLOAT DEFAULT 0.3,
+    p_source_attribution JSONB DEFAULT NULL,
+    p_trust_level FLOAT DEFAULT NULL,
+    p_promote_to_long_term BOOLEAN DEFAULT FALSE
+) RETURNS UUID[] AS $$
+DECLARE
+    ids UUID[];
+    embeddings vector[];
+    normalized_source JSONB;
+    effective_trust FLOAT;
+BEGIN
+    IF p_contents IS NULL OR COALESCE(array_length(p_contents, 1), 0) = 0 THEN
+        RETURN ARRAY[]::UUID[];
+    END IF;
+
+    embeddings := get_embeddings(p_contents);
+
+    normalized_source := normalize_source_reference(p_source_attribution);
+    IF normalized_source = '{}'::jsonb THEN
+        normalized_source := jsonb_build_object('kind', 'internal', 'observed_at', CURRENT_TIMESTAMP);
+    END IF;
+    effective_trust := LEAST(1.0, GREATEST(0.0, COALESCE(p_trust_level, 0.8)));
+
+    -- Pre-assign ids so the result follows input order.
+    SELECT COALESCE(array_agg(gen_random_uuid() ORDER BY t.ord), ARRAY[]::UUID[]) INTO ids
+    FROM unnest(p_contents) WITH ORDINALITY AS t(content, ord)
+    WHERE t.content IS NOT NULL AND t.content <> '';
+
+    INSERT INTO working_memory (id, content, embedding, importance, source_attribution, trust_level, promote_to_long_term, expiry)
+    SELECT
+        ids[t.rn],
+        t.content,
+        embeddings[t.ord],
+        LEAST(1.0, GREATEST(0.0, COALESCE(p_importance, 0.3))),
+        normalized_source,
+        effective_trust,
+        COALESCE(p_promote_to_long_term, false),
+        CURRENT_TIMESTAMP + p_expiry
+    FROM (
+        SELECT u.content, u.ord::int AS ord, (row_number() OVER (ORDER BY u.ord))::int AS rn
+        FROM unnest(p_contents) WITH ORDINALITY AS u(content, ord)
+        WHERE u.content IS NOT NULL AND u.content <> ''
+    ) t;
+
+    RETURN ids;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Search working memory
 CREATE OR REPLACE FUNCTION search_working_memory(
     p_query_text TEXT,
@@ -2397,15 +4136,16 @@ $$ LANGUAGE plpgsql;
 
 CREATE VIEW memory_health AS
 SELECT
-    type,
+    m.type,
     COUNT(*) as total_memories,
-    AVG(importance) as avg_importance,
-    AVG(access_count) as avg_access_count,
-    COUNT(*) FILTER (WHERE last_accessed > CURRENT_TIMESTAMP - INTERVAL '1 day') as accessed_last_day,
-    AVG(calculate_relevance(importance, decay_rate, created_at, last_accessed)) as avg_relevance
-FROM memories
-WHERE status = 'active'
-GROUP BY type;
+    AVG(COALESCE(ms.importance, m.importance)) as avg_importance,
+    AVG(COALESCE(ms.access_count, 0)) as avg_access_count,
+    COUNT(*) FILTER (WHERE ms.last_accessed > CURRENT_TIMESTAMP - INTERVAL '1 day') as accessed_last_day,
+    AVG(calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed)) as avg_relevance
+FROM memories m
+LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+WHERE m.status = 'active'
+GROUP BY m.type;
 
 CREATE VIEW cluster_insights AS
 SELECT
@@ -2460,7 +4200,118 @@ COMMENT ON FUNCTION create_memory IS 'Creates a base memory record and correspon
 
 COMMENT ON FUNCTION link_memory_to_concept IS 'Links a memory to an abstract concept, creating the concept if needed. Updates both relational and graph layers.';
 
-COMMENT ON TABLE memory_neighborhoods IS 'Precomputed associative neighborhoods for each memory. Replaces live spreading activation for performance. Updated by background worker.';
+-- Bulk variant of link_memory_to_concept() for parallel (memory_id, concept, strength) arrays.
+-- Concepts are inserted with ON CONFLICT DO NOTHING (no row rewrite for existing names),
+-- memory_concepts rows are upserted only when the strength changes, and the graph is updated
+-- with two Cypher UNWINDs (concept nodes, then INSTANCE_OF edges). Duplicate pairs: last wins.
+-- Returns the concept id for each input position (NULL for NULL/empty concept names).
+CREATE OR REPLACE FUNCTION link_memories_to_concepts(
+    p_memory_ids UUID[],
+    p_concepts TEXT[],
+    p_strengths FLOAT[] DEFAULT NULL
+)
+RETURNS UUID[] AS $$
+DECLARE
+    n INT;
+    concept_ids UUID[];
+    node_list TEXT;
+    edge_list TEXT;
+BEGIN
+    n := COALESCE(array_length(p_memory_ids, 1), 0);
+    IF n = 0 THEN
+        RETURN ARRAY[]::UUID[];
+    END IF;
+    IF COALESCE(array_length(p_concepts, 1), 0) <> n
+       OR (p_strengths IS NOT NULL AND COALESCE(array_length(p_strengths, 1), 0) <> n) THEN
+        RAISE EXCEPTION 'link_memories_to_concepts: array length mismatch';
+    END IF;
+
+    INSERT INTO concepts (name)
+    SELECT DISTINCT c.name
+    FROM unnest(p_concepts) AS c(name)
+    WHERE NULLIF(c.name, '') IS NOT NULL
+    ON CONFLICT (name) DO NOTHING;
+
+    WITH pairs AS (
+        SELECT DISTINCT ON (l.memory_id, l.name)
+            l.memory_id,
+            l.name,
+            COALESCE(p_strengths[l.ord::int], 1.0) AS strength
+        FROM unnest(p_memory_ids, p_concepts) WITH ORDINALITY AS l(memory_id, name, ord)
+        WHERE l.memory_id IS NOT NULL AND NULLIF(l.name, '') IS NOT NULL
+        ORDER BY l.memory_id, l.name, l.ord DESC
+    )
+    INSERT INTO memory_concepts (memory_id, concept_id, strength)
+    SELECT p.memory_id, c.id, p.strength
+    FROM pairs p
+    JOIN concepts c ON c.name = p.name
+    ON CONFLICT (memory_id, concept_id)
+    DO UPDATE SET strength = EXCLUDED.strength
+    WHERE memory_concepts.strength IS DISTINCT FROM EXCLUDED.strength;
+
+    SELECT array_agg(c.id ORDER BY l.ord) INTO concept_ids
+    FROM unnest(p_concepts) WITH ORDINALITY AS l(name, ord)
+    LEFT JOIN concepts c ON c.name = NULLIF(l.name, '');
+
+    SELECT string_agg(cypher_map_literal(jsonb_build_object('name', d.name)), ', ')
+    INTO node_list
+    FROM (
+        SELECT DISTINCT c.name
+        FROM unnest(p_memory_ids, p_concepts) AS c(memory_id, name)
+        WHERE c.memory_id IS NOT NULL AND NULLIF(c.name, '') IS NOT NULL
+    ) d;
+
+    IF node_list IS NULL THEN
+        RETURN concept_ids;
+    END IF;
+
+    SELECT string_agg(
+        cypher_map_literal(jsonb_build_object(
+            'memory_id', e.memory_id::text,
+            'name', e.name,
+            'strength', e.strength
+        )),
+        ', '
+    )
+    INTO edge_list
+    FROM (
+        SELECT DISTINCT ON (l.memory_id, l.name)
+            l.memory_id,
+            l.name,
+            COALESCE(p_strengths[l.ord::int], 1.0) AS strength
+        FROM unnest(p_memory_ids, p_concepts) WITH ORDINALITY AS l(memory_id, name, ord)
+        WHERE l.memory_id IS NOT NULL AND NULLIF(l.name, '') IS NOT NULL
+        ORDER BY l.memory_id, l.name, l.ord DESC
+    ) e;
+
+    EXECUTE format(
+        'SELECT * FROM cypher(''memory_graph'', $q$
+            UNWIND [%s] AS item
+            MERGE (c:ConceptNode {name: item.name})
+            RETURN count(c)
+        $q$) as (result agtype)',
+        node_list
+    );
+
+    EXECUTE format(
+        'SELECT * FROM cypher(''memory_graph'', $q$
+            UNWIND [%s] AS item
+            MATCH (m:MemoryNode {memory_id: item.memory_id}), (c:ConceptNode {name: item.name})
+            MERGE (m)-[r:INSTANCE_OF]->(c)
+            SET r.strength = item.strength
+            RETURN count(r)
+        $q$) as (result agtype)',
+        edge_list
+    );
+
+    RETURN concept_ids;
+END;
+$$ LANGUAGE plpgsql;
+COMMENT ON FUNCTION link_memories_to_concepts IS 'Bulk link_memory_to_concept(): links many (memory, concept) pairs with set-based upserts and one graph UNWIND per step.';
+
+COMMENT ON TABLE memory_neighborhoods IS 'Neighborhood recompute state (staleness, computed_at) for each memory; the neighbors are rows in memory_neighbor_edges. Updated by background worker.';
+
+COMMENT ON TABLE memory_neighbor_edges IS 'Normalized neighborhood edges (memory_id, neighbor_id, weight) read by fast_recall and cross_join_query. memory_neighborhoods keeps staleness.';
 
 COMMENT ON TABLE episodes IS 'Temporal segmentation of memories into coherent episodes. Auto-populated by trigger on memory insert.';
 
@@ -2680,10 +4531,17 @@ CREATE TABLE maintenance_config (
 
 INSERT INTO maintenance_config (key, value, description) VALUES
     ('maintenance_interval_seconds', 60, 'Seconds between subconscious maintenance ticks'),
-    ('neighborhood_batch_size', 10, 'How many stale neighborhoods to recompute per tick'),
+    ('neighborhood_batch_size', 50, 'Stale-neighborhood batch recomputed inside each tick; first batch of a worker drain'),
+    ('neighborhood_max_batch_size', 5000, 'Upper bound for an adaptive worker neighborhood batch'),
+    ('neighborhood_time_budget_ms', 1000, 'Milliseconds per worker drain spent recomputing stale neighborhoods (one committed batch per call)'),
     ('embedding_cache_older_than_days', 7, 'Days before embedding_cache entries are eligible for cleanup'),
     ('working_memory_promote_min_importance', 0.75, 'Working-memory items above this importance are promoted on expiry'),
-    ('working_memory_promote_min_accesses', 3, 'Working-memory items accessed >= this count are promoted on expiry');
+    ('working_memory_promote_min_accesses', 3, 'Working-memory items accessed >= this count are promoted on expiry'),
+    ('relevance_batch_size', 500, 'How many stored memory relevance scores to refresh per tick'),
+    ('relevance_max_age_minutes', 60, 'Minutes before a stored relevance score is refreshed even if the memory is unchanged'),
+    ('recall_trace_retention_days', 7, 'Delete recall_trace rows older than this many days'),
+    ('dedupe_similarity_threshold', 0.97, 'Opt-in dedupe on create: a same-type memory at or above this cosine similarity absorbs the new one'),
+    ('cluster_assignment_batch_size', 500, 'How many queued memories to assign to clusters per tick');
 
 -- ============================================================================
 -- CLUSTERING CONFIGURATION
@@ -3227,6 +5085,53 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Buffer recall accesses (one row per id) instead of updating the wide memories rows.
+CREATE OR REPLACE FUNCTION record_memory_access(p_ids UUID[])
+RETURNS INT AS $$
+DECLARE
+    recorded INT;
+BEGIN
+    IF p_ids IS NULL OR array_length(p_ids, 1) IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO memory_access_log (memory_id)
+    SELECT id FROM unnest(p_ids) AS t(id)
+    WHERE id IS NOT NULL;
+
+    GET DIAGNOSTICS recorded = ROW_COUNT;
+    RETURN recorded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fold buffered accesses into memory_stats: one UPDATE per memory per flush, so the
+-- trg_importance_on_access boost is applied once per tick however often it was recalled.
+-- The wide memories rows are not written.
+CREATE OR REPLACE FUNCTION flush_memory_access_log()
+RETURNS INT AS $$
+DECLARE
+    flushed INT;
+BEGIN
+    WITH drained AS (
+        DELETE FROM memory_access_log
+        RETURNING memory_id, accessed_at
+    ),
+    agg AS (
+        SELECT memory_id, COUNT(*)::int AS hits, MAX(accessed_at) AS last_at
+        FROM drained
+        GROUP BY memory_id
+    )
+    UPDATE memory_stats ms
+    SET access_count = ms.access_count + agg.hits,
+        last_accessed = GREATEST(COALESCE(ms.last_accessed, agg.last_at), agg.last_at)
+    FROM agg
+    WHERE ms.memory_id = agg.memory_id;
+
+    GET DIAGNOSTICS flushed = ROW_COUNT;
+    RETURN flushed;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Run a single subconscious maintenance tick: consolidation + pruning + indexing upkeep.
 CREATE OR REPLACE FUNCTION run_subconscious_maintenance(p_params JSONB DEFAULT '{}'::jsonb)
 RETURNS JSONB AS $$
@@ -3239,6 +5144,17 @@ DECLARE
     wm_stats JSONB;
     recomputed INT;
     cache_deleted INT;
+    recall_cache_deleted INT;
+    relevance_batch INT;
+    relevance_max_age FLOAT;
+    relevance_refreshed INT;
+    trace_days INT;
+    trace_deleted INT;
+    accesses_flushed INT;
+    cluster_batch INT;
+    clusters_assigned INT;
+    versions_compacted INT;
+    recall_modes_flushed INT;
 BEGIN
     got_lock := pg_try_advisory_lock(hashtext('agi_subconscious_maintenance'));
     IF NOT got_lock THEN
@@ -3258,17 +5174,46 @@ BEGIN
     neighborhood_batch := COALESCE(
         NULLIF(p_params->>'neighborhood_batch_size', '')::int,
         (SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size')::int,
-        10
+        50
     );
     cache_days := COALESCE(
         NULLIF(p_params->>'embedding_cache_older_than_days', '')::int,
         (SELECT value FROM maintenance_config WHERE key = 'embedding_cache_older_than_days')::int,
         7
     );
+    relevance_batch := COALESCE(
+        NULLIF(p_params->>'relevance_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_batch_size')::int,
+        500
+    );
+    relevance_max_age := COALESCE(
+        NULLIF(p_params->>'relevance_max_age_minutes', '')::float,
+        (SELECT value FROM maintenance_config WHERE key = 'relevance_max_age_minutes'),
+        60
+    );
+    trace_days := COALESCE(
+        NULLIF(p_params->>'recall_trace_retention_days', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'recall_trace_retention_days')::int,
+        7
+    );
+    cluster_batch := COALESCE(
+        NULLIF(p_params->>'cluster_assignment_batch_size', '')::int,
+        (SELECT value FROM maintenance_config WHERE key = 'cluster_assignment_batch_size')::int,
+        500
+    );
 
+    accesses_flushed := flush_memory_access_log();
     wm_stats := cleanup_working_memory_with_stats(min_imp, min_acc);
+    -- One batch: claimed rows stay locked until the tick commits. The time-budgeted drain runs
+    -- from the worker, one committed batch_recompute_neighborhoods() call at a time.
     recomputed := batch_recompute_neighborhoods(neighborhood_batch);
+    clusters_assigned := process_cluster_assignment_queue(cluster_batch);
     cache_deleted := cleanup_embedding_cache((cache_days || ' days')::interval);
+    recall_cache_deleted := cleanup_recall_cache();
+    relevance_refreshed := refresh_relevance_scores(relevance_batch, relevance_max_age);
+    trace_deleted := cleanup_recall_trace((trace_days || ' days')::interval);
+    versions_compacted := compact_state_versions();
+    recall_modes_flushed := flush_recall_mode_log();
 
     UPDATE maintenance_state
     SET last_maintenance_at = CURRENT_TIMESTAMP,
@@ -3299,6 +5244,13 @@ BEGIN
         'working_memory', wm_stats,
         'neighborhoods_recomputed', COALESCE(recomputed, 0),
         'embedding_cache_deleted', COALESCE(cache_deleted, 0),
+        'recall_cache_deleted', COALESCE(recall_cache_deleted, 0),
+        'relevance_refreshed', COALESCE(relevance_refreshed, 0),
+        'recall_trace_deleted', COALESCE(trace_deleted, 0),
+        'memory_accesses_flushed', COALESCE(accesses_flushed, 0),
+        'cluster_assignments_processed', COALESCE(clusters_assigned, 0),
+        'state_versions_compacted', COALESCE(versions_compacted, 0),
+        'recall_modes_flushed', COALESCE(recall_modes_flushed, 0),
         'ran_at', CURRENT_TIMESTAMP
     );
 EXCEPTION
@@ -4214,97 +6166,392 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Current affective state is stored in heartbeat_state (short-term "working memory").
-CREATE OR REPLACE FUNCTION get_current_affective_state()
+-- Current affective state is stored in heartbeat_state (short-term "working memory").
+CREATE OR REPLACE FUNCTION get_current_affective_state()
+RETURNS JSONB AS $$
+DECLARE
+    st RECORD;
+    fallback JSONB;
+BEGIN
+    SELECT * INTO st FROM heartbeat_state WHERE id = 1;
+
+    IF st.affective_state IS NOT NULL AND st.affective_state <> '{}'::jsonb THEN
+        RETURN st.affective_state;
+    END IF;
+
+    -- Fallback to last logged emotion if a legacy DB has no state yet.
+    SELECT jsonb_build_object(
+        'valence', valence,
+        'arousal', arousal,
+        'dominance', dominance,
+        'primary_emotion', primary_emotion,
+        'intensity', intensity,
+        'recorded_at', recorded_at,
+        'source', 'history_fallback'
+    )
+    INTO fallback
+    FROM current_emotional_state;
+
+    RETURN COALESCE(fallback, '{}'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RETURN '{}'::jsonb;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION set_current_affective_state(p_state JSONB)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE heartbeat_state
+    SET affective_state = COALESCE(p_state, '{}'::jsonb),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drives at or near their urgency threshold (context for turns / hydration)
+CREATE OR REPLACE FUNCTION get_urgent_drives_context()
+RETURNS JSONB AS $$
+BEGIN
+    RETURN COALESCE((
+        SELECT jsonb_agg(
+            jsonb_build_object(
+                'name', name,
+                'level', current_level,
+                'urgency_ratio', current_level / NULLIF(urgency_threshold, 0)
+            )
+            ORDER BY current_level DESC
+        )
+        FROM drives
+        WHERE current_level >= urgency_threshold * 0.8
+    ), '[]'::jsonb);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Extend gather_turn_context with emotional_state
+CREATE OR REPLACE FUNCTION gather_turn_context()
+RETURNS JSONB AS $$
+DECLARE
+    state_record RECORD;
+    action_costs JSONB;
+BEGIN
+    SELECT * INTO state_record FROM heartbeat_state WHERE id = 1;
+
+    SELECT jsonb_object_agg(
+        regexp_replace(key, '^cost_', ''),
+        value
+    ) INTO action_costs
+    FROM heartbeat_config
+    WHERE key LIKE 'cost_%';
+
+    RETURN jsonb_build_object(
+        'agent', get_agent_profile_context(),
+        'environment', get_environment_snapshot(),
+        'goals', get_goals_snapshot(),
+        'recent_memories', get_recent_context(5),
+        'identity', get_identity_context(),
+        'worldview', get_worldview_context(),
+        'self_model', get_self_model_context(25),
+        'narrative', get_narrative_context(),
+        'energy', jsonb_build_object(
+            'current', state_record.current_energy,
+            'max', (SELECT value FROM heartbeat_config WHERE key = 'max_energy')
+        ),
+        'action_costs', action_costs,
+        'heartbeat_number', state_record.heartbeat_count,
+        'urgent_drives', get_urgent_drives_context(),
+        'emotional_state', get_current_affective_state()
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- TURN CONTEXT SNAPSHOT CACHE (versioned)
+-- ============================================================================
+
+-- Committed state versions, one counter per name ('turn_context', ...). Writers append a row
+-- per statement (no shared row to lock); a version is the sum of the rows visible to the reader,
+-- so it moves only once the writer commits, and a reader that reads the version before the data
+-- never caches data older than the version it stores it under.
+-- fold_state_version() folds a name's committed rows into one without changing its sum; readers
+-- call it once a name has more than state_version_fold_threshold() rows, so reading a version
+-- costs a bounded index scan however many writes landed since the last maintenance tick.
+CREATE TABLE IF NOT EXISTS state_version_log (
+    id BIGSERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    bumps BIGINT NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_state_version_log_name ON state_version_log (name);
+
+CREATE OR REPLACE FUNCTION state_version_fold_threshold()
+RETURNS INT AS $$
+    SELECT 64;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Fold p_name's visible rows into one. Serialized per name with a transaction-level advisory
+-- lock (returns -1 without folding when another session holds it); uncommitted rows of other
+-- writers are not visible to the DELETE and stay as they are.
+CREATE OR REPLACE FUNCTION fold_state_version(p_name TEXT)
+RETURNS INT AS $$
+DECLARE
+    folded INT;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('state_version_fold'), hashtext(p_name)) THEN
+        RETURN -1;
+    END IF;
+
+    WITH gone AS (
+        DELETE FROM state_version_log
+        WHERE name = p_name
+        RETURNING bumps
+    ),
+    kept AS (
+        INSERT INTO state_version_log (name, bumps)
+        SELECT p_name, SUM(bumps)::bigint FROM gone HAVING COUNT(*) > 0
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM gone) - (SELECT COUNT(*) FROM kept) INTO folded;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Current version of p_name. Past the fold threshold the reader folds the name first (skipped in
+-- read-only transactions or while another session is folding it).
+CREATE OR REPLACE FUNCTION state_version(p_name TEXT)
+RETURNS BIGINT AS $$
+DECLARE
+    n_rows INT;
+BEGIN
+    SELECT COUNT(*) INTO n_rows
+    FROM (
+        SELECT 1 FROM state_version_log
+        WHERE name = p_name
+        LIMIT state_version_fold_threshold() + 1
+    ) s;
+
+    IF n_rows > state_version_fold_threshold()
+       AND NOT current_setting('transaction_read_only')::boolean
+    THEN
+        PERFORM fold_state_version(p_name);
+    END IF;
+
+    RETURN (SELECT COALESCE(SUM(bumps), 0)::bigint FROM state_version_log WHERE name = p_name);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level trigger function; TG_ARGV[0] names the version to bump.
+CREATE OR REPLACE FUNCTION bump_state_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO state_version_log (name) VALUES (TG_ARGV[0]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Maintenance: fold every name that has more than one row (already-folded names are not rewritten).
+CREATE OR REPLACE FUNCTION compact_state_versions()
+RETURNS INT AS $$
+DECLARE
+    folded INT := 0;
+    n TEXT;
+BEGIN
+    FOR n IN
+        SELECT name FROM state_version_log GROUP BY name HAVING COUNT(*) > 1
+    LOOP
+        folded := folded + GREATEST(fold_state_version(n), 0);
+    END LOOP;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transient snapshot cache (fast writes, lost on crash)
+CREATE UNLOGGED TABLE IF NOT EXISTS turn_context_cache (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),  -- Singleton pattern
+    version BIGINT NOT NULL,
+    snapshot JSONB NOT NULL,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- State version for the turn context: bumped by writes to the tables gather_turn_context()
+-- reads; a cached snapshot is reused while the version is unchanged.
+CREATE OR REPLACE FUNCTION turn_context_version()
+RETURNS BIGINT AS $$
+    SELECT state_version('turn_context');
+$$ LANGUAGE sql;
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_goals ON goals;
+CREATE TRIGGER trg_turn_context_version_goals
+    AFTER INSERT OR UPDATE OR DELETE ON goals
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_drives ON drives;
+CREATE TRIGGER trg_turn_context_version_drives
+    AFTER INSERT OR UPDATE OR DELETE ON drives
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_identity ON identity_aspects;
+CREATE TRIGGER trg_turn_context_version_identity
+    AFTER INSERT OR UPDATE OR DELETE ON identity_aspects
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_worldview ON worldview_primitives;
+CREATE TRIGGER trg_turn_context_version_worldview
+    AFTER INSERT OR UPDATE OR DELETE ON worldview_primitives
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+DROP TRIGGER IF EXISTS trg_turn_context_version_heartbeat ON heartbeat_state;
+CREATE TRIGGER trg_turn_context_version_heartbeat
+    AFTER INSERT OR UPDATE OR DELETE ON heartbeat_state
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+-- Importance (and access bookkeeping, which lives in memory_stats) does not change the turn context.
+DROP TRIGGER IF EXISTS trg_turn_context_version_memories ON memories;
+CREATE TRIGGER trg_turn_context_version_memories
+    AFTER INSERT OR DELETE OR UPDATE OF content, status, trust_level, source_attribution ON memories
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('turn_context');
+
+-- Cached gather_turn_context(): recomputed when the state version changes or the snapshot is
+-- older than p_max_age_seconds (graph-backed sections like self_model/narrative are not versioned).
+-- The environment section is time-dependent and always computed fresh.
+CREATE OR REPLACE FUNCTION get_turn_context_snapshot(p_max_age_seconds FLOAT DEFAULT 60)
 RETURNS JSONB AS $$
 DECLARE
-    st RECORD;
-    fallback JSONB;
+    current_version BIGINT;
+    cached RECORD;
+    snap JSONB;
 BEGIN
-    SELECT * INTO st FROM heartbeat_state WHERE id = 1;
+    current_version := turn_context_version();
 
-    IF st.affective_state IS NOT NULL AND st.affective_state <> '{}'::jsonb THEN
-        RETURN st.affective_state;
+    SELECT * INTO cached FROM turn_context_cache WHERE id = 1;
+
+    IF FOUND
+       AND cached.version = current_version
+       AND cached.computed_at > clock_timestamp() - make_interval(secs => GREATEST(0, COALESCE(p_max_age_seconds, 0)))
+    THEN
+        snap := cached.snapshot;
+    ELSE
+        snap := gather_turn_context();
+
+        INSERT INTO turn_context_cache (id, version, snapshot, computed_at)
+        VALUES (1, current_version, snap, clock_timestamp())
+        ON CONFLICT (id) DO UPDATE
+        SET version = EXCLUDED.version,
+            snapshot = EXCLUDED.snapshot,
+            computed_at = EXCLUDED.computed_at
+        WHERE turn_context_cache.version <= EXCLUDED.version;
     END IF;
 
-    -- Fallback to last logged emotion if a legacy DB has no state yet.
-    SELECT jsonb_build_object(
-        'valence', valence,
-        'arousal', arousal,
-        'dominance', dominance,
-        'primary_emotion', primary_emotion,
-        'intensity', intensity,
-        'recorded_at', recorded_at,
-        'source', 'history_fallback'
-    )
-    INTO fallback
-    FROM current_emotional_state;
+    RETURN snap || jsonb_build_object(
+        'environment', get_environment_snapshot(),
+        'context_version', current_version
+    );
+END;
+$$ LANGUAGE plpgsql;
 
-    RETURN COALESCE(fallback, '{}'::jsonb);
-EXCEPTION
-    WHEN OTHERS THEN
-        RETURN '{}'::jsonb;
+-- ============================================================================
+-- RECALL RESULT CACHE (write-watermark invalidation)
+-- ============================================================================
+
+-- Shared recall results keyed by recall_cache_key() (fast writes, lost on crash)
+CREATE UNLOGGED TABLE IF NOT EXISTS recall_cache (
+    cache_key TEXT PRIMARY KEY,
+    write_version BIGINT NOT NULL,
+    results JSONB NOT NULL,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Global memory-write watermark (state_version_log, so it moves when the writer commits).
+-- Bumped once per statement that can change recall results; cached recalls are served only
+-- while the watermark is unchanged. Callers read it before recalling.
+CREATE OR REPLACE FUNCTION memory_write_version()
+RETURNS BIGINT AS $$
+    SELECT state_version('memory_write');
+$$ LANGUAGE sql;
+
+-- Access bookkeeping (memory_stats) does not invalidate cached recalls.
+DROP TRIGGER IF EXISTS trg_memory_write_version_memories ON memories;
+CREATE TRIGGER trg_memory_write_version_memories
+    AFTER INSERT OR DELETE OR UPDATE OF
+        content, embedding, status, type, importance, trust_level, source_attribution, decay_rate, created_at
+    ON memories
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('memory_write');
+
+-- A recompute always rewrites the edges in the same transaction that marks the neighborhood
+-- fresh, and staleness only changes through memories updates, so edge writes cover both.
+DROP TRIGGER IF EXISTS trg_memory_write_version_edges ON memory_neighbor_edges;
+CREATE TRIGGER trg_memory_write_version_edges
+    AFTER INSERT OR UPDATE OR DELETE ON memory_neighbor_edges
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_state_version('memory_write');
+
+-- Cache key for a recall: normalized query text (trimmed, whitespace-collapsed, lowercased)
+-- plus the recall parameters (limit, filters, mode) as canonical JSONB text.
+CREATE OR REPLACE FUNCTION recall_cache_key(p_query_text TEXT, p_params JSONB DEFAULT '{}'::jsonb)
+RETURNS TEXT AS $$
+    SELECT encode(
+        sha256(convert_to(
+            lower(regexp_replace(btrim(COALESCE(p_query_text, '')), '\s+', ' ', 'g'))
+                || E'\x1f' || COALESCE(p_params, '{}'::jsonb)::text,
+            'UTF8'
+        )),
+        'hex'
+    );
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Cached results for p_cache_key, or NULL if missing, written before the current
+-- watermark, or older than p_max_age_seconds (time-dependent relevance still drifts).
+CREATE OR REPLACE FUNCTION get_cached_recall(p_cache_key TEXT, p_max_age_seconds FLOAT DEFAULT 300)
+RETURNS JSONB AS $$
+DECLARE
+    current_version BIGINT;
+BEGIN
+    current_version := memory_write_version();
+    RETURN (
+        SELECT rc.results
+        FROM recall_cache rc
+        WHERE rc.cache_key = p_cache_key
+          AND rc.write_version = current_version
+          AND rc.computed_at > clock_timestamp() - make_interval(secs => GREATEST(0, COALESCE(p_max_age_seconds, 0)))
+    );
 END;
-$$ LANGUAGE plpgsql STABLE;
+$$ LANGUAGE plpgsql;
 
-CREATE OR REPLACE FUNCTION set_current_affective_state(p_state JSONB)
+-- Store results computed while the watermark was p_write_version (read it BEFORE recalling,
+-- so a concurrent write can only make the entry look older than it is, never newer).
+CREATE OR REPLACE FUNCTION put_cached_recall(p_cache_key TEXT, p_write_version BIGINT, p_results JSONB)
 RETURNS VOID AS $$
 BEGIN
-    UPDATE heartbeat_state
-    SET affective_state = COALESCE(p_state, '{}'::jsonb),
-        updated_at = CURRENT_TIMESTAMP
-    WHERE id = 1;
+    INSERT INTO recall_cache (cache_key, write_version, results, computed_at)
+    VALUES (p_cache_key, p_write_version, COALESCE(p_results, '[]'::jsonb), clock_timestamp())
+    ON CONFLICT (cache_key) DO UPDATE
+    SET write_version = EXCLUDED.write_version,
+        results = EXCLUDED.results,
+        computed_at = EXCLUDED.computed_at
+    WHERE recall_cache.write_version <= EXCLUDED.write_version;
 END;
 $$ LANGUAGE plpgsql;
 
--- Extend gather_turn_context with emotional_state
-CREATE OR REPLACE FUNCTION gather_turn_context()
-RETURNS JSONB AS $$
+-- Drop entries that can no longer be served.
+CREATE OR REPLACE FUNCTION cleanup_recall_cache(p_max_age_seconds FLOAT DEFAULT 300)
+RETURNS INT AS $$
 DECLARE
-    state_record RECORD;
-    action_costs JSONB;
+    deleted_count INT;
+    current_version BIGINT;
 BEGIN
-    SELECT * INTO state_record FROM heartbeat_state WHERE id = 1;
-
-    SELECT jsonb_object_agg(
-        regexp_replace(key, '^cost_', ''),
-        value
-    ) INTO action_costs
-    FROM heartbeat_config
-    WHERE key LIKE 'cost_%';
+    current_version := memory_write_version();
+    DELETE FROM recall_cache
+    WHERE write_version < current_version
+       OR computed_at < clock_timestamp() - make_interval(secs => GREATEST(0, COALESCE(p_max_age_seconds, 0)));
 
-    RETURN jsonb_build_object(
-        'agent', get_agent_profile_context(),
-        'environment', get_environment_snapshot(),
-        'goals', get_goals_snapshot(),
-        'recent_memories', get_recent_context(5),
-        'identity', get_identity_context(),
-        'worldview', get_worldview_context(),
-        'self_model', get_self_model_context(25),
-        'narrative', get_narrative_context(),
-        'energy', jsonb_build_object(
-            'current', state_record.current_energy,
-            'max', (SELECT value FROM heartbeat_config WHERE key = 'max_energy')
-        ),
-        'action_costs', action_costs,
-        'heartbeat_number', state_record.heartbeat_count,
-        'urgent_drives', (
-            SELECT COALESCE(
-                jsonb_agg(
-                    jsonb_build_object(
-                        'name', name,
-                        'level', current_level,
-                        'urgency_ratio', current_level / NULLIF(urgency_threshold, 0)
-                    )
-                    ORDER BY current_level DESC
-                ),
-                '[]'::jsonb
-            )
-            FROM drives
-            WHERE current_level >= urgency_threshold * 0.8
-        ),
-        'emotional_state', get_current_affective_state()
-    );
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    RETURN deleted_count;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -4546,65 +6793,138 @@ CREATE OR REPLACE FUNCTION recompute_neighborhood(
     p_min_similarity FLOAT DEFAULT 0.35  -- Lowered from 0.5; revisit when memory count > 200
 )
 RETURNS VOID AS $$
+BEGIN
+    PERFORM recompute_neighborhoods(ARRAY[p_memory_id], p_neighbor_count, p_min_similarity);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Set-based recompute: one LATERAL kNN statement writes the edges for every id in the batch.
+-- Ids that are missing, inactive or have a zero embedding are marked fresh without edges
+-- so they do not sit at the head of the stale queue forever.
+CREATE OR REPLACE FUNCTION recompute_neighborhoods(
+    p_memory_ids UUID[],
+    p_neighbor_count INT DEFAULT 20,
+    p_min_similarity FLOAT DEFAULT 0.35
+)
+RETURNS INT AS $$
 DECLARE
-    memory_emb vector;
     zero_vec vector;
-    neighbors JSONB;
+    valid_ids UUID[];
 BEGIN
-    SELECT embedding INTO memory_emb
-    FROM memories
-    WHERE id = p_memory_id AND status = 'active';
+    IF p_memory_ids IS NULL OR COALESCE(array_length(p_memory_ids, 1), 0) = 0 THEN
+        RETURN 0;
+    END IF;
 
     zero_vec := array_fill(0, ARRAY[embedding_dimension()])::vector;
 
     -- Avoid NaNs from cosine distance when any side is the zero vector.
-    IF memory_emb IS NULL OR memory_emb = zero_vec THEN
-        RETURN;
-    END IF;
-
-    SELECT jsonb_object_agg(id::text, round(similarity::numeric, 4))
-    INTO neighbors
-    FROM (
-        SELECT m.id, 1 - (m.embedding <=> memory_emb) as similarity
+    SELECT COALESCE(array_agg(id), ARRAY[]::UUID[]) INTO valid_ids
+    FROM memories
+    WHERE id = ANY(p_memory_ids)
+      AND status = 'active'
+      AND embedding IS NOT NULL
+      AND embedding <> zero_vec;
+
+    DELETE FROM memory_neighbor_edges WHERE memory_id = ANY(valid_ids);
+
+    INSERT INTO memory_neighbor_edges (memory_id, neighbor_id, weight)
+    SELECT src.id, nb.id, round(nb.similarity::numeric, 4)::real
+    FROM memories src
+    CROSS JOIN LATERAL (
+        SELECT m.id, 1 - (m.embedding <=> src.embedding) as similarity
         FROM memories m
-        WHERE m.id != p_memory_id
+        WHERE m.id != src.id
           AND m.status = 'active'
           AND m.embedding IS NOT NULL
           AND m.embedding <> zero_vec
-        ORDER BY m.embedding <=> memory_emb
+        ORDER BY m.embedding <=> src.embedding
         LIMIT p_neighbor_count
-    ) sub
-    WHERE similarity >= p_min_similarity;
+    ) nb
+    WHERE src.id = ANY(valid_ids)
+      AND nb.similarity >= p_min_similarity;
 
-    INSERT INTO memory_neighborhoods (memory_id, neighbors, computed_at, is_stale)
-    VALUES (p_memory_id, COALESCE(neighbors, '{}'::jsonb), CURRENT_TIMESTAMP, FALSE)
+    INSERT INTO memory_neighborhoods (memory_id, computed_at, is_stale)
+    SELECT v.id, CURRENT_TIMESTAMP, FALSE
+    FROM unnest(valid_ids) AS v(id)
     ON CONFLICT (memory_id) DO UPDATE SET
-        neighbors = EXCLUDED.neighbors,
         computed_at = EXCLUDED.computed_at,
         is_stale = FALSE;
+
+    UPDATE memory_neighborhoods
+    SET is_stale = FALSE,
+        computed_at = CURRENT_TIMESTAMP
+    WHERE memory_id = ANY(p_memory_ids)
+      AND NOT (memory_id = ANY(valid_ids))
+      AND is_stale = TRUE;
+
+    RETURN (SELECT COUNT(DISTINCT id)::int FROM unnest(p_memory_ids) AS t(id) WHERE id IS NOT NULL);
 END;
 $$ LANGUAGE plpgsql;
 
+-- Claims up to p_batch_size stale rows with FOR UPDATE SKIP LOCKED, so concurrent
+-- workers split the stale set instead of recomputing the same memories. Claimed rows stay
+-- locked until the caller commits: call it in its own short transaction.
 CREATE OR REPLACE FUNCTION batch_recompute_neighborhoods(
     p_batch_size INT DEFAULT 50
 )
 RETURNS INT AS $$
 DECLARE
-    recomputed INT := 0;
-    mem_id UUID;
+    claimed UUID[];
 BEGIN
-    FOR mem_id IN
+    SELECT array_agg(memory_id) INTO claimed
+    FROM (
         SELECT memory_id
         FROM memory_neighborhoods
         WHERE is_stale = TRUE
         ORDER BY computed_at ASC NULLS FIRST
         LIMIT p_batch_size
-    LOOP
-        PERFORM recompute_neighborhood(mem_id);
-        recomputed := recomputed + 1;
-    END LOOP;
+        FOR UPDATE SKIP LOCKED
+    ) s;
+
+    RETURN recompute_neighborhoods(claimed);
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- ============================================================================
+-- STORED RELEVANCE SCORES
+-- ============================================================================
+
+-- Refresh memory_stats.relevance_score for up to p_batch_size active memories that have no score,
+-- were modified since it was computed, or whose score is older than p_max_age_minutes.
+-- Only the narrow memory_stats rows are written; memories is read, not updated.
+CREATE OR REPLACE FUNCTION refresh_relevance_scores(
+    p_batch_size INT DEFAULT 500,
+    p_max_age_minutes FLOAT DEFAULT 60
+)
+RETURNS INT AS $$
+DECLARE
+    refreshed INT;
+BEGIN
+    WITH due AS (
+        SELECT
+            m.id,
+            calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) AS score
+        FROM memories m
+        LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+        WHERE m.status = 'active'
+          AND (
+              ms.relevance_computed_at IS NULL
+              OR ms.relevance_computed_at < m.updated_at
+              OR ms.relevance_computed_at < CURRENT_TIMESTAMP - make_interval(secs => GREATEST(0, COALESCE(p_max_age_minutes, 0)) * 60)
+          )
+        ORDER BY ms.relevance_computed_at ASC NULLS FIRST
+        LIMIT GREATEST(0, COALESCE(p_batch_size, 0))
+    )
+    INSERT INTO memory_stats (memory_id, relevance_score, relevance_computed_at)
+    SELECT due.id, due.score, CURRENT_TIMESTAMP
+    FROM due
+    ON CONFLICT (memory_id) DO UPDATE SET
+        relevance_score = EXCLUDED.relevance_score,
+        relevance_computed_at = EXCLUDED.relevance_computed_at;
 
-    RETURN recomputed;
+    GET DIAGNOSTICS refreshed = ROW_COUNT;
+    RETURN refreshed;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -4698,6 +7018,64 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Bulk variant of discover_relationship(): merges all edges through create_memory_relationships()
+-- and records every discovery in one INSERT. Arrays are parallel; confidences default to 0.8.
+CREATE OR REPLACE FUNCTION discover_relationships(
+    p_from_ids UUID[],
+    p_to_ids UUID[],
+    p_relationship_types graph_edge_type[],
+    p_confidences FLOAT[] DEFAULT NULL,
+    p_discovered_by TEXT DEFAULT 'reflection',
+    p_heartbeat_id UUID DEFAULT NULL,
+    p_discovery_contexts TEXT[] DEFAULT NULL
+)
+RETURNS INT AS $$
+DECLARE
+    n INT;
+    props JSONB[];
+BEGIN
+    n := COALESCE(array_length(p_from_ids, 1), 0);
+    IF n = 0 THEN
+        RETURN 0;
+    END IF;
+    IF COALESCE(array_length(p_to_ids, 1), 0) <> n
+       OR COALESCE(array_length(p_relationship_types, 1), 0) <> n
+       OR (p_confidences IS NOT NULL AND COALESCE(array_length(p_confidences, 1), 0) <> n)
+       OR (p_discovery_contexts IS NOT NULL AND COALESCE(array_length(p_discovery_contexts, 1), 0) <> n) THEN
+        RAISE EXCEPTION 'discover_relationships: array length mismatch';
+    END IF;
+
+    props := ARRAY(
+        SELECT jsonb_build_object('confidence', COALESCE(p_confidences[i], 0.8), 'by', p_discovered_by)
+        FROM generate_series(1, n) AS i
+        ORDER BY i
+    );
+
+    BEGIN
+        PERFORM create_memory_relationships(p_from_ids, p_to_ids, p_relationship_types, props);
+    EXCEPTION
+        WHEN OTHERS THEN
+            NULL;
+    END;
+
+    INSERT INTO relationship_discoveries (
+        from_id, to_id, relationship_type, confidence, discovered_by, discovery_context, heartbeat_id
+    )
+    SELECT
+        p_from_ids[i],
+        p_to_ids[i],
+        p_relationship_types[i],
+        COALESCE(p_confidences[i], 0.8),
+        p_discovered_by,
+        p_discovery_contexts[i],
+        p_heartbeat_id
+    FROM generate_series(1, n) AS i
+    WHERE p_from_ids[i] IS NOT NULL AND p_to_ids[i] IS NOT NULL AND p_relationship_types[i] IS NOT NULL;
+
+    RETURN n;
+END;
+$$ LANGUAGE plpgsql;
+
 CREATE OR REPLACE FUNCTION link_memory_supports_worldview(
     p_memory_id UUID,
     p_worldview_id UUID,
@@ -5085,10 +7463,68 @@ $$ LANGUAGE plpgsql;
 -- TIP OF TONGUE / PARTIAL ACTIVATION
 -- ============================================================================
 
+-- Tip-of-tongue clusters for a precomputed query embedding: the query is close to a
+-- cluster centroid but no individual member memory is a strong match.
+-- The centroid HNSW index (idx_clusters_centroid) picks the p_max_clusters nearest
+-- clusters first; member similarities are only computed for those, so the cost does
+-- not grow with the total number of cluster memberships.
+CREATE OR REPLACE FUNCTION find_partial_activations_with_embedding(
+    p_query_embedding vector,
+    p_cluster_threshold FLOAT DEFAULT 0.7,
+    p_memory_threshold FLOAT DEFAULT 0.5,
+    p_max_clusters INT DEFAULT 20
+)
+RETURNS TABLE (
+    cluster_id UUID,
+    cluster_name TEXT,
+    keywords TEXT[],
+    emotional_signature JSONB,
+    cluster_similarity FLOAT,
+    best_memory_similarity FLOAT
+) AS $$
+BEGIN
+    IF p_query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    WITH nearest_clusters AS MATERIALIZED (
+        SELECT
+            mc.id,
+            mc.name,
+            mc.keywords,
+            mc.emotional_signature,
+            (1 - (mc.centroid_embedding <=> p_query_embedding))::float as cluster_sim
+        FROM memory_clusters mc
+        WHERE mc.centroid_embedding IS NOT NULL
+        ORDER BY mc.centroid_embedding <=> p_query_embedding
+        LIMIT GREATEST(COALESCE(p_max_clusters, 20), 1)
+    )
+    SELECT
+        nc.id,
+        nc.name,
+        nc.keywords,
+        nc.emotional_signature,
+        nc.cluster_sim,
+        best.sim
+    FROM nearest_clusters nc
+    CROSS JOIN LATERAL (
+        SELECT MAX((1 - (m.embedding <=> p_query_embedding))::float) as sim
+        FROM memory_cluster_members mcm
+        JOIN memories m ON m.id = mcm.memory_id
+        WHERE mcm.cluster_id = nc.id
+          AND m.status = 'active'
+    ) best
+    WHERE nc.cluster_sim >= p_cluster_threshold
+      AND best.sim < p_memory_threshold;
+END;
+$$ LANGUAGE plpgsql;
+
 CREATE OR REPLACE FUNCTION find_partial_activations(
     p_query_text TEXT,
     p_cluster_threshold FLOAT DEFAULT 0.7,
-    p_memory_threshold FLOAT DEFAULT 0.5
+    p_memory_threshold FLOAT DEFAULT 0.5,
+    p_max_clusters INT DEFAULT 20
 )
 RETURNS TABLE (
     cluster_id UUID,
@@ -5098,31 +7534,132 @@ RETURNS TABLE (
     cluster_similarity FLOAT,
     best_memory_similarity FLOAT
 ) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT * FROM find_partial_activations_with_embedding(
+        safe_get_embedding(p_query_text),
+        p_cluster_threshold,
+        p_memory_threshold,
+        p_max_clusters
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- RAG HYDRATION
+-- ============================================================================
+
+-- Single-call hydration: embeds the query once and returns recalled memories,
+-- partial activations and the requested context sections as one JSONB document.
+-- Flags (all optional): include_partial, include_identity, include_worldview,
+-- include_emotional_state, include_drives (default true); include_goals, hybrid (default false);
+-- diversity (0..1, default 0) for MMR reranking of the recalled memories;
+-- mode ('fast', 'balanced', 'exact') for the recall quality (see fast_recall);
+-- explain (default false) recalls through fast_recall_explain and adds its trace
+-- (log_slow_ms is passed on as p_log_slow_ms; hybrid and diversity are ignored).
+-- Context sections come from the versioned turn-context snapshot; if the caller passes
+-- known_context_version and it is still current, sections are omitted and
+-- context_unchanged is set so the caller can reuse its own copy.
+CREATE OR REPLACE FUNCTION hydrate_context(
+    p_query_text TEXT,
+    p_limit INT DEFAULT 10,
+    p_flags JSONB DEFAULT '{}'::jsonb
+)
+RETURNS JSONB AS $$
 DECLARE
+    flags JSONB := COALESCE(p_flags, '{}'::jsonb);
     query_embedding vector;
+    known_version BIGINT;
+    current_version BIGINT;
+    ctx JSONB;
+    result JSONB;
+    explained JSONB;
+    started_at TIMESTAMPTZ := clock_timestamp();
 BEGIN
-    query_embedding := safe_get_embedding(p_query_text);
-    IF query_embedding IS NULL THEN
-        RETURN;
+    known_version := NULLIF(flags->>'known_context_version', '')::bigint;
+
+    IF COALESCE((flags->>'explain')::boolean, FALSE) THEN
+        -- Runs first so the trace reports the embedding-cache state of this call.
+        explained := fast_recall_explain(
+            p_query_text,
+            p_limit,
+            p_mode => flags->>'mode',
+            p_log_slow_ms => NULLIF(flags->>'log_slow_ms', '')::float
+        );
+        query_embedding := get_embedding(p_query_text);
+        result := jsonb_build_object(
+            'memories', explained->'memories',
+            'trace', explained->'trace'
+        );
+    ELSE
+        query_embedding := get_embedding(p_query_text);
+        result := jsonb_build_object(
+            'memories', COALESCE((
+                SELECT jsonb_agg(
+                    jsonb_build_object(
+                        'memory_id', fr.memory_id,
+                        'content', fr.content,
+                        'type', fr.memory_type,
+                        'score', fr.score,
+                        'source', fr.source,
+                        'importance', COALESCE(ms.importance, m.importance),
+                        'trust_level', m.trust_level,
+                        'source_attribution', m.source_attribution,
+                        'created_at', m.created_at,
+                        'emotional_valence', em.emotional_valence
+                    )
+                    ORDER BY fr.score DESC
+                )
+                FROM fast_recall_with_embedding(
+                    query_embedding,
+                    p_limit,
+                    p_lexical_query => CASE
+                        WHEN COALESCE((flags->>'hybrid')::boolean, FALSE) THEN p_query_text
+                    END,
+                    p_diversity => COALESCE(NULLIF(flags->>'diversity', '')::float, 0.0),
+                    p_mode => flags->>'mode'
+                ) fr
+                JOIN memories m ON m.id = fr.memory_id
+                LEFT JOIN episodic_memories em ON em.memory_id = fr.memory_id
+                LEFT JOIN memory_stats ms ON ms.memory_id = fr.memory_id
+            ), '[]'::jsonb)
+        );
+        PERFORM record_recall_mode(flags->>'mode', started_at);
     END IF;
 
-    RETURN QUERY
-    SELECT
-        mc.id,
-        mc.name,
-        mc.keywords,
-        mc.emotional_signature,
-        (1 - (mc.centroid_embedding <=> query_embedding))::float as cluster_sim,
-        MAX((1 - (m.embedding <=> query_embedding))::float) as best_mem_sim
-    FROM memory_clusters mc
-    JOIN memory_cluster_members mcm ON mc.id = mcm.cluster_id
-    JOIN memories m ON mcm.memory_id = m.id
-    WHERE m.status = 'active'
-      AND mc.centroid_embedding IS NOT NULL
-    GROUP BY mc.id, mc.name, mc.keywords, mc.emotional_signature, mc.centroid_embedding
-    HAVING
-        (1 - (mc.centroid_embedding <=> query_embedding)) >= p_cluster_threshold
-        AND MAX(1 - (m.embedding <=> query_embedding)) < p_memory_threshold;
+    IF COALESCE((flags->>'include_partial')::boolean, TRUE) THEN
+        result := result || jsonb_build_object(
+            'partial_activations', COALESCE((
+                SELECT jsonb_agg(to_jsonb(pa))
+                FROM find_partial_activations_with_embedding(query_embedding) pa
+            ), '[]'::jsonb)
+        );
+    END IF;
+    current_version := turn_context_version();
+    result := result || jsonb_build_object('context_version', current_version);
+    IF known_version IS NOT NULL AND known_version = current_version THEN
+        RETURN result || jsonb_build_object('context_unchanged', TRUE);
+    END IF;
+
+    ctx := get_turn_context_snapshot();
+
+    IF COALESCE((flags->>'include_identity')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('identity', ctx->'identity');
+    END IF;
+    IF COALESCE((flags->>'include_worldview')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('worldview', ctx->'worldview');
+    END IF;
+    IF COALESCE((flags->>'include_emotional_state')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('emotional_state', ctx->'emotional_state');
+    END IF;
+    IF COALESCE((flags->>'include_goals')::boolean, FALSE) THEN
+        result := result || jsonb_build_object('goals', ctx->'goals');
+    END IF;
+    IF COALESCE((flags->>'include_drives')::boolean, TRUE) THEN
+        result := result || jsonb_build_object('urgent_drives', ctx->'urgent_drives');
+    END IF;
+
+    RETURN result;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -5278,6 +7815,84 @@ END;
 $function$;
 COMMENT ON FUNCTION create_memory_relationship IS 'Creates a typed edge between two memories in the graph. Used for causal chains, contradictions, etc.';
 
+-- Render a JSONB object as a Cypher map literal ({key: value, ...}) for dynamic cypher() calls.
+-- Strings use backslash escaping (Cypher), nested objects/arrays are stored as JSON text.
+CREATE OR REPLACE FUNCTION cypher_map_literal(p_properties JSONB)
+RETURNS TEXT AS $$
+    SELECT '{' || COALESCE(string_agg(
+        CASE
+            WHEN key ~ '^[A-Za-z_][A-Za-z0-9_]*$' THEN key
+            ELSE '`' || replace(key, '`', '``') || '`'
+        END
+        || ': ' ||
+        CASE
+            WHEN jsonb_typeof(value) IN ('number', 'boolean', 'null') THEN value::text
+            ELSE '''' || replace(replace(
+                CASE WHEN jsonb_typeof(value) = 'string' THEN value #>> '{}' ELSE value::text END,
+                E'\\', E'\\\\'), '''', E'\\''') || ''''
+        END,
+        ', '
+    ), '') || '}'
+    FROM jsonb_each(CASE WHEN jsonb_typeof(p_properties) = 'object' THEN p_properties ELSE '{}'::jsonb END);
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Bulk variant of create_memory_relationship(): one Cypher UNWIND per distinct edge type
+-- (edge labels cannot be parameterized), matching endpoints through the MemoryNode property index.
+-- Arrays are parallel; p_properties may be NULL or contain NULLs. Returns the number of edges merged.
+CREATE OR REPLACE FUNCTION create_memory_relationships(
+    p_from_ids UUID[],
+    p_to_ids UUID[],
+    p_relationship_types graph_edge_type[],
+    p_properties JSONB[] DEFAULT NULL
+)
+RETURNS INT AS $$
+DECLARE
+    n INT;
+    rel_token TEXT;
+    edge_list TEXT;
+    edge_count INT;
+    total INT := 0;
+BEGIN
+    n := COALESCE(array_length(p_from_ids, 1), 0);
+    IF n = 0 THEN
+        RETURN 0;
+    END IF;
+    IF COALESCE(array_length(p_to_ids, 1), 0) <> n
+       OR COALESCE(array_length(p_relationship_types, 1), 0) <> n
+       OR (p_properties IS NOT NULL AND COALESCE(array_length(p_properties, 1), 0) <> n) THEN
+        RAISE EXCEPTION 'create_memory_relationships: array length mismatch';
+    END IF;
+
+    FOR rel_token, edge_list IN
+        SELECT
+            e.rel_type::text,
+            string_agg(
+                format('{from_id: %L, to_id: %L, props: %s}', e.from_id, e.to_id, cypher_map_literal(p_properties[e.ord::int])),
+                ', ' ORDER BY e.ord
+            )
+        FROM unnest(p_from_ids, p_to_ids, p_relationship_types) WITH ORDINALITY AS e(from_id, to_id, rel_type, ord)
+        WHERE e.from_id IS NOT NULL AND e.to_id IS NOT NULL AND e.rel_type IS NOT NULL
+        GROUP BY e.rel_type
+    LOOP
+        EXECUTE format(
+            'SELECT * FROM cypher(''memory_graph'', $q$
+                UNWIND [%s] AS item
+                MATCH (a:MemoryNode {memory_id: item.from_id}), (b:MemoryNode {memory_id: item.to_id})
+                MERGE (a)-[r:%s]->(b)
+                SET r += item.props
+                RETURN count(r)
+            $q$) as (result agtype)',
+            edge_list,
+            rel_token
+        ) INTO edge_count;
+        total := total + COALESCE(edge_count, 0);
+    END LOOP;
+
+    RETURN total;
+END;
+$$ LANGUAGE plpgsql;
+COMMENT ON FUNCTION create_memory_relationships IS 'Bulk-creates typed edges between memories with one Cypher UNWIND per edge type.';
+
 CREATE OR REPLACE FUNCTION public.execute_heartbeat_action(p_heartbeat_id uuid, p_action text, p_params jsonb DEFAULT '{}'::jsonb)
  RETURNS jsonb
  LANGUAGE plpgsql
@@ -5352,9 +7967,25 @@ BEGIN
             result := jsonb_build_object('memory_id', remembered_id);
 
         WHEN 'recall' THEN
-            SELECT jsonb_agg(row_to_json(r)) INTO result
-            FROM fast_recall(p_params->>'query', COALESCE((p_params->>'limit')::int, 5)) r;
-            result := jsonb_build_object('memories', COALESCE(result, '[]'::jsonb));
+            DECLARE
+                v_query TEXT := p_params->>'query';
+                v_limit INT := COALESCE((p_params->>'limit')::int, 5);
+                -- Background recall: cheap HNSW scan unless the action asks for more.
+                v_mode TEXT := COALESCE(NULLIF(p_params->>'mode', ''), 'fast');
+                v_cache_key TEXT;
+                v_version BIGINT;
+            BEGIN
+                v_cache_key := recall_cache_key(v_query, jsonb_build_object('limit', v_limit, 'mode', v_mode, 'caller', 'heartbeat'));
+                v_version := memory_write_version();
+                result := get_cached_recall(v_cache_key);
+                IF result IS NULL THEN
+                    SELECT jsonb_agg(row_to_json(r)) INTO result
+                    FROM fast_recall(v_query, v_limit, p_mode => v_mode) r;
+                    result := COALESCE(result, '[]'::jsonb);
+                    PERFORM put_cached_recall(v_cache_key, v_version, result);
+                END IF;
+            END;
+            result := jsonb_build_object('memories', result);
             PERFORM satisfy_drive('curiosity', 0.2);
 
         WHEN 'connect' THEN
@@ -5579,7 +8210,8 @@ BEGIN
                     tags,
                     NULL,
                     jsonb_build_object('heartbeat_id', p_heartbeat_id, 'sources', p_params->'sources', 'boundaries', boundary_hits),
-                    0.7
+                    0.7,
+                    p_dedupe => COALESCE((p_params->>'dedupe')::boolean, FALSE)
                 );
                 result := jsonb_build_object('synthesis_memory_id', synth_id, 'boundaries', boundary_hits);
             END;
@@ -201,7 +201,13 @@ async def test_memory_tables(db_pool):
         # Note: relevance_score is computed via calculate_relevance() function, not a column
         assert "importance" in columns, "importance column not found"
         assert "decay_rate" in columns, "decay_rate column not found"
-        assert "last_accessed" in columns, "last_accessed column not found"
+        stats_columns = {
+            r["column_name"]
+            for r in await conn.fetch(
+                "SELECT column_name FROM information_schema.columns WHERE table_name = 'memory_stats'"
+            )
+        }
+        assert "last_accessed" in stats_columns, "last_accessed column not found"
         assert "id" in columns and columns["id"]["data_type"] == "uuid"
         assert "content" in columns and columns["content"]["is_nullable"] == "NO"
         assert "embedding" in columns
@@ -272,14 +278,12 @@ async def test_memory_importance(db_pool):
                 type, 
                 content, 
                 embedding,
-                importance,
-                access_count
+                importance
             ) VALUES (
                 'semantic',
                 'Important test content',
                 array_fill(0, ARRAY[embedding_dimension()])::vector,
-                0.5,
-                0
+                0.5
             ) RETURNING id
         """
         )
@@ -287,9 +291,9 @@ async def test_memory_importance(db_pool):
         # Update access count to trigger importance recalculation
         await conn.execute(
             """
-            UPDATE memories 
+            UPDATE memory_stats 
             SET access_count = access_count + 1
-            WHERE id = $1
+            WHERE memory_id = $1
         """,
             memory_id,
         )
@@ -298,8 +302,8 @@ async def test_memory_importance(db_pool):
         new_importance = await conn.fetchval(
             """
             SELECT importance 
-            FROM memories 
-            WHERE id = $1
+            FROM memory_stats 
+            WHERE memory_id = $1
         """,
             memory_id,
         )
@@ -897,9 +901,9 @@ async def test_memory_relevance(db_pool):
         
         # Check relevance score using calculate_relevance function
         relevance = await conn.fetchval("""
-            SELECT calculate_relevance(importance, decay_rate, created_at, last_accessed)
-            FROM memories
-            WHERE id = $1
+            SELECT calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed)
+            FROM memories m LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+            WHERE m.id = $1
         """, memory_id)
 
         assert relevance is not None, "Relevance score not calculated"
@@ -1089,38 +1093,37 @@ async def test_enhanced_relevance_scoring(db_pool):
                 embedding,
                 importance,
                 decay_rate,
-                created_at,
-                access_count
+                created_at
             ) VALUES (
                 'semantic'::memory_type,
                 'Test relevance scoring',
                 array_fill(0, ARRAY[embedding_dimension()])::vector,
                 0.8,
                 0.01,
-                CURRENT_TIMESTAMP - interval '1 day',
-                5
+                CURRENT_TIMESTAMP - interval '1 day'
             ) RETURNING id
         """)
+        await conn.execute("UPDATE memory_stats SET access_count = 5 WHERE memory_id = $1", memory_id)
         
         # Get initial relevance score using calculate_relevance function
         initial_score = await conn.fetchval("""
-            SELECT calculate_relevance(importance, decay_rate, created_at, last_accessed)
-            FROM memories
-            WHERE id = $1
+            SELECT calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed)
+            FROM memories m LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+            WHERE m.id = $1
         """, memory_id)
 
         # Update access count to trigger importance change
         await conn.execute("""
-            UPDATE memories
+            UPDATE memory_stats
             SET access_count = access_count + 1
-            WHERE id = $1
+            WHERE memory_id = $1
         """, memory_id)
 
         # Get updated relevance score
         updated_score = await conn.fetchval("""
-            SELECT calculate_relevance(importance, decay_rate, created_at, last_accessed)
-            FROM memories
-            WHERE id = $1
+            SELECT calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed)
+            FROM memories m LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+            WHERE m.id = $1
         """, memory_id)
 
         assert initial_score is not None, "Initial relevance score not calculated"
@@ -1195,14 +1198,12 @@ async def test_update_memory_importance_trigger(db_pool):
                 type,
                 content,
                 embedding,
-                importance,
-                access_count
+                importance
             ) VALUES (
                 'semantic'::memory_type,
                 'Test importance update',
                 array_fill(0, ARRAY[embedding_dimension()])::vector,
-                0.5,
-                0
+                0.5
             ) RETURNING id
         """)
 
@@ -1213,27 +1214,27 @@ async def test_update_memory_importance_trigger(db_pool):
 
         # Update access count
         await conn.execute("""
-            UPDATE memories 
+            UPDATE memory_stats 
             SET access_count = access_count + 1
-            WHERE id = $1
+            WHERE memory_id = $1
         """, memory_id)
 
         # Get new importance
         new_importance = await conn.fetchval("""
-            SELECT importance FROM memories WHERE id = $1
+            SELECT importance FROM memory_stats WHERE memory_id = $1
         """, memory_id)
 
         assert new_importance > initial_importance, "Importance should increase"
         
         # Test multiple accesses
         await conn.execute("""
-            UPDATE memories 
+            UPDATE memory_stats 
             SET access_count = access_count + 5
-            WHERE id = $1
+            WHERE memory_id = $1
         """, memory_id)
         
         final_importance = await conn.fetchval("""
-            SELECT importance FROM memories WHERE id = $1
+            SELECT importance FROM memory_stats WHERE memory_id = $1
         """, memory_id)
         
         assert final_importance > new_importance, "Importance should increase with more accesses"
@@ -1304,19 +1305,21 @@ async def test_memory_health_view(db_pool):
         memory_types = ['episodic', 'semantic', 'procedural', 'strategic']
         for mem_type in memory_types:
             await conn.execute("""
-                INSERT INTO memories (
-                    type,
-                    content,
-                    embedding,
-                    importance,
-                    access_count
-                ) VALUES (
-                    $1::memory_type,
-                    'Test ' || $1,
-                    array_fill(0, ARRAY[embedding_dimension()])::vector,
-                    0.5,
-                    5
+                WITH m AS (
+                    INSERT INTO memories (
+                        type,
+                        content,
+                        embedding,
+                        importance
+                    ) VALUES (
+                        $1::memory_type,
+                        'Test ' || $1,
+                        array_fill(0, ARRAY[embedding_dimension()])::vector,
+                        0.5
+                    ) RETURNING id
                 )
+                INSERT INTO memory_stats (memory_id, access_count)
+                SELECT id, 5 FROM m
             """, mem_type)
 
         # Query view
@@ -1384,7 +1387,13 @@ async def test_memory_tables(db_pool):
         """)
         columns = {col["column_name"]: col for col in memories}
 
-        assert "last_accessed" in columns, "last_accessed column not found"
+        stats_columns = {
+            r["column_name"]
+            for r in await conn.fetch(
+                "SELECT column_name FROM information_schema.columns WHERE table_name = 'memory_stats'"
+            )
+        }
+        assert "last_accessed" in stats_columns, "last_accessed column not found"
         assert "id" in columns and columns["id"]["data_type"] == "uuid"
         assert "content" in columns and columns["content"]["is_nullable"] == "NO"
         assert "embedding" in columns
@@ -1715,6 +1724,71 @@ async def test_assign_memory_to_clusters_function(db_pool):
         assert len(memberships) > 0, "Memory not assigned to any clusters"
         assert memberships[0]['membership_strength'] >= 0.7, "Expected high similarity"
 
+async def test_create_memory_queues_cluster_assignment_for_maintenance(db_pool):
+    """create_memory only enqueues; process_cluster_assignment_queue() does the assignment."""
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("cluster_queue")
+            content = f"Queued cluster memory {test_id}"
+            embedding = [0.0] * EMBEDDING_DIMENSION
+            embedding[300:400] = [1.0] * 100
+
+            await conn.execute(
+                """
+                INSERT INTO embedding_cache (content_hash, embedding)
+                VALUES (encode(sha256($1::text::bytea), 'hex'), $2::vector)
+                ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding
+                """,
+                content,
+                str(embedding),
+            )
+            cluster_id = await conn.fetchval(
+                """
+                INSERT INTO memory_clusters (cluster_type, name, centroid_embedding)
+                VALUES ('theme'::cluster_type, $1, $2::vector)
+                RETURNING id
+                """,
+                f"Queue cluster {test_id}",
+                str(embedding),
+            )
+            # Fresh threshold, so no refresh happens inside the assignment.
+            await conn.execute(
+                "UPDATE cluster_config SET value = 0.5, updated_at = CURRENT_TIMESTAMP WHERE key = 'similarity_threshold'"
+            )
+
+            memory_id = await conn.fetchval(
+                "SELECT create_semantic_memory($1::text, 0.9::float)", content
+            )
+            queued = await conn.fetchval(
+                "SELECT COUNT(*) FROM cluster_assignment_queue WHERE memory_id = $1", memory_id
+            )
+            members = await conn.fetchval(
+                "SELECT COUNT(*) FROM memory_cluster_members WHERE memory_id = $1", memory_id
+            )
+            assert queued == 1
+            assert members == 0
+
+            processed = await conn.fetchval("SELECT process_cluster_assignment_queue(1000000)")
+            assert processed >= 1
+            strength = await conn.fetchval(
+                "SELECT membership_strength FROM memory_cluster_members WHERE memory_id = $1 AND cluster_id = $2",
+                memory_id,
+                cluster_id,
+            )
+            assert strength == pytest.approx(1.0, abs=1e-6)
+            assert await conn.fetchval(
+                "SELECT COUNT(*) FROM cluster_assignment_queue WHERE memory_id = $1", memory_id
+            ) == 0
+
+            # Sampled threshold refresh stays within its floor/ceiling.
+            threshold = await conn.fetchval("SELECT refresh_cluster_similarity_threshold()")
+            assert 0.2 <= threshold <= 0.8
+        finally:
+            await tr.rollback()
+
+
 async def test_recalculate_cluster_centroid_function(db_pool):
     """Test the recalculate_cluster_centroid function"""
     async with db_pool.acquire() as conn:
@@ -2280,14 +2354,12 @@ async def test_concurrency_safety(db_pool):
                 type,
                 content,
                 embedding,
-                importance,
-                access_count
+                importance
             ) VALUES (
                 'semantic'::memory_type,
                 'Concurrency test memory',
                 array_fill(0.5, ARRAY[embedding_dimension()])::vector,
-                0.5,
-                0
+                0.5
             ) RETURNING id
         """)
         
@@ -2296,9 +2368,9 @@ async def test_concurrency_safety(db_pool):
             async with pool.acquire() as connection:
                 for _ in range(increment):
                     await connection.execute("""
-                        UPDATE memories 
+                        UPDATE memory_stats 
                         SET access_count = access_count + 1
-                        WHERE id = $1
+                        WHERE memory_id = $1
                     """, mem_id)
         
         # Run concurrent updates
@@ -2313,7 +2385,7 @@ async def test_concurrency_safety(db_pool):
         
         # Verify final access count
         final_count = await conn.fetchval("""
-            SELECT access_count FROM memories WHERE id = $1
+            SELECT access_count FROM memory_stats WHERE memory_id = $1
         """, memory_id)
         
         assert final_count == 30, f"Expected 30 accesses, got {final_count}"
@@ -2491,31 +2563,29 @@ async def test_memory_lifecycle_workflow(db_pool):
                 type,
                 content,
                 embedding,
-                importance,
-                access_count
+                importance
             ) VALUES (
                 'semantic'::memory_type,
                 'Lifecycle test memory',
                 array_fill(0.5, ARRAY[embedding_dimension()])::vector,
-                0.3,
-                0
+                0.3
             ) RETURNING id
         """)
         
         initial_relevance = await conn.fetchval("""
-            SELECT calculate_relevance(importance, decay_rate, created_at, last_accessed) as relevance_score FROM memories WHERE id = $1
+            SELECT calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) as relevance_score FROM memories m LEFT JOIN memory_stats ms ON ms.memory_id = m.id WHERE m.id = $1
         """, memory_id)
         
         # Step 2: Simulate memory access and importance growth
         for i in range(5):
             await conn.execute("""
-                UPDATE memories 
+                UPDATE memory_stats 
                 SET access_count = access_count + 1
-                WHERE id = $1
+                WHERE memory_id = $1
             """, memory_id)
         
         mid_relevance = await conn.fetchval("""
-            SELECT calculate_relevance(importance, decay_rate, created_at, last_accessed) as relevance_score FROM memories WHERE id = $1
+            SELECT calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) as relevance_score FROM memories m LEFT JOIN memory_stats ms ON ms.memory_id = m.id WHERE m.id = $1
         """, memory_id)
         
         assert mid_relevance > initial_relevance, "Relevance should increase with access"
@@ -2528,16 +2598,18 @@ async def test_memory_lifecycle_workflow(db_pool):
         """, memory_id)
         
         aged_relevance = await conn.fetchval("""
-            SELECT calculate_relevance(importance, decay_rate, created_at, last_accessed) as relevance_score FROM memories WHERE id = $1
+            SELECT calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) as relevance_score FROM memories m LEFT JOIN memory_stats ms ON ms.memory_id = m.id WHERE m.id = $1
         """, memory_id)
         
         assert aged_relevance < mid_relevance, "Relevance should decrease with age"
         
         # Step 4: Archive low-relevance memory
         await conn.execute("""
-            UPDATE memories
+            UPDATE memories m
             SET status = 'archived'::memory_status
-            WHERE id = $1 AND calculate_relevance(importance, decay_rate, created_at, last_accessed) < 0.1
+            FROM memory_stats ms
+            WHERE m.id = $1 AND ms.memory_id = m.id
+              AND calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) < 0.1
         """, memory_id)
         
         final_status = await conn.fetchval("""
@@ -2664,19 +2736,22 @@ async def test_edge_cases_extreme_values(db_pool):
     async with db_pool.acquire() as conn:
         # Test memory with very high importance
         high_importance_id = await conn.fetchval("""
-            INSERT INTO memories (
-                type,
-                content,
-                embedding,
-                importance,
-                access_count
-            ) VALUES (
-                'semantic'::memory_type,
-                'Extremely important memory',
-                array_fill(0.5, ARRAY[embedding_dimension()])::vector,
-                999999.0,
-                999999
-            ) RETURNING id
+            WITH m AS (
+                INSERT INTO memories (
+                    type,
+                    content,
+                    embedding,
+                    importance
+                ) VALUES (
+                    'semantic'::memory_type,
+                    'Extremely important memory',
+                    array_fill(0.5, ARRAY[embedding_dimension()])::vector,
+                    999999.0
+                ) RETURNING id
+            )
+            INSERT INTO memory_stats (memory_id, access_count)
+            SELECT id, 999999 FROM m
+            RETURNING memory_id
         """)
         
         # Test memory with very old timestamp
@@ -2698,11 +2773,11 @@ async def test_edge_cases_extreme_values(db_pool):
         
         # Test relevance calculation with extreme values
         high_relevance = await conn.fetchval("""
-            SELECT calculate_relevance(importance, decay_rate, created_at, last_accessed) as relevance_score FROM memories WHERE id = $1
+            SELECT calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) as relevance_score FROM memories m LEFT JOIN memory_stats ms ON ms.memory_id = m.id WHERE m.id = $1
         """, high_importance_id)
         
         old_relevance = await conn.fetchval("""
-            SELECT calculate_relevance(importance, decay_rate, created_at, last_accessed) as relevance_score FROM memories WHERE id = $1
+            SELECT calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) as relevance_score FROM memories m LEFT JOIN memory_stats ms ON ms.memory_id = m.id WHERE m.id = $1
         """, old_memory_id)
         
         assert high_relevance > 1000, "High importance should result in high relevance"
@@ -2871,7 +2946,7 @@ async def test_computed_field_accuracy(db_pool):
         """)
         
         relevance = await conn.fetchval("""
-            SELECT calculate_relevance(importance, decay_rate, created_at, last_accessed) as relevance_score FROM memories WHERE id = $1
+            SELECT calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) as relevance_score FROM memories m LEFT JOIN memory_stats ms ON ms.memory_id = m.id WHERE m.id = $1
         """, test_memory_id)
         
         # The calculate_relevance function uses a more complex formula:
@@ -2924,11 +2999,11 @@ async def test_trigger_consistency(db_pool):
         """, memory_id)
         
         await conn.execute("""
-            UPDATE memories SET access_count = access_count + 1 WHERE id = $1
+            UPDATE memory_stats SET access_count = access_count + 1 WHERE memory_id = $1
         """, memory_id)
         
         new_importance = await conn.fetchval("""
-            SELECT importance FROM memories WHERE id = $1
+            SELECT importance FROM memory_stats WHERE memory_id = $1
         """, memory_id)
         
         assert new_importance > initial_importance, "Importance trigger should fire on access count change"
@@ -2974,36 +3049,39 @@ async def test_view_calculation_accuracy(db_pool):
         test_memories = []
         for i in range(10):
             memory_id = await conn.fetchval("""
-                INSERT INTO memories (
-                    type,
-                    content,
-                    embedding,
-                    importance,
-                    access_count,
-                    last_accessed
-                ) VALUES (
-                    'semantic'::memory_type,
-                    'Health test memory ' || $1 || ' ' || $2,
-                    array_fill(0.5, ARRAY[embedding_dimension()])::vector,
-                    $3,
-                    $4,
-                    CASE WHEN $5 THEN CURRENT_TIMESTAMP - interval '12 hours' ELSE NULL END
-                ) RETURNING id
+                WITH m AS (
+                    INSERT INTO memories (
+                        type,
+                        content,
+                        embedding,
+                        importance
+                    ) VALUES (
+                        'semantic'::memory_type,
+                        'Health test memory ' || $1 || ' ' || $2,
+                        array_fill(0.5, ARRAY[embedding_dimension()])::vector,
+                        $3
+                    ) RETURNING id
+                )
+                INSERT INTO memory_stats (memory_id, access_count, last_accessed)
+                SELECT id, $4, CASE WHEN $5 THEN CURRENT_TIMESTAMP - interval '12 hours' ELSE NULL END
+                FROM m
+                RETURNING memory_id
             """, str(i), unique_suffix, float(i) * 0.1, i, i % 2 == 0)
             test_memories.append(memory_id)
         
         # Query memory_health view for just our test memories
         health_stats = await conn.fetchrow("""
             SELECT
-                type,
+                m.type,
                 COUNT(*) as total_memories,
-                AVG(importance) as avg_importance,
-                AVG(access_count) as avg_access_count,
-                COUNT(*) FILTER (WHERE last_accessed > CURRENT_TIMESTAMP - INTERVAL '1 day') as accessed_last_day,
-                AVG(calculate_relevance(importance, decay_rate, created_at, last_accessed)) as avg_relevance
-            FROM memories
-            WHERE type = 'semantic' AND content LIKE '%' || $1
-            GROUP BY type
+                AVG(COALESCE(ms.importance, m.importance)) as avg_importance,
+                AVG(ms.access_count) as avg_access_count,
+                COUNT(*) FILTER (WHERE ms.last_accessed > CURRENT_TIMESTAMP - INTERVAL '1 day') as accessed_last_day,
+                AVG(calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed)) as avg_relevance
+            FROM memories m
+            LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+            WHERE m.type = 'semantic' AND m.content LIKE '%' || $1
+            GROUP BY m.type
         """, unique_suffix)
         
         # Verify calculations
@@ -3651,63 +3729,72 @@ async def test_memory_lifecycle_management(db_pool):
         # Stage 1: Fresh memories (high importance, recent)
         for i in range(3):
             memory_id = await conn.fetchval("""
-                INSERT INTO memories (
-                    type,
-                    content,
-                    embedding,
-                    importance,
-                    access_count,
-                    created_at
-                ) VALUES (
-                    'semantic'::memory_type,
-                    'Fresh memory ' || $1,
-                    array_fill(0.8, ARRAY[embedding_dimension()])::vector,
-                    0.9,
-                    10 + $2,
-                    CURRENT_TIMESTAMP - interval '1 hour' * $2
-                ) RETURNING id
+                WITH m AS (
+                    INSERT INTO memories (
+                        type,
+                        content,
+                        embedding,
+                        importance,
+                        created_at
+                    ) VALUES (
+                        'semantic'::memory_type,
+                        'Fresh memory ' || $1,
+                        array_fill(0.8, ARRAY[embedding_dimension()])::vector,
+                        0.9,
+                        CURRENT_TIMESTAMP - interval '1 hour' * $2
+                    ) RETURNING id
+                )
+                INSERT INTO memory_stats (memory_id, access_count)
+                SELECT id, 10 + $2 FROM m
+                RETURNING memory_id
             """, str(i), i)
             lifecycle_memories.append(('fresh', memory_id))
         
         # Stage 2: Aging memories (medium importance, older)
         for i in range(3):
             memory_id = await conn.fetchval("""
-                INSERT INTO memories (
-                    type,
-                    content,
-                    embedding,
-                    importance,
-                    access_count,
-                    created_at
-                ) VALUES (
-                    'episodic'::memory_type,
-                    'Aging memory ' || $1,
-                    array_fill(0.5, ARRAY[embedding_dimension()])::vector,
-                    0.5,
-                    5 + $2,
-                    CURRENT_TIMESTAMP - interval '7 days' * ($2 + 1)
-                ) RETURNING id
+                WITH m AS (
+                    INSERT INTO memories (
+                        type,
+                        content,
+                        embedding,
+                        importance,
+                        created_at
+                    ) VALUES (
+                        'episodic'::memory_type,
+                        'Aging memory ' || $1,
+                        array_fill(0.5, ARRAY[embedding_dimension()])::vector,
+                        0.5,
+                        CURRENT_TIMESTAMP - interval '7 days' * ($2 + 1)
+                    ) RETURNING id
+                )
+                INSERT INTO memory_stats (memory_id, access_count)
+                SELECT id, 5 + $2 FROM m
+                RETURNING memory_id
             """, str(i), i)
             lifecycle_memories.append(('aging', memory_id))
         
         # Stage 3: Stale memories (low importance, very old)
         for i in range(3):
             memory_id = await conn.fetchval("""
-                INSERT INTO memories (
-                    type,
-                    content,
-                    embedding,
-                    importance,
-                    access_count,
-                    created_at
-                ) VALUES (
-                    'procedural'::memory_type,
-                    'Stale memory ' || $1,
-                    array_fill(0.2, ARRAY[embedding_dimension()])::vector,
-                    0.1,
-                    1,
-                    CURRENT_TIMESTAMP - interval '30 days' * ($2 + 1)
-                ) RETURNING id
+                WITH m AS (
+                    INSERT INTO memories (
+                        type,
+                        content,
+                        embedding,
+                        importance,
+                        created_at
+                    ) VALUES (
+                        'procedural'::memory_type,
+                        'Stale memory ' || $1,
+                        array_fill(0.2, ARRAY[embedding_dimension()])::vector,
+                        0.1,
+                        CURRENT_TIMESTAMP - interval '30 days' * ($2 + 1)
+                    ) RETURNING id
+                )
+                INSERT INTO memory_stats (memory_id, access_count)
+                SELECT id, 1 FROM m
+                RETURNING memory_id
             """, str(i), i)
             lifecycle_memories.append(('stale', memory_id))
         
@@ -3745,24 +3832,27 @@ async def test_memory_lifecycle_management(db_pool):
         # Simulate multiple accesses
         for _ in range(5):
             await conn.execute("""
-                UPDATE memories 
+                UPDATE memory_stats 
                 SET access_count = access_count + 1
-                WHERE id = $1
+                WHERE memory_id = $1
             """, stale_memory)
         
         final_importance = await conn.fetchval("""
-            SELECT importance FROM memories WHERE id = $1
+            SELECT COALESCE(ms.importance, m.importance)
+            FROM memories m LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+            WHERE m.id = $1
         """, stale_memory)
         
         assert final_importance > initial_importance, "Accessed memory should gain importance"
         
         # Test memory archival workflow
         archival_candidates = await conn.fetch("""
-            SELECT id, calculate_relevance(importance, decay_rate, created_at, last_accessed) as relevance_score
-            FROM memories
-            WHERE calculate_relevance(importance, decay_rate, created_at, last_accessed) < 0.1
-            AND status = 'active'
-            ORDER BY calculate_relevance(importance, decay_rate, created_at, last_accessed) ASC
+            SELECT m.id, calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) as relevance_score
+            FROM memories m
+            LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+            WHERE calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) < 0.1
+            AND m.status = 'active'
+            ORDER BY relevance_score ASC
             LIMIT 5
         """)
         
@@ -3790,57 +3880,62 @@ async def test_memory_pruning_operations(db_pool):
         # Create very old, low-relevance memories
         for i in range(10):
             memory_id = await conn.fetchval("""
-                INSERT INTO memories (
-                    type,
-                    content,
-                    embedding,
-                    importance,
-                    access_count,
-                    created_at,
-                    last_accessed
-                ) VALUES (
-                    'semantic'::memory_type,
-                    'Pruning candidate ' || $1,
-                    array_fill(0.1, ARRAY[embedding_dimension()])::vector,
-                    0.05,
-                    0,
-                    CURRENT_TIMESTAMP - interval '90 days',
-                    CURRENT_TIMESTAMP - interval '60 days'
-                ) RETURNING id
+                WITH m AS (
+                    INSERT INTO memories (
+                        type,
+                        content,
+                        embedding,
+                        importance,
+                        created_at
+                    ) VALUES (
+                        'semantic'::memory_type,
+                        'Pruning candidate ' || $1,
+                        array_fill(0.1, ARRAY[embedding_dimension()])::vector,
+                        0.05,
+                        CURRENT_TIMESTAMP - interval '90 days'
+                    ) RETURNING id
+                )
+                INSERT INTO memory_stats (memory_id, access_count, last_accessed)
+                SELECT id, 0, CURRENT_TIMESTAMP - interval '60 days' FROM m
+                RETURNING memory_id
             """, str(i))
             pruning_memories.append(memory_id)
         
         # Create some memories worth keeping
         for i in range(5):
             await conn.fetchval("""
-                INSERT INTO memories (
-                    type,
-                    content,
-                    embedding,
-                    importance,
-                    access_count,
-                    created_at
-                ) VALUES (
-                    'episodic'::memory_type,
-                    'Important memory ' || $1,
-                    array_fill(0.8, ARRAY[embedding_dimension()])::vector,
-                    0.8,
-                    20,
-                    CURRENT_TIMESTAMP - interval '30 days'
-                ) RETURNING id
+                WITH m AS (
+                    INSERT INTO memories (
+                        type,
+                        content,
+                        embedding,
+                        importance,
+                        created_at
+                    ) VALUES (
+                        'episodic'::memory_type,
+                        'Important memory ' || $1,
+                        array_fill(0.8, ARRAY[embedding_dimension()])::vector,
+                        0.8,
+                        CURRENT_TIMESTAMP - interval '30 days'
+                    ) RETURNING id
+                )
+                INSERT INTO memory_stats (memory_id, access_count)
+                SELECT id, 20 FROM m
+                RETURNING memory_id
             """, str(i))
         
         # Test pruning criteria identification
         pruning_candidates = await conn.fetch("""
-            SELECT id, calculate_relevance(importance, decay_rate, created_at, last_accessed) as relevance_score,
-                   importance,
-                   age_in_days(created_at) as age_days,
-                   COALESCE(age_in_days(last_accessed), 999) as days_since_access
-            FROM memories
-            WHERE calculate_relevance(importance, decay_rate, created_at, last_accessed) < 0.1
-            AND (last_accessed IS NULL OR last_accessed < CURRENT_TIMESTAMP - interval '30 days')
-            AND importance < 0.1
-            ORDER BY calculate_relevance(importance, decay_rate, created_at, last_accessed) ASC
+            SELECT m.id, calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) as relevance_score,
+                   COALESCE(ms.importance, m.importance) AS importance,
+                   age_in_days(m.created_at) as age_days,
+                   COALESCE(age_in_days(ms.last_accessed), 999) as days_since_access
+            FROM memories m
+            LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+            WHERE calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) < 0.1
+            AND (ms.last_accessed IS NULL OR ms.last_accessed < CURRENT_TIMESTAMP - interval '30 days')
+            AND COALESCE(ms.importance, m.importance) < 0.1
+            ORDER BY relevance_score ASC
         """)
         
         assert len(pruning_candidates) >= 10, "Should identify pruning candidates"
@@ -3940,10 +4035,11 @@ async def test_database_optimization_operations(db_pool):
             SELECT
                 m.type,
                 COUNT(*) as memory_count,
-                AVG(m.importance) as avg_importance,
-                AVG(calculate_relevance(m.importance, m.decay_rate, m.created_at, m.last_accessed)) as avg_relevance,
+                AVG(COALESCE(ms.importance, m.importance)) as avg_importance,
+                AVG(calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed)) as avg_relevance,
                 COUNT(mcm.cluster_id) as cluster_memberships
             FROM memories m
+            LEFT JOIN memory_stats ms ON ms.memory_id = m.id
             LEFT JOIN memory_cluster_members mcm ON m.id = mcm.memory_id
             WHERE m.status = 'active'
             GROUP BY m.type
@@ -4111,12 +4207,13 @@ async def test_backup_restore_consistency(db_pool):
         # Test 4: Verify computed fields are consistent
         computed_field_check = await conn.fetch("""
             SELECT
-                id,
-                importance,
-                calculate_relevance(importance, decay_rate, created_at, last_accessed) as relevance_score,
-                (importance * exp(-decay_rate * age_in_days(created_at))) as expected_relevance
-            FROM memories
-            WHERE content LIKE 'Backup test memory%'
+                m.id,
+                m.importance,
+                calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) as relevance_score,
+                (m.importance * exp(-m.decay_rate * age_in_days(m.created_at))) as expected_relevance
+            FROM memories m
+            LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+            WHERE m.content LIKE 'Backup test memory%'
         """)
 
         for row in computed_field_check:
@@ -4217,13 +4314,14 @@ async def test_monitoring_and_alerting_metrics(db_pool):
         health_metrics = await conn.fetchrow("""
             SELECT
                 COUNT(*) as total_memories,
-                COUNT(*) FILTER (WHERE status = 'active') as active_memories,
-                COUNT(*) FILTER (WHERE status = 'archived') as archived_memories,
-                AVG(importance) as avg_importance,
-                AVG(calculate_relevance(importance, decay_rate, created_at, last_accessed)) as avg_relevance,
-                AVG(access_count) as avg_access_count,
-                COUNT(*) FILTER (WHERE last_accessed > CURRENT_TIMESTAMP - interval '24 hours') as recently_accessed
-            FROM memories
+                COUNT(*) FILTER (WHERE m.status = 'active') as active_memories,
+                COUNT(*) FILTER (WHERE m.status = 'archived') as archived_memories,
+                AVG(COALESCE(ms.importance, m.importance)) as avg_importance,
+                AVG(calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed)) as avg_relevance,
+                AVG(ms.access_count) as avg_access_count,
+                COUNT(*) FILTER (WHERE ms.last_accessed > CURRENT_TIMESTAMP - interval '24 hours') as recently_accessed
+            FROM memories m
+            LEFT JOIN memory_stats ms ON ms.memory_id = m.id
         """)
         
         assert health_metrics['total_memories'] > 0, "Should have memories for monitoring"
@@ -4273,7 +4371,7 @@ async def test_monitoring_and_alerting_metrics(db_pool):
                     ELSE 'OK' 
                 END as status,
                 COUNT(*) FILTER (WHERE last_accessed > CURRENT_TIMESTAMP - interval '24 hours') as recent_access_count
-            FROM memories
+            FROM memory_stats
             
             UNION ALL
             
@@ -4688,9 +4786,10 @@ async def test_memory_neighborhoods_initialization(db_pool):
 
         assert neighborhood is not None, "Neighborhood record should be auto-created"
         assert neighborhood['is_stale'] == True, "New neighborhood should be stale"
-        # neighbors is JSONB, may be dict or empty object string
-        neighbors = neighborhood['neighbors']
-        assert neighbors == {} or neighbors == '{}' or len(neighbors) == 0, "Neighbors should be empty initially"
+        edges = await conn.fetchval("""
+            SELECT COUNT(*) FROM memory_neighbor_edges WHERE memory_id = $1
+        """, memory_id)
+        assert edges == 0, "Neighbors should be empty initially"
 
 
 async def test_neighborhoods_staleness_trigger(db_pool):
@@ -4704,11 +4803,10 @@ async def test_neighborhoods_staleness_trigger(db_pool):
             RETURNING id
         """)
 
-        # Manually set neighborhood to not stale with some neighbors
+        # Manually set neighborhood to not stale
         await conn.execute("""
             UPDATE memory_neighborhoods
             SET is_stale = FALSE,
-                neighbors = '{"test-uuid": 0.8}'::jsonb,
                 computed_at = CURRENT_TIMESTAMP
             WHERE memory_id = $1
         """, memory_id)
@@ -4793,31 +4891,38 @@ async def test_stale_neighborhoods_view(db_pool):
         assert fresh_memory_id not in stale_ids, "Fresh memory should not appear in view"
 
 
-async def test_neighborhoods_gin_index(db_pool):
-    """Test GIN index on neighbors JSONB works correctly"""
+async def test_neighbor_edges_reverse_lookup(db_pool):
+    """Test idx_neighbor_edges_neighbor finds inbound edges by neighbor_id"""
     async with db_pool.acquire() as conn:
-        # Create memory with neighbors
-        memory_id = await conn.fetchval("""
+        source_id = await conn.fetchval("""
             INSERT INTO memories (type, content, embedding)
-            VALUES ('semantic'::memory_type, 'GIN index test',
+            VALUES ('semantic'::memory_type, 'Edge source test',
                     array_fill(0.85, ARRAY[embedding_dimension()])::vector)
             RETURNING id
         """)
+        neighbor_id = await conn.fetchval("""
+            INSERT INTO memories (type, content, embedding)
+            VALUES ('semantic'::memory_type, 'Edge neighbor test',
+                    array_fill(0.86, ARRAY[embedding_dimension()])::vector)
+            RETURNING id
+        """)
 
-        # Update with neighbors
         await conn.execute("""
-            UPDATE memory_neighborhoods
-            SET neighbors = '{"neighbor1": 0.9, "neighbor2": 0.7}'::jsonb
-            WHERE memory_id = $1
-        """, memory_id)
+            INSERT INTO memory_neighbor_edges (memory_id, neighbor_id, weight)
+            VALUES ($1, $2, 0.9)
+        """, source_id, neighbor_id)
 
-        # Query using JSONB operators
         result = await conn.fetch("""
-            SELECT memory_id FROM memory_neighborhoods
-            WHERE neighbors ? 'neighbor1'
-        """)
+            SELECT memory_id FROM memory_neighbor_edges
+            WHERE neighbor_id = $1
+        """, neighbor_id)
+
+        assert [r['memory_id'] for r in result] == [source_id], "Should find the inbound edge"
 
-        assert len(result) > 0, "Should find memory with neighbor1 key"
+        index_exists = await conn.fetchval("""
+            SELECT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'idx_neighbor_edges_neighbor')
+        """)
+        assert index_exists
 
 
 # -----------------------------------------------------------------------------
@@ -5079,21 +5184,307 @@ async def test_link_memory_to_concept_function(db_pool):
         assert len(edge_result) > 0, "INSTANCE_OF edge should exist in graph"
 
 
-# -----------------------------------------------------------------------------
-# FAST_RECALL FUNCTION TESTS
-# -----------------------------------------------------------------------------
-
-async def test_fast_recall_basic(db_pool):
-    """Test fast_recall() primary retrieval function"""
+async def test_link_memories_to_concepts_bulk(db_pool):
     async with db_pool.acquire() as conn:
-        # Create test memories with distinct content
-        memory_ids = []
-        contents = [
-            'The weather today is sunny and warm',
-            'Python is a programming language',
-            'The sun provides light and warmth',
-            'JavaScript runs in browsers'
-        ]
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            await conn.execute("SET LOCAL search_path = ag_catalog, public;")
+            suffix = get_test_identifier("concepts")
+            existing = f"Existing {suffix}"
+            quoted = f"Owner's {suffix}"
+            fresh = f"Fresh {suffix}"
+
+            ids = await conn.fetchval(
+                """
+                SELECT batch_create_memories_with_embeddings(
+                    'semantic'::memory_type,
+                    ARRAY['concept bulk a', 'concept bulk b'],
+                    (
+                        SELECT jsonb_agg(to_jsonb(array_fill(0.2::float, ARRAY[embedding_dimension()])))
+                        FROM generate_series(1, 2)
+                    )
+                )
+                """
+            )
+            a, b = ids
+
+            existing_id = await conn.fetchval(
+                "INSERT INTO concepts (name) VALUES ($1) RETURNING id", existing
+            )
+            ctid_before = await conn.fetchval(
+                "SELECT ctid::text FROM concepts WHERE id = $1", existing_id
+            )
+
+            concept_ids = await conn.fetchval(
+                "SELECT link_memories_to_concepts($1::uuid[], $2::text[], $3::float[])",
+                [a, a, b, b, b],
+                [existing, quoted, existing, fresh, fresh],
+                [0.5, 0.7, 1.0, 0.2, 0.6],
+            )
+            assert len(concept_ids) == 5
+            assert concept_ids[0] == existing_id
+            assert concept_ids[2] == existing_id
+            assert concept_ids[3] == concept_ids[4]
+
+            # Existing concept rows are not rewritten.
+            ctid_after = await conn.fetchval(
+                "SELECT ctid::text FROM concepts WHERE id = $1", existing_id
+            )
+            assert ctid_after == ctid_before
+
+            links = await conn.fetch(
+                """
+                SELECT mc.memory_id, c.name, mc.strength
+                FROM memory_concepts mc
+                JOIN concepts c ON c.id = mc.concept_id
+                WHERE mc.memory_id = ANY($1::uuid[])
+                """,
+                [a, b],
+            )
+            got = {(r["memory_id"], r["name"]): float(r["strength"]) for r in links}
+            assert got == {
+                (a, existing): 0.5,
+                (a, quoted): 0.7,
+                (b, existing): 1.0,
+                (b, fresh): 0.6,
+            }
+
+            edge_count = await conn.fetchval(
+                f"""
+                SELECT COUNT(*) FROM cypher('memory_graph', $$
+                    MATCH (m:MemoryNode)-[r:INSTANCE_OF]->(c:ConceptNode)
+                    WHERE m.memory_id IN ['{a}', '{b}']
+                    RETURN r
+                $$) as (r agtype)
+                """
+            )
+            assert int(edge_count) == 4
+        finally:
+            await tr.rollback()
+
+
+async def test_create_memory_dedupe_reinforces_existing(db_pool):
+    """p_dedupe => TRUE folds exact and near-duplicate writes into the existing memory."""
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("dedupe_create")
+            original = f"Dedupe original {test_id}"
+            paraphrase = f"Dedupe paraphrase {test_id}"
+            unrelated = f"Dedupe unrelated {test_id}"
+
+            # Random direction for the original; the paraphrase is a tiny perturbation of it.
+            await conn.execute(
+                """
+                INSERT INTO embedding_cache (content_hash, embedding)
+                SELECT encode(sha256($1::text::bytea), 'hex'),
+                       (SELECT array_agg(random()) FROM generate_series(1, embedding_dimension()))::vector
+                ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding
+                """,
+                original,
+            )
+            await conn.execute(
+                """
+                INSERT INTO embedding_cache (content_hash, embedding)
+                SELECT encode(sha256($1::text::bytea), 'hex'), v.e
+                FROM (
+                    SELECT (
+                        SELECT array_agg(CASE WHEN x.ord = 1 THEN x.val + 0.001 ELSE x.val END ORDER BY x.ord)
+                        FROM unnest(ec.embedding::real[]) WITH ORDINALITY AS x(val, ord)
+                    )::vector AS e
+                    FROM embedding_cache ec
+                    WHERE ec.content_hash = encode(sha256($2::text::bytea), 'hex')
+                ) v
+                ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding
+                """,
+                paraphrase,
+                original,
+            )
+            await conn.execute(
+                """
+                INSERT INTO embedding_cache (content_hash, embedding)
+                SELECT encode(sha256($1::text::bytea), 'hex'),
+                       (SELECT array_agg(random()) FROM generate_series(1, embedding_dimension()))::vector
+                ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding
+                """,
+                unrelated,
+            )
+
+            source_a = {"kind": "paper", "ref": f"doi:10.0000/{test_id}-a", "trust": 0.8}
+            source_b = {"kind": "paper", "ref": f"doi:10.0000/{test_id}-b", "trust": 0.8}
+            create_sql = """
+                SELECT create_semantic_memory(
+                    $1::text, 0.9::float, NULL, NULL, $2::jsonb, $3::float,
+                    NULL, NULL, p_dedupe => $4::boolean
+                )
+            """
+
+            first_id = await conn.fetchval(create_sql, original, json.dumps(source_a), 0.4, True)
+            again_id = await conn.fetchval(create_sql, original, json.dumps(source_b), 0.7, True)
+            near_id = await conn.fetchval(create_sql, paraphrase, None, 0.5, True)
+            assert again_id == first_id
+            assert near_id == first_id
+
+            row = await conn.fetchrow(
+                """
+                SELECT ms.access_count, COALESCE(ms.importance, m.importance) AS importance,
+                       jsonb_array_length(sm.source_references) AS n_sources
+                FROM memories m
+                JOIN memory_stats ms ON ms.memory_id = m.id
+                JOIN semantic_memories sm ON sm.memory_id = m.id
+                WHERE m.id = $1::uuid
+                """,
+                first_id,
+            )
+            assert row["access_count"] == 2
+            assert float(row["importance"]) >= 0.7
+            assert row["n_sources"] == 2
+
+            # Without the flag a duplicate is still inserted.
+            plain_id = await conn.fetchval(create_sql, original, None, 0.4, False)
+            assert plain_id != first_id
+
+            # Batch creators keep input order and substitute the existing id.
+            ids = await conn.fetchval(
+                "SELECT batch_create_memories($1::jsonb, TRUE)",
+                json.dumps([
+                    {"type": "semantic", "content": unrelated},
+                    {"type": "semantic", "content": paraphrase},
+                ]),
+            )
+            assert len(ids) == 2
+            assert ids[1] in (first_id, plain_id)
+            assert ids[0] not in (first_id, plain_id)
+            total = await conn.fetchval(
+                "SELECT COUNT(*) FROM memories WHERE content = ANY($1::text[])",
+                [original, paraphrase, unrelated],
+            )
+            assert int(total) == 3
+        finally:
+            await tr.rollback()
+
+
+async def test_batch_create_memories_dedupe_collapses_in_batch_duplicates(db_pool):
+    """Identical and near-identical items of one batch become one memory."""
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("dedupe_in_batch")
+            original = f"In-batch original {test_id}"
+            paraphrase = f"In-batch paraphrase {test_id}"
+            unrelated = f"In-batch unrelated {test_id}"
+
+            for content in (original, unrelated):
+                await conn.execute(
+                    """
+                    INSERT INTO embedding_cache (content_hash, embedding)
+                    SELECT encode(sha256($1::text::bytea), 'hex'),
+                           (SELECT array_agg(random()) FROM generate_series(1, embedding_dimension()))::vector
+                    ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding
+                    """,
+                    content,
+                )
+            await conn.execute(
+                """
+                INSERT INTO embedding_cache (content_hash, embedding)
+                SELECT encode(sha256($1::text::bytea), 'hex'), ec.embedding
+                FROM embedding_cache ec
+                WHERE ec.content_hash = encode(sha256($2::text::bytea), 'hex')
+                ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding
+                """,
+                paraphrase,
+                original,
+            )
+
+            ids = await conn.fetchval(
+                "SELECT batch_create_memories($1::jsonb, TRUE)",
+                json.dumps([
+                    {"type": "semantic", "content": original},
+                    {"type": "semantic", "content": paraphrase},
+                    {"type": "semantic", "content": original},
+                    {"type": "semantic", "content": unrelated},
+                    {"type": "episodic", "content": original},
+                ]),
+            )
+            assert len(ids) == 5
+            assert ids[0] == ids[1] == ids[2]
+            assert len({ids[0], ids[3], ids[4]}) == 3
+
+            total = await conn.fetchval(
+                "SELECT COUNT(*) FROM memories WHERE content = ANY($1::text[])",
+                [original, paraphrase, unrelated],
+            )
+            assert int(total) == 3
+            access_count = await conn.fetchval(
+                "SELECT access_count FROM memory_stats WHERE memory_id = $1", ids[0]
+            )
+            assert int(access_count) == 2
+        finally:
+            await tr.rollback()
+
+
+async def test_find_duplicate_memory_not_crowded_out_by_other_types(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("dedupe_crowded")
+            query = await conn.fetchval(
+                "SELECT (SELECT array_agg(random()) FROM generate_series(1, embedding_dimension()))::vector::text"
+            )
+            # Exact-match neighbors of another type fill the HNSW candidate list.
+            await conn.execute(
+                """
+                INSERT INTO memories (type, content, embedding)
+                SELECT 'episodic', $1 || ' ' || g, $2::vector
+                FROM generate_series(1, 100) g
+                """,
+                f"Crowding episodic {test_id}",
+                query,
+            )
+            semantic_id = await conn.fetchval(
+                """
+                INSERT INTO memories (type, content, embedding)
+                VALUES ('semantic', $1, $2::vector)
+                RETURNING id
+                """,
+                f"Crowded semantic {test_id}",
+                query,
+            )
+            await conn.execute("SET LOCAL hnsw.ef_search = 10")
+
+            dup = await conn.fetchval(
+                "SELECT find_duplicate_memory('semantic', $1, $2::vector)",
+                f"Different wording {test_id}",
+                query,
+            )
+            assert dup == semantic_id
+            assert await conn.fetchval(
+                "SELECT find_duplicate_memory('semantic', $1, array_fill(0.0, ARRAY[embedding_dimension()])::vector)",
+                f"Zero vector {test_id}",
+            ) is None
+        finally:
+            await tr.rollback()
+
+
+# -----------------------------------------------------------------------------
+# FAST_RECALL FUNCTION TESTS
+# -----------------------------------------------------------------------------
+
+async def test_fast_recall_basic(db_pool):
+    """Test fast_recall() primary retrieval function"""
+    async with db_pool.acquire() as conn:
+        # Create test memories with distinct content
+        memory_ids = []
+        contents = [
+            'The weather today is sunny and warm',
+            'Python is a programming language',
+            'The sun provides light and warmth',
+            'JavaScript runs in browsers'
+        ]
 
         for content in contents:
             memory_id = await conn.fetchval("""
@@ -5195,6 +5586,244 @@ async def test_fast_recall_source_attribution(db_pool):
                 raise
 
 
+async def test_fast_recall_filters_keep_exact_count(db_pool):
+    """Test filtered recall returns `limit` matching rows even when closer rows are filtered out"""
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("fast_recall_filters")
+            vec = [0.0] * EMBEDDING_DIMENSION
+            vec[0] = 1.0
+            near = "[" + ",".join(str(x) for x in vec) + "]"
+            vec[1] = 0.2
+            farther = "[" + ",".join(str(x) for x in vec) + "]"
+
+            for i in range(8):
+                await conn.execute(
+                    "INSERT INTO memories (type, content, embedding, importance) VALUES ('semantic', $1, $2::vector, 0.9)",
+                    f"Filter decoy {i} {test_id}",
+                    near,
+                )
+            wanted = set()
+            for i in range(3):
+                wanted.add(await conn.fetchval(
+                    "INSERT INTO memories (type, content, embedding, importance) VALUES ('episodic', $1, $2::vector, 0.9) RETURNING id",
+                    f"Filter target {i} {test_id}",
+                    farther,
+                ))
+
+            rows = await conn.fetch(
+                """
+                SELECT fr.memory_id, fr.memory_type, m.importance
+                FROM fast_recall_with_embedding($1::vector, 3, ARRAY['episodic']::memory_type[], 0.8) fr
+                JOIN memories m ON m.id = fr.memory_id
+                """,
+                near,
+            )
+            assert len(rows) == 3
+            assert all(r["memory_type"] == "episodic" for r in rows)
+            assert all(r["importance"] >= 0.8 for r in rows)
+            assert {r["memory_id"] for r in rows} == wanted
+        finally:
+            await tr.rollback()
+
+
+async def test_fast_recall_hybrid_fuses_lexical_matches(db_pool):
+    """Test hybrid recall surfaces an exact-token match that vector search alone misses"""
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("fast_recall_hybrid")
+            vec = [0.0] * EMBEDDING_DIMENSION
+            vec[0] = 1.0
+            near = "[" + ",".join(str(x) for x in vec) + "]"
+            vec[0], vec[1] = 0.0, 1.0
+            orthogonal = "[" + ",".join(str(x) for x in vec) + "]"
+
+            for i in range(12):
+                await conn.execute(
+                    "INSERT INTO memories (type, content, embedding, importance) VALUES ('semantic', $1, $2::vector, 1.0)",
+                    f"Hybrid filler {i} {test_id}",
+                    near,
+                )
+            target = await conn.fetchval(
+                "INSERT INTO memories (type, content, embedding, importance) VALUES ('semantic', $1, $2::vector, 1.0) RETURNING id",
+                f"Reset the zyxquorble relay {test_id}",
+                orthogonal,
+            )
+
+            vector_only = await conn.fetch(
+                "SELECT memory_id, source FROM fast_recall_with_embedding($1::vector, 10, NULL, 0.99)",
+                near,
+            )
+            assert target not in {r["memory_id"] for r in vector_only}
+
+            hybrid = await conn.fetch(
+                """
+                SELECT memory_id, source
+                FROM fast_recall_with_embedding($1::vector, 10, NULL, 0.99, p_lexical_query => 'zyxquorble')
+                """,
+                near,
+            )
+            assert len(hybrid) == 10
+            sources = {r["memory_id"]: r["source"] for r in hybrid}
+            assert sources.get(target) == "lexical"
+        finally:
+            await tr.rollback()
+
+
+async def test_mmr_rerank_skips_near_duplicates(db_pool):
+    """Test mmr_rerank trades relevance for diversity when lambda < 1"""
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("mmr")
+
+            def _vec(**dims: float) -> str:
+                v = [0.0] * EMBEDDING_DIMENSION
+                for k, val in dims.items():
+                    v[int(k[1:])] = val
+                return "[" + ",".join(str(x) for x in v) + "]"
+
+            embeddings = [_vec(d0=1.0)] * 3 + [_vec(d0=0.8, d1=0.6), _vec(d0=0.8, d2=0.6)]
+            ids = []
+            for i, emb in enumerate(embeddings):
+                ids.append(await conn.fetchval(
+                    "INSERT INTO memories (type, content, embedding) VALUES ('semantic', $1, $2::vector) RETURNING id",
+                    f"MMR candidate {i} {test_id}",
+                    emb,
+                ))
+            relevance = [0.9, 0.89, 0.88, 0.72, 0.71]
+
+            plain = await conn.fetch(
+                "SELECT memory_id FROM mmr_rerank($1::uuid[], $2::float[], 3, 1.0) ORDER BY mmr_rank",
+                ids,
+                relevance,
+            )
+            assert [r["memory_id"] for r in plain] == ids[:3]
+
+            # Relevance is min-max scaled over the candidates, so the duplicates' lead is ~0.9:
+            # a strong diversity setting is needed before exact copies give way.
+            diverse = await conn.fetch(
+                "SELECT memory_id FROM mmr_rerank($1::uuid[], $2::float[], 3, 0.1) ORDER BY mmr_rank",
+                ids,
+                relevance,
+            )
+            assert [r["memory_id"] for r in diverse] == [ids[0], ids[3], ids[4]]
+        finally:
+            await tr.rollback()
+
+
+async def test_mmr_rerank_low_diversity_only_demotes_near_duplicates(db_pool):
+    """Raw recall scores (~0.05-0.3) are rescaled before the cosine redundancy penalty applies"""
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("mmr_scale")
+
+            def _vec(**dims: float) -> str:
+                v = [0.0] * EMBEDDING_DIMENSION
+                for k, val in dims.items():
+                    v[int(k[1:])] = val
+                return "[" + ",".join(str(x) for x in v) + "]"
+
+            # top hit, its exact duplicate, a related but distinct memory, an unrelated weak match
+            embeddings = [_vec(d0=1.0), _vec(d0=1.0), _vec(d0=0.6, d1=0.8), _vec(d2=1.0)]
+            ids = []
+            for i, emb in enumerate(embeddings):
+                ids.append(await conn.fetchval(
+                    "INSERT INTO memories (type, content, embedding) VALUES ('semantic', $1, $2::vector) RETURNING id",
+                    f"MMR scale candidate {i} {test_id}",
+                    emb,
+                ))
+            relevance = [0.30, 0.29, 0.29, 0.05]
+
+            # diversity 0.2 -> lambda 0.8
+            ranked = await conn.fetch(
+                "SELECT memory_id FROM mmr_rerank($1::uuid[], $2::float[], 4, 0.8) ORDER BY mmr_rank",
+                ids,
+                relevance,
+            )
+            # The duplicate drops below the distinct memory, but not below the weak unrelated one.
+            assert [r["memory_id"] for r in ranked] == [ids[0], ids[2], ids[1], ids[3]]
+        finally:
+            await tr.rollback()
+
+
+async def test_fast_recall_modes_scope_ef_search_and_record_stats(db_pool):
+    """Test recall modes set ef_search per call only, exact mode scans exactly, and calls are counted"""
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("recall_mode")
+            await conn.execute(f"SET LOCAL application_name = '{test_id}'")
+
+            def _vec(**dims: float) -> str:
+                v = [0.0] * EMBEDDING_DIMENSION
+                for k, val in dims.items():
+                    v[int(k[1:])] = val
+                return "[" + ",".join(str(x) for x in v) + "]"
+
+            near_id = await conn.fetchval(
+                "INSERT INTO memories (type, content, embedding) VALUES ('semantic', $1, $2::vector) RETURNING id",
+                f"Recall mode target {test_id}",
+                _vec(d0=1.0, d1=0.05),
+            )
+            await conn.execute(
+                "INSERT INTO memories (type, content, embedding) VALUES ('semantic', $1, $2::vector)",
+                f"Recall mode distractor {test_id}",
+                _vec(d1=1.0),
+            )
+
+            ef_before = await conn.fetchval("SELECT current_setting('hnsw.ef_search', true)")
+            for mode in ("fast", "balanced", "exact"):
+                rows = await conn.fetch(
+                    "SELECT memory_id, source FROM fast_recall_with_embedding($1::vector, 1, p_mode => $2)",
+                    _vec(d0=1.0),
+                    mode,
+                )
+                assert [r["memory_id"] for r in rows] == [near_id], mode
+                assert rows[0]["source"] == "vector"
+            assert await conn.fetchval("SELECT current_setting('hnsw.ef_search', true)") == ef_before
+
+            assert await conn.fetchval("SELECT recall_mode_ef_search('fast', 10)") == 20
+            assert await conn.fetchval("SELECT recall_mode_ef_search('balanced', 10)") == 100
+            assert await conn.fetchval("SELECT recall_mode_ef_search('exact', 10)") is None
+
+            with pytest.raises(asyncpg.exceptions.RaiseError):
+                async with conn.transaction():
+                    await conn.fetch(
+                        "SELECT * FROM fast_recall_with_embedding($1::vector, 1, p_mode => 'sloppy')",
+                        _vec(d0=1.0),
+                    )
+
+            await conn.execute("SELECT record_recall_mode('exact', clock_timestamp())")
+            await conn.execute("SELECT record_recall_mode('Exact', clock_timestamp())")
+            await conn.execute("SELECT record_recall_mode(NULL, clock_timestamp())")
+            # Recalls only append to the (unlogged) log; the shared stats rows are written by maintenance.
+            assert await conn.fetchval(
+                "SELECT relpersistence FROM pg_class WHERE oid = 'recall_mode_log'::regclass"
+            ) == "u"
+            assert await conn.fetchval("SELECT COUNT(*) FROM recall_mode_stats WHERE caller = $1", test_id) == 0
+            assert await conn.fetchval("SELECT COUNT(*) FROM recall_mode_log WHERE caller = $1", test_id) == 3
+            assert await conn.fetchval("SELECT flush_recall_mode_log()") >= 2
+            stats = {
+                r["mode"]: r["calls"]
+                for r in await conn.fetch(
+                    "SELECT mode, calls FROM recall_mode_stats WHERE caller = $1",
+                    test_id,
+                )
+            }
+            assert stats == {"exact": 2, "default": 1}
+        finally:
+            await tr.rollback()
+
+
 # -----------------------------------------------------------------------------
 # SEARCH FUNCTIONS TESTS
 # -----------------------------------------------------------------------------
@@ -6070,9 +6699,14 @@ async def test_memory_health_view_aggregations(db_pool):
 
         for i in range(5):
             await conn.execute("""
-                INSERT INTO memories (type, content, embedding, importance, access_count)
-                VALUES ('procedural'::memory_type, $1,
-                        array_fill(0.94, ARRAY[embedding_dimension()])::vector, $2, $3)
+                WITH m AS (
+                    INSERT INTO memories (type, content, embedding, importance)
+                    VALUES ('procedural'::memory_type, $1,
+                            array_fill(0.94, ARRAY[embedding_dimension()])::vector, $2)
+                    RETURNING id
+                )
+                INSERT INTO memory_stats (memory_id, access_count)
+                SELECT id, $3 FROM m
             """, f'Health view test {unique_suffix} {i}', 0.5 + i * 0.1, i)
 
         # Query view
@@ -6327,6 +6961,70 @@ async def test_get_embedding_different_content_different_embeddings(db_pool, ens
         assert embedding1 != embedding2, "Different content should produce different embeddings"
 
 
+async def test_get_embeddings_batch_matches_single_and_caches(db_pool, ensure_embedding_service):
+    """Test get_embeddings() returns per-input vectors in order and fills the cache"""
+    async with db_pool.acquire() as conn:
+        test_id = get_test_identifier("get_embs_batch")
+        contents = [
+            f"Batch embedding alpha {test_id}",
+            f"Batch embedding beta {test_id}",
+            f"Batch embedding alpha {test_id}",
+        ]
+
+        hashes = [
+            await conn.fetchval("SELECT encode(sha256($1::text::bytea), 'hex')", c)
+            for c in contents
+        ]
+        await conn.execute(
+            "DELETE FROM embedding_cache WHERE content_hash = ANY($1::text[])", hashes
+        )
+
+        n = await conn.fetchval(
+            "SELECT array_length(get_embeddings($1::text[]), 1)", contents
+        )
+        assert n == 3, "Should return one embedding per input"
+
+        cached = await conn.fetchval(
+            "SELECT COUNT(*) FROM embedding_cache WHERE content_hash = ANY($1::text[])", hashes
+        )
+        assert cached == 2, "Duplicate inputs should share a single cache entry"
+
+        matches = await conn.fetchval(
+            """
+            SELECT bool_and(e.emb = get_embedding(t.content))
+            FROM unnest($1::text[]) WITH ORDINALITY AS t(content, ord)
+            JOIN unnest(get_embeddings($1::text[])) WITH ORDINALITY AS e(emb, ord)
+              ON e.ord = t.ord
+            """,
+            contents,
+        )
+        assert matches is True, "Batch embeddings should match get_embedding() per input"
+
+
+async def test_add_to_working_memory_batch_inserts_in_order(db_pool, ensure_embedding_service):
+    """Test add_to_working_memory_batch() inserts every item and returns ids in input order"""
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("wm_batch")
+            contents = [f"Working batch {i} {test_id}" for i in range(3)]
+
+            ids = await conn.fetchval(
+                "SELECT add_to_working_memory_batch($1::text[], INTERVAL '1 hour')",
+                contents,
+            )
+            assert len(ids) == 3
+
+            rows = await conn.fetch(
+                "SELECT id, content FROM working_memory WHERE id = ANY($1::uuid[])", ids
+            )
+            by_id = {r["id"]: r["content"] for r in rows}
+            assert [by_id[i] for i in ids] == contents
+        finally:
+            await tr.rollback()
+
+
 async def test_get_embedding_http_error_handling(db_pool):
     """Test get_embedding() error handling when HTTP service is unavailable"""
     async with db_pool.acquire() as conn:
@@ -6675,7 +7373,7 @@ async def test_create_memory_initializes_neighborhood(db_pool, ensure_embedding_
 
         # Verify neighborhood record was created
         neighborhood = await conn.fetchrow("""
-            SELECT memory_id, neighbors, is_stale FROM memory_neighborhoods
+            SELECT memory_id, is_stale FROM memory_neighborhoods
             WHERE memory_id = $1
         """, memory_id)
 
@@ -6858,6 +7556,59 @@ async def test_batch_create_memories_creates_rows_and_nodes(db_pool, ensure_embe
             await tr.rollback()
 
 
+async def test_batch_create_memories_set_based_keeps_order_and_defaults(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("batch_create_set_based")
+            items = [
+                {"type": "procedural", "content": f"Batch procedural {test_id}", "steps": {"steps": ["a", "b"]}},
+                {"type": "strategic", "content": f"Batch strategic {test_id}"},
+                {"type": "episodic", "content": f"Batch episodic {test_id}", "trust_level": 1.5},
+                {"type": "semantic", "content": f"Batch semantic {test_id}", "category": ["x"]},
+            ]
+            vec = "[" + ",".join(["0.1"] * EMBEDDING_DIMENSION) + "]"
+            for item in items:
+                await conn.execute(
+                    "INSERT INTO embedding_cache (content_hash, embedding) VALUES (encode(sha256($1::text::bytea), 'hex'), $2::vector) ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding",
+                    item["content"],
+                    vec,
+                )
+
+            ids = await conn.fetchval("SELECT batch_create_memories($1::jsonb)", json.dumps(items))
+            rows = await conn.fetch(
+                """
+                SELECT m.id, m.type::text as type, m.content, m.trust_level, m.source_attribution->>'kind' as kind
+                FROM unnest($1::uuid[]) WITH ORDINALITY AS t(id, ord)
+                JOIN memories m ON m.id = t.id
+                ORDER BY t.ord
+                """,
+                ids,
+            )
+            assert [r["content"] for r in rows] == [item["content"] for item in items]
+            assert [r["type"] for r in rows] == ["procedural", "strategic", "episodic", "semantic"]
+            assert rows[0]["trust_level"] == pytest.approx(0.70)
+            assert rows[2]["trust_level"] == pytest.approx(1.0)
+            assert [r["kind"] for r in rows] == ["internal", "internal", "internal", "unattributed"]
+
+            steps = await conn.fetchval("SELECT steps FROM procedural_memories WHERE memory_id = $1", ids[0])
+            assert _coerce_json(steps) == {"steps": ["a", "b"]}
+            pattern = await conn.fetchval("SELECT pattern_description FROM strategic_memories WHERE memory_id = $1", ids[1])
+            assert pattern == items[1]["content"]
+            category = await conn.fetchval("SELECT category FROM semantic_memories WHERE memory_id = $1", ids[3])
+            assert list(category) == ["x"]
+
+            with pytest.raises(asyncpg.exceptions.RaiseError, match="item 2 invalid type"):
+                async with conn.transaction():
+                    await conn.fetchval(
+                        "SELECT batch_create_memories($1::jsonb)",
+                        json.dumps([items[0], {"type": "dream", "content": "nope"}]),
+                    )
+        finally:
+            await tr.rollback()
+
+
 # -----------------------------------------------------------------------------
 # INTEGRATION TESTS - Full workflow with real embeddings
 # -----------------------------------------------------------------------------
@@ -7700,30 +8451,160 @@ async def test_gather_turn_context_has_expected_shape(db_pool):
         assert isinstance(ctx["urgent_drives"], list)
 
 
-async def test_get_environment_snapshot_has_expected_keys(db_pool):
+async def test_turn_context_snapshot_tracks_state_version(db_pool):
     async with db_pool.acquire() as conn:
-        env = _coerce_json(await conn.fetchval("SELECT get_environment_snapshot()"))
-        assert isinstance(env, dict)
-        for key in ("timestamp", "time_since_user_hours", "pending_events", "day_of_week", "hour_of_day"):
-            assert key in env
+        v1 = int(await conn.fetchval("SELECT turn_context_version()"))
+        snap1 = _coerce_json(await conn.fetchval("SELECT get_turn_context_snapshot()"))
+        assert int(snap1["context_version"]) >= v1
+        assert "environment" in snap1 and "goals" in snap1
 
+        cached_at = await conn.fetchval("SELECT computed_at FROM turn_context_cache WHERE id = 1")
+        await conn.fetchval("SELECT get_turn_context_snapshot()")
+        assert await conn.fetchval("SELECT computed_at FROM turn_context_cache WHERE id = 1") == cached_at
 
-async def test_get_goals_snapshot_has_expected_keys(db_pool):
-    async with db_pool.acquire() as conn:
-        snap = _coerce_json(await conn.fetchval("SELECT get_goals_snapshot()"))
-        assert isinstance(snap, dict)
-        for key in ("active", "queued", "issues", "counts"):
-            assert key in snap
+        # Committed state change bumps the version and invalidates the snapshot.
+        await conn.execute("UPDATE heartbeat_state SET updated_at = updated_at WHERE id = 1")
+        v2 = int(await conn.fetchval("SELECT turn_context_version()"))
+        assert v2 > int(snap1["context_version"])
+        snap2 = _coerce_json(await conn.fetchval("SELECT get_turn_context_snapshot()"))
+        assert int(snap2["context_version"]) == v2
 
 
-async def test_get_recent_context_respects_limit(db_pool):
-    async with db_pool.acquire() as conn:
-        ctx = _coerce_json(await conn.fetchval("SELECT get_recent_context(2)"))
-        assert isinstance(ctx, list)
-        assert len(ctx) <= 2
+async def test_turn_context_version_moves_only_when_writer_commits(db_pool):
+    async with db_pool.acquire() as writer, db_pool.acquire() as reader:
+        tr = writer.transaction()
+        await tr.start()
+        try:
+            await writer.execute("UPDATE heartbeat_state SET updated_at = updated_at WHERE id = 1")
+            v_before = int(await reader.fetchval("SELECT turn_context_version()"))
+            # A reader caching while the write is in flight stores it under the old version.
+            snap = _coerce_json(await reader.fetchval("SELECT get_turn_context_snapshot()"))
+            assert int(snap["context_version"]) == v_before
+        finally:
+            await tr.commit()
 
+        v_after = int(await reader.fetchval("SELECT turn_context_version()"))
+        assert v_after > v_before
+        snap = _coerce_json(await reader.fetchval("SELECT get_turn_context_snapshot()"))
+        assert int(snap["context_version"]) == v_after
 
-async def test_get_identity_context_and_worldview_context_return_arrays(db_pool):
+        # Compaction folds the log without changing the version.
+        await reader.fetchval("SELECT compact_state_versions()")
+        assert int(await reader.fetchval("SELECT turn_context_version()")) == v_after
+
+
+async def test_state_version_reader_folds_past_threshold(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            name = get_test_identifier("state_version_fold")
+            threshold = int(await conn.fetchval("SELECT state_version_fold_threshold()"))
+            await conn.execute(
+                "INSERT INTO state_version_log (name) SELECT $1 FROM generate_series(1, $2)",
+                name,
+                threshold * 3,
+            )
+            # The read folds the rows it had to count, so the next read scans one row.
+            assert int(await conn.fetchval("SELECT state_version($1)", name)) == threshold * 3
+            assert int(await conn.fetchval("SELECT COUNT(*) FROM state_version_log WHERE name = $1", name)) == 1
+            assert int(await conn.fetchval("SELECT state_version($1)", name)) == threshold * 3
+
+            # Below the threshold nothing is rewritten, and compaction skips already-folded names.
+            await conn.execute("INSERT INTO state_version_log (name) VALUES ($1)", name)
+            assert int(await conn.fetchval("SELECT state_version($1)", name)) == threshold * 3 + 1
+            assert int(await conn.fetchval("SELECT COUNT(*) FROM state_version_log WHERE name = $1", name)) == 2
+            await conn.fetchval("SELECT compact_state_versions()")
+            ids_before = await conn.fetch("SELECT id FROM state_version_log WHERE name = $1", name)
+            assert len(ids_before) == 1
+            await conn.fetchval("SELECT compact_state_versions()")
+            assert await conn.fetch("SELECT id FROM state_version_log WHERE name = $1", name) == ids_before
+        finally:
+            await tr.rollback()
+
+
+async def test_recall_cache_invalidated_by_memory_write_watermark(db_pool):
+    async with db_pool.acquire() as conn:
+        test_id = get_test_identifier("recall_cache")
+        key = await conn.fetchval("SELECT recall_cache_key($1, '{\"limit\": 5}'::jsonb)", f"  Where IS   {test_id} ")
+        assert key == await conn.fetchval("SELECT recall_cache_key($1, '{\"limit\": 5}'::jsonb)", f"where is {test_id}".lower())
+        assert key != await conn.fetchval("SELECT recall_cache_key($1, '{\"limit\": 6}'::jsonb)", f"where is {test_id}".lower())
+
+        mem_id = None
+        try:
+            v1 = int(await conn.fetchval("SELECT memory_write_version()"))
+            await conn.execute("SELECT put_cached_recall($1, $2, '[{\"hit\": 1}]'::jsonb)", key, v1)
+            assert _coerce_json(await conn.fetchval("SELECT get_cached_recall($1)", key)) == [{"hit": 1}]
+            assert await conn.fetchval("SELECT get_cached_recall($1, 0)", key) is None
+
+            # Committed memory write moves the watermark and invalidates the entry.
+            mem_id = await conn.fetchval(
+                "INSERT INTO memories (type, content, embedding) VALUES ('semantic', $1, array_fill(0.3, ARRAY[embedding_dimension()])::vector) RETURNING id",
+                f"Recall cache write {test_id}",
+            )
+            v2 = int(await conn.fetchval("SELECT memory_write_version()"))
+            assert v2 > v1
+            assert await conn.fetchval("SELECT get_cached_recall($1)", key) is None
+
+            # Access bookkeeping does not.
+            await conn.execute("SELECT put_cached_recall($1, $2, '[]'::jsonb)", key, v2)
+            await conn.execute("UPDATE memory_stats SET access_count = access_count + 1, last_accessed = CURRENT_TIMESTAMP WHERE memory_id = $1", mem_id)
+            assert int(await conn.fetchval("SELECT memory_write_version()")) == v2
+            assert _coerce_json(await conn.fetchval("SELECT get_cached_recall($1)", key)) == []
+        finally:
+            await conn.execute("DELETE FROM recall_cache WHERE cache_key = $1", key)
+            if mem_id is not None:
+                await conn.execute("DELETE FROM memories WHERE id = $1", mem_id)
+
+
+async def test_memory_write_version_is_per_statement_and_commit_visible(db_pool):
+    async with db_pool.acquire() as writer, db_pool.acquire() as reader:
+        test_id = get_test_identifier("write_version")
+        v1 = int(await reader.fetchval("SELECT memory_write_version()"))
+        tr = writer.transaction()
+        await tr.start()
+        try:
+            await writer.execute(
+                """
+                INSERT INTO memories (type, content, embedding)
+                SELECT 'semantic', $1 || '-' || g, array_fill(0.3, ARRAY[embedding_dimension()])::vector
+                FROM generate_series(1, 20) g
+                """,
+                test_id,
+            )
+            # One bump for the multi-row statement, not one per row.
+            assert int(await writer.fetchval("SELECT memory_write_version()")) - v1 < 20
+            # Uncommitted writes do not move the watermark other sessions see.
+            assert int(await reader.fetchval("SELECT memory_write_version()")) == v1
+        finally:
+            await tr.rollback()
+        assert int(await reader.fetchval("SELECT memory_write_version()")) == v1
+
+
+async def test_get_environment_snapshot_has_expected_keys(db_pool):
+    async with db_pool.acquire() as conn:
+        env = _coerce_json(await conn.fetchval("SELECT get_environment_snapshot()"))
+        assert isinstance(env, dict)
+        for key in ("timestamp", "time_since_user_hours", "pending_events", "day_of_week", "hour_of_day"):
+            assert key in env
+
+
+async def test_get_goals_snapshot_has_expected_keys(db_pool):
+    async with db_pool.acquire() as conn:
+        snap = _coerce_json(await conn.fetchval("SELECT get_goals_snapshot()"))
+        assert isinstance(snap, dict)
+        for key in ("active", "queued", "issues", "counts"):
+            assert key in snap
+
+
+async def test_get_recent_context_respects_limit(db_pool):
+    async with db_pool.acquire() as conn:
+        ctx = _coerce_json(await conn.fetchval("SELECT get_recent_context(2)"))
+        assert isinstance(ctx, list)
+        assert len(ctx) <= 2
+
+
+async def test_get_identity_context_and_worldview_context_return_arrays(db_pool):
     async with db_pool.acquire() as conn:
         ident = _coerce_json(await conn.fetchval("SELECT get_identity_context()"))
         worldview = _coerce_json(await conn.fetchval("SELECT get_worldview_context()"))
@@ -8045,17 +8926,21 @@ async def test_update_memory_importance_trigger_on_access(db_pool):
         try:
             mem_id = await conn.fetchval(
                 """
-                INSERT INTO memories (type, content, embedding, importance, access_count)
-                VALUES ('semantic', 'imp', array_fill(0.0::float, ARRAY[embedding_dimension()])::vector, 1.0, 0)
+                INSERT INTO memories (type, content, embedding, importance)
+                VALUES ('semantic', 'imp', array_fill(0.0::float, ARRAY[embedding_dimension()])::vector, 1.0)
                 RETURNING id
                 """
             )
-            await conn.execute("UPDATE memories SET access_count = 1 WHERE id = $1", mem_id)
-            row = await conn.fetchrow("SELECT importance, last_accessed, access_count FROM memories WHERE id = $1", mem_id)
+            await conn.execute("UPDATE memory_stats SET access_count = 1 WHERE memory_id = $1", mem_id)
+            row = await conn.fetchrow("SELECT importance, last_accessed, access_count FROM memory_stats WHERE memory_id = $1", mem_id)
             assert row is not None
             assert row["last_accessed"] is not None
             assert int(row["access_count"]) == 1
             assert float(row["importance"]) > 1.0
+            # The base value on memories is untouched; an explicit write replaces the boost.
+            assert float(await conn.fetchval("SELECT importance FROM memories WHERE id = $1", mem_id)) == pytest.approx(1.0)
+            await conn.execute("UPDATE memories SET importance = 0.4 WHERE id = $1", mem_id)
+            assert await conn.fetchval("SELECT importance FROM memory_stats WHERE memory_id = $1", mem_id) is None
         finally:
             await tr.rollback()
 
@@ -8108,6 +8993,43 @@ async def test_mark_neighborhoods_stale_trigger_sets_stale(db_pool):
         finally:
             await tr.rollback()
 
+async def test_flush_memory_access_log_applies_one_boost_per_memory(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            mem_id = await conn.fetchval(
+                """
+                INSERT INTO memories (type, content, embedding, importance)
+                VALUES ('semantic', 'access log', array_fill(0.0::float, ARRAY[embedding_dimension()])::vector, 0.5)
+                RETURNING id
+                """
+            )
+            await conn.execute("UPDATE memory_neighborhoods SET is_stale = FALSE WHERE memory_id = $1", mem_id)
+
+            recorded = await conn.fetchval("SELECT record_memory_access($1::uuid[])", [mem_id, mem_id, mem_id])
+            assert recorded == 3
+            # Recording does not touch the stats row.
+            stats = "SELECT access_count, COALESCE(ms.importance, m.importance) AS importance, last_accessed FROM memories m JOIN memory_stats ms ON ms.memory_id = m.id WHERE m.id = $1"
+            row = await conn.fetchrow(stats, mem_id)
+            assert int(row["access_count"]) == 0
+            assert float(row["importance"]) == pytest.approx(0.5)
+
+            flushed = await conn.fetchval("SELECT flush_memory_access_log()")
+            assert flushed >= 1
+            row = await conn.fetchrow(stats, mem_id)
+            assert int(row["access_count"]) == 3
+            assert row["last_accessed"] is not None
+            # One trigger boost for the whole batch of accesses.
+            assert float(row["importance"]) == pytest.approx(0.5 * (1.0 + np.log(4) * 0.1), rel=1e-6)
+
+            is_stale = await conn.fetchval("SELECT is_stale FROM memory_neighborhoods WHERE memory_id = $1", mem_id)
+            assert is_stale is False
+            remaining = await conn.fetchval("SELECT COUNT(*) FROM memory_access_log WHERE memory_id = $1", mem_id)
+            assert int(remaining) == 0
+        finally:
+            await tr.rollback()
+
 
 async def test_recompute_neighborhood_writes_neighbors(db_pool):
     async with db_pool.acquire() as conn:
@@ -8144,11 +9066,253 @@ async def test_recompute_neighborhood_writes_neighbors(db_pool):
             )
 
             await conn.execute("SELECT recompute_neighborhood($1::uuid, 50, 0.99)", m1)
-            row = await conn.fetchrow("SELECT is_stale, neighbors FROM memory_neighborhoods WHERE memory_id = $1", m1)
+            row = await conn.fetchrow("SELECT is_stale FROM memory_neighborhoods WHERE memory_id = $1", m1)
             assert row is not None
             assert row["is_stale"] is False
-            neighbors = _coerce_json(row["neighbors"])
-            assert str(m2) in neighbors
+            neighbor_ids = {
+                r["neighbor_id"]
+                for r in await conn.fetch("SELECT neighbor_id FROM memory_neighbor_edges WHERE memory_id = $1", m1)
+            }
+            assert m2 in neighbor_ids
+        finally:
+            await tr.rollback()
+
+
+async def test_refresh_relevance_scores_stores_score_without_touching_updated_at(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            mem_id = await conn.fetchval(
+                """
+                INSERT INTO memories (type, content, embedding, importance, decay_rate, created_at, updated_at)
+                VALUES ('semantic', 'relevance refresh', array_fill(0.2, ARRAY[embedding_dimension()])::vector,
+                        0.8, 0.1, CURRENT_TIMESTAMP - INTERVAL '10 days', CURRENT_TIMESTAMP - INTERVAL '10 days')
+                RETURNING id
+                """
+            )
+            before = await conn.fetchrow(
+                """
+                SELECT m.updated_at, ms.relevance_score
+                FROM memories m LEFT JOIN memory_stats ms ON ms.memory_id = m.id
+                WHERE m.id = $1
+                """,
+                mem_id,
+            )
+            assert before["relevance_score"] is None
+
+            refreshed = await conn.fetchval("SELECT refresh_relevance_scores(1000000, 60)")
+            assert refreshed >= 1
+
+            row = await conn.fetchrow(
+                """
+                SELECT m.updated_at, ms.relevance_score, ms.relevance_computed_at,
+                       calculate_relevance(COALESCE(ms.importance, m.importance), m.decay_rate, m.created_at, ms.last_accessed) AS live
+                FROM memories m JOIN memory_stats ms ON ms.memory_id = m.id
+                WHERE m.id = $1
+                """,
+                mem_id,
+            )
+            assert row["relevance_score"] == pytest.approx(row["live"])
+            assert row["relevance_score"] < 0.8
+            assert row["updated_at"] == before["updated_at"]
+            assert row["relevance_computed_at"] >= row["updated_at"]
+
+            # Fresh scores are skipped; expired ones are picked up again.
+            due = "SELECT COUNT(*) FROM memory_stats WHERE memory_id = $1 AND relevance_computed_at < CURRENT_TIMESTAMP - INTERVAL '60 minutes'"
+            await conn.execute(
+                "UPDATE memory_stats SET relevance_computed_at = relevance_computed_at - INTERVAL '2 hours' WHERE memory_id = $1",
+                mem_id,
+            )
+            assert await conn.fetchval(due, mem_id) == 1
+            await conn.fetchval("SELECT refresh_relevance_scores(1000000, 60)")
+            assert await conn.fetchval(due, mem_id) == 0
+        finally:
+            await tr.rollback()
+
+async def test_relevance_refresh_writes_narrow_stats_rows_only(db_pool):
+    """Benchmark: a full relevance refresh leaves memories untouched and writes small memory_stats rows."""
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            n = 200
+            await conn.execute(
+                """
+                INSERT INTO memories (type, content, embedding, importance)
+                SELECT 'semantic',
+                       'stats bench ' || g || ' ' || repeat('lorem ipsum ', 20),
+                       (SELECT array_agg(random()) FROM generate_series(1, embedding_dimension()))::vector,
+                       0.5
+                FROM generate_series(1, $1) g
+                """,
+                n,
+            )
+
+            stats_sql = """
+                SELECT relname, n_tup_ins, n_tup_upd
+                FROM pg_stat_xact_user_tables
+                WHERE relname IN ('memories', 'memory_stats')
+            """
+            before = {r["relname"]: r for r in await conn.fetch(stats_sql)}
+
+            start = time.time()
+            refreshed = await conn.fetchval("SELECT refresh_relevance_scores(1000000, 60)")
+            elapsed = time.time() - start
+            assert refreshed >= n
+
+            after = {r["relname"]: r for r in await conn.fetch(stats_sql)}
+            mem_updates = after["memories"]["n_tup_upd"] - before["memories"]["n_tup_upd"]
+            stats_writes = (
+                after["memory_stats"]["n_tup_ins"] + after["memory_stats"]["n_tup_upd"]
+                - before["memory_stats"]["n_tup_ins"] - before["memory_stats"]["n_tup_upd"]
+            )
+            assert mem_updates == 0
+            assert stats_writes >= n
+
+            sizes = await conn.fetchrow(
+                """
+                SELECT AVG(pg_column_size(m.*)) AS memory_row, AVG(pg_column_size(ms.*)) AS stats_row
+                FROM memories m
+                JOIN memory_stats ms ON ms.memory_id = m.id
+                WHERE m.content LIKE 'stats bench %'
+                """
+            )
+            print(
+                f"relevance refresh of {refreshed} memories in {elapsed:.3f}s: "
+                f"0 memories row versions, {stats_writes} memory_stats row versions "
+                f"({float(sizes['stats_row']):.0f} B each vs {float(sizes['memory_row']):.0f} B per memories row)"
+            )
+            assert float(sizes["stats_row"]) < float(sizes["memory_row"])
+        finally:
+            await tr.rollback()
+
+
+async def test_access_flush_dead_tuples_memory_stats_vs_memories(db_pool):
+    """Benchmark: access bookkeeping leaves dead memory_stats versions instead of wide memories versions."""
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            n, rounds = 200, 5
+            ids = await conn.fetch(
+                """
+                INSERT INTO memories (type, content, embedding, importance)
+                SELECT 'semantic',
+                       'access bench ' || g || ' ' || repeat('lorem ipsum ', 20),
+                       (SELECT array_agg(random()) FROM generate_series(1, embedding_dimension()))::vector,
+                       0.5
+                FROM generate_series(1, $1) g
+                RETURNING id
+                """,
+                n,
+            )
+            ids = [r["id"] for r in ids]
+
+            stats_sql = """
+                SELECT relname, n_tup_upd, n_tup_hot_upd
+                FROM pg_stat_xact_user_tables
+                WHERE relname IN ('memories', 'memory_stats')
+            """
+
+            async def versions(run):
+                before = {r["relname"]: r for r in await conn.fetch(stats_sql)}
+                start = time.time()
+                for _ in range(rounds):
+                    await run()
+                elapsed = time.time() - start
+                after = {r["relname"]: r for r in await conn.fetch(stats_sql)}
+                return elapsed, {
+                    rel: (
+                        after[rel]["n_tup_upd"] - before[rel]["n_tup_upd"],
+                        after[rel]["n_tup_hot_upd"] - before[rel]["n_tup_hot_upd"],
+                    )
+                    for rel in ("memories", "memory_stats")
+                }
+
+            async def flush_round():
+                await conn.fetchval("SELECT record_memory_access($1::uuid[])", ids)
+                await conn.fetchval("SELECT flush_memory_access_log()")
+
+            # The previous layout wrote one new memories row version per memory per flush.
+            async def wide_round():
+                await conn.execute("UPDATE memories SET decay_rate = decay_rate WHERE id = ANY($1::uuid[])", ids)
+
+            new_time, new = await versions(flush_round)
+            old_time, old = await versions(wide_round)
+            assert new["memories"][0] == 0
+            assert new["memory_stats"][0] >= n * rounds
+            assert old["memories"][0] == n * rounds
+
+            sizes = await conn.fetchrow(
+                """
+                SELECT AVG(pg_column_size(m.*)) AS memory_row, AVG(pg_column_size(ms.*)) AS stats_row
+                FROM memories m
+                JOIN memory_stats ms ON ms.memory_id = m.id
+                WHERE m.id = ANY($1::uuid[])
+                """,
+                ids,
+            )
+            new_dead = new["memory_stats"][0] * float(sizes["stats_row"])
+            old_dead = old["memories"][0] * float(sizes["memory_row"])
+            print(
+                f"{rounds} access flushes over {n} memories: "
+                f"memory_stats {new['memory_stats'][0]} dead versions ({new['memory_stats'][1]} HOT), ~{new_dead / 1024:.0f} KiB in {new_time:.3f}s; "
+                f"memories {old['memories'][0]} dead versions ({old['memories'][1]} HOT), ~{old_dead / 1024:.0f} KiB in {old_time:.3f}s"
+            )
+            assert new_dead < old_dead
+        finally:
+            await tr.rollback()
+
+
+async def test_recompute_neighborhood_replaces_edges(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            await conn.execute(
+                "UPDATE memories SET status = 'archived' WHERE status = 'active' AND embedding = array_fill(0, ARRAY[embedding_dimension()])::vector"
+            )
+            ids = []
+            for content in ("edge1", "edge2", "edge3"):
+                ids.append(
+                    await conn.fetchval(
+                        """
+                        INSERT INTO memories (type, content, embedding)
+                        VALUES (
+                            'semantic',
+                            $1,
+                            (ARRAY[0.654::float] || array_fill(0.0::float, ARRAY[embedding_dimension() - 1]))::vector
+                        )
+                        RETURNING id
+                        """,
+                        content,
+                    )
+                )
+            m1, m2, m3 = ids
+
+            await conn.execute("SELECT recompute_neighborhood($1::uuid, 50, 0.99)", m1)
+            edges = await conn.fetch(
+                "SELECT neighbor_id, weight FROM memory_neighbor_edges WHERE memory_id = $1",
+                m1,
+            )
+            neighbor_ids = {r["neighbor_id"] for r in edges}
+            assert {m2, m3} <= neighbor_ids
+            assert m1 not in neighbor_ids
+            assert all(r["weight"] >= 0.99 for r in edges)
+
+            # Deleting a neighbor removes its inbound edge; recompute replaces the rest.
+            await conn.execute("DELETE FROM memories WHERE id = $1", m3)
+            assert await conn.fetchval(
+                "SELECT COUNT(*) FROM memory_neighbor_edges WHERE memory_id = $1 AND neighbor_id = $2",
+                m1,
+                m3,
+            ) == 0
+
+            await conn.execute("SELECT recompute_neighborhood($1::uuid, 50, 1.01)", m1)
+            assert await conn.fetchval("SELECT COUNT(*) FROM memory_neighbor_edges WHERE memory_id = $1", m1) == 0
+            row = await conn.fetchrow("SELECT is_stale FROM memory_neighborhoods WHERE memory_id = $1", m1)
+            assert row["is_stale"] is False
         finally:
             await tr.rollback()
 
@@ -8355,6 +9519,148 @@ async def test_api_remember_batch_raw_success_creates_graph_nodes(cognitive_memo
             await conn.execute("DELETE FROM memories WHERE id = ANY($1::uuid[])", ids)
 
 
+async def test_api_bulk_import_streams_batches_through_staging(cognitive_memory_client, db_pool):
+    from cognitive_memory_api import MemoryType
+
+    test_id = get_test_identifier("api_bulk_import")
+    contents = [f"Bulk import {i} {test_id}" for i in range(5)]
+    emb = [[0.01 * (i + 1)] * EMBEDDING_DIMENSION for i in range(5)]
+
+    imported = await cognitive_memory_client.bulk_import(
+        iter(contents), iter(emb), type=MemoryType.SEMANTIC, importance=0.4, batch_size=2
+    )
+    assert imported == 5
+
+    async with db_pool.acquire() as conn:
+        try:
+            rows = await conn.fetch(
+                """
+                SELECT m.id, m.importance, m.trust_level, sm.confidence
+                FROM memories m
+                JOIN semantic_memories sm ON sm.memory_id = m.id
+                WHERE m.content LIKE $1
+                """,
+                f"Bulk import % {test_id}",
+            )
+            assert len(rows) == 5
+            assert all(abs(float(r["importance"]) - 0.4) < 1e-9 for r in rows)
+
+            staged = await conn.fetchval("SELECT COUNT(*) FROM memory_import_staging")
+            assert int(staged) == 0
+
+            await conn.execute("LOAD 'age';")
+            await conn.execute("SET search_path = ag_catalog, public;")
+            id_list = ", ".join(f"'{r['id']}'" for r in rows)
+            node_count = await conn.fetchval(
+                f"""
+                SELECT COUNT(*) FROM cypher('memory_graph', $$
+                    MATCH (n:MemoryNode)
+                    WHERE n.memory_id IN [{id_list}]
+                    RETURN n
+                $$) as (n agtype)
+                """
+            )
+            assert int(node_count) == 5
+            await conn.execute(
+                f"""
+                SELECT * FROM cypher('memory_graph', $$
+                    MATCH (n:MemoryNode)
+                    WHERE n.memory_id IN [{id_list}]
+                    DETACH DELETE n
+                $$) as (v agtype)
+                """
+            )
+        finally:
+            await conn.execute("DELETE FROM memories WHERE content LIKE $1", f"Bulk import % {test_id}")
+
+    with pytest.raises(ValueError):
+        await cognitive_memory_client.bulk_import(["x", "y"], [[0.0] * EMBEDDING_DIMENSION])
+
+
+async def test_import_staged_memories_matches_batch_trust(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("staged_trust")
+            batch_id = uuid.uuid4()
+            await conn.execute(
+                """
+                INSERT INTO memory_import_staging (batch_id, ord, type, content, embedding, importance)
+                VALUES ($1, 1, 'semantic', $2, array_fill(0.2, ARRAY[embedding_dimension()])::vector, 0.5)
+                """,
+                batch_id,
+                f"Staged trust {test_id}",
+            )
+            assert await conn.fetchval("SELECT import_staged_memories($1)", batch_id) == 1
+            staged_trust = await conn.fetchval(
+                "SELECT trust_level FROM memories WHERE content = $1", f"Staged trust {test_id}"
+            )
+
+            ids = await conn.fetchval(
+                """
+                SELECT batch_create_memories_with_vectors(
+                    'semantic'::memory_type, ARRAY[$1]::text[],
+                    ARRAY[array_fill(0.7, ARRAY[embedding_dimension()])::vector]
+                )
+                """,
+                f"Batch trust {test_id}",
+            )
+            batch_trust = await conn.fetchval("SELECT trust_level FROM memories WHERE id = $1", ids[0])
+
+            assert float(staged_trust) == pytest.approx(float(batch_trust))
+        finally:
+            await tr.rollback()
+
+
+async def test_api_numpy_embeddings_round_trip(cognitive_memory_client, db_pool):
+    import numpy as np
+    from cognitive_memory_api import MemoryType
+
+    test_id = get_test_identifier("api_numpy")
+    contents = [f"Numpy A {test_id}", f"Numpy B {test_id}"]
+    emb = np.zeros((2, EMBEDDING_DIMENSION), dtype=np.float32)
+    emb[0, 0] = 1.0
+    emb[1, 1] = 1.0
+
+    ids = await cognitive_memory_client.remember_batch_raw(contents, emb, type=MemoryType.SEMANTIC)
+    assert len(ids) == 2
+
+    try:
+        query_vec = await cognitive_memory_client.get_embedding(f"numpy query {test_id}")
+        assert isinstance(query_vec, np.ndarray)
+        assert query_vec.dtype == np.float32
+        assert query_vec.shape == (EMBEDDING_DIMENSION,)
+
+        async with db_pool.acquire() as conn:
+            last_logged = await conn.fetchval("SELECT COALESCE(MAX(id), 0) FROM recall_mode_log")
+        memories, vectors = await cognitive_memory_client.recall_with_vectors(emb[0], limit=5, mode="exact")
+        async with db_pool.acquire() as conn:
+            # Counted per caller and mode like the SQL recall entry points.
+            assert await conn.fetchval(
+                "SELECT COUNT(*) FROM recall_mode_log WHERE id > $1 AND mode = 'exact'", last_logged
+            ) == 1
+        assert isinstance(vectors, np.ndarray)
+        assert vectors.shape == (len(memories), EMBEDDING_DIMENSION)
+        by_id = {m.id: i for i, m in enumerate(memories)}
+        assert ids[0] in by_id
+        np.testing.assert_allclose(vectors[by_id[ids[0]]], emb[0])
+    finally:
+        async with db_pool.acquire() as conn:
+            await conn.execute("LOAD 'age';")
+            await conn.execute("SET search_path = ag_catalog, public;")
+            for mid in ids:
+                await conn.execute(
+                    f"""
+                    SELECT * FROM cypher('memory_graph', $$
+                        MATCH (n:MemoryNode {{memory_id: '{mid}'}})
+                        DETACH DELETE n
+                    $$) as (v agtype)
+                    """
+                )
+            await conn.execute("DELETE FROM memories WHERE id = ANY($1::uuid[])", ids)
+
+
 async def test_api_remember_batch_raw_dimension_mismatch_raises(cognitive_memory_client):
     from cognitive_memory_api import MemoryType
 
@@ -8362,6 +9668,13 @@ async def test_api_remember_batch_raw_dimension_mismatch_raises(cognitive_memory
         await cognitive_memory_client.remember_batch_raw(["x"], [[0.0]], type=MemoryType.SEMANTIC)
 
 
+async def test_api_hydrate_explain_rejects_hybrid_and_diversity(cognitive_memory_client):
+    with pytest.raises(ValueError):
+        await cognitive_memory_client.hydrate("q", explain=True, hybrid=True)
+    with pytest.raises(ValueError):
+        await cognitive_memory_client.hydrate("q", explain=True, diversity=0.5)
+
+
 async def test_api_hydrate_batch_returns_many(cognitive_memory_client):
     test_id = get_test_identifier("api_hydrate_batch")
     res = await cognitive_memory_client.hydrate_batch([f"q1 {test_id}", f"q2 {test_id}", f"q3 {test_id}"], include_goals=False)
@@ -8376,6 +9689,77 @@ async def test_api_context_manager_connect_works(ensure_embedding_service):
         assert isinstance(ctx.memories, list)
 
 
+async def test_api_embedding_batcher_coalesces_concurrent_calls():
+    from cognitive_memory_api import EmbeddingBatcher
+
+    class _Resp:
+        def __init__(self, payload):
+            self._payload = payload
+
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return self._payload
+
+    class _Client:
+        def __init__(self):
+            self.requests = []
+
+        async def post(self, url, json):
+            self.requests.append(json["inputs"])
+            return _Resp([[float(len(t)), 0.0] for t in json["inputs"]])
+
+        async def aclose(self):
+            return None
+
+    batcher = EmbeddingBatcher("http://embeddings/embed", max_batch_size=8, max_wait_ms=20)
+    fake = _Client()
+    batcher._client = fake
+
+    texts = ["a", "bb", "ccc", "a"]
+    vecs = await asyncio.gather(*[batcher.embed(t) for t in texts])
+    await batcher.close()
+
+    assert [v[0] for v in vecs] == [1.0, 2.0, 3.0, 1.0]
+    assert len(fake.requests) == 1, "Concurrent calls should share one HTTP request"
+    assert sorted(fake.requests[0]) == ["a", "bb", "ccc"], "Duplicate texts are sent once"
+
+
+async def test_api_client_embedding_falls_back_on_failure_or_wrong_dimension(db_pool, caplog):
+    from cognitive_memory_api import CognitiveMemory
+
+    class _Failing:
+        service_url = "http://embeddings/embed"
+
+        async def embed_many(self, texts):
+            raise ConnectionError("unreachable")
+
+    class _WrongDim:
+        service_url = "http://embeddings/embed"
+
+        async def embed_many(self, texts):
+            return [[0.5, 0.5] for _ in texts]
+
+    mem = CognitiveMemory(db_pool, embedder=_Failing())
+    with caplog.at_level("WARNING", logger="cognitive_memory_api"):
+        assert await mem._embed_texts(["a"]) is None
+        assert await mem._embed_texts(["b"]) is None
+    assert sum("falling back" in r.getMessage() for r in caplog.records) == 1
+
+    mem = CognitiveMemory(db_pool, embedder=_WrongDim())
+    text = f"wrong dim {get_test_identifier('embed_dim')}"
+    vectors = await mem._embed_texts([text])
+    async with db_pool.acquire() as conn:
+        # Mismatched vectors are skipped instead of failing the cache INSERT.
+        await mem._prime_embedding_cache(conn, [text], vectors)
+        cached = await conn.fetchval(
+            "SELECT COUNT(*) FROM embedding_cache WHERE content_hash = encode(sha256($1::text::bytea), 'hex')",
+            text,
+        )
+    assert cached == 0
+
+
 async def test_api_introspection_methods_return_shapes(cognitive_memory_client):
     health = await cognitive_memory_client.get_health()
     assert isinstance(health, dict)
@@ -8515,8 +9899,8 @@ async def test_worker_run_maintenance_cleans_items(db_pool):
         )
         await conn.execute(
             """
-            INSERT INTO memory_neighborhoods (memory_id, neighbors, is_stale)
-            VALUES ($1, '{}'::jsonb, TRUE)
+            INSERT INTO memory_neighborhoods (memory_id, is_stale)
+            VALUES ($1, TRUE)
             ON CONFLICT (memory_id) DO UPDATE SET is_stale = TRUE
             """,
             m1,
@@ -8532,6 +9916,63 @@ async def test_worker_run_maintenance_cleans_items(db_pool):
         assert stale is False
 
 
+async def test_worker_neighborhood_drain_recomputes_stale_rows(db_pool):
+    from worker import MaintenanceWorker
+
+    worker = MaintenanceWorker()
+    worker.pool = db_pool
+
+    test_id = get_test_identifier("nb_drain")
+    async with db_pool.acquire() as conn:
+        await conn.execute("UPDATE memory_neighborhoods SET is_stale = FALSE")
+        ids = [
+            r["id"]
+            for r in await conn.fetch(
+                """
+                INSERT INTO memories (type, content, embedding)
+                SELECT 'semantic', $1 || ' ' || g,
+                       (ARRAY[0.5::float, g::float] || array_fill(0.0::float, ARRAY[embedding_dimension() - 2]))::vector
+                FROM generate_series(1, 5) g
+                RETURNING id
+                """,
+                test_id,
+            )
+        ]
+        await conn.execute(
+            "UPDATE memory_neighborhoods SET is_stale = TRUE WHERE memory_id = ANY($1::uuid[])", ids
+        )
+    try:
+        # Start from one-row batches so the drain needs several committed calls.
+        async with db_pool.acquire() as conn:
+            prev_batch = await conn.fetchval(
+                "SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size'"
+            )
+            await conn.execute("UPDATE maintenance_config SET value = 1 WHERE key = 'neighborhood_batch_size'")
+        try:
+            drained = await worker.recompute_stale_neighborhoods()
+        finally:
+            async with db_pool.acquire() as conn:
+                await conn.execute(
+                    "UPDATE maintenance_config SET value = $1 WHERE key = 'neighborhood_batch_size'",
+                    prev_batch,
+                )
+        assert drained == 5
+
+        # No claim outlives the drain: another session sees every row refreshed and can lock them.
+        async with db_pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SET LOCAL lock_timeout = '1s'")
+                rows = await conn.fetch(
+                    "SELECT is_stale FROM memory_neighborhoods WHERE memory_id = ANY($1::uuid[]) FOR UPDATE NOWAIT",
+                    ids,
+                )
+            assert len(rows) == 5
+            assert all(r["is_stale"] is False for r in rows)
+    finally:
+        async with db_pool.acquire() as conn:
+            await conn.execute("DELETE FROM memories WHERE id = ANY($1::uuid[])", ids)
+
+
 async def test_worker_check_and_run_heartbeat_queues_decision_call(db_pool):
     from worker import HeartbeatWorker
 
@@ -8630,6 +10071,108 @@ async def test_assign_to_episode_trigger_sequences_and_splits_on_gap(db_pool):
             await tr.rollback()
 
 
+async def test_assign_to_episode_handles_bulk_insert_and_tracks_state(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            await conn.execute("UPDATE episodes SET ended_at = COALESCE(ended_at, started_at) WHERE ended_at IS NULL")
+
+            rows = await conn.fetch(
+                """
+                INSERT INTO memories (type, content, embedding, created_at)
+                SELECT 'semantic', v.content, array_fill(0.0::float, ARRAY[embedding_dimension()])::vector, v.created_at
+                FROM (VALUES
+                    ('bulk3', NOW() - INTERVAL '1 hour'),
+                    ('bulk1', NOW() - INTERVAL '2 hours'),
+                    ('bulk2', NOW() - INTERVAL '1 hour 50 minutes'),
+                    ('bulk4', NOW() - INTERVAL '55 minutes')
+                ) AS v(content, created_at)
+                RETURNING id, content
+                """
+            )
+            ids = {r["content"]: r["id"] for r in rows}
+            links = {
+                content: await conn.fetchrow(
+                    "SELECT episode_id, sequence_order FROM episode_memories WHERE memory_id = $1",
+                    memory_id,
+                )
+                for content, memory_id in ids.items()
+            }
+
+            assert links["bulk1"]["episode_id"] == links["bulk2"]["episode_id"]
+            assert [int(links[c]["sequence_order"]) for c in ("bulk1", "bulk2")] == [1, 2]
+            assert links["bulk3"]["episode_id"] != links["bulk2"]["episode_id"]
+            assert links["bulk3"]["episode_id"] == links["bulk4"]["episode_id"]
+            assert [int(links[c]["sequence_order"]) for c in ("bulk3", "bulk4")] == [1, 2]
+
+            first_closed = await conn.fetchval(
+                "SELECT ended_at IS NOT NULL FROM episodes WHERE id = $1",
+                links["bulk1"]["episode_id"],
+            )
+            assert first_closed is True
+
+            state = await conn.fetchrow("SELECT current_episode_id FROM episode_state WHERE id = 1")
+            assert state["current_episode_id"] == links["bulk4"]["episode_id"]
+
+            # A follow-up single-row insert continues the tracked episode without rescanning it.
+            m5 = await conn.fetchval(
+                """
+                INSERT INTO memories (type, content, embedding, created_at)
+                VALUES ('semantic', 'bulk5', array_fill(0.0::float, ARRAY[embedding_dimension()])::vector, NOW() - INTERVAL '50 minutes')
+                RETURNING id
+                """
+            )
+            r5 = await conn.fetchrow("SELECT episode_id, sequence_order FROM episode_memories WHERE memory_id = $1", m5)
+            assert r5["episode_id"] == links["bulk4"]["episode_id"]
+            assert int(r5["sequence_order"]) == 3
+
+            neighborhoods = await conn.fetchval(
+                "SELECT COUNT(*) FROM memory_neighborhoods WHERE memory_id = ANY($1::uuid[])",
+                list(ids.values()),
+            )
+            assert int(neighborhoods) == 4
+        finally:
+            await tr.rollback()
+
+
+async def test_assign_to_episode_does_not_serialize_writers_in_open_episode(db_pool):
+    async with db_pool.acquire() as setup, db_pool.acquire() as conn1, db_pool.acquire() as conn2:
+        await setup.execute("UPDATE episodes SET ended_at = COALESCE(ended_at, started_at) WHERE ended_at IS NULL")
+        first_id = await setup.fetchval(
+            """
+            INSERT INTO memories (type, content, embedding)
+            VALUES ('semantic', 'episode writer 0', array_fill(0.0::float, ARRAY[embedding_dimension()])::vector)
+            RETURNING id
+            """
+        )
+        episode_id = await setup.fetchval("SELECT episode_id FROM episode_memories WHERE memory_id = $1", first_id)
+        tr1 = conn1.transaction()
+        tr2 = conn2.transaction()
+        await tr1.start()
+        await tr2.start()
+        try:
+            insert = """
+                INSERT INTO memories (type, content, embedding)
+                VALUES ('semantic', $1, array_fill(0.0::float, ARRAY[embedding_dimension()])::vector)
+                RETURNING id
+            """
+            m1 = await conn1.fetchval(insert, "episode writer 1")
+            # conn1 has not committed; conn2 must not wait on it.
+            await conn2.execute("SET LOCAL lock_timeout = '2s'")
+            m2 = await conn2.fetchval(insert, "episode writer 2")
+
+            e1 = await conn1.fetchval("SELECT episode_id FROM episode_memories WHERE memory_id = $1", m1)
+            e2 = await conn2.fetchval("SELECT episode_id FROM episode_memories WHERE memory_id = $1", m2)
+            assert e1 == episode_id
+            assert e2 == episode_id
+        finally:
+            await tr2.rollback()
+            await tr1.rollback()
+            await setup.execute("DELETE FROM memories WHERE id = $1", first_id)
+            await setup.execute("DELETE FROM episodes WHERE id = $1", episode_id)
+
+
 async def test_on_external_call_complete_trigger_allows_status_transition(db_pool):
     async with db_pool.acquire() as conn:
         tr = conn.transaction()
@@ -8715,6 +10258,82 @@ async def test_discover_relationship_inserts_audit_and_graph_edge(db_pool):
             await tr.rollback()
 
 
+async def test_discover_relationships_bulk_creates_typed_edges(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            await conn.execute("SET LOCAL search_path = ag_catalog, public;")
+
+            ids = await conn.fetchval(
+                """
+                SELECT batch_create_memories_with_embeddings(
+                    'semantic'::memory_type,
+                    ARRAY['bulk graph a', 'bulk graph b', 'bulk graph c'],
+                    (
+                        SELECT jsonb_agg(to_jsonb(array_fill(0.1::float, ARRAY[embedding_dimension()])))
+                        FROM generate_series(1, 3)
+                    )
+                )
+                """
+            )
+            a, b, c = ids
+
+            # batch_create_memories_with_embeddings() creates the MemoryNodes in one UNWIND.
+            node_count = await conn.fetchval(
+                f"""
+                SELECT COUNT(*) FROM cypher('memory_graph', $$
+                    MATCH (n:MemoryNode)
+                    WHERE n.memory_id IN ['{a}', '{b}', '{c}']
+                    RETURN n
+                $$) as (n agtype)
+                """
+            )
+            assert int(node_count) == 3
+
+            merged = await conn.fetchval(
+                """
+                SELECT discover_relationships(
+                    $1::uuid[], $2::uuid[], $3::graph_edge_type[], $4::float[], 'test', NULL, $5::text[]
+                )
+                """,
+                [a, b, a],
+                [b, c, c],
+                ["ASSOCIATED", "ASSOCIATED", "CAUSES"],
+                [0.9, None, 0.4],
+                ["ctx 'quoted'", None, None],
+            )
+            assert int(merged) == 3
+
+            audit = await conn.fetch(
+                """
+                SELECT relationship_type::text AS rel, confidence
+                FROM relationship_discoveries
+                WHERE from_id = ANY($1::uuid[]) AND discovered_by = 'test'
+                ORDER BY relationship_type::text, confidence
+                """,
+                [a, b],
+            )
+            assert [(r["rel"], float(r["confidence"])) for r in audit] == [
+                ("ASSOCIATED", 0.8),
+                ("ASSOCIATED", 0.9),
+                ("CAUSES", 0.4),
+            ]
+
+            for src, dst, rel in ((a, b, "ASSOCIATED"), (b, c, "ASSOCIATED"), (a, c, "CAUSES")):
+                edge_count = await conn.fetchval(
+                    f"""
+                    SELECT COUNT(*) FROM cypher('memory_graph', $$
+                        MATCH (x:MemoryNode {{memory_id: '{src}'}})-[r:{rel}]->(y:MemoryNode {{memory_id: '{dst}'}})
+                        RETURN r
+                    $$) as (r agtype)
+                    """
+                )
+                assert int(edge_count) == 1
+        finally:
+            await tr.rollback()
+
+
 async def test_find_contradictions_returns_results(db_pool):
     async with db_pool.acquire() as conn:
         tr = conn.transaction()
@@ -8868,8 +10487,8 @@ async def test_batch_recompute_neighborhoods_marks_fresh(db_pool):
 
         await conn.execute(
             """
-            INSERT INTO memory_neighborhoods (memory_id, neighbors, is_stale)
-            VALUES ($1, '{}'::jsonb, TRUE)
+            INSERT INTO memory_neighborhoods (memory_id, is_stale)
+            VALUES ($1, TRUE)
             ON CONFLICT (memory_id) DO UPDATE SET is_stale = TRUE
             """,
             m1,
@@ -8878,11 +10497,59 @@ async def test_batch_recompute_neighborhoods_marks_fresh(db_pool):
         recomputed = await conn.fetchval("SELECT batch_recompute_neighborhoods(1)")
         assert int(recomputed) >= 1
 
-        fresh = await conn.fetchrow("SELECT is_stale, neighbors FROM memory_neighborhoods WHERE memory_id = $1", m1)
+        fresh = await conn.fetchrow("SELECT is_stale FROM memory_neighborhoods WHERE memory_id = $1", m1)
         assert fresh is not None
         assert fresh["is_stale"] is False
 
 
+async def test_recompute_neighborhoods_set_based_batch(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            ids = []
+            for i in range(3):
+                ids.append(
+                    await conn.fetchval(
+                        """
+                        INSERT INTO memories (type, content, embedding)
+                        VALUES ('semantic', $1, (ARRAY[0.0::float, 0.0, 0.8] || array_fill(0.0::float, ARRAY[embedding_dimension() - 3]))::vector)
+                        RETURNING id
+                        """,
+                        f"set nb {i}",
+                    )
+                )
+            zero_id = await conn.fetchval(
+                """
+                INSERT INTO memories (type, content, embedding)
+                VALUES ('semantic', 'set nb zero', array_fill(0.0::float, ARRAY[embedding_dimension()])::vector)
+                RETURNING id
+                """
+            )
+
+            recomputed = await conn.fetchval(
+                "SELECT recompute_neighborhoods($1::uuid[], 50, 0.99)", ids + [zero_id]
+            )
+            assert recomputed == 4
+
+            for mem_id in ids:
+                row = await conn.fetchrow("SELECT is_stale FROM memory_neighborhoods WHERE memory_id = $1", mem_id)
+                assert row["is_stale"] is False
+                edges = await conn.fetchval("SELECT COUNT(*) FROM memory_neighbor_edges WHERE memory_id = $1", mem_id)
+                assert int(edges) >= 2
+
+            # Zero-embedding memories get no edges but no longer block the stale queue.
+            zero_row = await conn.fetchrow("SELECT is_stale FROM memory_neighborhoods WHERE memory_id = $1", zero_id)
+            assert zero_row["is_stale"] is False
+            assert await conn.fetchval("SELECT COUNT(*) FROM memory_neighbor_edges WHERE memory_id = $1", zero_id) == 0
+
+            await conn.execute("UPDATE memory_neighborhoods SET is_stale = TRUE WHERE memory_id = ANY($1::uuid[])", ids)
+            # A batch claims at most p_batch_size stale rows.
+            assert await conn.fetchval("SELECT batch_recompute_neighborhoods(1)") == 1
+        finally:
+            await tr.rollback()
+
+
 async def test_reflect_action_queues_external_call(db_pool):
     async with db_pool.acquire() as conn:
         hb_id = await conn.fetchval("SELECT start_heartbeat()")
@@ -9051,6 +10718,188 @@ async def test_find_partial_activations_via_seeded_cache(db_pool):
         assert any(r["cluster_id"] == cluster_id for r in rows)
 
 
+async def test_fast_recall_explain_reports_stages_and_logs_slow_calls(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("recall_explain")
+            query_text = f"recall-explain {test_id}"
+
+            vec = [0.0] * EMBEDDING_DIMENSION
+            vec[0] = 1.0
+            vec_str = "[" + ",".join(str(x) for x in vec) + "]"
+            await conn.execute(
+                "INSERT INTO embedding_cache (content_hash, embedding) VALUES (encode(sha256($1::text::bytea), 'hex'), $2::vector) ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding",
+                query_text,
+                vec_str,
+            )
+            mem_id = await conn.fetchval(
+                "INSERT INTO memories (type, content, embedding) VALUES ('semantic', $1, $2::vector) RETURNING id",
+                f"Recall explain memory {test_id}",
+                vec_str,
+            )
+
+            raw = await conn.fetchval(
+                "SELECT fast_recall_explain($1, 5, p_log_slow_ms => 0)",
+                query_text,
+            )
+            doc = _coerce_json(raw)
+            assert any(m["memory_id"] == str(mem_id) for m in doc["memories"])
+            assert {"importance", "trust_level", "created_at"} <= set(doc["memories"][0])
+
+            trace = doc["trace"]
+            assert trace["embedding_cache_hit"] is True
+            assert trace["mode"] == "default"
+            assert trace["candidates"]["vector"] >= 1
+            assert trace["returned"] == len(doc["memories"])
+            for stage in ("embedding_ms", "seed_scan_ms", "association_ms", "temporal_ms", "scoring_ms", "total_ms"):
+                assert trace["timings"][stage] >= 0
+
+            logged = await conn.fetchval(
+                "SELECT COUNT(*) FROM recall_trace WHERE query_text = $1",
+                query_text,
+            )
+            assert logged == 1
+
+            # Same stages as the plain recall, so the same memories.
+            plain = await conn.fetch(
+                "SELECT memory_id FROM fast_recall_with_embedding($1::vector, 5)",
+                vec_str,
+            )
+            assert {m["memory_id"] for m in doc["memories"]} == {str(r["memory_id"]) for r in plain}
+
+            raw = await conn.fetchval(
+                "SELECT hydrate_context($1, 5, $2::jsonb)",
+                query_text,
+                json.dumps({"explain": True, "include_partial": False}),
+            )
+            ctx = _coerce_json(raw)
+            assert ctx["trace"]["candidates"]["vector"] >= 1
+            assert any(m["memory_id"] == str(mem_id) for m in ctx["memories"])
+        finally:
+            await tr.rollback()
+
+
+async def test_find_partial_activations_skips_clusters_with_strong_member(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("tot_index_first")
+            # Other tests leave clusters with the same centroid; widen the HNSW scan.
+            await conn.execute("SET LOCAL hnsw.ef_search = 1000")
+
+            def _vec(dim: int) -> str:
+                v = [0.0] * EMBEDDING_DIMENSION
+                v[dim] = 1.0
+                return "[" + ",".join(str(x) for x in v) + "]"
+
+            cluster_ids = {}
+            for label, member_dim in (("weak", 1), ("strong", 0)):
+                cluster_ids[label] = await conn.fetchval(
+                    "INSERT INTO memory_clusters (cluster_type, name, centroid_embedding) VALUES ('theme', $1, $2::vector) RETURNING id",
+                    f"ToT {label} {test_id}",
+                    _vec(0),
+                )
+                mem_id = await conn.fetchval(
+                    "INSERT INTO memories (type, content, embedding) VALUES ('semantic', $1, $2::vector) RETURNING id",
+                    f"ToT {label} member {test_id}",
+                    _vec(member_dim),
+                )
+                await conn.execute(
+                    "INSERT INTO memory_cluster_members (cluster_id, memory_id) VALUES ($1, $2)",
+                    cluster_ids[label],
+                    mem_id,
+                )
+
+            rows = await conn.fetch(
+                "SELECT * FROM find_partial_activations_with_embedding($1::vector, 0.7, 0.5, 1000)",
+                _vec(0),
+            )
+            by_id = {r["cluster_id"]: r for r in rows}
+            assert cluster_ids["weak"] in by_id
+            assert cluster_ids["strong"] not in by_id
+            assert by_id[cluster_ids["weak"]]["best_memory_similarity"] < 0.5
+            assert by_id[cluster_ids["weak"]]["cluster_similarity"] == pytest.approx(1.0)
+        finally:
+            await tr.rollback()
+
+
+async def test_hydrate_context_returns_only_requested_sections(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("hydrate_ctx")
+            query_text = f"hydrate-context {test_id}"
+
+            vec = [0.0] * EMBEDDING_DIMENSION
+            vec[0] = 1.0
+            vec_str = "[" + ",".join(str(x) for x in vec) + "]"
+            await conn.execute(
+                "INSERT INTO embedding_cache (content_hash, embedding) VALUES (encode(sha256($1::text::bytea), 'hex'), $2::vector) ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding",
+                query_text,
+                vec_str,
+            )
+            mem_id = await conn.fetchval(
+                "INSERT INTO memories (type, content, embedding) VALUES ('semantic', $1, $2::vector) RETURNING id",
+                f"Hydrate context memory {test_id}",
+                vec_str,
+            )
+
+            raw = await conn.fetchval(
+                "SELECT hydrate_context($1, 5, $2::jsonb)",
+                query_text,
+                json.dumps({"include_identity": False, "include_goals": True}),
+            )
+            ctx = json.loads(raw) if isinstance(raw, str) else raw
+
+            assert any(m["memory_id"] == str(mem_id) for m in ctx["memories"])
+            assert "identity" not in ctx
+            for key in ("partial_activations", "worldview", "emotional_state", "goals", "urgent_drives"):
+                assert key in ctx
+        finally:
+            await tr.rollback()
+
+
+async def test_fast_recall_many_tags_rows_by_query_index(db_pool):
+    async with db_pool.acquire() as conn:
+        tr = conn.transaction()
+        await tr.start()
+        try:
+            test_id = get_test_identifier("recall_many")
+            queries = [f"recall-many alpha {test_id}", f"recall-many beta {test_id}"]
+
+            mem_ids = []
+            for dim, query_text in enumerate(queries):
+                vec = [0.0] * EMBEDDING_DIMENSION
+                vec[dim] = 1.0
+                vec_str = "[" + ",".join(str(x) for x in vec) + "]"
+                await conn.execute(
+                    "INSERT INTO embedding_cache (content_hash, embedding) VALUES (encode(sha256($1::text::bytea), 'hex'), $2::vector) ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding",
+                    query_text,
+                    vec_str,
+                )
+                mem_ids.append(await conn.fetchval(
+                    "INSERT INTO memories (type, content, embedding) VALUES ('semantic', $1, $2::vector) RETURNING id",
+                    f"Recall many memory {dim} {test_id}",
+                    vec_str,
+                ))
+
+            rows = await conn.fetch(
+                "SELECT query_index, memory_id FROM fast_recall_many($1::text[], 1)",
+                queries + [""],
+            )
+            assert [(r["query_index"], r["memory_id"]) for r in rows] == [
+                (1, mem_ids[0]),
+                (2, mem_ids[1]),
+            ]
+            assert await conn.fetchval("SELECT COUNT(*) FROM fast_recall_many(ARRAY[]::text[])") == 0
+        finally:
+            await tr.rollback()
+
+
 # =============================================================================
 # CLI UX SMOKE TESTS (No mocks; minimal subprocess checks)
 # =============================================================================
@@ -11,6 +11,8 @@ This module contains two independent background loops:
 
 2) Maintenance worker (subconscious substrate upkeep):
    - Runs `run_subconscious_maintenance()` on its own schedule (`should_run_maintenance()`)
+   - Drains stale neighborhoods after each tick, one committed `batch_recompute_neighborhoods()` per batch
+   - Optionally runs NEIGHBORHOOD_WORKERS extra drain loops
    - Optionally bridges outbox/inbox to RabbitMQ (integration plumbing)
 
 These are intentionally separate concerns with separate triggers.
@@ -99,6 +101,9 @@ RABBITMQ_OUTBOX_QUEUE = os.getenv("RABBITMQ_OUTBOX_QUEUE", "agi.outbox")
 RABBITMQ_INBOX_QUEUE = os.getenv("RABBITMQ_INBOX_QUEUE", "agi.inbox")
 RABBITMQ_POLL_INBOX_EVERY = float(os.getenv("RABBITMQ_POLL_INBOX_EVERY", 1.0))
 
+# Extra loops that drain stale neighborhoods alongside the maintenance tick (SKIP LOCKED batches).
+NEIGHBORHOOD_WORKERS = int(os.getenv("NEIGHBORHOOD_WORKERS", 0))
+
 # System prompt for heartbeat decisions
 HEARTBEAT_SYSTEM_PROMPT = """You are the cognitive core of an autonomous AGI. Each hour, you wake for a "heartbeat" — a moment of consciousness where you observe your situation, review your goals, and decide what to do.
 
@@ -489,7 +494,7 @@ class HeartbeatWorker:
             logger.warning(f"RabbitMQ inbox poll failed: {e}")
             return 0
 
-        ingested = 0
+        contents: list[str] = []
         for m in msgs:
             payload = m.get("payload")
             content: Any = payload
@@ -501,21 +506,50 @@ class HeartbeatWorker:
                     content = parsed
             except Exception:
                 pass
+            contents.append(str(content))
 
+        if not contents:
+            return 0
+
+        # One batched embedding call for the whole poll instead of one per message.
+        try:
+            async with self.pool.acquire() as conn:
+                ids = await conn.fetchval(
+                    "SELECT add_to_working_memory_batch($1::text[], INTERVAL '1 day')",
+                    contents,
+                )
+                await conn.execute(
+                    "UPDATE heartbeat_state SET last_user_contact = CURRENT_TIMESTAMP WHERE id = 1"
+                )
+            return len(ids or [])
+        except Exception as e:
+            logger.warning(
+                f"Batched inbox ingestion failed, retrying messages one at a time: {e}"
+            )
+
+        # The messages are already off the queue, so keep every one that can be stored.
+        ingested = 0
+        for content in contents:
             try:
                 async with self.pool.acquire() as conn:
                     await conn.fetchval(
                         "SELECT add_to_working_memory($1::text, INTERVAL '1 day')",
-                        str(content),
+                        content,
                     )
+                ingested += 1
+            except Exception as e:
+                logger.warning(
+                    f"Dropped inbox message {content[:80]!r} after ingestion failure: {e}"
+                )
+
+        if ingested:
+            try:
+                async with self.pool.acquire() as conn:
                     await conn.execute(
                         "UPDATE heartbeat_state SET last_user_contact = CURRENT_TIMESTAMP WHERE id = 1"
                     )
-                ingested += 1
             except Exception as e:
-                logger.warning(f"Failed ingesting inbox message into DB: {e}")
-                return ingested
-
+                logger.warning(f"Failed updating last_user_contact: {e}")
         return ingested
 
     async def complete_call(self, call_id: str, output: dict):
@@ -1532,7 +1566,7 @@ class MaintenanceWorker:
         self._last_rabbit_inbox_poll = 0.0
 
     async def connect(self):
-        self.pool = await asyncpg.create_pool(**DB_CONFIG, min_size=1, max_size=5)
+        self.pool = await asyncpg.create_pool(**DB_CONFIG, min_size=1, max_size=5 + NEIGHBORHOOD_WORKERS)
         logger.info(f"Connected to database at {DB_CONFIG['host']}:{DB_CONFIG['port']}")
         if RABBITMQ_ENABLED:
             await self.ensure_rabbitmq_ready()
@@ -1558,8 +1592,58 @@ class MaintenanceWorker:
     async def run_if_due(self) -> None:
         if await self.should_run():
             stats = await self.run_maintenance_tick()
+            stats["neighborhoods_drained"] = await self.recompute_stale_neighborhoods()
             logger.info(f"Subconscious maintenance: {stats}")
 
+    async def recompute_stale_neighborhoods(self) -> int:
+        """Recompute stale neighborhoods for one time budget (outside the maintenance lock).
+
+        Each batch_recompute_neighborhoods() call is its own transaction, so claimed rows are
+        locked only for one batch and the new edges are visible as soon as it returns. Later
+        batches are sized to fill the remaining budget at the observed per-memory cost.
+        """
+        async with self.pool.acquire() as conn:
+            cfg = await conn.fetchrow(
+                """
+                SELECT
+                    COALESCE((SELECT value FROM maintenance_config WHERE key = 'neighborhood_time_budget_ms'), 1000) AS budget_ms,
+                    COALESCE((SELECT value FROM maintenance_config WHERE key = 'neighborhood_batch_size')::int, 50) AS initial_batch,
+                    COALESCE((SELECT value FROM maintenance_config WHERE key = 'neighborhood_max_batch_size')::int, 5000) AS max_batch
+                """
+            )
+            budget_ms = float(cfg["budget_ms"])
+            initial_batch = max(1, int(cfg["initial_batch"]))
+            max_batch = max(initial_batch, int(cfg["max_batch"]))
+
+            batch_size = initial_batch
+            total = 0
+            started = time.monotonic()
+            while True:
+                batch_started = time.monotonic()
+                recomputed = int(await conn.fetchval("SELECT batch_recompute_neighborhoods($1)", batch_size) or 0)
+                total += recomputed
+                # A short batch means the stale set is drained (or the rest is claimed by other workers).
+                if recomputed < batch_size:
+                    break
+                elapsed_ms = (time.monotonic() - started) * 1000
+                if elapsed_ms >= budget_ms:
+                    break
+                per_memory_ms = max((time.monotonic() - batch_started) * 1000 / recomputed, 0.001)
+                batch_size = int(min(max_batch, max(initial_batch, (budget_ms - elapsed_ms) / per_memory_ms)))
+            return total
+
+    async def run_neighborhood_loop(self, index: int) -> None:
+        """Extra neighborhood worker: claims disjoint stale batches until stopped."""
+        while self.running:
+            try:
+                recomputed = await self.recompute_stale_neighborhoods()
+                if recomputed:
+                    logger.debug(f"Neighborhood worker {index}: recomputed {recomputed}")
+                    continue
+            except Exception as e:
+                logger.error(f"Neighborhood worker {index} error: {e}")
+            await asyncio.sleep(POLL_INTERVAL)
+
     # RabbitMQ (optional outbox/inbox bridge; uses management HTTP API).
     async def ensure_rabbitmq_ready(self) -> None:
         # Reuse the existing implementation on HeartbeatWorker for now.
@@ -1585,6 +1669,10 @@ class MaintenanceWorker:
         self.running = True
         logger.info("Maintenance worker starting...")
         await self.connect()
+        helpers = [
+            asyncio.create_task(self.run_neighborhood_loop(i))
+            for i in range(NEIGHBORHOOD_WORKERS)
+        ]
         try:
             while self.running:
                 try:
@@ -1596,6 +1684,9 @@ class MaintenanceWorker:
                     logger.error(f"Maintenance loop error: {e}")
                 await asyncio.sleep(POLL_INTERVAL)
         finally:
+            for task in helpers:
+                task.cancel()
+            await asyncio.gather(*helpers, return_exceptions=True)
             await self.disconnect()
 
     def stop(self):